@@ -4,24 +4,79 @@ Agents package for Recipe Creation and Evaluation System
 This package contains all agent definitions and node functions for the LangGraph workflow.
 """
 
-from .agent_definitions import RecipeCreatorAgent, RecipeEvaluatorAgent, AGENT_DEFINITIONS
+from .agent_definitions import RecipeCreatorAgent, RecipeEvaluatorAgent, NutritionGoalAgent, AGENT_DEFINITIONS
 from .recipe_creator_node import create_recipe_node
 from .recipe_evaluator_node import evaluate_recipe_node
 from .format_output_node import format_final_output_node
-from .workflow_state import WorkflowState
+from .workflow_state import MealPlanState, WorkflowState
 from .goal_eval_node import evaluate_goal_node
 from .nutrition_eval_node import analyse_nutrition_node
 from .nerby_res_node import nearby_restaurants_node
+from .pipelined_recipe_node import create_recipe_pipelined_node
+from .speculative_recipe_node import create_recipe_speculative_node
+from .nutrition_goal_node import analyse_and_evaluate_goal_node
+from .node_fusion import FUSIONS
+from .meal_plan_nodes import check_plan_node, format_meal_plan_node, parse_plan_request, plan_meal_node
+from .cuisine_keywords import extract_cuisine_keywords
+from .ingredient_catalog import CANONICAL_INGREDIENTS, match_ingredient
+from .ingredient_parser import ParsedIngredient, parse_recipe_ingredients
+from .nutrition_cache import IncrementalNutritionAnalyzer, NutritionCache
+from .recipe_patch import apply_patch, revise_recipe
+from .recipe_index import RecipeIndex, retrieve_recipe
+from .recipe_rescaler import parse_rescale_request, rescale_previous
+from .intent_router import classify_intent, route_intent_node
+from .deadlines import deadline_after, has_budget
+from .places_client import AsyncPlacesClient
+from .session_memory import ConversationSession, SessionStore, RollingSummarizer
+from .metrics import render_metrics
+from .tracing import instrument_node, upstream_call
+from .structured_logging import bind_request, configure_logging
 
 __all__ = [
     'RecipeCreatorAgent',
     'RecipeEvaluatorAgent',
+    'NutritionGoalAgent',
     'AGENT_DEFINITIONS',
     'create_recipe_node',
     'evaluate_goal_node',
     'analyse_nutrition_node',
     'nearby_restaurants_node',
+    'create_recipe_pipelined_node',
+    'create_recipe_speculative_node',
+    'analyse_and_evaluate_goal_node',
+    'FUSIONS',
+    'plan_meal_node',
+    'check_plan_node',
+    'format_meal_plan_node',
+    'parse_plan_request',
     'evaluate_recipe_node',
     'format_final_output_node',
-    'WorkflowState'
+    'extract_cuisine_keywords',
+    'CANONICAL_INGREDIENTS',
+    'match_ingredient',
+    'ParsedIngredient',
+    'parse_recipe_ingredients',
+    'IncrementalNutritionAnalyzer',
+    'NutritionCache',
+    'apply_patch',
+    'revise_recipe',
+    'RecipeIndex',
+    'retrieve_recipe',
+    'parse_rescale_request',
+    'rescale_previous',
+    'classify_intent',
+    'route_intent_node',
+    'deadline_after',
+    'has_budget',
+    'AsyncPlacesClient',
+    'ConversationSession',
+    'SessionStore',
+    'RollingSummarizer',
+    'render_metrics',
+    'instrument_node',
+    'upstream_call',
+    'bind_request',
+    'configure_logging',
+    'WorkflowState',
+    'MealPlanState'
 ]
@@ -8,10 +8,21 @@ used in our LangGraph-based recipe workflow system.
 from typing import Dict, Any
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
-from typing import List
+from pydantic import BaseModel, Field
+from typing import Iterator, List, Literal, Optional, Sequence, Tuple, Union
+import asyncio
 import os
 
 import googlemaps
+from openai import OpenAIError
+
+from .concurrency import run_coroutine_sync
+from .cuisine_keywords import format_cuisine_keywords
+from .micro_batcher import VERDICT_BATCHER, VERDICT_BATCHING
+from .places_client import PLACES_BACKEND, AsyncPlacesClient, keyword_queries, shared_places_client
+from .tracing import upstream_call
+from .upstream_limiter import INTERACTIVE, allm_call, llm_call, llm_slot
+from .verbosity import CONCISE, FULL, STANDARD, complete_text, limit_output
 
 class RecipeCreatorAgent:
     """
@@ -27,13 +38,16 @@ class RecipeCreatorAgent:
     - Provides creative variations and substitutions when appropriate
     """
 
-    def __init__(self, llm: ChatOpenAI):
+    def __init__(self, llm: ChatOpenAI, verbosity: str = FULL):
         self.llm = llm
         self.name = "Recipe Creator"
         self.role = "Creative Recipe Developer"
+        self.verbosity = verbosity
+        # Recipe generation is capped and stopped per verbosity mode; structured patches are not
+        self.recipe_llm = limit_output(llm, "recipe", verbosity)
 
-        self.prompt_template = ChatPromptTemplate.from_messages([
-            ("system", """You are a creative and experienced chef specializing in recipe development.
+        system_prompts = {
+            FULL: """You are a creative and experienced chef specializing in recipe development.
             Your role is to create detailed, practical recipes based on user requests.
             
             Guidelines:
@@ -50,15 +64,111 @@ class RecipeCreatorAgent:
             3. Instructions (numbered steps)
             4. Cooking/Prep Time
             5. Serving Size
-            6. Optional: Tips or Variations"""),
+            6. Optional: Tips or Variations""",
+            STANDARD: """You are an experienced chef writing practical recipes based on user requests.
+
+            Guidelines:
+            - Always provide a complete ingredients list with measurements
+            - Give at most 8 short cooking steps
+            - Consider dietary restrictions and preferences
+            - No introduction, tips, variations or closing remarks
+
+            Format your response as a structured recipe with:
+            1. Recipe Name
+            2. List[(ingredient, quantity (grams)) ] -  Ingredients (and quantities)
+            3. Instructions (numbered steps)
+            4. Cooking/Prep Time
+            5. Serving Size""",
+            CONCISE: """You are a chef writing recipes for a phone screen. Be brief.
+
+            Guidelines:
+            - A complete ingredients list with measurements, one ingredient per line
+            - At most 5 cooking steps of one sentence each
+            - Consider dietary restrictions and preferences
+            - Nothing else: no introduction, tips, variations or closing remarks
+
+            Format your response exactly as:
+            1. Recipe Name
+            2. Ingredients: List[(ingredient, quantity (grams))]
+            3. Instructions (numbered steps)
+            4. Cooking/Prep Time (one line)
+            5. Serving Size (one line)""",
+        }
+        self.prompt_template = ChatPromptTemplate.from_messages([
+            ("system", system_prompts[verbosity]),
+            ("system", "What you know about this user from the conversation so far:\n{context}"),
             ("human", "{user_input}")
         ])
 
-    def create_recipe(self, user_input: str) -> str:
-        """Generate a recipe based on user input."""
-        chain = self.prompt_template | self.llm
-        response = chain.invoke({"user_input": user_input})
-        return response.content
+        # Retry mode: a structured patch against the previous recipe instead of a new recipe
+        self.revision_prompt_template = ChatPromptTemplate.from_messages([
+            ("system", """You are the chef who wrote the recipe below, and it did not meet the user's goal.
+            Propose the smallest set of ingredient edits that makes it meet the goal: quantity changes,
+            substitutions, additions or removals. Refer to existing ingredients exactly as they are named
+            in the recipe, give amounts with units (for example "150 g"), and do not rewrite the recipe."""),
+            ("human", "Goal: {goal}\nUser weight: {weight}\n\nNutrient profile:\n{nutrients}\n\nRecipe:\n{recipe}")
+        ])
+
+        # Retrieval mode: a structured patch fitting a corpus recipe to the request
+        self.adaptation_prompt_template = ChatPromptTemplate.from_messages([
+            ("system", """You are a chef adapting an existing recipe to a user's request.
+            Propose the smallest set of ingredient edits that makes the recipe fit the request and what you
+            know about the user: quantity changes, substitutions, additions or removals. Refer to existing
+            ingredients exactly as they are named in the recipe, give amounts with units (for example
+            "150 g"), and do not rewrite the recipe. Return no edits if it already fits."""),
+            ("system", "What you know about this user from the conversation so far:\n{context}"),
+            ("human", "Request: {user_input}\n\nRecipe:\n{recipe}")
+        ])
+
+    def create_recipe(self, user_input: str, context: str = "") -> str:
+        """Generate a recipe based on user input and the conversation context."""
+        chain = self.prompt_template | self.recipe_llm
+        with llm_call(self.llm, "create_recipe", INTERACTIVE):
+            response = chain.invoke({"user_input": user_input, "context": context or "Nothing yet."})
+        return complete_text(response, "recipe")
+
+    async def acreate_recipe(self, user_input: str, context: str = "") -> str:
+        """Async version of `create_recipe` (cancelling the task aborts the request)."""
+        chain = self.prompt_template | self.recipe_llm
+        async with allm_call(self.llm, "create_recipe", INTERACTIVE):
+            response = await chain.ainvoke({"user_input": user_input, "context": context or "Nothing yet."})
+        return complete_text(response, "recipe")
+
+    def stream_recipe(self, user_input: str, context: str = "") -> Iterator[str]:
+        """Generate the same recipe as `create_recipe`, yielding text chunks as they arrive."""
+        chain = self.prompt_template | self.recipe_llm
+        # The caller times the stream as an upstream call; the slot is held until it ends
+        with llm_slot(self.llm, "stream_recipe", INTERACTIVE):
+            for chunk in chain.stream({"user_input": user_input, "context": context or "Nothing yet."}):
+                yield chunk.content
+
+    def revise_recipe(self, recipe: str, goal: str, weight: str, nutrient_profile: str) -> "RecipePatch":
+        """Return ingredient edits that make `recipe` meet the goal (applied by `recipe_patch`)."""
+        chain = self.revision_prompt_template | self.llm.with_structured_output(RecipePatch)
+        with llm_call(self.llm, "revise_recipe", INTERACTIVE):
+            return chain.invoke({"recipe": recipe, "goal": goal, "weight": weight, "nutrients": nutrient_profile})
+
+    def adapt_recipe(self, recipe: str, user_input: str, context: str = "") -> "RecipePatch":
+        """Return ingredient edits that fit a corpus `recipe` to the request (applied by `recipe_patch`)."""
+        chain = self.adaptation_prompt_template | self.llm.with_structured_output(RecipePatch)
+        with llm_call(self.llm, "adapt_recipe", INTERACTIVE):
+            return chain.invoke({"recipe": recipe, "user_input": user_input, "context": context or "Nothing yet."})
+
+
+class IngredientEdit(BaseModel):
+    """One edit to a recipe's ingredient list."""
+    action: Literal["change", "replace", "add", "remove"] = Field(
+        description="change: new amount; replace: swap for new_ingredient; add: new ingredient; remove: drop it"
+    )
+    ingredient: str = Field(description="Ingredient as named in the recipe (the new ingredient for 'add')")
+    new_ingredient: Optional[str] = Field(None, description="Substitute ingredient, for 'replace'")
+    quantity: Optional[str] = Field(None, description="Amount with unit, e.g. '150 g', for change/replace/add")
+
+
+class RecipePatch(BaseModel):
+    """Structured output of RecipeCreatorAgent.revise_recipe and adapt_recipe."""
+    edits: List[IngredientEdit]
+    note: str = Field(description="One sentence on what the edits change and why")
 
 
 class EvaluateNutritionalContent:
@@ -71,6 +181,14 @@ class EvaluateNutritionalContent:
     Given a goal (e.g., *weight loss*, *muscle gain*) and a nutrient breakdown string,
     ask an LLM to judge whether the recipe advances that goal. The agent returns a
     single token: **YES** if compliant, **NO** otherwise.
+
+    Verdicts requested concurrently (by other workflow runs or speculative
+    candidates) are micro-batched into one multi-item call, see `micro_batcher`.
+    A batch deliberately mixes items from different users and sessions: each
+    item is judged on its own and only its YES/NO goes back to its caller, so
+    nothing of one user's profile reaches another's response. If the batched
+    call fails (rate limit, timeout, API error or an unparseable answer), every
+    item gets a call of its own, and only items whose own call fails raise.
     """
 
   
@@ -96,17 +214,73 @@ class EvaluateNutritionalContent:
             ),
         ])
 
+        # Batch mode: several independent (goal, profile, weight) items judged in one call
+        self.batch_prompt_template = ChatPromptTemplate.from_messages([
+            ("system", """You are a nutrition coach. For each numbered item, evaluate if its nutrient profile
+            aligns with its dietary goal given the user's weight. Judge every item on its own and return
+            one verdict per item number."""),
+            ("human", "{items}")
+        ])
 
-    def evaluate(self, goal: str, nutrient_profile: str, weight: str) -> str:
-        """Return 'YES' if profile supports goal, else 'NO'."""
-        print(f"goal{goal}")
-        
 
+    def evaluate(self, goal: str, nutrient_profile: str, weight: str) -> str:
+        """Return 'YES' if profile supports goal, else 'NO' (batched with concurrent verdicts)."""
+        if not VERDICT_BATCHING:
+            return self._evaluate_one(goal, nutrient_profile, weight)
+        key = (getattr(self.llm, "model_name", None), getattr(self.llm, "temperature", None))
+        return VERDICT_BATCHER.submit(key, (goal, nutrient_profile, weight), self.evaluate_batch)
+
+    def evaluate_batch(self, items: Sequence[Tuple[str, str, str]]) -> List[Union[str, BaseException]]:
+        """Return the verdict of each (goal, nutrient profile, weight) item (or its error), from one call."""
+        if len(items) == 1:
+            return [self._evaluate_one(*items[0])]
+        numbered = "\n\n".join(
+            f"Item {index}:\nGoal: {goal}\nUser weight: {weight}\nNutrient Profile:\n{nutrients}"
+            for index, (goal, nutrients, weight) in enumerate(items, 1)
+        )
+        chain = self.batch_prompt_template | self.llm.with_structured_output(GoalVerdicts)
+        try:
+            with llm_call(self.llm, "evaluate_goal_batch"):
+                result = chain.invoke({"items": numbered})
+            verdicts = {verdict.item: "YES" if verdict.meets_goal else "NO" for verdict in result.verdicts}
+        except (ValueError, OpenAIError):
+            # Unparseable or failed batch call: every item falls back to its own call
+            verdicts = {}
+        # Items the model skipped get calls of their own, sent concurrently; an
+        # item whose own call fails gets its exception (see MicroBatcher.submit)
+        missing = [index for index in range(1, len(items) + 1) if index not in verdicts]
+        if missing:
+            answers = run_coroutine_sync(self._aevaluate_each([items[index - 1] for index in missing]))
+            verdicts.update(zip(missing, answers))
+        return [verdicts[index] for index in range(1, len(items) + 1)]
+
+    def _evaluate_one(self, goal: str, nutrient_profile: str, weight: str) -> str:
+        """Return the verdict for one profile, from its own call."""
         chain = self.prompt_template | self.llm
-        response = chain.invoke({"goal": goal, "nutrients": nutrient_profile, "weight": weight})
+        with llm_call(self.llm, "evaluate_goal"):
+            response = chain.invoke({"goal": goal, "nutrients": nutrient_profile, "weight": weight})
         verdict = response.content.strip().upper()
         # force normalization
         return "YES" if verdict.startswith("Y") else "NO"
+
+    async def aevaluate(self, goal: str, nutrient_profile: str, weight: str) -> str:
+        """Async version of `evaluate`."""
+        if VERDICT_BATCHING:
+            # Waiting for the batch blocks, so it happens off the event loop
+            return await asyncio.to_thread(self.evaluate, goal, nutrient_profile, weight)
+        return await self._aevaluate_one(goal, nutrient_profile, weight)
+
+    async def _aevaluate_each(self, items: Sequence[Tuple[str, str, str]]) -> List[Union[str, BaseException]]:
+        """Return the verdict of each item (or its error), from concurrent calls of their own."""
+        return await asyncio.gather(*(self._aevaluate_one(*item) for item in items), return_exceptions=True)
+
+    async def _aevaluate_one(self, goal: str, nutrient_profile: str, weight: str) -> str:
+        """Async version of `_evaluate_one`."""
+        chain = self.prompt_template | self.llm
+        async with allm_call(self.llm, "evaluate_goal"):
+            response = await chain.ainvoke({"goal": goal, "nutrients": nutrient_profile, "weight": weight})
+        verdict = response.content.strip().upper()
+        return "YES" if verdict.startswith("Y") else "NO"
      
 class RecipeEvaluatorAgent:
     """
@@ -123,13 +297,14 @@ class RecipeEvaluatorAgent:
     - Provides constructive feedback and alternative approaches
     """
 
-    def __init__(self, llm: ChatOpenAI):
-        self.llm = llm
+    def __init__(self, llm: ChatOpenAI, verbosity: str = FULL):
+        self.llm = limit_output(llm, "evaluation", verbosity)
         self.name = "Recipe Evaluator"
         self.role = "Recipe Quality Assurance Specialist"
+        self.verbosity = verbosity
 
-        self.prompt_template = ChatPromptTemplate.from_messages([
-            ("system", """You are an expert culinary reviewer and food safety specialist.
+        system_prompts = {
+            FULL: """You are an expert culinary reviewer and food safety specialist.
             Your role is to evaluate recipes for logic, safety, and quality.
             
             Evaluation Criteria:
@@ -147,15 +322,33 @@ class RecipeEvaluatorAgent:
             3. Areas for improvement
             4. Safety considerations (if any)
             5. Suggested modifications
-            6. Final recommendation"""),
+            6. Final recommendation""",
+            STANDARD: """You are an expert culinary reviewer and food safety specialist.
+            Evaluate the recipe for the user's fitness goal, cooking logic and food safety.
+            Use one or two short bullet points per section and no more than 150 words.
+
+            Provide your evaluation in this format:
+            1. Overall Assessment (Good/Needs Improvement/Problematic), mentioning the fitness goal
+            2. Strengths of the recipe
+            3. Suggested modifications
+            4. Safety considerations (only if there are any)""",
+            CONCISE: """You are an expert culinary reviewer and food safety specialist.
+            Judge the recipe for the user's fitness goal in at most 60 words:
+            one line "Verdict: Good/Needs Improvement/Problematic - <reason>", then at most
+            three one-line bullet points with the most important changes, a food safety
+            issue first if there is one. Nothing else.""",
+        }
+        self.prompt_template = ChatPromptTemplate.from_messages([
+            ("system", system_prompts[verbosity]),
             ("human", "Please evaluate this recipe:\n\n{recipe} given the Nutritional profile:\n\n{nutritional_profile} and the fitness goal:\n\n{goal}")
         ])
 
     def evaluate_recipe(self, recipe: str, nutritional_profile: str, goal: str) -> str:
         """Evaluate a recipe and provide feedback."""
         chain = self.prompt_template | self.llm
-        response = chain.invoke({"recipe": recipe, "goal": goal, "nutritional_profile": nutritional_profile})
-        return response.content
+        with llm_call(self.llm, "evaluate_recipe"):
+            response = chain.invoke({"recipe": recipe, "goal": goal, "nutritional_profile": nutritional_profile})
+        return complete_text(response, "evaluation")
     
 
 class NutritionalAnalysisAgent:
@@ -191,12 +384,149 @@ class NutritionalAnalysisAgent:
             ("human", "{user_input}")
         ])
 
+        # Per-ingredient variant used by the nutrition cache (see nutrition_cache)
+        self.ingredient_prompt_template = ChatPromptTemplate.from_messages([
+            ("system", """You are a nutritionist. For each numbered ingredient and amount, estimate the
+            nutrients contained in exactly that amount: calories (kcal), and protein, carbs, fat, sugar
+            and fiber in grams. Answer for every ingredient, using its number as the index."""),
+            ("human", "{ingredients}")
+        ])
+
+        # Follow-up questions about the previous recipe (see intent_router)
+        self.question_prompt_template = ChatPromptTemplate.from_messages([
+            ("system", """You are a nutritionist answering a follow-up question about a recipe the user
+            was just given. Base your answer on the recipe and its nutritional breakdown, answer in two
+            or three sentences, and give amounts per serving when the serving size is known.
+
+            Recipe:
+            {recipe}
+
+            Nutritional breakdown:
+            {nutrient_profile}"""),
+            ("human", "{question}")
+        ])
+
     def analyse_nutrients(self, recipe: str) -> str:
         """Generate a recipe based on user input."""
         chain = self.prompt_template | self.llm
-        response = chain.invoke({"user_input": recipe})
+        with llm_call(self.llm, "analyse_nutrients"):
+            response = chain.invoke({"user_input": recipe})
         return response.content
-    
+
+    async def aanalyse_nutrients(self, recipe: str) -> str:
+        """Async version of `analyse_nutrients`."""
+        chain = self.prompt_template | self.llm
+        async with allm_call(self.llm, "analyse_nutrients"):
+            response = await chain.ainvoke({"user_input": recipe})
+        return response.content
+
+    def answer_question(self, recipe: str, nutrient_profile: str, question: str) -> str:
+        """Answer a nutrition question about an already analysed recipe."""
+        chain = self.question_prompt_template | self.llm
+        with llm_call(self.llm, "answer_question"):
+            response = chain.invoke({"recipe": recipe, "nutrient_profile": nutrient_profile, "question": question})
+        return response.content
+
+    def analyse_ingredients(self, ingredients: List[str]) -> Dict[int, "IngredientNutrients"]:
+        """Return structured nutrients for each "<amount> <ingredient>" line, keyed by its index."""
+        chain = self.ingredient_prompt_template | self.llm.with_structured_output(IngredientBreakdown)
+        with llm_call(self.llm, "analyse_ingredients"):
+            result = chain.invoke({"ingredients": _numbered(ingredients)})
+        return {item.index: item for item in result.ingredients}
+
+    async def aanalyse_ingredients(self, ingredients: List[str]) -> Dict[int, "IngredientNutrients"]:
+        """Async version of `analyse_ingredients`."""
+        chain = self.ingredient_prompt_template | self.llm.with_structured_output(IngredientBreakdown)
+        async with allm_call(self.llm, "analyse_ingredients"):
+            result = await chain.ainvoke({"ingredients": _numbered(ingredients)})
+        return {item.index: item for item in result.ingredients}
+
+
+def _numbered(lines: List[str]) -> str:
+    """Number `lines` from 0 for prompts that answer by index."""
+    return "\n".join(f"{index}. {line}" for index, line in enumerate(lines))
+
+
+class IngredientNutrients(BaseModel):
+    """Nutrients of one ingredient amount, as returned by NutritionalAnalysisAgent.analyse_ingredients."""
+    index: int = Field(description="Number of the ingredient in the request")
+    calories: float = Field(description="Energy in kcal")
+    protein_g: float = Field(description="Protein in grams")
+    carbs_g: float = Field(description="Carbohydrates in grams")
+    fat_g: float = Field(description="Fat in grams")
+    sugar_g: float = Field(description="Sugars in grams")
+    fiber_g: float = Field(description="Fiber in grams")
+
+
+class IngredientBreakdown(BaseModel):
+    """Structured output of NutritionalAnalysisAgent.analyse_ingredients."""
+    ingredients: List[IngredientNutrients]
+
+
+class GoalVerdict(BaseModel):
+    """One item's verdict in EvaluateNutritionalContent.evaluate_batch."""
+    item: int = Field(description="Item number, as given in the request")
+    meets_goal: bool = Field(description="True if the item's nutrient profile supports its goal")
+
+
+class GoalVerdicts(BaseModel):
+    """Structured output of EvaluateNutritionalContent.evaluate_batch."""
+    verdicts: List[GoalVerdict]
+
+
+class NutritionVerdict(BaseModel):
+    """Structured output of the NutritionGoalAgent."""
+    nutrient_profile: str = Field(
+        description="Per-ingredient breakdown of proteins, fats, carbs, vitamins and sugars "
+                    "(in grams), followed by the overall totals for the recipe"
+    )
+    meets_goal: bool = Field(
+        description="True if the nutrient profile supports the user's goal given their weight"
+    )
+
+
+class NutritionGoalAgent:
+    """
+    Fused Nutrient Analysis and Goal Evaluator agent.
+
+    Role: Nutrition Analyst and Dietary Goal Compliance Checker
+    Purpose: Produce the nutrient profile and the goal verdict in one structured call
+
+    Capabilities:
+    - Breaks down nutrients per ingredient, as NutritionalAnalysisAgent does
+    - Judges the profile against the goal and weight, as EvaluateNutritionalContent does
+    - Saves the second round-trip of the two-step analyse -> evaluate chain
+    """
+
+    def __init__(self, llm: ChatOpenAI):
+        self.llm = llm.with_structured_output(NutritionVerdict)
+        self.name = "Nutrition & Goal Evaluator"
+        self.role = "Analyse nutritional content and check it against the user's goal"
+
+        self.prompt_template = ChatPromptTemplate.from_messages([
+            ("system", """You are a nutrition coach and recipe analyst.
+            First create a detailed nutritional breakdown of the recipe based on its ingredients and their amounts:
+            include proteins, fats, carbs, vitamins and sugar amounts (in grams) for each ingredient, taking the
+            ingredient quantity into account, and mention any missing nutrients.
+            Then decide whether that nutrient profile supports the user's dietary goal given their weight."""),
+            ("human", "Goal: {goal}\nUser weight: {weight}\n\nRecipe:\n{recipe}")
+        ])
+
+    def analyse_and_evaluate(self, recipe: str, goal: str, weight: str) -> Tuple[str, str]:
+        """Return (nutrient profile, 'YES' or 'NO') for `recipe` and the user's goal."""
+        chain = self.prompt_template | self.llm
+        with llm_call(self.llm, "analyse_and_evaluate_goal"):
+            result = chain.invoke({"recipe": recipe, "goal": goal, "weight": weight})
+        return result.nutrient_profile, "YES" if result.meets_goal else "NO"
+
+    async def aanalyse_and_evaluate(self, recipe: str, goal: str, weight: str) -> Tuple[str, str]:
+        """Async version of `analyse_and_evaluate`."""
+        chain = self.prompt_template | self.llm
+        async with allm_call(self.llm, "analyse_and_evaluate_goal"):
+            result = await chain.ainvoke({"recipe": recipe, "goal": goal, "weight": weight})
+        return result.nutrient_profile, "YES" if result.meets_goal else "NO"
+
+
 class NearbyRestaurantsAgent:
     """Recommend nearby restaurants offering cuisine similar to the given recipe.
 
@@ -208,8 +538,9 @@ class NearbyRestaurantsAgent:
     the recipe’s primary cuisine or keyword terms.
 
     ### Capabilities
-    * Extract key cuisine or dish keywords from the recipe using an LLM chain
+    * Extract key cuisine or dish keywords from the recipe with a local lexicon matcher
     * Query Google Places `textsearch` or `nearbysearch` endpoints
+    * Run one query per keyword concurrently and merge the results (async backend)
     * Return a curated list of restaurants (name, address, rating, price level)
     * Gracefully handle cases where no results are found
     """
@@ -218,6 +549,9 @@ class NearbyRestaurantsAgent:
         self,
         llm: ChatOpenAI,
         api_key: str | None = None,
+        backend: str | None = None,
+        places_client: AsyncPlacesClient | None = None,
+        timeout: float | None = None,
     ):
         # Allow API key via arg or env var
         api_key = api_key or os.getenv("GOOGLE_MAPS_API_KEY")
@@ -225,24 +559,28 @@ class NearbyRestaurantsAgent:
             raise ValueError("Google Maps API key required for NearbyRestaurantsAgent")
 
         self.llm = llm
-        self.gmaps = googlemaps.Client(key=api_key)
+        self.backend = backend or PLACES_BACKEND
+        # Longest a whole lookup may take (None: the clients' own timeouts)
+        self.timeout = timeout
+        if self.backend == "sync":
+            self.gmaps = googlemaps.Client(key=api_key, timeout=timeout)
+        else:
+            self.places_client = places_client or shared_places_client(api_key)
         self.name = "Nearby Restaurants Recommender"
         self.role = "Restaurant Recommendation Assistant"
 
-        # Prompt used to extract cuisine/keywords from recipe text
-        self.keyword_prompt = ChatPromptTemplate.from_messages([
-            (
-                "system",
-                (
-                    "You are a culinary classifier. Given a recipe, output a short comma‑"\
-                    "separated list of 1–3 keywords representing the primary cuisine(s) "\
-                    "or dish (e.g., 'Italian pasta', 'vegan taco'). Respond **only** "\
-                    "with the keywords."
-                ),
-            ),
-            ("human", "{recipe}"),
-        ])
+    def extract_keywords(self, recipe: str) -> str:
+        """
+        Return a comma-separated list of 1–3 cuisine/dish keywords for `recipe`.
 
+        Keywords are extracted locally (see `cuisine_keywords`) instead of with an
+        extra LLM round-trip. Falls back to the first line of the text when
+        nothing in the lexicon matches.
+        """
+        keywords = format_cuisine_keywords(recipe)
+        if keywords:
+            return keywords
+        return recipe.strip().splitlines()[0][:80] if recipe.strip() else ""
 
     def recommend_restaurants(
         self,
@@ -252,29 +590,52 @@ class NearbyRestaurantsAgent:
         max_results: int = 5,
     ) -> List[Dict[str, Any]]:
         """Return a list of restaurant dicts near `user_location` serving similar food."""
-        keywords = query
+        if self.backend != "sync":
+            return run_coroutine_sync(
+                self.arecommend_restaurants(query, user_location, radius_meters, max_results), self.timeout
+            )
+
+        keywords = self.extract_keywords(query)
 
         # Use Places Text Search for flexibility with cuisine keywords
-        places_result = self.gmaps.places(
-            query=f"{keywords} restaurant",
+        with upstream_call("google_places", "text_search"):
+            places_result = self.gmaps.places(
+                query=f"{keywords} restaurant",
+                location=user_location,
+                radius=radius_meters,
+                type="restaurant",
+            )
+
+        return [_restaurant_summary(result) for result in places_result.get("results", [])[:max_results]]
+
+    async def arecommend_restaurants(
+        self,
+        query: str,
+        user_location: str,
+        radius_meters: int = 5000,
+        max_results: int = 5,
+    ) -> List[Dict[str, Any]]:
+        """Async version of `recommend_restaurants`: one concurrent query per keyword, merged by place id."""
+        queries = keyword_queries(self.extract_keywords(query))
+        results = await self.places_client.search_many(
+            queries,
             location=user_location,
             radius=radius_meters,
-            type="restaurant",
+            place_type="restaurant",
+            max_results=max_results,
         )
+        return [_restaurant_summary(result) for result in results]
 
-        restaurants: List[Dict[str, Any]] = []
-        for result in places_result.get("results", [])[:max_results]:
-            restaurants.append(
-                {
-                    "name": result.get("name"),
-                    "address": result.get("formatted_address"),
-                    "rating": result.get("rating"),
-                    "price_level": result.get("price_level"),
-                    "user_ratings_total": result.get("user_ratings_total"),
-                }
-            )
 
-        return restaurants
+def _restaurant_summary(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Keep the fields of a Places result that are shown to the user."""
+    return {
+        "name": result.get("name"),
+        "address": result.get("formatted_address"),
+        "rating": result.get("rating"),
+        "price_level": result.get("price_level"),
+        "user_ratings_total": result.get("user_ratings_total"),
+    }
 
 
 # Agent registry for easy access
@@ -333,4 +694,13 @@ AGENT_DEFINITIONS = {
             "Return YES/NO compliance verdict",
         ],
     },
+    "nutrition_goal_evaluator": {
+        "class": NutritionGoalAgent,
+        "role": "Nutrition Analyst and Dietary Goal Compliance Checker",
+        "purpose": "Provide the nutrient breakdown and the goal verdict in one structured call",
+        "capabilities": [
+            "Break down nutrients per ingredient",
+            "Return YES/NO compliance verdict for the goal and weight",
+        ],
+    },
 }
@@ -0,0 +1,73 @@
+"""
+Async Helpers for Synchronous Workflow Nodes
+
+LangGraph runs the workflow nodes synchronously, but some nodes fan out to
+several concurrent upstream calls. This module keeps one long-lived asyncio
+event loop on a daemon thread and lets sync code run coroutines on it. A single
+loop (rather than `asyncio.run` per call) keeps async HTTP clients that are
+cached across calls bound to a loop that never closes.
+"""
+
+import asyncio
+import concurrent.futures
+import contextvars
+import threading
+from typing import Any, Awaitable, Optional
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+
+def background_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared event loop, starting its thread on first use."""
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=loop.run_forever, name="workflow-async-loop", daemon=True
+            ).start()
+            _loop = loop
+        return _loop
+
+
+def run_coroutine_sync(coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    """
+    Run `coro` on the shared event loop and wait for its result.
+
+    The coroutine runs in a copy of the caller's context, so trace spans opened
+    inside it nest under the caller's current span. If the wait times out, the
+    coroutine is cancelled.
+
+    Args:
+        coro: Coroutine to run
+        timeout: Seconds to wait before cancelling (None waits forever)
+
+    Returns:
+        Whatever the coroutine returns; its exception is re-raised here
+    """
+    loop = background_loop()
+    context = contextvars.copy_context()
+    result: concurrent.futures.Future = concurrent.futures.Future()
+    tasks = []
+
+    def start() -> None:
+        task = context.run(loop.create_task, coro)
+        tasks.append(task)
+
+        def finish(done: asyncio.Task) -> None:
+            if done.cancelled():
+                result.cancel()
+            elif done.exception() is not None:
+                result.set_exception(done.exception())
+            else:
+                result.set_result(done.result())
+
+        task.add_done_callback(finish)
+
+    loop.call_soon_threadsafe(start)
+    try:
+        return result.result(timeout)
+    except concurrent.futures.TimeoutError:
+        loop.call_soon_threadsafe(lambda: [task.cancel() for task in tasks])
+        raise
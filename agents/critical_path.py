@@ -0,0 +1,335 @@
+"""
+Critical-Path Analysis of Recorded Workflow Runs
+
+Node timings alone do not say which nodes bound end-to-end latency: a slow
+node on a parallel branch may be hidden behind a slower sibling, and the goal
+retry loop runs some nodes twice. This module reads the trace spans written
+to TRACE_FILE (see `tracing`), rebuilds the execution DAG of every run from
+the node spans' start/end times, and computes its critical path and the slack
+of every node execution:
+
+- an execution depends on the executions that ended before it started and
+  are not already followed by another of those (LangGraph runs the graph in
+  steps, so these are the nodes of the previous step); repeated executions
+  of a node are separate vertices ("create_recipe#2");
+- earliest/latest start times over that DAG give each execution's slack,
+  the time it could take longer without delaying the run; the critical path
+  is the chain of zero-slack executions;
+- the gaps the critical path spends outside any node are reported as
+  scheduling overhead.
+
+Aggregated over many runs, the report ranks nodes by the end-to-end time a
+speed-up would actually save, estimated by replaying every run's DAG with
+that node's durations scaled down (`--speedup`, 50% by default).
+
+Usage:
+    python -m agents.critical_path traces.jsonl [--json report.json] [--speedup 0.5]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+NODE_PREFIX = "node."
+ROOT_SPAN = "workflow.run"
+# Start/end comparisons tolerate this much clock jitter (seconds)
+TOLERANCE_S = 0.001
+
+
+class Execution(NamedTuple):
+    """
+    One execution of a node within a run.
+
+    Attributes:
+        key: Node name, suffixed with the iteration for repeats ("create_recipe#2")
+        node: Node name as registered in the graph
+        start: Start time relative to the run's start (seconds)
+        end: End time relative to the run's start (seconds)
+        upstream: Seconds spent in upstream calls made directly by the node
+    """
+    key: str
+    node: str
+    start: float
+    end: float
+    upstream: float
+
+    @property
+    def duration(self) -> float:
+        """Wall-clock duration (seconds)."""
+        return self.end - self.start
+
+
+class RunAnalysis(NamedTuple):
+    """
+    Critical-path analysis of one run.
+
+    Attributes:
+        trace_id: Trace id of the run
+        duration: Wall-clock duration of the run (seconds)
+        executions: Node executions, by start time
+        predecessors: Execution key -> keys of the executions it waited for
+        slack: Execution key -> slack (seconds)
+        critical_path: Keys of the critical executions, in order
+        overhead: Time on the critical path spent outside any node (seconds)
+    """
+    trace_id: str
+    duration: float
+    executions: List[Execution]
+    predecessors: Dict[str, List[str]]
+    slack: Dict[str, float]
+    critical_path: List[str]
+    overhead: float
+
+
+def load_spans(paths: Sequence[str]) -> List[Dict[str, Any]]:
+    """Read spans from JSON-lines files written by the tracing sink."""
+    spans = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            spans.extend(json.loads(line) for line in f if line.strip())
+    return spans
+
+
+def group_runs(spans: Iterable[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Group spans by trace, keeping the traces that contain node spans."""
+    traces: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for item in spans:
+        traces[item["trace_id"]].append(item)
+    return {trace_id: items for trace_id, items in traces.items()
+            if any(item["name"].startswith(NODE_PREFIX) for item in items)}
+
+
+def executions(spans: List[Dict[str, Any]]) -> List[Execution]:
+    """Return the node executions of one run, relative to its start, in start order."""
+    nodes = sorted((item for item in spans if item["name"].startswith(NODE_PREFIX)),
+                   key=lambda item: item["start"])
+    root = next((item for item in spans if item["name"] == ROOT_SPAN), None)
+    origin = root["start"] if root else nodes[0]["start"]
+
+    upstream: Dict[str, float] = defaultdict(float)
+    for item in spans:
+        if item.get("attributes", {}).get("upstream") and item.get("parent_id"):
+            upstream[item["parent_id"]] += item["end"] - item["start"]
+
+    seen: Dict[str, int] = defaultdict(int)
+    result = []
+    for item in nodes:
+        node = item["name"][len(NODE_PREFIX):]
+        seen[node] += 1
+        key = node if seen[node] == 1 else f"{node}#{seen[node]}"
+        result.append(Execution(key, node, item["start"] - origin, item["end"] - origin,
+                                upstream[item["span_id"]]))
+    return result
+
+
+def build_dag(runs: List[Execution], tolerance: float = TOLERANCE_S) -> Dict[str, List[str]]:
+    """
+    Infer which executions each execution waited for.
+
+    `u` precedes `v` when `u` ended before `v` started and no other execution
+    lies between them (started after `u` ended and ended before `v` started).
+    """
+    predecessors: Dict[str, List[str]] = {}
+    for v in runs:
+        before = [u for u in runs if u.key != v.key and u.end <= v.start + tolerance]
+        predecessors[v.key] = [
+            u.key for u in before
+            if not any(w.start + tolerance >= u.end and w.key != u.key for w in before)
+        ]
+    return predecessors
+
+
+def schedule(runs: List[Execution], predecessors: Dict[str, List[str]],
+             durations: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """
+    Earliest finish time of every execution over the DAG.
+
+    Each execution starts when its last predecessor finishes, plus the gap it
+    actually waited after that predecessor (scheduling overhead), so replaying
+    the recorded durations reproduces the recorded run.
+
+    Args:
+        runs: Executions in start order (a topological order of the DAG)
+        predecessors: Output of `build_dag`
+        durations: Durations to use instead of the recorded ones, by key
+    """
+    by_key = {execution.key: execution for execution in runs}
+    finish: Dict[str, float] = {}
+    for execution in runs:
+        preds = predecessors[execution.key]
+        if preds:
+            gate = max(preds, key=lambda key: by_key[key].end)
+            start = max(finish[key] for key in preds) + max(0.0, execution.start - by_key[gate].end)
+        else:
+            start = execution.start
+        duration = execution.duration if durations is None else durations.get(execution.key, execution.duration)
+        finish[execution.key] = start + duration
+    return finish
+
+
+def analyse_run(trace_id: str, spans: List[Dict[str, Any]], tolerance: float = TOLERANCE_S) -> RunAnalysis:
+    """Rebuild the DAG of one run and compute its slack and critical path."""
+    runs = executions(spans)
+    predecessors = build_dag(runs, tolerance)
+    root = next((item for item in spans if item["name"] == ROOT_SPAN), None)
+    duration = (root["end"] - root["start"]) if root else max(execution.end for execution in runs)
+
+    # Latest finish that does not delay the run, by a backward pass
+    successors: Dict[str, List[str]] = defaultdict(list)
+    for key, preds in predecessors.items():
+        for pred in preds:
+            successors[pred].append(key)
+    by_key = {execution.key: execution for execution in runs}
+    # Time each execution waited after its last predecessor finished
+    waited = {
+        key: max(0.0, by_key[key].start - max((by_key[pred].end for pred in preds), default=by_key[key].start))
+        for key, preds in predecessors.items()
+    }
+    makespan = max(execution.end for execution in runs)
+    latest_finish: Dict[str, float] = {}
+    for execution in reversed(runs):
+        latest_finish[execution.key] = min(
+            (latest_finish[key] - by_key[key].duration - waited[key] for key in successors[execution.key]),
+            default=makespan,
+        )
+    slack = {key: max(0.0, latest_finish[key] - by_key[key].end) for key in by_key}
+
+    # Walk back from the last execution along the predecessor that gated each start
+    path = [max(runs, key=lambda execution: execution.end).key]
+    while predecessors[path[-1]]:
+        path.append(max(predecessors[path[-1]], key=lambda key: by_key[key].end))
+    path.reverse()
+    busy = sum(by_key[key].duration for key in path)
+    return RunAnalysis(trace_id, duration, runs, predecessors, slack, path, max(0.0, duration - busy))
+
+
+def speedup_saving(run: RunAnalysis, node: str, speedup: float) -> float:
+    """Seconds the run would save if every execution of `node` took `speedup` less time."""
+    durations = {execution.key: execution.duration * (1 - speedup)
+                 for execution in run.executions if execution.node == node}
+    if not durations:
+        return 0.0
+    baseline = max(schedule(run.executions, run.predecessors).values())
+    return baseline - max(schedule(run.executions, run.predecessors, durations).values())
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    """Return the `fraction` percentile of `values`."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def build_report(spans: Iterable[Dict[str, Any]], speedup: float = 0.5,
+                 tolerance: float = TOLERANCE_S) -> Dict[str, Any]:
+    """
+    Analyse every recorded run and aggregate per node.
+
+    Args:
+        spans: Span dicts as written to TRACE_FILE (or `Span.to_dict()`)
+        speedup: Fractional speed-up used for the what-if saving estimate
+        tolerance: Clock jitter tolerated when ordering executions (seconds)
+
+    Returns:
+        JSON-serialisable report: run totals, nodes ranked by estimated saving,
+        and the most common critical paths
+    """
+    analyses = [analyse_run(trace_id, items, tolerance) for trace_id, items in group_runs(spans).items()]
+    total = sum(run.duration for run in analyses)
+    per_node: Dict[str, Dict[str, Any]] = {}
+    paths: Dict[str, int] = defaultdict(int)
+
+    for run in analyses:
+        paths[" → ".join(run.critical_path)] += 1
+        critical = set(run.critical_path)
+        for node in {execution.node for execution in run.executions}:
+            mine = [execution for execution in run.executions if execution.node == node]
+            stats = per_node.setdefault(node, {
+                "runs": 0, "executions": 0, "durations": [], "critical_runs": 0, "critical_s": 0.0,
+                "slack": [], "upstream_s": 0.0, "busy_s": 0.0, "saving_s": 0.0,
+            })
+            stats["runs"] += 1
+            stats["executions"] += len(mine)
+            stats["durations"].extend(execution.duration for execution in mine)
+            on_path = [execution for execution in mine if execution.key in critical]
+            stats["critical_runs"] += bool(on_path)
+            stats["critical_s"] += sum(execution.duration for execution in on_path)
+            stats["slack"].append(min(run.slack[execution.key] for execution in mine))
+            stats["upstream_s"] += sum(execution.upstream for execution in mine)
+            stats["busy_s"] += sum(execution.duration for execution in mine)
+            stats["saving_s"] += speedup_saving(run, node, speedup)
+
+    nodes = []
+    for node, stats in per_node.items():
+        durations = stats["durations"]
+        nodes.append({
+            "node": node,
+            "runs": stats["runs"],
+            "executions_per_run": round(stats["executions"] / stats["runs"], 2),
+            "mean_ms": round(statistics.fmean(durations) * 1000, 1),
+            "p95_ms": round(_percentile(durations, 0.95) * 1000, 1),
+            "critical_fraction": round(stats["critical_runs"] / stats["runs"], 3),
+            "critical_share": round(stats["critical_s"] / total, 3) if total else 0.0,
+            "median_slack_ms": round(statistics.median(stats["slack"]) * 1000, 1),
+            "upstream_share": round(stats["upstream_s"] / stats["busy_s"], 3) if stats["busy_s"] else 0.0,
+            "saving_ms_per_run": round(stats["saving_s"] / len(analyses) * 1000, 1),
+        })
+    nodes.sort(key=lambda item: item["saving_ms_per_run"], reverse=True)
+
+    durations = [run.duration for run in analyses]
+    return {
+        "runs": len(analyses),
+        "speedup": speedup,
+        "mean_run_ms": round(statistics.fmean(durations) * 1000, 1) if durations else 0.0,
+        "p95_run_ms": round(_percentile(durations, 0.95) * 1000, 1) if durations else 0.0,
+        "overhead_share": round(sum(run.overhead for run in analyses) / total, 3) if total else 0.0,
+        "nodes": nodes,
+        "critical_paths": [{"path": path, "runs": count}
+                           for path, count in sorted(paths.items(), key=lambda item: -item[1])[:5]],
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render `build_report` output as a text table."""
+    if not report["runs"]:
+        return "No workflow runs with node spans found."
+    lines = [
+        f"Critical-path report: {report['runs']} runs, mean {report['mean_run_ms']:.0f} ms, "
+        f"p95 {report['p95_run_ms']:.0f} ms; {report['overhead_share']:.1%} of run time outside nodes",
+        "",
+        f"{'node':32} {'mean ms':>8} {'p95 ms':>8} {'x/run':>6} {'critical':>9} {'share':>7} "
+        f"{'slack ms':>9} {'upstream':>9} {'saves ms':>9}",
+    ]
+    for item in report["nodes"]:
+        lines.append(
+            f"{item['node']:32} {item['mean_ms']:8.0f} {item['p95_ms']:8.0f} {item['executions_per_run']:6.2f} "
+            f"{item['critical_fraction']:9.0%} {item['critical_share']:7.1%} {item['median_slack_ms']:9.0f} "
+            f"{item['upstream_share']:9.0%} {item['saving_ms_per_run']:9.0f}"
+        )
+    lines += ["", f"'saves ms': mean end-to-end saving per run if the node were {report['speedup']:.0%} faster.",
+              "", "Most common critical paths:"]
+    lines += [f"  {item['runs']:4d} × {item['path']}" for item in report["critical_paths"]]
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    """Command-line entry point: print the report and optionally write it as JSON."""
+    parser = argparse.ArgumentParser(description="Critical-path report for recorded workflow runs")
+    parser.add_argument("traces", nargs="+", help="JSON-lines span files written via TRACE_FILE")
+    parser.add_argument("--json", dest="json_path", help="also write the report as JSON to this path")
+    parser.add_argument("--speedup", type=float, default=0.5, help="fractional speed-up for the saving estimate")
+    parser.add_argument("--tolerance-ms", type=float, default=TOLERANCE_S * 1000,
+                        help="clock jitter tolerated when ordering node executions")
+    args = parser.parse_args(argv)
+
+    report = build_report(load_spans(args.traces), args.speedup, args.tolerance_ms / 1000)
+    print(format_report(report))
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,309 @@
+"""
+Local Cuisine Keyword Extraction
+
+This module replaces the LLM keyword prompt of the NearbyRestaurantsAgent with a
+local extractor. Recipe or user text is matched against a cuisine and dish
+lexicon using a word-level Aho-Corasick automaton, and the strongest 1–3 matches
+are ranked into the same comma-separated keyword string the prompt would return
+(e.g. "Italian pasta, risotto").
+"""
+
+import re
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+
+# Canonical cuisine names mapped to the surface forms that signal them.
+CUISINES: Dict[str, List[str]] = {
+    "Italian": ["italian", "tuscan", "sicilian", "neapolitan"],
+    "Mexican": ["mexican", "tex mex", "oaxacan"],
+    "Chinese": ["chinese", "szechuan", "sichuan", "cantonese", "hunan"],
+    "Japanese": ["japanese"],
+    "Korean": ["korean"],
+    "Thai": ["thai"],
+    "Vietnamese": ["vietnamese"],
+    "Indian": ["indian", "punjabi", "south indian"],
+    "French": ["french", "provencal"],
+    "Spanish": ["spanish", "catalan"],
+    "Greek": ["greek"],
+    "Mediterranean": ["mediterranean"],
+    "Middle Eastern": ["middle eastern", "levantine", "lebanese", "persian", "israeli"],
+    "Turkish": ["turkish"],
+    "Moroccan": ["moroccan", "north african"],
+    "Ethiopian": ["ethiopian"],
+    "Caribbean": ["caribbean", "jamaican", "cuban"],
+    "Cajun": ["cajun", "creole", "louisiana"],
+    "American": ["american"],
+    "Peruvian": ["peruvian"],
+    "Brazilian": ["brazilian"],
+    "German": ["german", "bavarian"],
+}
+
+# Dish names mapped to the cuisine they imply (None when cuisine-neutral).
+DISHES: Dict[str, Optional[str]] = {
+    "pasta": "Italian", "spaghetti": "Italian", "penne": "Italian", "lasagna": "Italian",
+    "risotto": "Italian", "pizza": "Italian", "gnocchi": "Italian", "carbonara": "Italian",
+    "bolognese": "Italian", "pesto": "Italian", "bruschetta": "Italian", "minestrone": "Italian",
+    "taco": "Mexican", "burrito": "Mexican", "enchilada": "Mexican", "quesadilla": "Mexican",
+    "fajita": "Mexican", "tamale": "Mexican", "pozole": "Mexican", "guacamole": "Mexican",
+    "stir fry": None, "fried rice": "Chinese", "dumpling": "Chinese", "chow mein": "Chinese",
+    "lo mein": "Chinese", "kung pao": "Chinese", "mapo tofu": "Chinese", "dim sum": "Chinese",
+    "sushi": "Japanese", "ramen": "Japanese", "teriyaki": "Japanese", "tempura": "Japanese",
+    "udon": "Japanese", "miso soup": "Japanese", "katsu": "Japanese", "donburi": "Japanese",
+    "bibimbap": "Korean", "bulgogi": "Korean", "kimchi": "Korean", "japchae": "Korean",
+    "pad thai": "Thai", "green curry": "Thai", "red curry": "Thai", "tom yum": "Thai",
+    "pho": "Vietnamese", "banh mi": "Vietnamese", "spring roll": "Vietnamese",
+    "curry": None, "tikka masala": "Indian", "biryani": "Indian", "dal": "Indian",
+    "tandoori": "Indian", "korma": "Indian", "vindaloo": "Indian", "samosa": "Indian",
+    "paneer": "Indian", "chana masala": "Indian", "naan": "Indian",
+    "quiche": "French", "ratatouille": "French", "crepe": "French", "coq au vin": "French",
+    "bouillabaisse": "French", "souffle": "French",
+    "paella": "Spanish", "tapas": "Spanish", "gazpacho": "Spanish", "tortilla espanola": "Spanish",
+    "souvlaki": "Greek", "gyro": "Greek", "moussaka": "Greek", "spanakopita": "Greek",
+    "tzatziki": "Greek",
+    "falafel": "Middle Eastern", "hummus": "Middle Eastern", "shawarma": "Middle Eastern",
+    "tabbouleh": "Middle Eastern", "fattoush": "Middle Eastern", "shakshuka": "Middle Eastern",
+    "kebab": "Turkish", "kofta": "Turkish",
+    "tagine": "Moroccan", "couscous": "Moroccan",
+    "injera": "Ethiopian", "jerk chicken": "Caribbean",
+    "jambalaya": "Cajun", "gumbo": "Cajun", "etouffee": "Cajun",
+    "burger": "American", "bbq": None, "barbecue": None, "mac and cheese": "American",
+    "chili": "American", "meatloaf": "American", "pulled pork": "American",
+    "ceviche": "Peruvian", "lomo saltado": "Peruvian",
+    "feijoada": "Brazilian", "schnitzel": "German", "bratwurst": "German",
+    "salad": None, "soup": None, "stew": None, "sandwich": None, "wrap": None,
+    "noodle": None, "omelette": None, "pancake": None, "poke bowl": None,
+    "grain bowl": None, "steak": None, "seafood": None,
+}
+
+# Diet modifiers, used only to qualify a dish when no cuisine is detected.
+DIETS: List[str] = ["vegan", "vegetarian", "gluten free", "keto", "paleo", "plant based"]
+
+# Characteristic ingredients that hint at a cuisine without naming it.
+INGREDIENT_HINTS: Dict[str, str] = {
+    "oyster sauce": "Chinese", "hoisin": "Chinese", "shaoxing": "Chinese", "bok choy": "Chinese",
+    "mirin": "Japanese", "miso": "Japanese", "dashi": "Japanese", "nori": "Japanese",
+    "gochujang": "Korean", "gochugaru": "Korean",
+    "fish sauce": "Thai", "lemongrass": "Thai", "galangal": "Thai", "curry paste": "Thai",
+    "garam masala": "Indian", "ghee": "Indian", "turmeric": "Indian", "basmati": "Indian",
+    "tortilla": "Mexican", "salsa": "Mexican", "jalapeno": "Mexican", "chipotle": "Mexican",
+    "mozzarella": "Italian", "arborio": "Italian", "prosciutto": "Italian",
+    "feta": "Greek", "kalamata": "Greek",
+    "tahini": "Middle Eastern", "sumac": "Middle Eastern", "za atar": "Middle Eastern",
+    "ras el hanout": "Moroccan", "harissa": "Moroccan",
+    "saffron": "Spanish", "chorizo": "Spanish",
+    "andouille": "Cajun", "cajun seasoning": "Cajun",
+    "gruyere": "French",
+}
+
+# Ingredient names that contain a cuisine or dish word but say nothing about the
+# dish itself ("greek yogurt", "chili powder"); matching them masks the shorter term.
+IGNORED_PHRASES: List[str] = [
+    "greek yogurt", "american cheese", "italian seasoning", "italian parsley",
+    "italian sausage", "french bread", "french mustard", "spanish onion", "spanish paprika",
+    "mexican oregano", "thai basil", "thai chili", "japanese eggplant", "chinese five spice",
+    "chili powder", "chili flakes", "chili oil", "chili sauce", "chili pepper", "curry powder",
+    "sushi rice", "pizza dough", "pizza stone", "pasta water", "taco seasoning", "soup spoon",
+    "salad dressing", "salad spinner", "burger buns", "dumpling wrappers", "wrap it",
+]
+
+# Weights per category, weight of repeated mentions and the bonus for matches near
+# the start of the text (the recipe name), which decays over the first tokens.
+_CATEGORY_WEIGHT = {"cuisine": 3.0, "dish": 2.0, "generic_dish": 1.0, "diet": 1.0, "hint": 0.75}
+_REPEAT_WEIGHT = 0.1
+_IMPLIED_CUISINE_WEIGHT = 1.5
+_TITLE_BONUS = 3.0
+_TITLE_TOKENS = 16
+# Secondary keywords must be backed by more than a single ingredient hint.
+_MIN_SECONDARY_SCORE = 1.5
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+
+
+def _plural_forms(word: str) -> List[str]:
+    """Return the singular form of the last word plus its common plural."""
+    if word.endswith(("s", "x", "ch", "sh")):
+        return [word, word + "es"]
+    if word.endswith("y") and word[-2:-1] not in "aeiou":
+        return [word, word[:-1] + "ies"]
+    return [word, word + "s"]
+
+
+class AhoCorasick:
+    """
+    Word-level Aho-Corasick automaton for multi-pattern phrase matching.
+
+    Patterns are tuples of tokens, so matches always fall on word boundaries and
+    the text only has to be scanned once, token by token, regardless of how many
+    phrases are in the lexicon.
+    """
+
+    def __init__(self, patterns: Dict[Tuple[str, ...], Tuple[str, str]]):
+        # Node 0 is the root; goto/fail/output are parallel lists indexed by node.
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, Tuple[str, str]]]] = [[]]
+
+        for tokens, payload in patterns.items():
+            node = 0
+            for token in tokens:
+                nxt = self._goto[node].get(token)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][token] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append((len(tokens), payload))
+
+        # Breadth-first construction of failure links.
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def search(self, tokens: List[str]) -> List[Tuple[int, int, Tuple[str, str]]]:
+        """Return (start token index, length, payload) for every pattern occurrence."""
+        goto, fail, out = self._goto, self._fail, self._out
+        matches: List[Tuple[int, int, Tuple[str, str]]] = []
+        node = 0
+        for index, token in enumerate(tokens):
+            while node and token not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(token, 0)
+            if out[node]:
+                for length, payload in out[node]:
+                    matches.append((index - length + 1, length, payload))
+        return matches
+
+
+def _build_lexicon() -> Dict[Tuple[str, ...], Tuple[str, str]]:
+    """Expand the lexicon tables into token patterns keyed by token tuple."""
+    patterns: Dict[Tuple[str, ...], Tuple[str, str]] = {}
+
+    for cuisine, forms in CUISINES.items():
+        for form in forms:
+            patterns[tuple(form.split())] = ("cuisine", cuisine)
+
+    for dish, implied in DISHES.items():
+        category = "dish" if implied else "generic_dish"
+        *head, last = dish.split()
+        for variant in _plural_forms(last):
+            patterns[tuple(head + [variant])] = (category, dish)
+
+    for diet in DIETS:
+        patterns[tuple(diet.split())] = ("diet", diet)
+
+    for hint, cuisine in INGREDIENT_HINTS.items():
+        patterns[tuple(hint.split())] = ("hint", cuisine)
+
+    for phrase in IGNORED_PHRASES:
+        patterns[tuple(phrase.split())] = ("ignore", phrase)
+
+    return patterns
+
+
+_MATCHER = AhoCorasick(_build_lexicon())
+
+
+def _longest_matches(
+    matches: List[Tuple[int, int, Tuple[str, str]]]
+) -> List[Tuple[int, Tuple[str, str]]]:
+    """Keep leftmost-longest, non-overlapping matches ("pad thai" masks "thai")."""
+    selected: List[Tuple[int, Tuple[str, str]]] = []
+    covered_until = 0
+    for start, length, payload in sorted(matches, key=lambda m: (m[0], -m[1])):
+        if start < covered_until:
+            continue
+        covered_until = start + length
+        selected.append((start, payload))
+    return selected
+
+
+def rank_cuisine_keywords(text: str) -> List[Tuple[str, str, float]]:
+    """
+    Score every lexicon term found in `text`.
+
+    Args:
+        text: Recipe text or free-form user request
+
+    Returns:
+        List of (category, term, score) tuples sorted by descending score, where
+        category is one of "cuisine", "dish" or "diet"
+    """
+    tokens = _TOKEN_RE.findall(text.lower())
+    scores: Dict[Tuple[str, str], float] = {}
+
+    def add(key: Tuple[str, str], weight: float) -> None:
+        previous = scores.get(key)
+        scores[key] = weight if previous is None else max(previous, weight) + _REPEAT_WEIGHT
+
+    for start, (category, term) in _longest_matches(_MATCHER.search(tokens)):
+        if category == "ignore":
+            continue
+        if category == "hint":
+            add(("cuisine", term), _CATEGORY_WEIGHT["hint"])
+            continue
+
+        weight = _CATEGORY_WEIGHT[category]
+        if start < _TITLE_TOKENS:
+            weight += _TITLE_BONUS * (1 - start / _TITLE_TOKENS)
+
+        if category == "generic_dish":
+            category = "dish"
+        add((category, term), weight)
+
+        if category == "dish" and DISHES[term]:
+            add(("cuisine", DISHES[term]), _IMPLIED_CUISINE_WEIGHT)
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    return [(category, term, score) for (category, term), score in ranked]
+
+
+def extract_cuisine_keywords(text: str, max_keywords: int = 3) -> List[str]:
+    """
+    Extract the 1–3 cuisine/dish keywords that best describe `text`.
+
+    The first keyword combines the strongest cuisine with the strongest dish
+    (e.g. "Italian pasta"); when no cuisine is present a diet modifier is used
+    instead (e.g. "vegan taco"). Remaining slots are filled with the next best
+    cuisines and dishes.
+
+    Args:
+        text: Recipe text or free-form user request
+        max_keywords: Maximum number of keywords to return (1–3)
+
+    Returns:
+        List of keyword strings, empty if nothing in the lexicon matched
+    """
+    ranked = rank_cuisine_keywords(text)
+    cuisines = [(term, score) for category, term, score in ranked if category == "cuisine"]
+    dishes = [(term, score) for category, term, score in ranked if category == "dish"]
+    diets = [term for category, term, _ in ranked if category == "diet"]
+
+    qualifier = cuisines[0][0] if cuisines else (diets[0] if diets else None)
+    primary = " ".join(part for part in (qualifier, dishes[0][0] if dishes else None) if part)
+    if not primary:
+        return []
+
+    keywords = [primary]
+    for term, score in cuisines[1:] + dishes[1:]:
+        if len(keywords) >= max_keywords:
+            break
+        if score >= _MIN_SECONDARY_SCORE:
+            keywords.append(term)
+
+    return keywords[:max_keywords]
+
+
+def format_cuisine_keywords(text: str, max_keywords: int = 3) -> str:
+    """Return the keywords as the comma-separated string the LLM prompt produced."""
+    return ", ".join(extract_cuisine_keywords(text, max_keywords))
@@ -0,0 +1,104 @@
+"""
+Request Deadlines and Graceful Degradation
+
+A workflow run carries an absolute deadline in `WorkflowState["deadline"]`,
+set by `run_workflow` from the caller's budget (the /chat `X-Request-Timeout`
+header) or the REQUEST_DEADLINE_S server default. Stages that are not needed
+for an answer check the remaining budget before they start and are skipped
+when it is below what they usually take, so the user gets a fast partial
+answer instead of a late complete one:
+
+- "evaluation": the Recipe Evaluator review (DEADLINE_MIN_EVALUATION_S)
+- "restaurants": the nearby restaurant lookup (DEADLINE_MIN_RESTAURANTS_S)
+- "goal_retry": another attempt at a recipe that missed the goal
+  (DEADLINE_MIN_GOAL_RETRY_S)
+
+Skipped sections are recorded in `WorkflowState["omitted_sections"]` and
+listed by the output formatter; a goal retry counts as skipped only when
+time, not the verdict, ended the retries (see `record_goal_cutoff`). A
+deadline of 0 means no deadline.
+"""
+
+import math
+import os
+import time
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+
+from .metrics import OMITTED_SECTIONS
+from .workflow_state import WorkflowState
+
+REQUEST_DEADLINE_S = float(os.getenv("REQUEST_DEADLINE_S", "60"))
+
+# Remaining seconds each optional stage needs to be worth starting
+MIN_BUDGET_S: Dict[str, float] = {
+    "evaluation": float(os.getenv("DEADLINE_MIN_EVALUATION_S", "4")),
+    "restaurants": float(os.getenv("DEADLINE_MIN_RESTAURANTS_S", "1.5")),
+    "goal_retry": float(os.getenv("DEADLINE_MIN_GOAL_RETRY_S", "6")),
+}
+
+# How omitted sections are described to the user
+SECTION_LABELS: Dict[str, str] = {
+    "evaluation": "the professional evaluation",
+    "restaurants": "nearby restaurant suggestions",
+    "goal_retry": "another attempt at meeting your goal",
+}
+
+
+def deadline_after(seconds: Optional[float] = None) -> float:
+    """Return the absolute deadline `seconds` from now (REQUEST_DEADLINE_S by default; 0 = none)."""
+    seconds = REQUEST_DEADLINE_S if seconds is None else seconds
+    return time.time() + seconds if seconds > 0 else 0.0
+
+
+def check_request_timeout(seconds: Optional[float]) -> Optional[float]:
+    """Validate a client's X-Request-Timeout; ValueError unless it is absent or positive and finite."""
+    if seconds is not None and not (0 < seconds < math.inf):
+        raise ValueError("X-Request-Timeout must be a positive number of seconds")
+    return seconds
+
+
+def remaining(state: WorkflowState) -> float:
+    """Return the seconds left before the run's deadline (infinite without one)."""
+    deadline = state.get("deadline") or 0.0
+    return deadline - time.time() if deadline else math.inf
+
+
+def has_budget(state: WorkflowState, section: str) -> bool:
+    """True if there is enough time left to run the optional `section`."""
+    return remaining(state) >= MIN_BUDGET_S[section]
+
+
+def request_timeout(state: WorkflowState) -> Optional[float]:
+    """Upstream timeout that keeps an optional stage within the deadline (None without one)."""
+    left = remaining(state)
+    return max(left, 0.1) if left != math.inf else None
+
+
+def record_goal_cutoff(node: Callable[[WorkflowState], Dict[str, Any]]) -> Callable[[WorkflowState], Dict[str, Any]]:
+    """
+    Wrap the node that checks the goal so a retry cut for time is recorded.
+
+    When the node's verdict is NO and too little time is left for another
+    attempt, "goal_retry" is added to its omitted sections, which ends the
+    retries (see `retry_goal`) and tells the formatter why.
+    """
+    @wraps(node)
+    def wrapper(state: WorkflowState) -> Dict[str, Any]:
+        update = node(state)
+        if update.get("goal_compliance") == "NO" and not has_budget(state, "goal_retry"):
+            omitted = update.get("omitted_sections", []) + omit("goal_retry")["omitted_sections"]
+            update = {**update, "omitted_sections": omitted}
+        return update
+    return wrapper
+
+
+def retry_goal(state: WorkflowState) -> bool:
+    """Route after the goal check: True to try again, False to finish (met, or cut for time)."""
+    return state["goal_compliance"] == "NO" and "goal_retry" not in (state.get("omitted_sections") or [])
+
+
+def omit(section: str) -> Dict[str, list]:
+    """Return the state update recording that `section` was skipped for time."""
+    OMITTED_SECTIONS.labels(section=section).inc()
+    return {"omitted_sections": [section]}
@@ -2,51 +2,150 @@
 Format Output Node for LangGraph Workflow
 
 This module contains the node function for formatting the final output in the workflow.
+The layout follows the run's "output" verbosity mode (see `verbosity`).
 """
 
-from typing import Dict, Any
+import json
+import logging
+import re
+from typing import Dict, Any, List, Optional
+from .deadlines import SECTION_LABELS
+from .verbosity import CONCISE, FULL, mode_for
 from .workflow_state import WorkflowState
 
+logger = logging.getLogger(__name__)
+
+# Structured totals line of a nutrient profile (see nutrition_cache)
+_TOTAL_RE = re.compile(r"^Total:\s*(\{.*\})\s*$", re.MULTILINE)
+_LABELS = {"calories": ("calories", "kcal"), "protein_g": ("protein", "g"), "carbs_g": ("carbs", "g"),
+           "fat_g": ("fat", "g"), "sugar_g": ("sugar", "g"), "fiber_g": ("fiber", "g")}
+# The optional "Tips or Variations" section, left out of shorter answers (a rescaling note stays)
+_TIPS_RE = re.compile(
+    r"\n+[ \t]*(?:\*\*|#+ )?(?:6\.\s*)?(?:Optional:\s*)?(?:Tips|Variations)\b[^\n]*:.*?(?=\n\s*Scaled: |\Z)",
+    re.DOTALL | re.IGNORECASE,
+)
+# Restaurant suggestions shown in concise answers
+_CONCISE_RESTAURANTS = 3
+
+
+def _format_restaurants(restaurants: List[Dict[str, Any]], limit: Optional[int] = None) -> str:
+    """Render restaurant suggestions as a markdown section (empty if none)."""
+    if not restaurants:
+        return ""
+    lines = ["\n---\n", "## 🍽️ Nearby Restaurants"]
+    for place in restaurants[:limit]:
+        rating = f" – ⭐ {place['rating']}" if place.get("rating") else ""
+        lines.append(f"- **{place.get('name')}**, {place.get('address')}{rating}")
+    return "\n".join(lines) + "\n"
+
+
+def _format_evaluation(evaluation: str) -> str:
+    """Render the professional evaluation section (empty when it was skipped)."""
+    if not evaluation:
+        return ""
+    return f"""
+---
+
+## 📋 Professional Evaluation
+{evaluation}
+"""
+
+
+def _format_nutrition(nutrient_profile: str, mode: str) -> str:
+    """Render the nutrition section (empty without a profile); concise answers show only the totals."""
+    if not nutrient_profile:
+        return ""
+    if mode == CONCISE:
+        totals = _format_totals(nutrient_profile)
+        return f"\n**🥗 Nutrition:** {totals}\n" if totals else f"\n## 🥗 Nutrition\n{nutrient_profile}\n"
+    return f"""
+
+---
+
+
+##  Nutritiona Evaluation
+{nutrient_profile}
+"""
+
 
-def format_final_output_node(state: WorkflowState) -> WorkflowState:
+def _format_totals(nutrient_profile: str) -> str:
+    """Return the profile's structured totals as one line ("612 kcal · 45 g protein · ..."), or ""."""
+    match = _TOTAL_RE.search(nutrient_profile)
+    if not match:
+        return ""
+    try:
+        totals = json.loads(match.group(1))
+    except ValueError:
+        return ""
+    parts = []
+    for key, (label, unit) in _LABELS.items():
+        if isinstance(totals.get(key), (int, float)):
+            parts.append(f"{totals[key]:.0f} kcal" if unit == "kcal" else f"{totals[key]:.0f} g {label}")
+    return " · ".join(parts)
+
+
+def _format_omitted(state: WorkflowState) -> str:
+    """Note which sections were left out to answer within the deadline, and a missed goal."""
+    omitted = list(dict.fromkeys(state.get("omitted_sections") or []))
+    missed_goal = state.get("goal_compliance") == "NO"
+    if not omitted and not missed_goal:
+        return ""
+    note = ""
+    if omitted:
+        labels = ", ".join(SECTION_LABELS[section] for section in omitted)
+        note += f"\n> ⏱️ To answer quickly, this response leaves out {labels}."
+    if missed_goal:
+        note += "\n> ⚠️ This recipe may not fully meet your goal yet; ask again to refine it."
+    return note + "\n"
+
+
+def format_final_output_node(state: WorkflowState) -> Dict[str, Any]:
     """
     Node function for formatting the final output.
 
     This function handles the final step of the workflow where the recipe and
     evaluation are combined into a user-friendly formatted response. It takes
     the outputs from both agents and creates a structured markdown document.
+    Sections skipped to meet the request deadline are listed at the end, and
+    empty ones are left out. Shorter verbosity modes drop the title, footer
+    and tips; concise answers also show only the nutrition totals and the
+    first few restaurants.
 
     Args:
         state: Current workflow state containing recipe and evaluation
 
     Returns:
-        Updated state with formatted final output
+        State update with the formatted final output
     """
-    print("📝 Formatting final response...")
+    logger.info("Formatting final response", extra={"node": "format_final_output"})
 
-    final_output = f"""
+    mode = mode_for(state, "output")
+    recipe = state["recipe"] if mode == FULL else _TIPS_RE.sub("", state["recipe"]).rstrip()
+    restaurants = state.get("restaurant_suggestions") or []
+
+    if mode == FULL:
+        final_output = f"""
 # Recipe Creation & Evaluation Results
 
 ## 🍳 Generated Recipe
-{state['recipe']}
-
----
-
-## 📋 Professional Evaluation
-{state['evaluation']}
-
-
----
-
-
-##  Nutritiona Evaluation
-{state['nutrient_profile']}
-
+{recipe}
+{_format_evaluation(state['evaluation'])}{_format_nutrition(state['nutrient_profile'], mode)}{_format_restaurants(restaurants)}{_format_omitted(state)}
 *This recipe was created by our Recipe Creator agent and evaluated by our Recipe Evaluator agent for quality assurance.*
 """
+    elif mode == CONCISE:
+        final_output = (
+            f"{recipe}\n{_format_nutrition(state['nutrient_profile'], mode)}"
+            f"{_format_evaluation(state['evaluation'])}"
+            f"{_format_restaurants(restaurants, _CONCISE_RESTAURANTS)}{_format_omitted(state)}"
+        )
+    else:
+        final_output = (
+            f"## 🍳 Generated Recipe\n{recipe}\n{_format_evaluation(state['evaluation'])}"
+            f"{_format_nutrition(state['nutrient_profile'], mode)}"
+            f"{_format_restaurants(restaurants)}{_format_omitted(state)}"
+        )
 
     return {
-        **state,
         "final_output": final_output.strip(),
         "step": "completed"
     }
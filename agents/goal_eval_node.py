@@ -6,14 +6,17 @@ nutrient profile meets a user‑specified dietary goal (e.g.
 weight‑loss, muscle‑gain, maintenance).
 """
 
+import logging
 import os
 from typing import Dict, Any
 from langchain_openai import ChatOpenAI
 from .agent_definitions import EvaluateNutritionalContent
 from .workflow_state import WorkflowState
 
+logger = logging.getLogger(__name__)
 
-def evaluate_goal_node(state: WorkflowState) -> WorkflowState:
+
+def evaluate_goal_node(state: WorkflowState) -> Dict[str, Any]:
     """
     ""Assess whether the nutrient profile supports the user’s dietary goal.
 
@@ -21,7 +24,7 @@ def evaluate_goal_node(state: WorkflowState) -> WorkflowState:
         • `goal`              – str, e.g. "weight loss", "muscle gain"
         • `nutrient_profile`  – str, textual macro/micro breakdown
 
-    Returns the same state extended with:
+    Returns an update with:
         • `goal_compliance` – "YES" or "NO"
         • `step`            – "goal_evaluated"
     """
@@ -37,10 +40,9 @@ def evaluate_goal_node(state: WorkflowState) -> WorkflowState:
     goal_evaluator = EvaluateNutritionalContent(llm)
 
     # Generate the recipe
-    verdict = goal_evaluator.evaluate(state["goal"], state["nutrition_profile"], state["weight"])
-    print(f"verdict---->{verdict}")
+    verdict = goal_evaluator.evaluate(state["goal"], state["nutrient_profile"], state["weight"])
+    logger.info("Goal verdict", extra={"verdict": verdict, "goal": state["goal"]})
     return {
-        **state,
         "goal_compliance": verdict,
         "step": "goal_evaluated",
     }
@@ -0,0 +1,348 @@
+"""
+Canonical Ingredient Catalog
+
+This module holds the canonical ingredient table used to normalise ingredient
+names coming out of the RecipeCreatorAgent, together with a character-trigram
+index that maps free-form names ("low sodium soy sauce", "boneless chicken
+breasts") to canonical ingredient ids with fuzzy matching.
+"""
+
+from functools import lru_cache
+import re
+import unicodedata
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from prometheus_client.core import CounterMetricFamily
+from prometheus_client.registry import Collector
+
+from .metrics import REGISTRY
+
+
+class CanonicalIngredient(NamedTuple):
+    """
+    Catalog entry for one canonical ingredient.
+
+    Attributes:
+        id: Stable snake_case identifier
+        aliases: Names the ingredient is commonly written as (first is the display name)
+        density: Grams per millilitre, used to convert volume units
+        piece_grams: Weight of one piece / clove / stalk, used for count units
+    """
+    id: str
+    aliases: Tuple[str, ...]
+    density: float = 1.0
+    piece_grams: Optional[float] = None
+
+
+_CATALOG: List[CanonicalIngredient] = [
+    # Proteins
+    CanonicalIngredient("chicken_breast", ("chicken breast", "chicken breasts", "boneless skinless chicken breast"), 1.0, 200),
+    CanonicalIngredient("chicken_thigh", ("chicken thighs", "chicken thigh", "boneless chicken thighs"), 1.0, 110),
+    CanonicalIngredient("ground_beef", ("ground beef", "lean ground beef", "minced beef", "beef mince"), 1.0),
+    CanonicalIngredient("flank_steak", ("flank steak", "beef steak", "sirloin steak", "steak"), 1.0, 250),
+    CanonicalIngredient("ground_turkey", ("ground turkey", "lean ground turkey", "turkey mince"), 1.0),
+    CanonicalIngredient("ground_pork", ("ground pork", "lean ground pork", "pork mince"), 1.0),
+    CanonicalIngredient("lamb", ("lamb shoulder", "lamb", "lamb leg"), 1.0),
+    CanonicalIngredient("salmon", ("salmon fillet", "salmon fillets", "salmon"), 1.0, 150),
+    CanonicalIngredient("shrimp", ("shrimp", "prawns", "large shrimp"), 1.0, 12),
+    CanonicalIngredient("andouille_sausage", ("andouille sausage", "smoked sausage", "chicken sausage"), 1.0, 75),
+    CanonicalIngredient("bacon", ("bacon", "bacon strips"), 1.0, 12),
+    CanonicalIngredient("tofu", ("tofu", "extra firm tofu", "firm tofu"), 1.0),
+    CanonicalIngredient("egg", ("eggs", "egg", "large eggs"), 1.03, 50),
+    # Dairy
+    CanonicalIngredient("greek_yogurt", ("greek yogurt", "plain greek yogurt", "nonfat greek yogurt", "yogurt"), 1.05),
+    CanonicalIngredient("milk", ("milk", "skim milk", "whole milk"), 1.03),
+    CanonicalIngredient("butter", ("butter", "unsalted butter"), 0.96),
+    CanonicalIngredient("ghee", ("ghee", "clarified butter"), 0.91),
+    CanonicalIngredient("heavy_cream", ("heavy cream", "cream", "double cream"), 1.0),
+    CanonicalIngredient("parmesan", ("parmesan cheese", "parmesan", "parmigiano reggiano"), 0.42),
+    CanonicalIngredient("mozzarella", ("mozzarella", "fresh mozzarella", "mozzarella cheese"), 0.45),
+    CanonicalIngredient("cheddar", ("cheddar cheese", "cheddar", "shredded cheddar"), 0.45),
+    CanonicalIngredient("feta", ("feta cheese", "feta"), 0.6),
+    CanonicalIngredient("gruyere", ("gruyere cheese", "gruyere", "swiss cheese"), 0.45),
+    # Grains, pasta, bread
+    CanonicalIngredient("pasta", ("pasta", "penne pasta", "whole wheat penne pasta", "whole wheat pasta", "spaghetti", "penne"), 0.45),
+    CanonicalIngredient("white_rice", ("white rice", "rice", "jasmine rice", "arborio rice", "bomba rice", "sushi rice", "short grain rice", "long grain rice"), 0.85),
+    CanonicalIngredient("basmati_rice", ("basmati rice",), 0.85),
+    CanonicalIngredient("brown_rice", ("brown rice",), 0.85),
+    CanonicalIngredient("quinoa", ("quinoa",), 0.72),
+    CanonicalIngredient("rice_noodles", ("rice noodles", "rice vermicelli", "flat rice noodles"), 0.4),
+    CanonicalIngredient("ramen_noodles", ("ramen noodles", "noodles"), 0.4),
+    CanonicalIngredient("flour", ("all purpose flour", "flour", "whole wheat flour"), 0.53),
+    CanonicalIngredient("corn_tortilla", ("corn tortillas", "corn tortilla"), 1.0, 26),
+    CanonicalIngredient("flour_tortilla", ("whole wheat tortillas", "flour tortillas", "tortillas", "tortilla wraps"), 1.0, 45),
+    CanonicalIngredient("pita", ("whole wheat pita", "pita bread", "pita"), 1.0, 60),
+    CanonicalIngredient("burger_bun", ("whole wheat burger buns", "burger buns", "hamburger buns"), 1.0, 55),
+    CanonicalIngredient("pizza_dough", ("pizza dough", "whole wheat pizza dough"), 1.0),
+    CanonicalIngredient("pie_crust", ("pie crust", "pastry crust", "shortcrust pastry"), 1.0, 220),
+    CanonicalIngredient("dumpling_wrapper", ("dumpling wrappers", "wonton wrappers", "gyoza wrappers"), 1.0, 8),
+    CanonicalIngredient("bread", ("whole wheat bread", "bread", "sandwich bread", "sourdough bread"), 1.0, 30),
+    CanonicalIngredient("croutons", ("croutons", "whole wheat croutons"), 0.15),
+    # Legumes, nuts, seeds
+    CanonicalIngredient("black_beans", ("black beans", "canned black beans"), 0.75),
+    CanonicalIngredient("kidney_beans", ("kidney beans", "red kidney beans"), 0.75),
+    CanonicalIngredient("chickpeas", ("chickpeas", "canned chickpeas", "garbanzo beans"), 0.7),
+    CanonicalIngredient("red_lentils", ("red lentils",), 0.82),
+    CanonicalIngredient("green_lentils", ("green lentils", "lentils", "brown lentils"), 0.82),
+    CanonicalIngredient("edamame", ("edamame", "shelled edamame"), 0.65),
+    CanonicalIngredient("peanuts", ("peanuts", "roasted peanuts"), 0.6),
+    CanonicalIngredient("almonds", ("almonds", "slivered almonds", "sliced almonds"), 0.45),
+    CanonicalIngredient("sesame_seeds", ("sesame seeds",), 0.6),
+    CanonicalIngredient("hummus", ("hummus",), 1.0),
+    CanonicalIngredient("tahini", ("tahini", "sesame paste"), 1.0),
+    # Vegetables and fruit
+    CanonicalIngredient("garlic", ("garlic", "garlic cloves", "garlic clove"), 0.6, 5),
+    CanonicalIngredient("onion", ("onion", "yellow onion", "white onion", "onions"), 0.6, 110),
+    CanonicalIngredient("red_onion", ("red onion", "red onions"), 0.6, 110),
+    CanonicalIngredient("shallot", ("shallots", "shallot"), 0.6, 40),
+    CanonicalIngredient("green_onion", ("green onions", "scallions", "spring onions"), 0.4, 15),
+    CanonicalIngredient("ginger", ("fresh ginger", "ginger", "ginger root"), 0.6, 15),
+    CanonicalIngredient("tomato", ("tomato", "tomatoes", "roma tomatoes"), 0.6, 120),
+    CanonicalIngredient("cherry_tomato", ("cherry tomatoes", "grape tomatoes"), 0.6, 17),
+    CanonicalIngredient("crushed_tomatoes", ("canned crushed tomatoes", "crushed tomatoes", "diced tomatoes", "canned tomatoes"), 1.03),
+    CanonicalIngredient("spinach", ("spinach", "baby spinach"), 0.13),
+    CanonicalIngredient("kale", ("kale", "lacinato kale"), 0.1),
+    CanonicalIngredient("romaine_lettuce", ("romaine lettuce", "lettuce", "mixed greens"), 0.2),
+    CanonicalIngredient("broccoli", ("broccoli florets", "broccoli"), 0.4),
+    CanonicalIngredient("bell_pepper", ("bell pepper", "red bell pepper", "green bell pepper", "yellow bell pepper"), 0.5, 150),
+    CanonicalIngredient("jalapeno", ("jalapeno", "jalapenos", "jalapeno pepper"), 0.5, 14),
+    CanonicalIngredient("carrot", ("carrots", "carrot"), 0.55, 60),
+    CanonicalIngredient("celery", ("celery", "celery stalks"), 0.5, 40),
+    CanonicalIngredient("zucchini", ("zucchini", "courgette"), 0.55, 200),
+    CanonicalIngredient("cucumber", ("cucumber", "english cucumber"), 0.55, 300),
+    CanonicalIngredient("mushrooms", ("mushrooms", "cremini mushrooms", "shiitake mushrooms", "button mushrooms"), 0.3),
+    CanonicalIngredient("green_beans", ("green beans",), 0.45),
+    CanonicalIngredient("snap_peas", ("snap peas", "sugar snap peas", "snow peas"), 0.4),
+    CanonicalIngredient("corn", ("corn kernels", "corn", "sweet corn"), 0.7),
+    CanonicalIngredient("bean_sprouts", ("bean sprouts",), 0.4),
+    CanonicalIngredient("bok_choy", ("baby bok choy", "bok choy"), 0.3, 60),
+    CanonicalIngredient("napa_cabbage", ("napa cabbage", "cabbage"), 0.3),
+    CanonicalIngredient("artichoke_hearts", ("artichoke hearts",), 0.7),
+    CanonicalIngredient("bamboo_shoots", ("bamboo shoots",), 0.6),
+    CanonicalIngredient("kalamata_olives", ("kalamata olives", "olives", "black olives"), 0.6),
+    CanonicalIngredient("avocado", ("avocado", "avocados"), 0.9, 150),
+    CanonicalIngredient("potato", ("potatoes", "potato", "russet potatoes"), 0.7, 170),
+    CanonicalIngredient("sweet_potato", ("sweet potatoes", "sweet potato"), 0.7, 130),
+    CanonicalIngredient("lemon", ("lemon", "lemons"), 1.0, 85),
+    CanonicalIngredient("lime", ("lime", "limes"), 1.0, 65),
+    CanonicalIngredient("dried_apricots", ("dried apricots",), 0.55),
+    CanonicalIngredient("banana", ("banana", "bananas"), 0.6, 120),
+    # Herbs and spices
+    CanonicalIngredient("cilantro", ("fresh cilantro", "cilantro", "coriander leaves"), 0.1),
+    CanonicalIngredient("parsley", ("fresh parsley", "parsley", "flat leaf parsley"), 0.1),
+    CanonicalIngredient("basil", ("fresh basil", "basil", "basil leaves", "thai basil"), 0.1),
+    CanonicalIngredient("mint", ("fresh mint", "mint", "mint leaves"), 0.1),
+    CanonicalIngredient("thyme", ("fresh thyme", "thyme", "dried thyme"), 0.2, 1),
+    CanonicalIngredient("oregano", ("dried oregano", "oregano"), 0.2),
+    CanonicalIngredient("cumin", ("ground cumin", "cumin", "cumin seeds"), 0.43),
+    CanonicalIngredient("smoked_paprika", ("smoked paprika", "paprika"), 0.46),
+    CanonicalIngredient("turmeric", ("ground turmeric", "turmeric"), 0.5),
+    CanonicalIngredient("garam_masala", ("garam masala",), 0.45),
+    CanonicalIngredient("chili_powder", ("chili powder", "chilli powder"), 0.5),
+    CanonicalIngredient("ras_el_hanout", ("ras el hanout",), 0.45),
+    CanonicalIngredient("cajun_seasoning", ("cajun seasoning", "creole seasoning"), 0.5),
+    CanonicalIngredient("saffron", ("saffron threads", "saffron"), 0.1),
+    CanonicalIngredient("nutmeg", ("ground nutmeg", "nutmeg"), 0.45),
+    CanonicalIngredient("cinnamon", ("cinnamon stick", "cinnamon sticks", "ground cinnamon", "cinnamon"), 0.5, 3),
+    CanonicalIngredient("star_anise", ("star anise",), 0.3, 1),
+    CanonicalIngredient("salt", ("salt", "sea salt", "kosher salt"), 1.2),
+    CanonicalIngredient("black_pepper", ("black pepper", "ground black pepper", "pepper"), 0.45),
+    # Oils, sauces and condiments
+    CanonicalIngredient("olive_oil", ("olive oil", "extra virgin olive oil"), 0.92),
+    CanonicalIngredient("vegetable_oil", ("vegetable oil", "canola oil", "neutral oil"), 0.92),
+    CanonicalIngredient("sesame_oil", ("sesame oil", "toasted sesame oil"), 0.92),
+    CanonicalIngredient("soy_sauce", ("soy sauce", "low sodium soy sauce", "tamari"), 1.15),
+    CanonicalIngredient("oyster_sauce", ("oyster sauce",), 1.2),
+    CanonicalIngredient("fish_sauce", ("fish sauce",), 1.2),
+    CanonicalIngredient("mirin", ("mirin",), 1.1),
+    CanonicalIngredient("rice_vinegar", ("rice vinegar",), 1.01),
+    CanonicalIngredient("red_wine_vinegar", ("red wine vinegar",), 1.01),
+    CanonicalIngredient("lemon_juice", ("lemon juice", "fresh lemon juice"), 1.03),
+    CanonicalIngredient("lime_juice", ("lime juice", "fresh lime juice"), 1.03),
+    CanonicalIngredient("dijon_mustard", ("dijon mustard", "mustard"), 1.05),
+    CanonicalIngredient("worcestershire_sauce", ("worcestershire sauce",), 1.1),
+    CanonicalIngredient("gochujang", ("gochujang", "korean chili paste"), 1.2),
+    CanonicalIngredient("miso_paste", ("white miso paste", "miso paste", "miso"), 1.15),
+    CanonicalIngredient("curry_paste", ("green curry paste", "red curry paste", "curry paste"), 1.1),
+    CanonicalIngredient("tamarind_paste", ("tamarind paste", "tamarind"), 1.2),
+    CanonicalIngredient("salsa", ("salsa", "tomato salsa"), 1.0),
+    CanonicalIngredient("coconut_milk", ("light coconut milk", "coconut milk"), 0.98),
+    CanonicalIngredient("chicken_broth", ("chicken broth", "chicken stock", "low sodium chicken broth"), 1.0),
+    CanonicalIngredient("vegetable_broth", ("vegetable broth", "vegetable stock"), 1.0),
+    CanonicalIngredient("white_wine", ("dry white wine", "white wine"), 0.99),
+    CanonicalIngredient("cornstarch", ("cornstarch", "corn starch", "cornflour"), 0.54),
+    CanonicalIngredient("honey", ("honey",), 1.42),
+    CanonicalIngredient("maple_syrup", ("maple syrup",), 1.32),
+    CanonicalIngredient("sugar", ("sugar", "granulated sugar", "white sugar"), 0.85),
+    CanonicalIngredient("brown_sugar", ("brown sugar",), 0.9),
+    CanonicalIngredient("water", ("water",), 1.0),
+]
+
+CANONICAL_INGREDIENTS: Dict[str, CanonicalIngredient] = {entry.id: entry for entry in _CATALOG}
+
+# Descriptors that do not change which ingredient is meant.
+_DESCRIPTORS = frozenset((
+    "fresh", "freshly", "chopped", "minced", "diced", "sliced", "finely", "roughly",
+    "thinly", "peeled", "grated", "shredded", "cubed", "trimmed", "rinsed", "drained",
+    "boneless", "skinless", "organic", "large", "small", "medium", "low", "sodium",
+    "reduced", "fat", "lean", "extra", "virgin", "plain", "raw", "cooked", "uncooked",
+    "packed", "softened", "melted", "toasted", "warm", "cold", "halved", "quartered",
+    "optional", "about", "of", "and", "or", "to", "taste", "for", "serving", "garnish",
+))
+
+_NON_WORD_RE = re.compile(r"[^a-z ]+")
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase, strip punctuation and parentheticals and collapse whitespace."""
+    name = name.lower()
+    if not name.isascii():
+        name = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    if "(" in name:
+        name = re.sub(r"\([^)]*\)?", " ", name)
+    return " ".join(_NON_WORD_RE.sub(" ", name).split())
+
+
+def _strip_descriptors(name: str) -> str:
+    """Drop preparation and size descriptors from a normalised name."""
+    return " ".join(word for word in name.split() if word not in _DESCRIPTORS)
+
+
+def _singular(name: str) -> str:
+    """Crude singularisation of the last word ("tomatoes" -> "tomato")."""
+    if name.endswith("oes"):
+        return name[:-2]
+    if name.endswith("ies"):
+        return name[:-3] + "y"
+    if name.endswith("s") and not name.endswith("ss"):
+        return name[:-1]
+    return name
+
+
+def _trigrams(text: str) -> frozenset:
+    """Return the padded character trigrams of `text`."""
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def _dice(a: frozenset, b: frozenset) -> float:
+    """Dice coefficient of two trigram sets."""
+    return 2.0 * len(a & b) / (len(a) + len(b)) if a or b else 0.0
+
+
+class IngredientMatcher:
+    """
+    Map free-form ingredient names to canonical ingredient ids.
+
+    Matching is tried in order of cost: exact alias, alias after stripping
+    descriptors / singularising, then fuzzy matching over a character-trigram
+    inverted index scored with the Dice coefficient. A fuzzy candidate must
+    also contain the name's last word and the word before it, so a different
+    ingredient sharing a word ("peanut butter", "tomato paste") is not taken
+    for the catalog one. Results are memoised, so repeated names (the common
+    case across recipes) cost a dict lookup.
+    """
+
+    def __init__(
+        self,
+        catalog: Optional[List[CanonicalIngredient]] = None,
+        threshold: float = 0.55,
+        cache_size: int = 8192,
+    ):
+        catalog = catalog if catalog is not None else _CATALOG
+        self.threshold = threshold
+        self._exact: Dict[str, str] = {}
+        self._alias_ids: List[str] = []
+        self._alias_words: List[Tuple[frozenset, ...]] = []
+        self._alias_sizes: List[int] = []
+        self._index: Dict[str, List[int]] = {}
+
+        for entry in catalog:
+            for alias in entry.aliases:
+                alias = normalize_name(alias)
+                for key in (alias, _singular(alias), _strip_descriptors(alias)):
+                    self._exact.setdefault(key, entry.id)
+
+                grams = _trigrams(alias)
+                alias_index = len(self._alias_ids)
+                self._alias_ids.append(entry.id)
+                self._alias_sizes.append(len(grams))
+                self._alias_words.append(tuple(_trigrams(_singular(word)) for word in alias.split()))
+                for gram in grams:
+                    self._index.setdefault(gram, []).append(alias_index)
+
+        self.match = lru_cache(maxsize=cache_size)(self._match)
+
+    def match_alias(self, name: str) -> Optional[str]:
+        """Canonical id of `name` if it is a catalog alias (after descriptors / plurals), else None."""
+        name = normalize_name(name)
+        exact = self._exact
+        for candidate in (name, _strip_descriptors(name)):
+            if candidate in exact:
+                return exact[candidate]
+            singular = _singular(candidate)
+            if singular in exact:
+                return exact[singular]
+        return None
+
+    def _match(self, name: str) -> Optional[str]:
+        """Uncached implementation of `match`."""
+        name = normalize_name(name)
+        if not name:
+            return None
+        return self.match_alias(name) or self._fuzzy(_strip_descriptors(name) or name)
+
+    def _fuzzy(self, name: str) -> Optional[str]:
+        """Best alias by trigram Dice coefficient, or None below the threshold."""
+        grams = _trigrams(name)
+        overlaps: Dict[int, int] = {}
+        for gram in grams:
+            for alias_index in self._index.get(gram, ()):
+                overlaps[alias_index] = overlaps.get(alias_index, 0) + 1
+
+        best_id, best_score = None, 0.0
+        size = len(grams)
+        head = [_trigrams(_singular(word)) for word in name.split()[-2:]]
+        for alias_index, overlap in overlaps.items():
+            score = 2.0 * overlap / (size + self._alias_sizes[alias_index])
+            if score > best_score and score >= self.threshold and self._covers(head, alias_index):
+                best_id, best_score = self._alias_ids[alias_index], score
+        return best_id
+
+    def _covers(self, words: List[frozenset], alias_index: int) -> bool:
+        """True if every word in `words` (as trigrams) is close to a word of the alias."""
+        alias_words = self._alias_words[alias_index]
+        return all(
+            any(_dice(word, alias_word) >= self.threshold for alias_word in alias_words)
+            for word in words
+        )
+
+
+_DEFAULT_MATCHER = IngredientMatcher()
+
+
+class _MatcherCacheCollector(Collector):
+    """Report the default matcher's lru_cache hits/misses on `/metrics`, read at scrape time."""
+
+    def collect(self) -> Iterator[CounterMetricFamily]:
+        info = _DEFAULT_MATCHER.match.cache_info()
+        family = CounterMetricFamily(
+            "recipe_ingredient_match_cache_events", "Ingredient name matcher lookups by result (hit/miss).",
+            labels=["result"],
+        )
+        family.add_metric(["hit"], info.hits)
+        family.add_metric(["miss"], info.misses)
+        yield family
+
+
+REGISTRY.register(_MatcherCacheCollector())
+
+
+def default_matcher() -> IngredientMatcher:
+    """Return the process-wide matcher built over the bundled catalog."""
+    return _DEFAULT_MATCHER
+
+
+def match_ingredient(name: str) -> Optional[str]:
+    """Return the canonical ingredient id for `name`, or None if nothing is close."""
+    return _DEFAULT_MATCHER.match(name)
@@ -0,0 +1,351 @@
+"""
+Ingredient Parser for RecipeCreatorAgent Output
+
+This module extracts structured (quantity, unit, ingredient name) entries from the
+ingredients section of a recipe produced by the RecipeCreatorAgent, converts the
+quantities to grams through a unit conversion table and maps each name to a
+canonical ingredient id (see `ingredient_catalog`).
+
+Everything here is local and allocation-light so that recipes can be parsed on
+the hot path without another LLM pass.
+"""
+
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .ingredient_catalog import CANONICAL_INGREDIENTS, match_ingredient
+
+
+class ParsedIngredient(NamedTuple):
+    """
+    One ingredient line parsed out of a recipe.
+
+    Attributes:
+        quantity: Numeric amount, or None when the line has none ("salt to taste")
+        unit: Canonical unit ("g", "ml", "tbsp", "piece", ...) or "" when absent
+        name: Ingredient name as written, without amount or unit
+        canonical_id: Canonical ingredient id, or None if no catalog entry matched
+        grams: Quantity converted to grams, or None when it cannot be converted
+        raw: The original line, used to rewrite the recipe text later on
+    """
+    quantity: Optional[float]
+    unit: str
+    name: str
+    canonical_id: Optional[str]
+    grams: Optional[float]
+    raw: str
+
+
+# Unit aliases as written by the LLM -> canonical unit
+UNIT_ALIASES: Dict[str, str] = {
+    "g": "g", "gr": "g", "gram": "g", "grams": "g", "gms": "g",
+    "kg": "kg", "kilogram": "kg", "kilograms": "kg",
+    "mg": "mg", "milligram": "mg", "milligrams": "mg",
+    "oz": "oz", "ounce": "oz", "ounces": "oz",
+    "lb": "lb", "lbs": "lb", "pound": "lb", "pounds": "lb",
+    "ml": "ml", "milliliter": "ml", "milliliters": "ml", "millilitre": "ml", "millilitres": "ml",
+    "l": "l", "liter": "l", "liters": "l", "litre": "l", "litres": "l",
+    "cup": "cup", "cups": "cup",
+    "tbsp": "tbsp", "tbsps": "tbsp", "tbs": "tbsp", "tablespoon": "tbsp", "tablespoons": "tbsp",
+    "tsp": "tsp", "tsps": "tsp", "teaspoon": "tsp", "teaspoons": "tsp",
+    "pint": "pint", "pints": "pint",
+    "clove": "clove", "cloves": "clove",
+    "piece": "piece", "pieces": "piece", "pcs": "piece",
+    "large": "piece", "medium": "piece", "small": "piece",
+    "slice": "slice", "slices": "slice",
+    "stalk": "stalk", "stalks": "stalk",
+    "can": "can", "cans": "can",
+    "pinch": "pinch", "pinches": "pinch",
+    "dash": "dash", "dashes": "dash",
+    "handful": "handful", "handfuls": "handful",
+    "bunch": "bunch", "bunches": "bunch",
+    "sprig": "sprig", "sprigs": "sprig",
+}
+
+# Grams per unit for mass units
+MASS_UNITS: Dict[str, float] = {"g": 1.0, "kg": 1000.0, "mg": 0.001, "oz": 28.3495, "lb": 453.592}
+
+# Millilitres per unit for volume units (converted with the ingredient density)
+VOLUME_UNITS: Dict[str, float] = {
+    "ml": 1.0, "l": 1000.0, "cup": 240.0, "tbsp": 15.0, "tsp": 5.0,
+    "fl oz": 29.5735, "pint": 473.176,
+}
+
+# Grams per unit for informal units that do not depend on the ingredient
+FIXED_UNITS: Dict[str, float] = {
+    "pinch": 0.35, "dash": 0.6, "handful": 30.0, "can": 400.0, "bunch": 50.0, "sprig": 1.0,
+}
+
+# Count units converted with the ingredient's piece weight
+COUNT_UNITS = frozenset(("piece", "clove", "slice", "stalk"))
+
+_FRACTIONS = {"½": 0.5, "¼": 0.25, "¾": 0.75, "⅓": 1 / 3, "⅔": 2 / 3, "⅛": 0.125}
+
+_NUMBER = r"\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?(?:\s*[½¼¾⅓⅔⅛])?|[½¼¾⅓⅔⅛]"
+_AMOUNT_RE = re.compile(
+    rf"(?P<qty>{_NUMBER})(?:\s*(?:-|–|to)\s*(?P<qty2>{_NUMBER}))?\s*"
+    r"(?P<unit>fl\.?\s*oz\b|[a-zA-Z]+\b\.?)?\s*(?P<rest>.*)$"
+)
+_LEADING_AMOUNT_RE = re.compile(rf"^(?:{_NUMBER})")
+# Fast path for the dominant "- 2 tbsp olive oil, chopped" shape in a single match
+_SIMPLE_LINE_RE = re.compile(
+    rf"[\s\-*•·+>]*({_NUMBER})\s*(?:([A-Za-z]+)\.?\s+)?(?:of\s+)?([A-Za-z][^,(:*]*)"
+)
+# Fast path for the name-first shapes "(olive oil, 2 tbsp)" and "Olive oil: 2 tbsp"
+_NAME_FIRST_RE = re.compile(
+    rf"[\s\-*•·+>]*\(?\s*([A-Za-z][^:,()*]*)[:,]\s*({_NUMBER})\s*(?:([A-Za-z]+)\b\.?)?\s*\)?\s*(?:[,(].*)?$"
+)
+_PACKAGE_RE = re.compile(r"^(?:cans?|packages?|jars?|bags?|boxes|box|tins?)\b\s*", re.IGNORECASE)
+_BULLET_CHARS = "-*•·–—+> \t"
+
+_SECTION_START_RE = re.compile(
+    r"^[#*\s\d.)]*(?:[\w\[\]()' ,]{0,50}?-\s*)?\**\s*ingredients\b[^\n]{0,40}$",
+    re.IGNORECASE | re.MULTILINE,
+)
+_SECTION_END_WORDS = (
+    r"(?:\d+[.)][ \t]*)?(?:\*\*)?(?:step[- ]by[- ]step\s+)?(?:instructions|directions|method|steps|preparation|"
+    r"cooking|prep\b|serving|tips|notes|nutrition|equipment)"
+)
+# Only heading-shaped lines close the section ("## Method", "**Instructions:**",
+# "3. Instructions:"), never an ingredient such as "* Cooking spray" or "3. Cooking oil: 2 tbsp"
+_SECTION_END_RE = re.compile(
+    rf"\n[ \t]*(?:(?:#+|\*\*)[ \t]*{_SECTION_END_WORDS}[^\n\d]*|{_SECTION_END_WORDS}[^\n\d:]*:[^\n\d]*)$",
+    re.IGNORECASE | re.MULTILINE,
+)
+# Numbered list marker in front of an ingredient ("1. 200g chicken breast")
+_LIST_NUMBER_RE = re.compile(r"\s*\d+[.)]\s+(?=\S)")
+
+
+def _to_number(text: str) -> float:
+    """Convert "1 1/2", "3/4", "2.5", "1½" or "½" to a float."""
+    text = text.strip()
+    value = 0.0
+    if text[-1] in _FRACTIONS:
+        value = _FRACTIONS[text[-1]]
+        text = text[:-1].strip()
+        if not text:
+            return value
+    if " " in text:
+        whole, fraction = text.split(None, 1)
+        return value + float(whole) + _to_number(fraction)
+    if "/" in text:
+        numerator, denominator = text.split("/", 1)
+        return value + float(numerator) / float(denominator)
+    return value + float(text)
+
+
+def to_grams(quantity: Optional[float], unit: str, canonical_id: Optional[str]) -> Optional[float]:
+    """
+    Convert `quantity` of `unit` to grams.
+
+    Volume units use the ingredient density and count units its piece weight from
+    the catalog; None is returned when no sensible conversion exists.
+    """
+    if quantity is None:
+        return None
+    if unit in MASS_UNITS:
+        return quantity * MASS_UNITS[unit]
+
+    entry = CANONICAL_INGREDIENTS.get(canonical_id) if canonical_id else None
+    if unit in VOLUME_UNITS:
+        density = entry.density if entry else 1.0
+        return quantity * VOLUME_UNITS[unit] * density
+    if unit in FIXED_UNITS:
+        return quantity * FIXED_UNITS[unit]
+    if unit in COUNT_UNITS or not unit:
+        if entry and entry.piece_grams:
+            return quantity * entry.piece_grams
+    return None
+
+
+def _parse_amount(text: str) -> Optional[Tuple[float, str, str]]:
+    """Parse "2 tbsp olive oil" into (2.0, "tbsp", "olive oil"); None if no amount."""
+    match = _AMOUNT_RE.match(text)
+    if not match:
+        return None
+
+    quantity = _to_number(match.group("qty"))
+    if match.group("qty2"):
+        quantity = (quantity + _to_number(match.group("qty2"))) / 2
+
+    rest = match.group("rest")
+    unit_text = match.group("unit")
+    unit = ""
+    if unit_text:
+        key = unit_text.lower().rstrip(".").replace(" ", "")
+        if key.startswith("fl"):
+            unit = "fl oz"
+        elif key in UNIT_ALIASES:
+            unit = UNIT_ALIASES[key]
+        else:
+            # Not a unit: it is the first word of the ingredient name
+            rest = f"{unit_text} {rest}" if rest else unit_text
+
+    # Package sizes: "1 (14 oz) can diced tomatoes" -> 14 oz diced tomatoes
+    if not unit and rest.startswith("(") and ")" in rest:
+        inner, _, after = rest[1:].partition(")")
+        package = _parse_amount(inner.strip())
+        if package and (package[1] in MASS_UNITS or package[1] in VOLUME_UNITS):
+            quantity *= package[0]
+            unit = package[1]
+            rest = _PACKAGE_RE.sub("", after.strip(), count=1)
+
+    if rest[:3].lower() == "of ":
+        rest = rest[3:]
+    return quantity, unit, rest
+
+
+def _finish(quantity: Optional[float], unit: str, name: str, raw: str) -> Optional[ParsedIngredient]:
+    """Build the ParsedIngredient for an already split line."""
+    name = name.strip(" ,;:-*").split(",", 1)[0].strip()
+    if not name:
+        return None
+    canonical_id = match_ingredient(name)
+    if quantity is not None and not unit:
+        unit = "piece"
+    return ParsedIngredient(quantity, unit, name, canonical_id, to_grams(quantity, unit, canonical_id), raw)
+
+
+def parse_ingredient_line(line: str) -> Optional[ParsedIngredient]:
+    """
+    Parse a single ingredient line.
+
+    Supported shapes (with or without a leading bullet):
+        "(chicken breast, 450 grams)"    tuple style requested by the prompt
+        "400g black beans"               amount first
+        "Chicken thighs: 600 grams"      name, colon, amount
+        "Chicken breast - 200 g"         name, dash, amount
+        "Parmesan cheese (40 g)"         amount in parentheses
+        "Salt and pepper to taste"       no amount (quantity None)
+        "1. 200g chicken breast"         numbered list marker, then any of the above
+
+    Args:
+        line: One line from the ingredients section
+
+    Returns:
+        ParsedIngredient, or None for blank lines and sub-headings
+    """
+    raw = line
+    numbered = _LIST_NUMBER_RE.match(line)
+    if numbered:
+        line = line[numbered.end():]
+
+    # Fast paths: one regex match covers nearly every line the agent emits
+    simple = _SIMPLE_LINE_RE.match(line)
+    if simple:
+        qty, unit_word, name = simple.groups()
+        unit = ""
+        if unit_word:
+            unit = UNIT_ALIASES.get(unit_word.lower(), "")
+            if not unit:
+                name = f"{unit_word} {name}"
+    else:
+        simple = _NAME_FIRST_RE.match(line)
+        if simple:
+            name, qty, unit_word = simple.groups()
+            unit = UNIT_ALIASES.get(unit_word.lower(), "") if unit_word else ""
+
+    # Two-word "fl oz" is left to the general parser below
+    if simple and (unit or not unit_word or unit_word.lower() != "fl"):
+        try:
+            quantity = float(qty)
+        except ValueError:
+            quantity = _to_number(qty)
+        name = name.rstrip()
+        canonical_id = match_ingredient(name)
+        unit = unit or "piece"
+        return ParsedIngredient(
+            quantity, unit, name, canonical_id, to_grams(quantity, unit, canonical_id), raw
+        )
+
+    # General parser for everything else
+    line = line.strip().lstrip(_BULLET_CHARS).replace("**", "").strip()
+    if not line or line.endswith(":"):
+        return None
+
+    # Tuple style: "(name, amount)"
+    if line[0] == "(" and "," in line:
+        name, _, amount = line.strip("()").rpartition(",")
+        parsed = _parse_amount(amount.strip())
+        if parsed:
+            quantity, unit, rest = parsed
+            return _finish(quantity, unit, name if not rest else f"{name} {rest}", raw)
+
+    # "a pinch of salt" / "an onion"
+    if line[:2].lower() == "a " or line[:3].lower() == "an ":
+        line = "1" + line[line.index(" "):]
+
+    # Amount first
+    if _LEADING_AMOUNT_RE.match(line):
+        parsed = _parse_amount(line)
+        if parsed:
+            return _finish(parsed[0], parsed[1], parsed[2], raw)
+
+    # "Name: amount" / "Name - amount"
+    for separator in (":", " - ", " – "):
+        if separator in line:
+            name, _, amount = line.partition(separator)
+            parsed = _parse_amount(amount.strip())
+            if parsed:
+                return _finish(parsed[0], parsed[1], name, raw)
+
+    # "Name (amount)"
+    if "(" in line:
+        name, _, amount = line.partition("(")
+        parsed = _parse_amount(amount.strip(" )"))
+        if parsed and parsed[1]:
+            return _finish(parsed[0], parsed[1], name, raw)
+
+    return _finish(None, "", line, raw)
+
+
+def ingredient_section_bounds(recipe: str) -> Optional[Tuple[int, Optional[int]]]:
+    """
+    Locate the ingredients section in `recipe`.
+
+    Returns:
+        (start, end) character offsets of the section body, where `end` is None
+        when the section has not been closed by a following heading yet (useful
+        while the recipe is still being streamed), or None if there is no
+        ingredients heading at all.
+    """
+    header = _SECTION_START_RE.search(recipe)
+    if not header:
+        return None
+
+    start = header.end() + 1
+    end = _SECTION_END_RE.search(recipe, start)
+    return start, end.start() + 1 if end else None
+
+
+def extract_ingredient_lines(recipe: str) -> List[str]:
+    """Return the non-empty lines of the ingredients section of `recipe`."""
+    bounds = ingredient_section_bounds(recipe)
+    if bounds is None:
+        return []
+    start, end = bounds
+    section = recipe[start:end] if end is not None else recipe[start:]
+    return [line for line in section.splitlines() if line.strip()]
+
+
+def parse_recipe_ingredients(recipe: str) -> List[ParsedIngredient]:
+    """
+    Parse every ingredient of a RecipeCreatorAgent recipe.
+
+    Args:
+        recipe: Full recipe text
+
+    Returns:
+        Parsed ingredients in the order they appear in the recipe
+    """
+    ingredients: List[ParsedIngredient] = []
+    for line in extract_ingredient_lines(recipe):
+        parsed = parse_ingredient_line(line)
+        if parsed is not None:
+            ingredients.append(parsed)
+    return ingredients
+
+
+def total_grams(ingredients: List[ParsedIngredient]) -> float:
+    """Sum of the gram weights of the ingredients that could be converted."""
+    return sum(item.grams for item in ingredients if item.grams is not None)
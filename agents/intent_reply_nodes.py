@@ -0,0 +1,135 @@
+"""
+Reply Nodes for Routed Intents
+
+This module contains the node functions for the messages the intent router
+(see `intent_router`) sends past the generation pipeline: a canned reply for
+small talk, a nutrition answer about the previous recipe (locally from the
+cached totals when possible, otherwise one LLM call) and a restaurant lookup.
+Each one writes `final_output` itself and ends the run.
+"""
+
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, Optional
+
+from langchain_openai import ChatOpenAI
+
+from .agent_definitions import NutritionalAnalysisAgent
+from .cuisine_keywords import format_cuisine_keywords
+from .format_output_node import _LABELS, _TOTAL_RE, _format_restaurants
+from .nerby_res_node import nearby_restaurants_node
+from .recipe_rescaler import recipe_servings
+from .session_memory import recipe_title
+from .workflow_state import WorkflowState
+
+logger = logging.getLogger(__name__)
+
+_CANNED_REPLIES = (
+    (re.compile(r"\b(?:thanks?|thank you|thx|ty|cheers|helpful|best|love)\b"),
+     "You're welcome! Ask me for another recipe, its nutrition or restaurants nearby any time."),
+    (re.compile(r"\b(?:bye|goodbye|see you|good night)\b"), "Enjoy your meal, and see you next time! 👋"),
+    (re.compile(r"\b(?:help|what can you do|who are you|how does this work)\b"),
+     "I create recipes that fit your dietary goal, analyse their nutrition, evaluate them and suggest "
+     "restaurants nearby. Try \"a high-protein vegetarian dinner\", then \"how much protein is in that?\", "
+     "\"make it for 6 people\" or \"any restaurants near me?\"."),
+)
+_DEFAULT_REPLY = "Hi! Tell me what you'd like to eat and I'll put a recipe together for your goal. 🍳"
+
+# Question words -> keys of the nutrition cache totals (see nutrition_cache)
+_NUTRIENT_KEYS = (
+    (re.compile(r"\b(?:calories?|kcal|energy)\b"), "calories"),
+    (re.compile(r"\bprotein\b"), "protein_g"),
+    (re.compile(r"\b(?:carbs?|carbohydrates?)\b"), "carbs_g"),
+    (re.compile(r"\bfats?\b"), "fat_g"),
+    (re.compile(r"\bsugars?\b"), "sugar_g"),
+    (re.compile(r"\bfib(?:er|re)\b"), "fiber_g"),
+)
+_MACROS_RE = re.compile(r"\b(?:macros?|macronutrients?)\b")
+# Questions about amounts; "which ingredient has the most fat?" needs the breakdown instead
+_AMOUNT_QUESTION_RE = re.compile(
+    r"^\W*\w+\W*$|\b(?:how (?:much|many)|what(?:'s| is| are) (?:the|its)|count|total|per (?:serving|portion)|"
+    r"macros?|facts)\b"
+)
+
+
+def canned_reply_node(state: WorkflowState) -> Dict[str, Any]:
+    """Answer small talk ("thanks", "hi", "what can you do?") without any upstream call."""
+    text = state["user_input"].lower()
+    reply = next((reply for pattern, reply in _CANNED_REPLIES if pattern.search(text)), _DEFAULT_REPLY)
+    return {"final_output": reply, "step": "completed"}
+
+
+def local_nutrition_answer(question: str, recipe: str, nutrient_profile: str) -> Optional[str]:
+    """
+    Answer a question about specific nutrients from the structured profile totals.
+
+    Returns:
+        The answer, or None when the profile has no totals or the question is
+        not about calories, macros, sugar or fiber
+    """
+    match = _TOTAL_RE.search(nutrient_profile)
+    text = question.lower()
+    keys = [key for pattern, key in _NUTRIENT_KEYS if pattern.search(text)]
+    if _MACROS_RE.search(text):
+        keys = ["calories", "protein_g", "carbs_g", "fat_g"]
+    if not match or not keys or not _AMOUNT_QUESTION_RE.search(text):
+        return None
+    try:
+        totals = json.loads(match.group(1))
+    except ValueError:
+        return None
+    if any(not isinstance(totals.get(key), (int, float)) for key in keys):
+        return None
+
+    servings = recipe_servings(recipe)
+    parts = []
+    for key in keys:
+        label, unit = _LABELS[key]
+        amount = f"{totals[key]:.0f} {unit} of {label}" if unit == "g" else f"{totals[key]:.0f} {label}"
+        if servings and servings > 1:
+            per = totals[key] / servings
+            amount += f" ({per:.0f}{' g' if unit == 'g' else ' kcal'} per serving)"
+        parts.append(amount)
+    listed = parts[0] if len(parts) == 1 else ", ".join(parts[:-1]) + f" and {parts[-1]}"
+    serving_note = f" ({servings:g} servings)" if servings and servings > 1 else ""
+    return f"The whole recipe{serving_note} has about {listed}."
+
+
+def answer_nutrition_node(state: WorkflowState) -> Dict[str, Any]:
+    """
+    Answer a nutrition question about the previous recipe.
+
+    Totals cached by the nutrition analysis answer questions about calories
+    and macros directly; other questions take one call to the
+    NutritionalAnalysisAgent with the recipe and its profile.
+    """
+    logger.info("Answering nutrition question", extra={"node": "answer_nutrition"})
+    recipe, profile = state["last_recipe"], state.get("last_nutrient_profile") or ""
+
+    answer = local_nutrition_answer(state["user_input"], recipe, profile)
+    if answer is None:
+        llm = ChatOpenAI(
+            model="gpt-3.5-turbo",
+            temperature=0.01,
+            openai_api_key=os.getenv("OPENAI_API_KEY")
+        )
+        answer = NutritionalAnalysisAgent(llm).answer_question(recipe, profile, state["user_input"])
+
+    return {
+        "final_output": f"## 🥗 Nutrition: {recipe_title(recipe)}\n{answer}",
+        "step": "completed",
+    }
+
+
+def restaurant_reply_node(state: WorkflowState) -> Dict[str, Any]:
+    """Look up restaurants for the cuisine named in the message, or else for the previous recipe."""
+    message = state["user_input"]
+    query = message if format_cuisine_keywords(message) else (state.get("last_recipe") or message)
+    update = nearby_restaurants_node({**state, "recipe": query})
+
+    suggestions = update["restaurant_suggestions"]
+    reply = (_format_restaurants(suggestions).strip() if suggestions
+             else "I couldn't find restaurants for that nearby right now. Want a recipe instead?")
+    return {**update, "final_output": reply, "step": "completed"}
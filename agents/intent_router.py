@@ -0,0 +1,253 @@
+"""
+Local Intent Router
+
+The entry point of the workflow graph. Not every chat message asks for a new
+recipe: "thanks", "how much protein is in that?" or "any Thai restaurants
+near me?" only need a canned reply, the previous recipe's nutrition or a
+restaurant lookup, none of which should pay for the four LLM calls of the
+generation pipeline.
+
+Messages are classified locally, without a network call: a few high-precision
+keyword rules first, then a small multinomial logistic regression over word
+unigrams and bigrams, trained on first use from the labelled examples in
+INTENT_DATA (data/intents.jsonl). Predictions below ROUTER_MIN_CONFIDENCE, and
+questions about a previous recipe when there is none, fall back to full
+generation. INTENT_ROUTER=0 sends every message through generation.
+"""
+
+import json
+import logging
+import math
+import os
+import random
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from .cuisine_keywords import extract_cuisine_keywords
+from .ingredient_catalog import CANONICAL_INGREDIENTS
+from .metrics import ROUTED_MESSAGES
+from .workflow_state import WorkflowState
+
+logger = logging.getLogger(__name__)
+
+INTENT_ROUTER = os.getenv("INTENT_ROUTER", "1") != "0"
+INTENT_DATA = os.getenv(
+    "INTENT_DATA", str(Path(__file__).resolve().parent.parent / "data" / "intents.jsonl")
+)
+ROUTER_MIN_CONFIDENCE = float(os.getenv("ROUTER_MIN_CONFIDENCE", "0.6"))
+
+GENERATE, NUTRITION, RESTAURANTS, SMALLTALK = "generate", "nutrition", "restaurants", "smalltalk"
+INTENTS = (GENERATE, NUTRITION, RESTAURANTS, SMALLTALK)
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+_NUTRIENT = (r"\b(?:protein|calories?|kcal|energy|carbs?|carbohydrates?|fats?|fib(?:er|re)|sugars?|sodium|salt|"
+             r"cholesterol|potassium|iron|calcium|vitamins?|minerals?|omega|macros?|nutrition(?:al)?|nutrients?|"
+             r"healthy)\b")
+_GENERATION_RE = re.compile(
+    r"\b(?:recipe for|make|cook|bake|prepare|create|instead|another|redo|swap|add|give me|lower the|less)\b"
+)
+# An explicit request for a new recipe ("a takeout-style orange chicken recipe", "make me a pad thai",
+# "copycat delivery pizza at home"), as opposed to a question about "this recipe"
+_RECIPE_REQUEST_RE = re.compile(
+    r"\b(?:a|an|some|another|new)\s+(?:[\w'-]+\s+){0,4}recipes?\b|\brecipes?\s+for\b|"
+    r"\b(?:make|cook|bake|prepare|create)\s+(?:me\s+|us\s+)?(?:a|an|some|my|homemade|copycat|\d+)\b|"
+    r"\b(?:at home|homemade|copycat)\b"
+)
+# High-precision rules, checked in order before the model
+_RULES: Tuple[Tuple[re.Pattern, str], ...] = (
+    (re.compile(
+        r"^\W*(?:(?:thanks?|thank you|thx|ty|cheers|great|awesome|perfect|cool|nice|ok(?:ay)?|hi|hello|hey|"
+        r"there|good (?:morning|afternoon|evening|night)|bye|goodbye|see you(?: later)?|so much|a lot|again)"
+        r"[\s,!.]*)+$"
+    ), SMALLTALK),
+    # Checked before the restaurant and nutrition rules: a recipe request may name a
+    # restaurant ("like the one from my favourite restaurant") or a nutrient
+    (_RECIPE_REQUEST_RE, GENERATE),
+    (re.compile(r"\b(?:restaurants?|near me|nearby|close by|around here|places? to eat|eat(?:ing)? out|"
+                r"take-?out|delivery)\b"), RESTAURANTS),
+    (re.compile(r"\b(?:how (?:much|many)|what(?:'s| is| are) the|is (?:it|this|that)|does (?:it|this|that))\b"
+                rf".*{_NUTRIENT}"), NUTRITION),
+    # Asking to make or change something always needs the generation pipeline
+    (_GENERATION_RE, GENERATE),
+)
+_NEEDS_RECIPE = frozenset((NUTRITION,))
+
+
+class IntentDecision(NamedTuple):
+    """
+    Where a message is routed.
+
+    Attributes:
+        intent: One of INTENTS
+        confidence: Model probability of the intent (1.0 for rules)
+        source: "rule", "model" or "fallback"
+    """
+    intent: str
+    confidence: float
+    source: str
+
+
+def _food_words() -> FrozenSet[str]:
+    """Words naming an ingredient in the catalog (e.g. "chicken", "oats")."""
+    return frozenset(
+        word for entry in CANONICAL_INGREDIENTS.values() for alias in entry.aliases
+        for word in _TOKEN_RE.findall(alias) if len(word) > 3
+    )
+
+
+_FOOD_WORDS = _food_words()
+_NUTRIENT_RE = re.compile(_NUTRIENT)
+_PLACE_RE = re.compile(r"\b(?:where|places?|spots?|joints?|shops?|somewhere|cafes?|bars?|steakhouses?|town|area)\b")
+_MEAL_RE = re.compile(r"\b(?:breakfast|brunch|lunch|dinner|supper|snacks?|desserts?|meals?|dish|hungry|craving|recipes?)\b")
+_EDIT_RE = re.compile(r"\b(?:add|less|more|without|swap|replace|redo|instead|lower|higher|spicier|change|another)\b")
+
+
+def features(text: str) -> List[str]:
+    """
+    Word unigrams and bigrams of `text`, a bias, and lexicon features.
+
+    The lexicon features (a dish, cuisine or ingredient; a nutrient; a place;
+    a meal; a change to the recipe) let the model generalise from a few hundred examples to words it has
+    never seen in them, such as an unlisted dish.
+    """
+    text = text.lower()
+    tokens = _TOKEN_RE.findall(text)
+    extra = ["<bias>"]
+    if any(token in _FOOD_WORDS for token in tokens) or extract_cuisine_keywords(text):
+        extra.append("<food>")
+    if _NUTRIENT_RE.search(text):
+        extra.append("<nutrient>")
+    if _PLACE_RE.search(text):
+        extra.append("<place>")
+    if _MEAL_RE.search(text):
+        extra.append("<meal>")
+    if _EDIT_RE.search(text):
+        extra.append("<edit>")
+    return [*extra, *tokens, *(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))]
+
+
+class IntentModel:
+    """Multinomial logistic regression over sparse binary features, trained with SGD."""
+
+    def __init__(self, labels: Sequence[str] = INTENTS):
+        self.labels = tuple(labels)
+        self.weights: Dict[str, List[float]] = {}
+
+    def probabilities(self, text: str) -> List[float]:
+        """Return the probability of each label for `text`."""
+        scores = [0.0] * len(self.labels)
+        for feature in set(features(text)):
+            row = self.weights.get(feature)
+            if row is not None:
+                for label, weight in enumerate(row):
+                    scores[label] += weight
+        top = max(scores)
+        exps = [math.exp(score - top) for score in scores]
+        total = sum(exps)
+        return [value / total for value in exps]
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """Return (most likely label, its probability)."""
+        probabilities = self.probabilities(text)
+        best = max(range(len(self.labels)), key=probabilities.__getitem__)
+        return self.labels[best], probabilities[best]
+
+    def train(self, examples: Iterable[Tuple[str, str]], epochs: int = 40, rate: float = 0.5,
+              l2: float = 1e-4, seed: int = 7) -> "IntentModel":
+        """
+        Fit the weights to labelled examples.
+
+        Args:
+            examples: (text, label) pairs
+            epochs: Passes over the examples
+            rate: SGD learning rate
+            l2: L2 penalty, applied to the weights of each example's features
+            seed: Shuffling seed, so training is reproducible
+
+        Returns:
+            self
+        """
+        data = [(sorted(set(features(text))), self.labels.index(label)) for text, label in examples]
+        rng = random.Random(seed)
+        for _ in range(epochs):
+            rng.shuffle(data)
+            for feats, target in data:
+                rows = [self.weights.setdefault(feature, [0.0] * len(self.labels)) for feature in feats]
+                scores = [sum(row[label] for row in rows) for label in range(len(self.labels))]
+                top = max(scores)
+                exps = [math.exp(score - top) for score in scores]
+                total = sum(exps)
+                for label in range(len(self.labels)):
+                    gradient = exps[label] / total - (label == target)
+                    for row in rows:
+                        row[label] -= rate * (gradient + l2 * row[label])
+        return self
+
+
+def load_examples(path: str = INTENT_DATA) -> List[Tuple[str, str]]:
+    """Read (text, intent) pairs from a JSONL file of {"text", "intent"} objects."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [(item["text"], item["intent"]) for item in map(json.loads, f) if item.get("text")]
+
+
+_model: Optional[IntentModel] = None
+_model_lock = threading.Lock()
+
+
+def default_intent_model() -> Optional[IntentModel]:
+    """Return the model trained on INTENT_DATA (once per process), or None if the data is missing."""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                try:
+                    _model = IntentModel().train(load_examples())
+                except (OSError, ValueError, KeyError) as err:
+                    logger.warning("Intent model unavailable, using rules only",
+                                   extra={"path": INTENT_DATA, "error": str(err)})
+                    _model = IntentModel()
+    return _model if _model.weights else None
+
+
+def classify_intent(message: str, has_recipe: bool, model: Optional[IntentModel] = None) -> IntentDecision:
+    """
+    Decide which sub-graph answers `message`.
+
+    Args:
+        message: User message
+        has_recipe: Whether the session has a previous recipe to answer questions about
+        model: Model to use instead of the default one
+
+    Returns:
+        The routing decision
+    """
+    text = message.lower().strip()
+    decision = None
+    for pattern, intent in _RULES:
+        if pattern.search(text):
+            decision = IntentDecision(intent, 1.0, "rule")
+            break
+    if decision is None:
+        model = model or default_intent_model()
+        if model is not None:
+            intent, confidence = model.predict(text)
+            decision = IntentDecision(intent, confidence, "model")
+    if (decision is None or decision.confidence < ROUTER_MIN_CONFIDENCE
+            or (decision.intent in _NEEDS_RECIPE and not has_recipe)):
+        decision = IntentDecision(GENERATE, decision.confidence if decision else 0.0, "fallback")
+    return decision
+
+
+def route_intent_node(state: WorkflowState) -> Dict[str, Any]:
+    """Classify the message and record the intent that picks the next sub-graph."""
+    if not INTENT_ROUTER:
+        return {"intent": GENERATE, "step": "routed"}
+    decision = classify_intent(state["user_input"], bool(state.get("last_recipe")))
+    ROUTED_MESSAGES.labels(intent=decision.intent, source=decision.source).inc()
+    logger.info("Message routed", extra={
+        "node": "route_intent", "intent": decision.intent,
+        "confidence": round(decision.confidence, 3), "source": decision.source,
+    })
+    return {"intent": decision.intent, "step": "routed"}
@@ -0,0 +1,363 @@
+"""
+Meal-Plan Nodes for LangGraph Workflow
+
+This module contains the nodes of the meal-plan graph (see
+`workflow.build_meal_plan_workflow`), which answers "plan my week" with one
+run instead of one chat message per day. A plan is a grid of slots, one per
+day and meal. `dispatch_meals` fans the slots out with LangGraph `Send`, so
+each slot's recipe is generated and analysed by its own `plan_meal_node`
+task and all of them run in the same step; the graph is invoked with
+`max_concurrency` set to MEAL_PLAN_CONCURRENCY, which bounds how many run at
+once. A week of dinners then takes about as long as one recipe.
+
+`check_plan_node` adds up each day's per-serving nutrition and asks the goal
+evaluator whether the day supports the user's goal at their weight (the day
+verdicts of a plan are requested together and share a micro-batch, see
+`micro_batcher`). Only the days judged NO are generated again, with their
+totals as feedback, for up to MEAL_PLAN_MAX_ROUNDS rounds; the other days
+are kept. A meal whose generation or analysis fails is recorded as missing
+(no totals), its day is not judged, and the missing meals alone are
+generated again in the next round, like a day that missed the goal.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from langchain_openai import ChatOpenAI
+from langgraph.types import Send
+
+from .agent_definitions import EvaluateNutritionalContent, NutritionalAnalysisAgent, RecipeCreatorAgent
+from .concurrency import run_coroutine_sync
+from .format_output_node import _TIPS_RE, _TOTAL_RE, _format_totals
+from .metrics import MEAL_PLAN_DAYS
+from .nutrition_cache import NutrientFacts, ZERO_FACTS, IncrementalNutritionAnalyzer
+from .recipe_rescaler import recipe_servings
+from .verbosity import CONCISE, FULL, mode_for
+from .workflow_state import MealPlanState, MealSlot
+
+logger = logging.getLogger(__name__)
+
+MEAL_PLAN_CONCURRENCY = int(os.getenv("MEAL_PLAN_CONCURRENCY", "7"))
+MEAL_PLAN_MAX_ROUNDS = int(os.getenv("MEAL_PLAN_MAX_ROUNDS", "1"))
+MEAL_PLAN_MAX_DAYS = int(os.getenv("MEAL_PLAN_MAX_DAYS", "14"))
+MEAL_PLAN_MAX_MEALS = 6
+DEFAULT_MEALS = ("dinner",)
+
+# Cuisine suggested for each day, so days generated side by side still differ
+_CUISINES = ("Mediterranean", "Mexican", "Japanese", "Indian", "Italian", "Middle Eastern", "Thai")
+_NAME_RE = re.compile(r"^[\s#*]*(?:1\.\s*)?(?:Recipe Name:\s*)?(?P<name>.*?)[\s*]*$", re.IGNORECASE)
+# Day verdict of a day with a meal that could not be generated; it is not judged
+MISSING = "MISSING"
+
+
+def parse_plan_request(days: Optional[int], meals: Union[str, Sequence[str], None]) -> Tuple[int, List[str]]:
+    """
+    Validate the size of a meal-plan request.
+
+    Args:
+        days: Number of days, 7 when None
+        meals: Meals of each day, as a list or "breakfast,lunch,dinner";
+            DEFAULT_MEALS when empty
+
+    Returns:
+        (days, meal names)
+
+    Raises:
+        ValueError: Days outside 1..MEAL_PLAN_MAX_DAYS, or repeated or too many meals
+    """
+    days = 7 if days is None else days
+    if not 1 <= days <= MEAL_PLAN_MAX_DAYS:
+        raise ValueError(f"A meal plan covers 1 to {MEAL_PLAN_MAX_DAYS} days, got {days}")
+    if isinstance(meals, str):
+        meals = meals.split(",")
+    names = [name.strip().lower() for name in meals or () if name.strip()] or list(DEFAULT_MEALS)
+    if len(set(names)) != len(names) or len(names) > MEAL_PLAN_MAX_MEALS:
+        raise ValueError(f"Meals must be distinct and at most {MEAL_PLAN_MAX_MEALS} per day: {', '.join(names)}")
+    return days, names
+
+
+def meal_prompt(slot: MealSlot) -> str:
+    """Return the recipe request for one slot of the plan."""
+    cuisine = _CUISINES[(slot["day"] - 1) % len(_CUISINES)]
+    prompt = (
+        f"{slot['user_input']}\n\nThis is the {slot['meal']} for day {slot['day']} of a "
+        f"{slot['days']}-day meal plan supporting my goal of *{slot['goal']}*. "
+        f"Unless I asked for a particular cuisine, make it {cuisine}."
+    )
+    if slot["feedback"]:
+        prompt += f"\n\nNOTE: {slot['feedback']}"
+    return prompt
+
+
+def meal_name(recipe: str) -> str:
+    """Return the recipe's name, from its first non-empty line."""
+    for line in recipe.splitlines():
+        if line.strip():
+            return _NAME_RE.match(line).group("name") or line.strip()
+    return "Untitled recipe"
+
+
+def serving_facts(recipe: str, nutrient_profile: str) -> Optional[NutrientFacts]:
+    """Return the profile's totals for one serving of `recipe`, or None without a totals line."""
+    match = _TOTAL_RE.search(nutrient_profile)
+    if not match:
+        return None
+    try:
+        totals = json.loads(match.group(1))
+        facts = NutrientFacts(*(float(totals.get(field) or 0.0) for field in NutrientFacts._fields))
+    except (TypeError, ValueError):
+        return None
+    return facts.scaled(1 / (recipe_servings(recipe) or 1))
+
+
+def _totals_line(totals: Dict[str, float]) -> str:
+    """Return totals as one line ("612 kcal · 45 g protein · ...")."""
+    return _format_totals(f"Total: {json.dumps(totals)}")
+
+
+def _day_facts(meals: List[Dict[str, Any]]) -> Optional[NutrientFacts]:
+    """Sum the per-serving totals of a day's meals; None if any meal has none."""
+    total = ZERO_FACTS
+    for meal in meals:
+        if meal["totals"] is None:
+            return None
+        total = total.plus(NutrientFacts(**meal["totals"]))
+    return total
+
+
+def day_profile(day: int, meals: List[Dict[str, Any]]) -> str:
+    """Return the nutrient profile of one day for one person, in the format the goal evaluator reads."""
+    lines = [f"Day {day} of a meal plan, one serving of each meal:"]
+    for meal in meals:
+        if meal["totals"] is not None:
+            lines.append(f"- {meal['meal']} ({meal['name']}): {json.dumps(meal['totals'])}")
+        else:
+            lines.append(f"- {meal['meal']} ({meal['name']}), whole recipe:\n{meal['nutrient_profile']}")
+    total = _day_facts(meals)
+    if total is not None:
+        lines.append(f"Total: {json.dumps(total.as_dict())}")
+    return "\n".join(lines)
+
+
+def _meals_by_day(state: MealPlanState) -> Dict[int, List[Dict[str, Any]]]:
+    """Group the planned meals by day, each day in the order of `meal_names`."""
+    order = {name: index for index, name in enumerate(state["meal_names"])}
+    days: Dict[int, List[Dict[str, Any]]] = {}
+    for meal in sorted(state["meals"], key=lambda meal: (meal["day"], order[meal["meal"]])):
+        days.setdefault(meal["day"], []).append(meal)
+    return days
+
+
+def dispatch_meals(state: MealPlanState) -> Union[List[Send], str]:
+    """
+    Route the plan: one `plan_meal` task per meal of each pending day, or formatting when none is left.
+
+    A day that missed the goal is sent with its totals as feedback; a day
+    with missing meals only sends those, without feedback.
+    """
+    if not state["pending_days"]:
+        return "format_meal_plan"
+    by_day = _meals_by_day(state)
+    sends = []
+    for day in state["pending_days"]:
+        feedback = ""
+        meals = state["meal_names"]
+        if state["day_verdicts"].get(day) == MISSING:
+            missing = {meal["meal"] for meal in by_day.get(day, []) if meal.get("missing")}
+            meals = [meal for meal in meals if meal in missing]
+        elif state["day_verdicts"].get(day) == "NO":
+            day_total = _day_facts(by_day.get(day, []))
+            came_to = f" came to {_totals_line(day_total.as_dict())} per person and" if day_total is not None else ""
+            feedback = (
+                f"The previous meals for this day{came_to} did not "
+                f"satisfy my goal of *{state['goal']}* at {state['weight']} lb. "
+                "Please adjust ingredients, macros, and portion sizes to meet this goal."
+            )
+        for meal in meals:
+            sends.append(Send("plan_meal", MealSlot(
+                day=day,
+                meal=meal,
+                days=state["days"],
+                user_input=state["user_input"],
+                conversation_context=state["conversation_context"],
+                goal=state["goal"],
+                weight=state["weight"],
+                verbosity=state["verbosity"],
+                feedback=feedback,
+            )))
+    logger.info("Dispatching meals", extra={"days": state["pending_days"], "meals": len(sends)})
+    return sends
+
+
+def plan_meal_node(slot: MealSlot) -> Dict[str, Any]:
+    """
+    Node function for one meal of the plan.
+
+    Generates the slot's recipe and analyses its nutrition; several of these
+    run concurrently, one per slot sent by `dispatch_meals`. A failure does
+    not fail the plan: the meal is recorded as missing, with no totals.
+
+    Args:
+        slot: Day, meal and user context of this meal
+
+    Returns:
+        State update adding the meal (replacing a previous version of it)
+    """
+    recipe_creator = RecipeCreatorAgent(ChatOpenAI(
+        model="gpt-3.5-turbo",
+        temperature=0.7,
+        openai_api_key=os.getenv("OPENAI_API_KEY")
+    ), mode_for(slot, "recipe"))
+    nutrition_analyzer = IncrementalNutritionAnalyzer(NutritionalAnalysisAgent(ChatOpenAI(
+        model="gpt-3.5-turbo",
+        temperature=0.01,
+        openai_api_key=os.getenv("OPENAI_API_KEY")
+    )))
+
+    try:
+        recipe = recipe_creator.create_recipe(meal_prompt(slot), slot["conversation_context"])
+        nutrient_profile = nutrition_analyzer.analyse(recipe)
+    except Exception as err:
+        logger.warning("Meal could not be planned", extra={
+            "day": slot["day"], "meal": slot["meal"], "error": type(err).__name__,
+        })
+        return {
+            "meals": [{
+                "day": slot["day"],
+                "meal": slot["meal"],
+                "name": "Not generated",
+                "recipe": "",
+                "nutrient_profile": "",
+                "totals": None,
+                "missing": True,
+            }],
+            "step": "meal_planned",
+        }
+    facts = serving_facts(recipe, nutrient_profile)
+
+    return {
+        "meals": [{
+            "day": slot["day"],
+            "meal": slot["meal"],
+            "name": meal_name(recipe),
+            "recipe": recipe,
+            "nutrient_profile": nutrient_profile,
+            "totals": facts.as_dict() if facts is not None else None,
+        }],
+        "step": "meal_planned",
+    }
+
+
+def check_plan_node(state: MealPlanState) -> Dict[str, Any]:
+    """
+    Node function that checks the days just generated against the user's goal.
+
+    Each new day's per-person totals are judged by the goal evaluator, all
+    days at once. Days judged NO, and days with a missing meal (not judged),
+    are queued for another round while MEAL_PLAN_MAX_ROUNDS allows; days
+    judged YES are final.
+
+    Args:
+        state: Meal-plan state with the meals of every day
+
+    Returns:
+        State update with the day verdicts and the days to generate again
+    """
+    by_day = _meals_by_day(state)
+    checked = state["pending_days"]
+    goal_evaluator = EvaluateNutritionalContent(ChatOpenAI(
+        model="gpt-3.5-turbo",
+        temperature=0.7,
+        openai_api_key=os.getenv("OPENAI_API_KEY")
+    ))
+
+    incomplete = [day for day in checked if any(meal.get("missing") for meal in by_day[day])]
+    judged = [day for day in checked if day not in incomplete]
+
+    async def judge_days() -> List[str]:
+        return await asyncio.gather(*(
+            goal_evaluator.aevaluate(state["goal"], day_profile(day, by_day[day]), state["weight"])
+            for day in judged
+        ))
+
+    verdicts = {**state["day_verdicts"], **dict(zip(judged, run_coroutine_sync(judge_days()) if judged else []))}
+    verdicts.update((day, MISSING) for day in incomplete)
+    missed = [day for day in checked if verdicts[day] != "YES"]
+    retry = missed if state["rounds"] < MEAL_PLAN_MAX_ROUNDS else []
+    for day in checked:
+        outcome = "compliant" if day not in missed else ("regenerated" if retry else "non_compliant")
+        if day in incomplete and not retry:
+            outcome = "incomplete"
+        MEAL_PLAN_DAYS.labels(outcome=outcome).inc()
+    logger.info("Meal plan checked", extra={
+        "goal": state["goal"], "missed_days": missed, "incomplete_days": incomplete, "round": state["rounds"],
+    })
+
+    return {
+        "day_verdicts": verdicts,
+        "pending_days": retry,
+        "rounds": state["rounds"] + (1 if retry else 0),
+        "step": "plan_checked",
+    }
+
+
+def format_meal_plan_node(state: MealPlanState) -> Dict[str, Any]:
+    """
+    Node function for formatting the meal plan.
+
+    Lays out every day with its meals, each meal's per-serving nutrition and
+    the day's totals, then the totals and daily average of the whole plan.
+    Concise answers list the meals by name instead of their full recipes.
+
+    Args:
+        state: Meal-plan state with the meals and day verdicts
+
+    Returns:
+        State update with the formatted final output
+    """
+    mode = mode_for(state, "output")
+    sections = [f"# 🗓️ Your {state['days']}-Day Meal Plan\n**Goal:** {state['goal']} · **Weight:** {state['weight']} lb"]
+    plan_total = ZERO_FACTS
+    complete = True
+    for day, meals in _meals_by_day(state).items():
+        verdict = {"YES": "✅", MISSING: "⚠️ incomplete, ask again to fill it in"}.get(
+            state["day_verdicts"].get(day), "⚠️ may not fully meet your goal")
+        lines = [f"## Day {day} {verdict}"]
+        for meal in meals:
+            if meal.get("missing"):
+                lines.append(f"- **{meal['meal'].title()}:** could not be generated" if mode == CONCISE
+                             else f"### 🍳 {meal['meal'].title()}\nThis meal could not be generated.")
+                continue
+            totals = _totals_line(meal["totals"]) if meal["totals"] is not None else ""
+            if mode == CONCISE:
+                lines.append(f"- **{meal['meal'].title()}:** {meal['name']}" + (f" ({totals})" if totals else ""))
+                continue
+            recipe = meal["recipe"] if mode == FULL else _TIPS_RE.sub("", meal["recipe"]).rstrip()
+            lines.append(f"### 🍳 {meal['meal'].title()}\n{recipe}")
+            if totals:
+                lines.append(f"**🥗 Per serving:** {totals}")
+        day_total = _day_facts(meals)
+        if day_total is None:
+            complete = False
+        else:
+            plan_total = plan_total.plus(day_total)
+            if len(meals) > 1:
+                lines.append(f"**Day total:** {_totals_line(day_total.as_dict())}")
+        sections.append(("\n" if mode == CONCISE else "\n\n").join(lines))
+
+    if complete:
+        average = plan_total.scaled(1 / state["days"])
+        sections.append(
+            "## 📊 Plan Nutrition (per person)\n"
+            f"**Total:** {_totals_line(plan_total.as_dict())}\n"
+            f"**Daily average:** {_totals_line(average.as_dict())}"
+        )
+
+    return {
+        "final_output": "\n\n".join(sections),
+        "step": "completed",
+    }
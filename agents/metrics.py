@@ -0,0 +1,105 @@
+"""
+Prometheus Metrics for the Recipe Workflow
+
+This module declares the metric families used across the workflow: per-node
+and per-upstream latency histograms, in-flight gauges, cache hit/miss
+counters and error counters. They are plain `prometheus_client` metrics in
+one registry, so call sites select a series with `.labels(...)`, as in
+`NODE_ERRORS.labels(node="create_recipe", error="ValueError").inc()`. The
+frontend serves `render_metrics()` on `/metrics`.
+"""
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, disable_created_metrics, generate_latest,
+)
+
+# Nothing reads the per-series creation timestamps (`*_created`); leave them out of the payload
+disable_created_metrics()
+
+REGISTRY = CollectorRegistry()
+
+# prometheus_client's default buckets stop at 10 s; LLM calls and whole nodes run longer
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+NODE_LATENCY = Histogram(
+    "recipe_node_duration_seconds", "Wall-clock time spent in each workflow node.",
+    ["node"], buckets=LATENCY_BUCKETS, registry=REGISTRY)
+NODE_ERRORS = Counter(
+    "recipe_node_errors", "Exceptions raised by workflow nodes.",
+    ["node", "error"], registry=REGISTRY)
+UPSTREAM_LATENCY = Histogram(
+    "recipe_upstream_duration_seconds", "Latency of calls to upstream services (OpenAI, Places).",
+    ["upstream", "operation"], buckets=LATENCY_BUCKETS, registry=REGISTRY)
+UPSTREAM_ERRORS = Counter(
+    "recipe_upstream_errors", "Failed calls to upstream services.",
+    ["upstream", "operation", "error"], registry=REGISTRY)
+IN_FLIGHT = Gauge(
+    "recipe_in_flight", "Requests, workflow runs and node executions currently in progress.",
+    ["kind"], registry=REGISTRY)
+CACHE_EVENTS = Counter(
+    "recipe_cache_events", "Cache lookups by cache and result (hit/miss).",
+    ["cache", "result"], registry=REGISTRY)
+PIPELINE_OUTCOMES = Counter(
+    "recipe_pipeline_outcomes",
+    "Pipelined nutrition analysis runs by outcome (overlapped, restarted, sequential).",
+    ["outcome"], registry=REGISTRY)
+SPECULATIVE_CANDIDATES = Counter(
+    "recipe_speculative_candidates",
+    "Speculative recipe candidates by outcome (accepted, rejected, cancelled, failed).",
+    ["outcome"], registry=REGISTRY)
+NUTRITION_ANALYSES = Counter(
+    "recipe_nutrition_analyses",
+    "Ingredient-level nutrition analyses by cache outcome (full_hit, partial, miss, unparsed, incomplete).",
+    ["outcome"], registry=REGISTRY)
+RECIPE_REVISIONS = Counter(
+    "recipe_revisions",
+    "Goal retries handled with a recipe patch by outcome (patched, unapplied, failed).",
+    ["outcome"], registry=REGISTRY)
+RECIPE_RETRIEVALS = Counter(
+    "recipe_retrievals",
+    "First attempts looked up in the recipe corpus by outcome (unchanged, adapted, unapplied, failed, miss).",
+    ["outcome"], registry=REGISTRY)
+RECIPE_RESCALES = Counter(
+    "recipe_rescales",
+    "Sizing follow-ups answered locally by outcome (rescaled, unknown_servings, unparsed).",
+    ["outcome"], registry=REGISTRY)
+ROUTED_MESSAGES = Counter(
+    "routed_messages",
+    "Chat messages by routed intent and deciding stage (rule, model, fallback).",
+    ["intent", "source"], registry=REGISTRY)
+OMITTED_SECTIONS = Counter(
+    "recipe_omitted_sections",
+    "Optional response sections skipped to meet the request deadline.",
+    ["section"], registry=REGISTRY)
+UPSTREAM_CONCURRENCY_LIMIT = Gauge(
+    "recipe_upstream_concurrency_limit",
+    "Current adaptive limit on concurrent LLM calls per model.", ["model"], registry=REGISTRY)
+UPSTREAM_QUEUE_SECONDS = Histogram(
+    "recipe_upstream_queue_seconds",
+    "Time LLM calls waited for a concurrency slot, by model and priority.",
+    ["model", "priority"], buckets=LATENCY_BUCKETS, registry=REGISTRY)
+UPSTREAM_LIMIT_DECREASES = Counter(
+    "recipe_upstream_limit_decreases",
+    "Reductions of the adaptive LLM concurrency limit by reason (rate_limited, latency).",
+    ["model", "reason"], registry=REGISTRY)
+BATCH_SIZES = Histogram(
+    "recipe_batch_size",
+    "Items per micro-batched upstream call (1 = nothing to batch with).",
+    ["batcher"], buckets=(1, 2, 4, 8, 16, 32, 64), registry=REGISTRY)
+TRUNCATED_OUTPUTS = Counter(
+    "recipe_truncated_outputs",
+    "Agent outputs cut off by the max_tokens cap of their verbosity mode.",
+    ["agent"], registry=REGISTRY)
+MEAL_PLAN_DAYS = Counter(
+    "recipe_meal_plan_days",
+    "Meal-plan days checked against the goal by outcome (compliant, regenerated, non_compliant, incomplete).",
+    ["outcome"], registry=REGISTRY)
+
+
+# Content type of the `render_metrics()` payload
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+
+def render_metrics() -> str:
+    """Return the `/metrics` payload for the default registry."""
+    return generate_latest(REGISTRY).decode("utf-8")
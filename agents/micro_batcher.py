@@ -0,0 +1,116 @@
+"""
+Micro-Batching of Small Upstream Calls
+
+Some LLM calls are tiny: the goal verdict sends a short prompt and reads back
+a single YES/NO token. Under concurrency most of their cost is the round-trip
+and per-request overhead, paid once per workflow run, and every call counts
+against the upstream rate limit. A `MicroBatcher` collects the calls that
+arrive within a few milliseconds of each other and runs them as one batch.
+
+There is no background thread: the first caller of a batch waits up to
+`max_wait_s` (or until `max_size` items have joined), then runs the batch
+in its own thread and hands each waiting caller its result. Items are only
+batched together under the same key (e.g. the model they are sent to).
+
+Goal verdicts go through VERDICT_BATCHER (see
+`EvaluateNutritionalContent.evaluate`). VERDICT_BATCH_MAX_SIZE and
+VERDICT_BATCH_MAX_WAIT_MS bound each batch; VERDICT_BATCHING=0 sends every
+verdict on its own.
+"""
+
+import logging
+import os
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, List, Sequence
+
+from .metrics import BATCH_SIZES
+
+logger = logging.getLogger(__name__)
+
+VERDICT_BATCHING = os.getenv("VERDICT_BATCHING", "1") != "0"
+VERDICT_BATCH_MAX_SIZE = int(os.getenv("VERDICT_BATCH_MAX_SIZE", "16"))
+VERDICT_BATCH_MAX_WAIT_MS = float(os.getenv("VERDICT_BATCH_MAX_WAIT_MS", "15"))
+
+
+class _Batch:
+    """Items waiting for one batched call, with the futures of their callers."""
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.futures: List[Future] = []
+        self.closed = threading.Event()
+
+
+class MicroBatcher:
+    """
+    Collects concurrent calls for up to `max_wait_s` and runs them as one batch.
+
+    Args:
+        name: Batcher name, the `batcher` label of its metrics
+        max_size: Most items in one batch; a full batch runs at once
+        max_wait_s: Longest time the first item of a batch waits for others
+    """
+
+    def __init__(self, name: str, max_size: int, max_wait_s: float):
+        self.name = name
+        self.max_size = max(1, max_size)
+        self.max_wait_s = max(0.0, max_wait_s)
+        self._open: Dict[Hashable, _Batch] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: Hashable, item: Any, run: Callable[[Sequence[Any]], Sequence[Any]]) -> Any:
+        """
+        Add `item` to the open batch for `key` and wait for its result.
+
+        Args:
+            key: Batches only hold items with the same key
+            item: The call's input
+            run: Runs a whole batch, returning one result per item in order;
+                the `run` of the batch's first caller is used. A result that
+                is an exception fails that item only
+
+        Returns:
+            The result for `item`; an exception returned for `item` is raised,
+            and one raised by `run` is re-raised to every caller of the batch
+        """
+        future: Future = Future()
+        with self._lock:
+            batch = self._open.get(key)
+            leader = batch is None
+            if leader:
+                batch = self._open[key] = _Batch()
+            batch.items.append(item)
+            batch.futures.append(future)
+            if len(batch.items) >= self.max_size:
+                del self._open[key]
+                batch.closed.set()
+
+        if leader:
+            batch.closed.wait(self.max_wait_s)
+            with self._lock:
+                if self._open.get(key) is batch:
+                    del self._open[key]
+            self._run(batch, run)
+        return future.result()
+
+    def _run(self, batch: _Batch, run: Callable[[Sequence[Any]], Sequence[Any]]) -> None:
+        """Run a closed batch and resolve its futures."""
+        BATCH_SIZES.labels(batcher=self.name).observe(len(batch.items))
+        try:
+            results = list(run(batch.items))
+            if len(results) != len(batch.items):
+                raise ValueError(f"{self.name}: {len(results)} results for {len(batch.items)} items")
+        except Exception as err:
+            logger.warning("Batched call failed", extra={"batcher": self.name, "size": len(batch.items)})
+            for future in batch.futures:
+                future.set_exception(err)
+            return
+        for future, result in zip(batch.futures, results):
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+VERDICT_BATCHER = MicroBatcher("goal_verdict", VERDICT_BATCH_MAX_SIZE, VERDICT_BATCH_MAX_WAIT_MS / 1000)
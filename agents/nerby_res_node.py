@@ -4,17 +4,26 @@ notrient eval or LangGraph Workflow
 This module contains the node function for breakdown of nutritional content.
 """
 
+import logging
 import os
 from typing import Dict, Any
+from googlemaps.exceptions import Timeout as PlacesTimeout
 from langchain_openai import ChatOpenAI
 from .agent_definitions import NearbyRestaurantsAgent
+from .deadlines import has_budget, omit, request_timeout
 from .workflow_state import WorkflowState
 
+logger = logging.getLogger(__name__)
 
-def nearby_restaurants_node(state: WorkflowState) -> WorkflowState:
-    """Find nearby restaurants matching the recipe’s cuisine keywords."""
 
-    print("🍽️  Finding nearby restaurants ...")
+def nearby_restaurants_node(state: WorkflowState) -> Dict[str, Any]:
+    """Find nearby restaurants matching the recipe’s cuisine keywords (skipped near the deadline)."""
+
+    if not has_budget(state, "restaurants"):
+        logger.info("Skipping restaurant lookup, deadline too close", extra={"node": "nearby_restaurants"})
+        return {**omit("restaurants"), "restaurant_suggestions": [], "step": "restaurants_suggested"}
+
+    logger.info("Finding nearby restaurants", extra={"node": "nearby_restaurants"})
 
     # Initialize LLM and agent
     llm = ChatOpenAI(
@@ -23,25 +32,27 @@ def nearby_restaurants_node(state: WorkflowState) -> WorkflowState:
         openai_api_key=os.getenv("OPENAI_API_KEY"),
     )
 
-    restaurants_agent = NearbyRestaurantsAgent(llm)
-
     # ------------------------------------------------------------------
-    # Query agent
+    # Query agent (a missing Google Maps key just means no suggestions);
+    # with a deadline the lookup may not outlive it
     # ------------------------------------------------------------------
     try:
+        restaurants_agent = NearbyRestaurantsAgent(llm, timeout=request_timeout(state))
         suggestions = restaurants_agent.recommend_restaurants(
-            query=state["user_input"],
+            query=state.get("recipe") or state["user_input"],
             user_location= "Toronto",
             radius_meters=5000,  # 5‑km default
             max_results=5,
         )
+    except (TimeoutError, PlacesTimeout):
+        logger.warning("Restaurant lookup ran into the deadline", extra={"node": "nearby_restaurants"})
+        return {**omit("restaurants"), "restaurant_suggestions": [], "step": "restaurants_suggested"}
     except Exception as err:
-        # In production you might log this; return empty list on failure
-        print(f"⚠️  Error fetching restaurant data: {err}")
+        # No suggestions is an acceptable outcome; the rest of the response stands
+        logger.warning("Error fetching restaurant data", extra={"error": str(err)})
         suggestions = []
 
     return {
-        **state,
         "restaurant_suggestions": suggestions,
         "step": "restaurants_suggested",
     }
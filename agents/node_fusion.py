@@ -0,0 +1,80 @@
+"""
+Node Fusion Registry for the LangGraph Workflow
+
+Some adjacent LLM nodes only pass their output to the next one, so a single
+call can do the work of both. This module declares which node sequences may
+be fused and into which node, and rewrites a linear chain of node names with
+the fusions that are enabled. `build_workflow` applies it to the sequential
+create -> analyse -> evaluate chain.
+"""
+
+import os
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .nutrition_goal_node import analyse_and_evaluate_goal_node
+
+
+class Fusion(NamedTuple):
+    """
+    One allowed fusion.
+
+    Attributes:
+        nodes: Names of the adjacent nodes replaced, in graph order
+        node_name: Name of the fused node in the graph
+        node: Fused node function; it must write every key the replaced nodes wrote
+    """
+    nodes: Tuple[str, ...]
+    node_name: str
+    node: Callable
+
+
+FUSIONS: Dict[str, Fusion] = {
+    "nutrition_verdict": Fusion(
+        nodes=("analyse_nutrition", "evaluate_goal"),
+        node_name="analyse_and_evaluate_goal",
+        node=analyse_and_evaluate_goal_node,
+    ),
+}
+
+
+def enabled_fusions(names: Optional[Iterable[str]] = None) -> List[str]:
+    """
+    Return the fusion names to apply.
+
+    Args:
+        names: Fusion names; defaults to the comma-separated FUSED_NODES
+            environment variable ("all" enables every registered fusion)
+
+    Raises:
+        ValueError: If a name is not in FUSIONS
+    """
+    if names is None:
+        names = [name.strip() for name in os.getenv("FUSED_NODES", "").split(",") if name.strip()]
+    names = list(FUSIONS) if list(names) == ["all"] else list(names)
+    unknown = [name for name in names if name not in FUSIONS]
+    if unknown:
+        raise ValueError(f"Unknown node fusion(s) {unknown}; available: {sorted(FUSIONS)}")
+    return names
+
+
+def fuse_chain(chain: List[str], names: Iterable[str]) -> Tuple[List[str], Dict[str, Callable]]:
+    """
+    Replace each enabled fusion's node sequence in `chain` by its fused node.
+
+    Args:
+        chain: Node names of a linear part of the graph, in order
+        names: Fusions to apply (see `enabled_fusions`)
+
+    Returns:
+        (new chain, {fused node name: node function}) for the fusions that applied
+    """
+    fused_nodes: Dict[str, Callable] = {}
+    for name in names:
+        fusion = FUSIONS[name]
+        width = len(fusion.nodes)
+        for i in range(len(chain) - width + 1):
+            if tuple(chain[i:i + width]) == fusion.nodes:
+                chain = chain[:i] + [fusion.node_name] + chain[i + width:]
+                fused_nodes[fusion.node_name] = fusion.node
+                break
+    return chain, fused_nodes
@@ -0,0 +1,278 @@
+"""
+Ingredient-Level Nutrition Cache
+
+This module memoises nutrition analysis per ingredient instead of per recipe.
+A recipe is parsed into ingredients (see `ingredient_parser`) and each one is
+keyed by (canonical ingredient id, quantity bucket) when its name is a
+catalog alias, and by its own name otherwise. Only the ingredients missing
+from the cache are sent to the NutritionalAnalysisAgent, in one structured
+call, and the recipe totals are summed locally from the per-ingredient
+entries.
+
+A goal retry usually keeps most of the previous recipe's ingredients, and
+staples (olive oil, garlic, chicken breast) recur across users, so most
+analyses are partial or full cache hits. Quantities are bucketed on a
+logarithmic scale (NUTRITION_BUCKET_STEP, ~10% wide by default); a cached
+entry describes the bucket's representative amount and is scaled linearly to
+the actual grams.
+
+Recipes whose ingredients cannot be parsed fall back to the full-recipe
+analysis. Set NUTRITION_CACHE=0 to always use the full-recipe analysis.
+"""
+
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .agent_definitions import IngredientNutrients, NutritionalAnalysisAgent
+from .ingredient_catalog import CANONICAL_INGREDIENTS, default_matcher, normalize_name
+from .ingredient_parser import ParsedIngredient, parse_recipe_ingredients
+from .metrics import CACHE_EVENTS, NUTRITION_ANALYSES
+
+NUTRITION_CACHE_ENABLED = os.getenv("NUTRITION_CACHE", "1") != "0"
+NUTRITION_CACHE_SIZE = int(os.getenv("NUTRITION_CACHE_SIZE", "20000"))
+NUTRITION_BUCKET_STEP = float(os.getenv("NUTRITION_BUCKET_STEP", "1.1"))
+
+CacheKey = Tuple[str, str]
+
+
+class NutrientFacts(NamedTuple):
+    """Nutrients of one ingredient amount (kcal and grams)."""
+    calories: float
+    protein_g: float
+    carbs_g: float
+    fat_g: float
+    sugar_g: float
+    fiber_g: float
+
+    def scaled(self, factor: float) -> "NutrientFacts":
+        """Return the facts for `factor` times the amount."""
+        return NutrientFacts(*(value * factor for value in self))
+
+    def plus(self, other: "NutrientFacts") -> "NutrientFacts":
+        """Return the element-wise sum with `other`."""
+        return NutrientFacts(*(a + b for a, b in zip(self, other)))
+
+    def as_dict(self) -> Dict[str, float]:
+        """Return the facts rounded for display."""
+        return {name: round(value, 1) for name, value in zip(self._fields, self)}
+
+
+ZERO_FACTS = NutrientFacts(0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+MIN_BUCKET_GRAMS = 0.1
+
+
+def bucket_grams(grams: float, step: float = NUTRITION_BUCKET_STEP) -> float:
+    """Return the representative amount of the logarithmic bucket containing `grams`."""
+    if grams <= 0:
+        return 0.0
+    # Buckets are rounded to 0.1 g; a pinch must not share the zero-amount entry
+    return max(round(step ** round(math.log(grams, step)), 1), MIN_BUCKET_GRAMS)
+
+
+def cache_key(item: ParsedIngredient) -> Tuple[CacheKey, Optional[float]]:
+    """
+    Return the cache key of an ingredient and the amount the cached entry describes.
+
+    Ingredients written as a catalog alias and with a gram weight share entries
+    across wordings and nearby amounts. The rest, including fuzzy catalog
+    matches, which may name a different ingredient ("peanut butter"), are keyed
+    by normalised name and the amount as written, and are reused only when
+    repeated exactly.
+    """
+    if item.canonical_id and item.grams and default_matcher().match_alias(item.name) == item.canonical_id:
+        bucket = bucket_grams(item.grams)
+        return (item.canonical_id, f"{bucket:g}g"), bucket
+    amount = f"{item.quantity:g} {item.unit}".strip() if item.quantity is not None else "to taste"
+    return (normalize_name(item.name), amount), None
+
+
+def describe(item: ParsedIngredient, bucket: Optional[float]) -> str:
+    """Return the "<amount> <ingredient>" line sent to the agent for a cache miss."""
+    if bucket is not None:
+        return f"{bucket:g} g {CANONICAL_INGREDIENTS[item.canonical_id].aliases[0]}"
+    if item.quantity is None:
+        return f"{item.name} (to taste)"
+    return f"{item.quantity:g} {item.unit} {item.name}"
+
+
+class NutritionCache:
+    """Thread-safe LRU cache of NutrientFacts keyed by (ingredient, quantity bucket)."""
+
+    def __init__(self, max_entries: int = 20000):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, NutrientFacts]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: CacheKey) -> Optional[NutrientFacts]:
+        """Return the cached facts for `key`, or None."""
+        with self._lock:
+            facts = self._entries.get(key)
+            if facts is None:
+                self.misses += 1
+                CACHE_EVENTS.labels(cache="nutrition", result="miss").inc()
+                return None
+            self.hits += 1
+            CACHE_EVENTS.labels(cache="nutrition", result="hit").inc()
+            self._entries.move_to_end(key)
+            return facts
+
+    def put(self, key: CacheKey, facts: NutrientFacts) -> None:
+        """Store `facts` under `key`, evicting the least recently used entries."""
+        with self._lock:
+            self._entries[key] = facts
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_DEFAULT_CACHE = NutritionCache(NUTRITION_CACHE_SIZE)
+
+
+def default_nutrition_cache() -> NutritionCache:
+    """Return the process-wide cache shared by every request."""
+    return _DEFAULT_CACHE
+
+
+class AnalysisPlan(NamedTuple):
+    """
+    The diff of a recipe against the cache.
+
+    Attributes:
+        ingredients: Parsed ingredients of the recipe
+        keys: Cache key of each ingredient
+        buckets: Amount each key's entry describes (None when not bucketed)
+        facts: Facts of each ingredient already known, None for the rest
+        missing: Indexes of the ingredients to analyse, one per distinct key
+    """
+    ingredients: List[ParsedIngredient]
+    keys: List[CacheKey]
+    buckets: List[Optional[float]]
+    facts: List[Optional[NutrientFacts]]
+    missing: List[int]
+
+
+class IncrementalNutritionAnalyzer:
+    """
+    Nutrition analysis that only sends new or changed ingredients to the agent.
+
+    `analyse` returns a nutrient profile string in the same per-ingredient
+    dictionary format the NutritionalAnalysisAgent prompt asks for, followed
+    by the recipe totals, so the downstream goal and recipe evaluators are
+    unchanged.
+    """
+
+    def __init__(self, agent: NutritionalAnalysisAgent, cache: Optional[NutritionCache] = None):
+        self.agent = agent
+        self.cache = cache if cache is not None else default_nutrition_cache()
+
+    def plan(self, recipe: str) -> Optional[AnalysisPlan]:
+        """Diff `recipe` against the cache; None if its ingredients cannot be parsed."""
+        ingredients = parse_recipe_ingredients(recipe)
+        if not ingredients:
+            return None
+
+        keys, buckets, facts, missing = [], [], [], []
+        first_index: Dict[CacheKey, int] = {}
+        for index, item in enumerate(ingredients):
+            key, bucket = cache_key(item)
+            keys.append(key)
+            buckets.append(bucket)
+            facts.append(self.cache.get(key))
+            if facts[-1] is None and key not in first_index:
+                first_index[key] = index
+                missing.append(index)
+        return AnalysisPlan(ingredients, keys, buckets, facts, missing)
+
+    def analyse(self, recipe: str) -> str:
+        """Return the nutrient profile of `recipe`, analysing only cache misses."""
+        if not NUTRITION_CACHE_ENABLED:
+            return self.agent.analyse_nutrients(recipe)
+        plan = self.plan(recipe)
+        if plan is None:
+            NUTRITION_ANALYSES.labels(outcome="unparsed").inc()
+            return self.agent.analyse_nutrients(recipe)
+
+        results = {}
+        if plan.missing:
+            results = self.agent.analyse_ingredients(self._requests(plan))
+        if not self._store(plan, results):
+            NUTRITION_ANALYSES.labels(outcome="incomplete").inc()
+            return self.agent.analyse_nutrients(recipe)
+        return self._render(plan)
+
+    async def aanalyse(self, recipe: str) -> str:
+        """Async version of `analyse`."""
+        if not NUTRITION_CACHE_ENABLED:
+            return await self.agent.aanalyse_nutrients(recipe)
+        plan = self.plan(recipe)
+        if plan is None:
+            NUTRITION_ANALYSES.labels(outcome="unparsed").inc()
+            return await self.agent.aanalyse_nutrients(recipe)
+
+        results = {}
+        if plan.missing:
+            results = await self.agent.aanalyse_ingredients(self._requests(plan))
+        if not self._store(plan, results):
+            NUTRITION_ANALYSES.labels(outcome="incomplete").inc()
+            return await self.agent.aanalyse_nutrients(recipe)
+        return self._render(plan)
+
+    @staticmethod
+    def _requests(plan: AnalysisPlan) -> List[str]:
+        """Lines sent to the agent, one per missing key."""
+        return [describe(plan.ingredients[index], plan.buckets[index]) for index in plan.missing]
+
+    def _store(self, plan: AnalysisPlan, results: Dict[int, IngredientNutrients]) -> bool:
+        """Cache the agent's answers and fill in `plan.facts`; False if any answer is missing."""
+        if any(position not in results for position in range(len(plan.missing))):
+            return False
+
+        fresh: Dict[CacheKey, NutrientFacts] = {}
+        for position, index in enumerate(plan.missing):
+            answer = results[position]
+            facts = NutrientFacts(answer.calories, answer.protein_g, answer.carbs_g,
+                                  answer.fat_g, answer.sugar_g, answer.fiber_g)
+            fresh[plan.keys[index]] = facts
+            self.cache.put(plan.keys[index], facts)
+        for index, key in enumerate(plan.keys):
+            if plan.facts[index] is None:
+                plan.facts[index] = fresh[key]
+
+        if not plan.missing:
+            NUTRITION_ANALYSES.labels(outcome="full_hit").inc()
+        elif len(plan.missing) < len(set(plan.keys)):
+            NUTRITION_ANALYSES.labels(outcome="partial").inc()
+        else:
+            NUTRITION_ANALYSES.labels(outcome="miss").inc()
+        return True
+
+    @staticmethod
+    def _render(plan: AnalysisPlan) -> str:
+        """Scale each entry to its ingredient's amount and format the profile with totals."""
+        lines = []
+        total = ZERO_FACTS
+        for item, bucket, facts in zip(plan.ingredients, plan.buckets, plan.facts):
+            if bucket:
+                facts = facts.scaled(item.grams / bucket)
+            total = total.plus(facts)
+            if item.grams:
+                amount = f"{item.grams:.0f} g"
+            else:
+                amount = f"{item.quantity:g} {item.unit}" if item.quantity is not None else "to taste"
+            lines.append(f"- {item.name} ({amount}): {json.dumps(facts.as_dict())}")
+        lines.append(f"Total: {json.dumps(total.as_dict())}")
+        return "\n".join(lines)
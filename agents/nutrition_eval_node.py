@@ -4,24 +4,28 @@ notrient eval or LangGraph Workflow
 This module contains the node function for breakdown of nutritional content.
 """
 
+import logging
 import os
 from typing import Dict, Any
 from langchain_openai import ChatOpenAI
 from .agent_definitions import NutritionalAnalysisAgent
+from .nutrition_cache import IncrementalNutritionAnalyzer
 from .workflow_state import WorkflowState
 
+logger = logging.getLogger(__name__)
 
-def analyse_nutrition_node(state: WorkflowState) -> WorkflowState:
+
+def analyse_nutrition_node(state: WorkflowState) -> Dict[str, Any]:
     """
     Run the NutritionalAnalysisAgent on the current recipe text.
 
     Expects `state` to contain a `"recipe"` key with the full recipe string.
 
-    Adds two keys to the state:
-        • "nutrient_profile"  – string returned by the agent
+    Returns an update with two keys:
+        • "nutrient_profile"  – per-ingredient breakdown and totals
         • "step"              – set to "nutrients_analyzed"
     """
-    print("🥗  Running nutritional analysis ...")
+    logger.info("Running nutritional analysis", extra={"node": "analyse_nutrition"})
 
     # Initialize LLM and agent
     llm = ChatOpenAI(
@@ -32,10 +36,10 @@ def analyse_nutrition_node(state: WorkflowState) -> WorkflowState:
 
     nutrition_agent = NutritionalAnalysisAgent(llm)
 
-    nutrient_profile = nutrition_agent.analyse_nutrients(state["recipe"])
+    # Only ingredients missing from the shared cache are sent to the agent
+    nutrient_profile = IncrementalNutritionAnalyzer(nutrition_agent).analyse(state["recipe"])
 
     return {
-        **state,
         "nutrient_profile": nutrient_profile,
         "step": "nutrients_analyzed",
     }
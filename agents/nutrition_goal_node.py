@@ -0,0 +1,49 @@
+"""
+Fused Nutrition and Goal Evaluation Node for LangGraph Workflow
+
+This module contains the node function that replaces the adjacent
+analyse_nutrition -> evaluate_goal nodes when their fusion is enabled: the
+nutrient profile and the goal verdict come back from one structured LLM call.
+"""
+
+import logging
+import os
+from typing import Dict, Any
+from langchain_openai import ChatOpenAI
+from .agent_definitions import NutritionGoalAgent
+from .workflow_state import WorkflowState
+
+logger = logging.getLogger(__name__)
+
+
+def analyse_and_evaluate_goal_node(state: WorkflowState) -> Dict[str, Any]:
+    """
+    Node function for the fused nutrition analysis and goal evaluation.
+
+    Args:
+        state: Current workflow state containing the recipe, goal and weight
+
+    Returns:
+        State update with the nutrient profile and the "YES"/"NO" goal compliance
+    """
+    logger.info("Running nutritional analysis and goal check", extra={"node": "analyse_and_evaluate_goal"})
+
+    # Low temperature, as for the standalone nutrition analysis
+    llm = ChatOpenAI(
+        model="gpt-3.5-turbo",
+        temperature=0.01,
+        openai_api_key=os.getenv("OPENAI_API_KEY")
+    )
+
+    nutrition_goal_agent = NutritionGoalAgent(llm)
+
+    nutrient_profile, verdict = nutrition_goal_agent.analyse_and_evaluate(
+        state["recipe"], state["goal"], state["weight"]
+    )
+    logger.info("Goal verdict", extra={"verdict": verdict, "goal": state["goal"]})
+
+    return {
+        "nutrient_profile": nutrient_profile,
+        "goal_compliance": verdict,
+        "step": "goal_evaluated",
+    }
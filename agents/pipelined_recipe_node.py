@@ -0,0 +1,181 @@
+"""
+Pipelined Recipe Creation Node for LangGraph Workflow
+
+This module contains a node that replaces the create_recipe ->
+analyse_nutrition -> evaluate_goal chain when the workflow runs in pipelined
+mode. The recipe is streamed from the Recipe Creator agent; as soon as its
+ingredients section closes, nutrition analysis and goal evaluation start on a
+worker thread while the instructions and tips are still being generated.
+"""
+
+import contextvars
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from langchain_openai import ChatOpenAI
+from .agent_definitions import (
+    EvaluateNutritionalContent,
+    NutritionalAnalysisAgent,
+    NutritionGoalAgent,
+    RecipeCreatorAgent,
+)
+from .ingredient_parser import ingredient_section_bounds
+from .metrics import PIPELINE_OUTCOMES
+from .nutrition_cache import IncrementalNutritionAnalyzer
+from .recipe_creator_node import build_recipe_prompt
+from .recipe_index import retrieve_recipe
+from .recipe_patch import revise_recipe, should_revise
+from .tracing import upstream_call
+from .verbosity import mode_for
+from .workflow_state import WorkflowState
+
+logger = logging.getLogger(__name__)
+
+# Shared by all runs; each run submits at most one analysis job
+_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("PIPELINE_WORKERS", "8")),
+    thread_name_prefix="nutrition-pipeline",
+)
+
+
+def closed_ingredient_block(recipe: str) -> Optional[str]:
+    """Return the ingredients section of `recipe` once a following heading has closed it."""
+    bounds = ingredient_section_bounds(recipe)
+    if bounds is None or bounds[1] is None:
+        return None
+    start, end = bounds
+    return "Ingredients:\n" + recipe[start:end].strip()
+
+
+def final_ingredient_block(recipe: str) -> str:
+    """Return the ingredients section of a complete recipe, or the whole recipe without one."""
+    bounds = ingredient_section_bounds(recipe)
+    if bounds is None:
+        return recipe
+    start, end = bounds
+    return "Ingredients:\n" + recipe[start:end].strip()
+
+
+def _analyse_and_evaluate(ingredients: str, goal: str, weight: int, fused: bool,
+                          stale: Optional[threading.Event] = None) -> Optional[Tuple[str, str]]:
+    """
+    Run nutrition analysis on `ingredients`, then check the result against the goal.
+
+    Returns None without the goal check if `stale` is set once the analysis is
+    done: the node has restarted on the final ingredients and needs no verdict.
+    """
+    logger.info("Running nutritional analysis", extra={"node": "create_recipe_pipelined", "fused": fused})
+    if fused:
+        fused_llm = ChatOpenAI(
+            model="gpt-3.5-turbo",
+            temperature=0.01,
+            openai_api_key=os.getenv("OPENAI_API_KEY")
+        )
+        nutrient_profile, verdict = NutritionGoalAgent(fused_llm).analyse_and_evaluate(ingredients, goal, weight)
+        logger.info("Goal verdict", extra={"verdict": verdict, "goal": goal})
+        return nutrient_profile, verdict
+
+    analysis_llm = ChatOpenAI(
+        model="gpt-3.5-turbo",
+        temperature=0.01,
+        openai_api_key=os.getenv("OPENAI_API_KEY")
+    )
+    nutrient_profile = IncrementalNutritionAnalyzer(NutritionalAnalysisAgent(analysis_llm)).analyse(ingredients)
+    if stale is not None and stale.is_set():
+        return None
+
+    goal_llm = ChatOpenAI(
+        model="gpt-3.5-turbo",
+        temperature=0.7,
+        openai_api_key=os.getenv("OPENAI_API_KEY")
+    )
+    verdict = EvaluateNutritionalContent(goal_llm).evaluate(goal, nutrient_profile, weight)
+    logger.info("Goal verdict", extra={"verdict": verdict, "goal": goal})
+    return nutrient_profile, verdict
+
+
+def create_recipe_pipelined_node(state: WorkflowState, fused: bool = False) -> Dict[str, Any]:
+    """
+    Node function for streamed recipe creation with overlapped nutrition analysis.
+
+    The ingredients section is checked as chunks arrive. Once it is closed by
+    the next heading, `_analyse_and_evaluate` is submitted to the worker pool
+    and the stream keeps going. When the recipe is complete, the analysed block
+    is compared with the final one: if the section never closed early, or it
+    changed afterwards, the analysis is (re)run on the final block, so the
+    nutrient profile always describes the ingredients actually returned. First
+    attempts are answered from the recipe corpus when it has a good match, and
+    goal retries revise the previous recipe with a patch when possible.
+
+    Args:
+        state: Current workflow state containing user input and goal
+        fused: Get the nutrient profile and verdict from one structured call
+            (the "nutrition_verdict" fusion)
+
+    Returns:
+        State update with the recipe, nutrient profile and goal compliance
+    """
+    logger.info("Streaming recipe", extra={"node": "create_recipe_pipelined"})
+
+    llm = ChatOpenAI(
+        model="gpt-3.5-turbo",
+        temperature=0.7,
+        openai_api_key=os.getenv("OPENAI_API_KEY")
+    )
+    recipe_creator = RecipeCreatorAgent(llm, mode_for(state, "recipe"))
+
+    # A patched retry or a corpus recipe is complete at once: there is no stream to overlap with
+    ready = revise_recipe(recipe_creator, state) if should_revise(state) else retrieve_recipe(recipe_creator, state)
+    if ready is not None:
+        nutrient_profile, verdict = _analyse_and_evaluate(
+            final_ingredient_block(ready), state["goal"], state["weight"], fused
+        )
+        return {
+            "recipe": ready,
+            "nutrient_profile": nutrient_profile,
+            "goal_compliance": verdict,
+            "step": "goal_evaluated",
+        }
+
+    # The worker runs in this node's context so its spans nest under the node
+    node_context = contextvars.copy_context()
+    analysed_block: Optional[str] = None
+    analysis: Optional[Future] = None
+    stale = threading.Event()
+    recipe = ""
+
+    prompt = build_recipe_prompt(state)
+    with upstream_call("openai", "stream_recipe"):
+        for chunk in recipe_creator.stream_recipe(prompt, state.get("conversation_context", "")):
+            recipe += chunk
+            # A closing heading starts on a new line, so only re-check near one
+            if analysis is None and "\n" in recipe[-len(chunk) - 64:]:
+                analysed_block = closed_ingredient_block(recipe)
+                if analysed_block is not None:
+                    analysis = _EXECUTOR.submit(
+                        node_context.run, _analyse_and_evaluate,
+                        analysed_block, state["goal"], state["weight"], fused, stale,
+                    )
+
+    final_block = final_ingredient_block(recipe)
+    if analysis is not None and analysed_block == final_block:
+        PIPELINE_OUTCOMES.labels(outcome="overlapped").inc()
+        nutrient_profile, verdict = analysis.result()
+    else:
+        # The section closed late or changed: analyse the final text instead,
+        # dropping the early job (or its goal check, if it is already running)
+        PIPELINE_OUTCOMES.labels(outcome="restarted" if analysis is not None else "sequential").inc()
+        if analysis is not None:
+            stale.set()
+            analysis.cancel()
+        nutrient_profile, verdict = _analyse_and_evaluate(final_block, state["goal"], state["weight"], fused)
+
+    return {
+        "recipe": recipe,
+        "nutrient_profile": nutrient_profile,
+        "goal_compliance": verdict,
+        "step": "goal_evaluated",
+    }
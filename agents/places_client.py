@@ -0,0 +1,228 @@
+"""
+Async Google Places Client
+
+The synchronous `googlemaps.Client` issues one blocking request at a time. This
+module talks to the Places Text Search endpoint directly with a pooled
+`httpx.AsyncClient`, so one restaurant lookup can run a query per cuisine
+keyword ("Italian pasta restaurant", "risotto restaurant", ...) concurrently
+and merge the results, deduplicated by place id.
+
+Clients are shared per API key and live on the workflow's background event
+loop (see `concurrency`), so their connections are reused across requests.
+PLACES_MAX_CONCURRENCY bounds the in-flight requests per client and
+PLACES_MAX_CONNECTIONS the pool size. PLACES_BASE_URL points the client at
+another server, e.g. a local stub. PLACES_BACKEND=sync keeps the single
+`googlemaps` query instead.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from .tracing import upstream_call
+
+logger = logging.getLogger(__name__)
+
+PLACES_BACKEND = os.getenv("PLACES_BACKEND", "async")
+PLACES_BASE_URL = os.getenv("PLACES_BASE_URL", "https://maps.googleapis.com/maps/api/place")
+PLACES_MAX_CONCURRENCY = int(os.getenv("PLACES_MAX_CONCURRENCY", "4"))
+PLACES_MAX_CONNECTIONS = int(os.getenv("PLACES_MAX_CONNECTIONS", "10"))
+PLACES_TIMEOUT_S = float(os.getenv("PLACES_TIMEOUT_S", "10"))
+
+# Statuses that carry a (possibly empty) result list
+_OK_STATUSES = {"OK", "ZERO_RESULTS"}
+
+
+class PlacesApiError(Exception):
+    """The Places API answered with an error status (REQUEST_DENIED, OVER_QUERY_LIMIT, ...)."""
+
+    def __init__(self, status: str, message: str = ""):
+        super().__init__(f"{status}: {message}" if message else status)
+        self.status = status
+
+
+def keyword_queries(keywords: str, max_queries: int = 3) -> List[str]:
+    """
+    Turn a comma-separated keyword string into one text search query per keyword.
+
+    Args:
+        keywords: Keywords as returned by NearbyRestaurantsAgent.extract_keywords
+        max_queries: Maximum number of queries to issue
+
+    Returns:
+        Queries such as ["Italian pasta restaurant", "risotto restaurant"]
+    """
+    terms = [term.strip() for term in keywords.split(",") if term.strip()]
+    if not terms:
+        return ["restaurant"]
+    return [f"{term} restaurant" for term in terms[:max_queries]]
+
+
+def merge_results(result_lists: Sequence[List[Dict[str, Any]]], max_results: int) -> List[Dict[str, Any]]:
+    """
+    Merge ranked result lists, deduplicated by place id.
+
+    Lists are interleaved by rank (the best result of every query first), so
+    each keyword contributes its top matches before any query's tail.
+
+    Args:
+        result_lists: Place results of each query, best first
+        max_results: Maximum number of places to return
+
+    Returns:
+        Merged place results
+    """
+    merged: List[Dict[str, Any]] = []
+    seen = set()
+    for rank in range(max((len(results) for results in result_lists), default=0)):
+        for results in result_lists:
+            if rank >= len(results):
+                continue
+            place = results[rank]
+            place_id = place.get("place_id") or (place.get("name"), place.get("formatted_address"))
+            if place_id in seen:
+                continue
+            seen.add(place_id)
+            merged.append(place)
+            if len(merged) == max_results:
+                return merged
+    return merged
+
+
+class AsyncPlacesClient:
+    """Pooled, concurrency-bounded client for the Places Text Search endpoint."""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        max_connections: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.api_key = api_key
+        self.base_url = (base_url or PLACES_BASE_URL).rstrip("/")
+        self.max_concurrency = max_concurrency or PLACES_MAX_CONCURRENCY
+        self.max_connections = max_connections or PLACES_MAX_CONNECTIONS
+        self.timeout = PLACES_TIMEOUT_S if timeout is None else timeout
+        # Created on first use, inside the event loop that will own them
+        self._http: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _session(self) -> Tuple[httpx.AsyncClient, asyncio.Semaphore]:
+        """Return the pooled HTTP client and the concurrency bound, creating them once."""
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._http, self._semaphore
+
+    async def text_search(
+        self,
+        query: str,
+        location: Optional[str] = None,
+        radius: Optional[int] = None,
+        place_type: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Run one text search and return its place results, best first.
+
+        Args:
+            query: Free-text query, e.g. "Italian pasta restaurant"
+            location: Bias location ("lat,lng" or a place name)
+            radius: Bias radius in meters
+            place_type: Restrict results to a place type, e.g. "restaurant"
+
+        Returns:
+            The `results` list of the response
+
+        Raises:
+            PlacesApiError: The API answered with an error status
+            httpx.HTTPError: The request failed or timed out
+        """
+        params: Dict[str, Any] = {"query": query, "key": self.api_key}
+        if location:
+            params["location"] = location
+        if radius:
+            params["radius"] = radius
+        if place_type:
+            params["type"] = place_type
+
+        http, semaphore = self._session()
+        async with semaphore:
+            with upstream_call("google_places", "text_search"):
+                response = await http.get("/textsearch/json", params=params)
+                response.raise_for_status()
+                body = response.json()
+                status = body.get("status", "OK")
+                if status not in _OK_STATUSES:
+                    raise PlacesApiError(status, body.get("error_message", ""))
+        return body.get("results", [])
+
+    async def search_many(
+        self,
+        queries: Sequence[str],
+        location: Optional[str] = None,
+        radius: Optional[int] = None,
+        place_type: Optional[str] = None,
+        max_results: int = 5,
+    ) -> List[Dict[str, Any]]:
+        """
+        Run several text searches concurrently and merge their results.
+
+        A query that fails is logged and left out; the lookup only fails when
+        every query does.
+
+        Args:
+            queries: Text search queries, most important first
+            location: Bias location shared by every query
+            radius: Bias radius in meters
+            place_type: Place type shared by every query
+            max_results: Maximum number of places to return
+
+        Returns:
+            Merged place results, deduplicated by place id
+        """
+        outcomes = await asyncio.gather(
+            *(self.text_search(query, location, radius, place_type) for query in queries),
+            return_exceptions=True,
+        )
+        failures = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+        if failures and len(failures) == len(outcomes):
+            raise failures[0]
+        for query, outcome in zip(queries, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.warning("Places query failed", extra={"query": query, "error": str(outcome)})
+        return merge_results([outcome for outcome in outcomes if not isinstance(outcome, BaseException)],
+                             max_results)
+
+    async def aclose(self) -> None:
+        """Close the pooled connections."""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+            self._semaphore = None
+
+
+_clients: Dict[Tuple[str, str], AsyncPlacesClient] = {}
+_clients_lock = threading.Lock()
+
+
+def shared_places_client(api_key: str, base_url: Optional[str] = None) -> AsyncPlacesClient:
+    """Return the process-wide client for `api_key` (and `base_url`), creating it on first use."""
+    key = (api_key, (base_url or PLACES_BASE_URL).rstrip("/"))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = AsyncPlacesClient(api_key, base_url)
+        return client
@@ -0,0 +1,248 @@
+"""
+On-Demand Per-Request Profiling for the Recipe Workflow
+
+This module profiles individual workflow runs and writes one capture per run
+to PROFILE_DIR. A run is profiled when the caller asks for it (the /chat
+`X-Profile-Token` header matching PROFILE_TOKEN) or when it is picked by the
+PROFILE_SAMPLE_RATE lottery, so the hook can stay on at a low rate in
+production.
+
+Two profilers are available (PROFILE_MODE):
+- "sampling" (default): a background thread samples the stacks of every thread
+  working on the run's trace every PROFILE_INTERVAL_MS, including LangGraph's
+  branch threads and the pipelined/speculative workers. Writes collapsed
+  stacks (`<id>.folded`) that flamegraph.pl and speedscope read directly.
+- "cprofile": deterministic cProfile of the calling thread and of every
+  worker thread while it runs a span of the run's trace (a profiler is
+  started in the worker through `tracing.watch_trace_threads`, and the
+  stats are merged). Work a worker does outside a span is not captured.
+  Writes a pstats file (`<id>.prof`) for snakeviz / `python -m pstats`.
+
+Each capture also gets a `<id>.json` summary, which `list_profiles` reads.
+"""
+
+import cProfile
+import hmac
+import json
+import logging
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from .tracing import thread_trace_ids, watch_trace_threads
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MODE = os.getenv("PROFILE_MODE", "sampling")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "200"))
+
+
+def token_allows(token: Optional[str]) -> bool:
+    """Return True if `token` grants access to profiling (requires PROFILE_TOKEN to be set)."""
+    if not PROFILE_TOKEN or token is None:
+        return False
+    return hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode())
+
+
+def should_profile(requested: bool = False) -> bool:
+    """Decide whether to profile a run: on request, or with PROFILE_SAMPLE_RATE probability."""
+    return requested or (PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE)
+
+
+def _frame_label(code) -> str:
+    """Label a stack frame as `function (file:first line)`."""
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class WorkerProfiles:
+    """cProfile profilers of the worker threads of one run, merged into its stats at the end."""
+
+    def __init__(self):
+        self.profiles: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def enter(self):
+        """Start profiling the current (worker) thread; return the callback that stops it."""
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+        def leave() -> None:
+            profiler.disable()
+            with self._lock:
+                self.profiles.append(profiler)
+        return leave
+
+    def merge(self, stats: pstats.Stats) -> None:
+        """Add the finished worker profiles to `stats`."""
+        with self._lock:
+            profiles = list(self.profiles)
+        for profiler in profiles:
+            stats.add(profiler)
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of the threads working on one trace.
+
+    Threads are matched through `tracing.thread_trace_ids`, so concurrent
+    requests on other threads do not pollute the profile.
+    """
+
+    def __init__(self, trace_id: str, interval_ms: float = PROFILE_INTERVAL_MS):
+        self.trace_id = trace_id
+        self.interval = interval_ms / 1000
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self) -> None:
+        """Start sampling in the background."""
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and wait for the sampler thread."""
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        names = {}
+        while not self._stop.wait(self.interval):
+            owners = thread_trace_ids()
+            frames = sys._current_frames()
+            self.samples += 1
+            for ident, frame in frames.items():
+                if owners.get(ident) != self.trace_id:
+                    continue
+                if ident not in names:
+                    names[ident] = next(
+                        (t.name for t in threading.enumerate() if t.ident == ident), str(ident)
+                    )
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(names[ident])
+                self.stacks[";".join(reversed(labels))] += 1
+
+    def write(self, path: str) -> None:
+        """Write the samples as collapsed stacks (`stack count` per line)."""
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def top_functions(self, limit: int = 15) -> List[Dict[str, Any]]:
+        """Return the functions with the most samples at the top of the stack."""
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return [{"function": name, "samples": count} for name, count in leaves.most_common(limit)]
+
+
+@contextmanager
+def profile_run(trace_id: str, reason: str, mode: str = PROFILE_MODE) -> Iterator[None]:
+    """
+    Profile the enclosed block and write a capture to PROFILE_DIR.
+
+    Args:
+        trace_id: Trace id of the run (names the capture and selects threads)
+        reason: Why the run is profiled ("requested" or "sampled")
+        mode: "sampling" or "cprofile"
+    """
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    capture_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{trace_id[:8]}"
+    started = time.time()
+    start = time.perf_counter()
+
+    workers = WorkerProfiles()
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    else:
+        profiler = SamplingProfiler(trace_id)
+        profiler.start()
+
+    try:
+        if mode == "cprofile":
+            with watch_trace_threads(trace_id, workers.enter):
+                yield
+        else:
+            yield
+    finally:
+        duration = time.perf_counter() - start
+        summary: Dict[str, Any] = {
+            "id": capture_id,
+            "trace_id": trace_id,
+            "mode": mode,
+            "reason": reason,
+            "started": started,
+            "duration_ms": round(duration * 1000, 1),
+        }
+        if mode == "cprofile":
+            profiler.disable()
+            path = os.path.join(PROFILE_DIR, f"{capture_id}.prof")
+            merged = pstats.Stats(profiler)
+            workers.merge(merged)
+            merged.dump_stats(path)
+            summary["worker_threads"] = len(workers.profiles)
+            top = sorted(merged.stats.items(), key=lambda item: item[1][3], reverse=True)[:15]
+            summary["top"] = [
+                {"function": f"{func[2]} ({os.path.basename(func[0])}:{func[1]})",
+                 "cumulative_s": round(values[3], 4)}
+                for func, values in top
+            ]
+        else:
+            profiler.stop()
+            path = os.path.join(PROFILE_DIR, f"{capture_id}.folded")
+            profiler.write(path)
+            summary["samples"] = profiler.samples
+            summary["top"] = profiler.top_functions()
+        summary["file"] = os.path.basename(path)
+
+        with open(os.path.join(PROFILE_DIR, f"{capture_id}.json"), "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        _prune(PROFILE_KEEP)
+        logger.info("Profile written", extra={"path": path, "duration_ms": summary["duration_ms"]})
+
+
+def list_profiles(limit: int = 50) -> List[Dict[str, Any]]:
+    """Return the summaries of the most recent captures, newest first."""
+    if not os.path.isdir(PROFILE_DIR):
+        return []
+    names = sorted((n for n in os.listdir(PROFILE_DIR) if n.endswith(".json")), reverse=True)
+    profiles = []
+    for name in names[:limit]:
+        with open(os.path.join(PROFILE_DIR, name), "r", encoding="utf-8") as f:
+            summary = json.load(f)
+        summary.pop("top", None)
+        profiles.append(summary)
+    return profiles
+
+
+def profile_path(file_name: str) -> Optional[str]:
+    """Return the path of a capture file in PROFILE_DIR, or None if it does not exist."""
+    if os.path.basename(file_name) != file_name:
+        return None
+    path = os.path.join(PROFILE_DIR, file_name)
+    return path if os.path.isfile(path) else None
+
+
+def _prune(keep: int) -> None:
+    """Delete all but the `keep` most recent captures."""
+    summaries = sorted((n for n in os.listdir(PROFILE_DIR) if n.endswith(".json")), reverse=True)
+    for name in summaries[keep:]:
+        capture_id = name[:-len(".json")]
+        for suffix in (".json", ".folded", ".prof"):
+            path = os.path.join(PROFILE_DIR, capture_id + suffix)
+            if os.path.exists(path):
+                os.remove(path)
@@ -4,28 +4,47 @@ Recipe Creator Node for LangGraph Workflow
 This module contains the node function for recipe creation step in the workflow.
 """
 
+import logging
 import os
 from typing import Dict, Any
 from langchain_openai import ChatOpenAI
 from .agent_definitions import RecipeCreatorAgent
+from .recipe_index import retrieve_recipe
+from .recipe_patch import revise_recipe, should_revise
+from .verbosity import mode_for
 from .workflow_state import WorkflowState
 
+logger = logging.getLogger(__name__)
 
-def create_recipe_node(state: WorkflowState) -> WorkflowState:
+
+def build_recipe_prompt(state: WorkflowState) -> str:
+    """Return the user request, with a note to adjust the recipe when it missed the goal."""
+    user_prompt = state["user_input"]
+    if state.get("goal_compliance") == "NO" and state["goal"]:
+        user_prompt += (
+            f"\n\nNOTE: The previous recipe did not satisfy my goal of *{state['goal']}*. "
+            "Please adjust ingredients, macros, and portion sizes to meet this goal."
+        )
+    return user_prompt
+
+
+def create_recipe_node(state: WorkflowState) -> Dict[str, Any]:
     """
     Node function for recipe creation.
 
     This function handles the first step of the workflow where a recipe is created
     based on the user's input. It uses the RecipeCreatorAgent to generate a detailed
-    recipe with ingredients, instructions, and cooking information.
+    recipe with ingredients, instructions, and cooking information. A first
+    attempt is answered from the recipe corpus when it has a good match; when
+    the previous recipe missed the goal, it is revised with a patch if possible.
 
     Args:
         state: Current workflow state containing user input
 
     Returns:
-        Updated state with generated recipe
+        State update with the generated recipe
     """
-    print(f"🍳 Recipe Creator is creating a recipe...")
+    logger.info("Creating recipe", extra={"node": "create_recipe", "retry": state.get("goal_compliance") == "NO"})
 
     # Initialize LLM and agent
     llm = ChatOpenAI(
@@ -33,21 +52,20 @@ def create_recipe_node(state: WorkflowState) -> WorkflowState:
         temperature=0.7,
         openai_api_key=os.getenv("OPENAI_API_KEY")
     )
-    user_prompt = state["user_input"]
-    if state["goal_compliance"] == "NO" and state["goal"]:
-            user_prompt += (
-            f"\n\nNOTE: The previous recipe did not satisfy my goal of *{state['goal']}*. "
-            "Please adjust ingredients, macros, and portion sizes to meet this goal."
-        )
-
+    recipe_creator = RecipeCreatorAgent(llm, mode_for(state, "recipe"))
 
-    recipe_creator = RecipeCreatorAgent(llm)
+    # On a goal retry, patch the previous recipe; otherwise try the recipe corpus first
+    ready = revise_recipe(recipe_creator, state) if should_revise(state) else retrieve_recipe(recipe_creator, state)
+    if ready is not None:
+        return {
+            "recipe": ready,
+            "step": "recipe_created"
+        }
 
-    # Generate the recipe
-    recipe = recipe_creator.create_recipe(state["user_input"])
+    # Generate the recipe, personalised with the bounded conversation context
+    recipe = recipe_creator.create_recipe(build_recipe_prompt(state), state.get("conversation_context", ""))
 
     return {
-        **state,
         "recipe": recipe,
         "step": "recipe_created"
     }
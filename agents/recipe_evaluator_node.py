@@ -4,43 +4,61 @@ Recipe Evaluator Node for LangGraph Workflow
 This module contains the node function for recipe evaluation step in the workflow.
 """
 
+import logging
 import os
 from typing import Dict, Any
 from langchain_openai import ChatOpenAI
+from openai import APITimeoutError
 from .agent_definitions import RecipeEvaluatorAgent
+from .deadlines import has_budget, omit, request_timeout
+from .verbosity import mode_for
 from .workflow_state import WorkflowState
 
+logger = logging.getLogger(__name__)
 
-def evaluate_recipe_node(state: WorkflowState) -> WorkflowState:
+
+def evaluate_recipe_node(state: WorkflowState) -> Dict[str, Any]:
     """
     Node function for recipe evaluation.
 
     This function handles the second step of the workflow where the generated recipe
     is evaluated for quality, safety, and correctness. It uses the RecipeEvaluatorAgent
-    to provide professional feedback and suggestions for improvement.
+    to provide professional feedback and suggestions for improvement. The review
+    is optional: it is skipped (and cut off) when the request deadline is near.
 
     Args:
         state: Current workflow state containing the generated recipe
 
     Returns:
-        Updated state with recipe evaluation
+        State update with the recipe evaluation
     """
-    print(f"📋 Recipe Evaluator is evaluating the recipe...")
+    # Optional section: skip it rather than answer late
+    if not has_budget(state, "evaluation"):
+        logger.info("Skipping recipe evaluation, deadline too close", extra={"node": "evaluate_recipe"})
+        return {**omit("evaluation"), "evaluation": "", "step": "recipe_evaluated"}
+
+    logger.info("Evaluating recipe", extra={"node": "evaluate_recipe"})
 
-    # Initialize LLM and agent
+    # Initialize LLM and agent; with a deadline the request may not outlive it
+    timeout = request_timeout(state)
     llm = ChatOpenAI(
         model="gpt-3.5-turbo",
         temperature=0.7,
-        openai_api_key=os.getenv("OPENAI_API_KEY")
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        timeout=timeout,
+        max_retries=2 if timeout is None else 0,
     )
 
-    recipe_evaluator = RecipeEvaluatorAgent(llm)
+    recipe_evaluator = RecipeEvaluatorAgent(llm, mode_for(state, "evaluation"))
 
     # Evaluate the recipe
-    evaluation = recipe_evaluator.evaluate_recipe(state["recipe"],state["nutrition_profile"], state["goal"])
+    try:
+        evaluation = recipe_evaluator.evaluate_recipe(state["recipe"],state["nutrient_profile"], state["goal"])
+    except APITimeoutError:
+        logger.warning("Recipe evaluation ran into the deadline", extra={"node": "evaluate_recipe"})
+        return {**omit("evaluation"), "evaluation": "", "step": "recipe_evaluated"}
 
     return {
-        **state,
         "evaluation": evaluation,
         "step": "recipe_evaluated"
     }
@@ -0,0 +1,445 @@
+"""
+Retrieval-First Recipe Creation over a Local Recipe Corpus
+
+Common requests ("chicken tikka masala", "vegan black bean tacos") already
+have a good recipe in the corpus, so generating one with the LLM is wasted
+latency and tokens. This module indexes a JSONL recipe corpus (RECIPE_CORPUS,
+the bundled data/recipes.jsonl by default) with an inverted index and BM25
+ranking, and lets the recipe nodes query it before generating:
+
+- a request matching fewer than RETRIEVAL_MIN_TERMS terms and diet filters
+  of the best recipe ("chicken") is too vague to pick one, and is generated;
+- a good match (RETRIEVAL_ADAPT_COVERAGE of the request's term weight) is
+  lightly adapted with a structured patch (see `recipe_patch`) to the
+  request, the user's dietary goal and the conversation context, and served
+  as is if the patch has no edits. Every request carries a goal (the session
+  default at least) and corpus recipes are not tagged with one, so even a
+  match on every term goes through this adaptation call;
+- anything else falls back to generation.
+
+Each corpus line is a JSON object with at least "title" and "text" (the
+recipe in the RecipeCreatorAgent format); "cuisine", "dish", "keywords",
+"diets" and "ingredients" ([{"name": ...}, ...]) are indexed when present.
+Requests are parsed into search terms, diet filters ("vegan", "gluten-free")
+and excluded ingredients ("without mushrooms"); filters are hard, terms are
+ranked.
+
+Postings are ordered by BM25 impact and each term contributes at most
+RETRIEVAL_MAX_POSTINGS of them while collecting candidates; the best
+candidates are then rescored exactly, which keeps queries over 100k recipes
+in single-digit milliseconds. Recipe texts stay on disk and are read by
+offset. Set RECIPE_RETRIEVAL=0 to always generate.
+"""
+
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import threading
+from array import array
+from collections import Counter
+from functools import lru_cache
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from .agent_definitions import RecipeCreatorAgent
+from .ingredient_parser import parse_recipe_ingredients
+from .metrics import RECIPE_RETRIEVALS
+from .recipe_patch import apply_patch
+from .workflow_state import WorkflowState
+
+logger = logging.getLogger(__name__)
+
+RECIPE_RETRIEVAL = os.getenv("RECIPE_RETRIEVAL", "1") != "0"
+RECIPE_CORPUS = os.getenv("RECIPE_CORPUS", str(Path(__file__).resolve().parent.parent / "data" / "recipes.jsonl"))
+RETRIEVAL_ADAPT_COVERAGE = float(os.getenv("RETRIEVAL_ADAPT_COVERAGE", "0.6"))
+RETRIEVAL_MIN_TERMS = int(os.getenv("RETRIEVAL_MIN_TERMS", "2"))
+RETRIEVAL_MAX_POSTINGS = int(os.getenv("RETRIEVAL_MAX_POSTINGS", "4000"))
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+# Term frequency weight of each corpus field
+FIELD_WEIGHTS: Dict[str, float] = {
+    "title": 3.0,
+    "dish": 2.0,
+    "cuisine": 2.0,
+    "keywords": 1.0,
+    "diets": 1.0,
+    "ingredients": 1.0,
+}
+
+# Words that carry no retrieval signal in a recipe request
+STOPWORDS: FrozenSet[str] = frozenset("""
+    a an and or the of for to in on with at by from as is are be it its this that
+    i me my we our you your please can could would like want need make give show
+    cook recipe recipes dish dishes meal meals something some any idea ideas
+    dinner lunch breakfast tonight today quick easy simple healthy tasty delicious good
+    style homemade classic best really very without
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z]+")
+_DIET_RE = re.compile(
+    r"\b(vegan|vegetarian|pescatarian|keto|paleo|(?:gluten|dairy|nut|egg|soy)[\s-]free)\b"
+)
+_EXCLUDE_RE = re.compile(
+    r"\b(?:without|no|hold the)\s+([a-z]+(?:\s+[a-z]+){0,3}?)(?=\s*(?:[,.;!?)]|\band\b|\bor\b|\bplease\b|$))"
+)
+
+
+@lru_cache(maxsize=65536)
+def _stem(word: str) -> str:
+    """Crude plural folding, so "tacos" matches "taco" and "tomatoes" "tomato"."""
+    if len(word) <= 3:
+        return word
+    if word.endswith("oes"):
+        return word[:-2]
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Return the stemmed, stopword-free terms of `text`."""
+    return [_stem(word) for word in _TOKEN_RE.findall(text.lower()) if word not in STOPWORDS]
+
+
+def _normalize_diet(diet: str) -> str:
+    """Map "Gluten Free" and "gluten-free" to the same label."""
+    return "-".join(diet.lower().replace("-", " ").split())
+
+
+class RecipeQuery(NamedTuple):
+    """
+    A recipe request parsed for retrieval.
+
+    Attributes:
+        terms: Ranked search terms
+        diets: Diets every result must be labelled with, e.g. "gluten-free"
+        exclude: Ingredients (as term tuples) no result may contain
+    """
+    terms: Tuple[str, ...]
+    diets: FrozenSet[str]
+    exclude: Tuple[Tuple[str, ...], ...]
+
+
+def parse_query(text: str) -> RecipeQuery:
+    """Split a free-text request into search terms, diet filters and excluded ingredients."""
+    lowered = text.lower()
+    diets = frozenset(_normalize_diet(match) for match in _DIET_RE.findall(lowered))
+    exclude = tuple(tuple(tokenize(phrase)) for phrase in _EXCLUDE_RE.findall(lowered))
+    # Filters are not ranked: every result carries the diets, and excluded
+    # ingredients must not pull recipes that contain them up the ranking
+    lowered = _EXCLUDE_RE.sub(" ", _DIET_RE.sub(" ", lowered))
+    return RecipeQuery(tuple(dict.fromkeys(tokenize(lowered))), diets, tuple(phrase for phrase in exclude if phrase))
+
+
+class RecipeDocument(NamedTuple):
+    """
+    One indexed corpus recipe; its text is read from the corpus on demand.
+
+    Attributes:
+        recipe_id: "id" of the corpus record (its line number when absent)
+        title: Recipe title
+        diets: Normalised diet labels
+        offset: Byte offset of the record in the corpus file
+        length: Field-weighted number of terms (the BM25 document length)
+        terms: Term ids in the recipe, sorted
+        tfs: Field-weighted frequency of each term in `terms`
+        ingredient_terms: Term ids that occur in ingredient names
+    """
+    recipe_id: str
+    title: str
+    diets: FrozenSet[str]
+    offset: int
+    length: float
+    terms: array
+    tfs: array
+    ingredient_terms: array
+
+
+class SearchHit(NamedTuple):
+    """
+    A ranked search result.
+
+    Attributes:
+        doc: Position of the document in the index
+        recipe_id: Corpus id of the recipe
+        title: Recipe title
+        score: BM25 score
+        coverage: Share of the query's IDF weight found in the recipe (0-1)
+        matched: Number of query terms found in the recipe
+    """
+    doc: int
+    recipe_id: str
+    title: str
+    score: float
+    coverage: float
+    matched: int
+
+
+class RecipeIndex:
+    """Inverted BM25 index over a JSONL recipe corpus."""
+
+    def __init__(self, path: str, max_postings: Optional[int] = None):
+        self.path = path
+        self.max_postings = max_postings or RETRIEVAL_MAX_POSTINGS
+        self.documents: List[RecipeDocument] = []
+        self._term_ids: Dict[str, int] = {}
+        self._idf: List[float] = []
+        # Per term: documents and their BM25 impacts, highest impact first
+        self._posting_docs: List[array] = []
+        self._posting_impacts: List[array] = []
+        self._avg_length = 0.0
+        self._diet_sets: Dict[FrozenSet[str], FrozenSet[str]] = {}
+        self._build()
+
+    @classmethod
+    def build(cls, path: str, max_postings: Optional[int] = None) -> "RecipeIndex":
+        """Index the corpus at `path`."""
+        return cls(path, max_postings)
+
+    def _fields(self, record: Dict) -> Iterable[Tuple[str, str]]:
+        """Yield (field, text) pairs of a corpus record."""
+        yield "title", record.get("title", "")
+        yield "cuisine", record.get("cuisine") or ""
+        yield "dish", record.get("dish") or ""
+        yield "keywords", " ".join(record.get("keywords") or ())
+        yield "diets", " ".join(record.get("diets") or ())
+        names = [item.get("name", "") for item in record.get("ingredients") or ()]
+        if not names:
+            names = [parsed.name for parsed in parse_recipe_ingredients(record.get("text", ""))]
+        yield "ingredients", " ".join(names)
+
+    def _build(self) -> None:
+        """Read the corpus and build the postings."""
+        term_ids = self._term_ids
+        # Per term: documents and raw term frequencies, until the average length is known
+        docs: List[array] = []
+        tfs: List[array] = []
+        total_length = 0.0
+        with open(self.path, "rb") as corpus:
+            offset = 0
+            for line_number, line in enumerate(corpus):
+                line_offset, offset = offset, offset + len(line)
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                counts: Counter = Counter()
+                ingredient_terms = set()
+                for field, text in self._fields(record):
+                    weight = FIELD_WEIGHTS[field]
+                    for term in tokenize(text):
+                        term_id = term_ids.setdefault(term, len(term_ids))
+                        counts[term_id] += weight
+                        if field == "ingredients":
+                            ingredient_terms.add(term_id)
+                while len(docs) < len(term_ids):
+                    docs.append(array("i"))
+                    tfs.append(array("f"))
+
+                doc = len(self.documents)
+                terms = sorted(counts)
+                for term_id in terms:
+                    docs[term_id].append(doc)
+                    tfs[term_id].append(counts[term_id])
+                length = sum(counts.values())
+                total_length += length
+                diets = frozenset(_normalize_diet(diet) for diet in record.get("diets") or ())
+                self.documents.append(RecipeDocument(
+                    recipe_id=str(record.get("id", line_number)),
+                    title=record.get("title", ""),
+                    diets=self._diet_sets.setdefault(diets, diets),
+                    offset=line_offset,
+                    length=length,
+                    terms=array("i", terms),
+                    tfs=array("f", (counts[term_id] for term_id in terms)),
+                    ingredient_terms=array("i", sorted(ingredient_terms)),
+                ))
+
+        count = len(self.documents)
+        self._avg_length = total_length / count if count else 0.0
+        # BM25 length normalisation of every document, shared by all terms
+        norms = [K1 * (1 - B + B * document.length / self._avg_length) for document in self.documents]
+        for term_docs, term_tfs in zip(docs, tfs):
+            idf = math.log(1 + (count - len(term_docs) + 0.5) / (len(term_docs) + 0.5))
+            self._idf.append(idf)
+            scale = idf * (K1 + 1)
+            impacts = [scale * tf / (tf + norms[doc]) for doc, tf in zip(term_docs, term_tfs)]
+            order = sorted(range(len(impacts)), key=impacts.__getitem__, reverse=True)
+            self._posting_docs.append(array("i", [term_docs[i] for i in order]))
+            self._posting_impacts.append(array("f", [impacts[i] for i in order]))
+        logger.info("Recipe index built", extra={"recipes": count, "terms": len(term_ids)})
+
+    def _impact(self, idf: float, tf: float, length: float) -> float:
+        """BM25 contribution of one term to one document."""
+        return idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / self._avg_length))
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def _rescore(self, doc: int, term_ids: List[int], weights: List[float],
+                 total: float) -> Tuple[float, float, int]:
+        """Return the exact (BM25 score, coverage, matched terms) of `doc` for the query terms."""
+        document = self.documents[doc]
+        tfs = dict(zip(document.terms, document.tfs))
+        score = matched = 0.0
+        count = 0
+        for term_id, weight in zip(term_ids, weights):
+            tf = tfs.get(term_id)
+            if tf is not None:
+                score += self._impact(self._idf[term_id], tf, document.length)
+                matched += weight
+                count += 1
+        return score, round(matched / total, 6), count
+
+    def _allowed(self, doc: int, query: RecipeQuery, excluded: List[Tuple[int, ...]]) -> bool:
+        """True if `doc` carries every requested diet and none of the excluded ingredients."""
+        document = self.documents[doc]
+        if not query.diets <= document.diets:
+            return False
+        return not any(all(term in document.ingredient_terms for term in phrase) for phrase in excluded)
+
+    def search(self, query: RecipeQuery, k: int = 5) -> List[SearchHit]:
+        """
+        Return the `k` best recipes for `query`.
+
+        Args:
+            query: Parsed request (see `parse_query`)
+            k: Number of results
+
+        Returns:
+            Hits ordered by BM25 score, best first
+        """
+        count = len(self.documents)
+        if not query.terms or not count:
+            return []
+
+        # Terms missing from the corpus still count against coverage
+        term_ids, weights = [], []
+        missing = 0.0
+        for term in query.terms:
+            term_id = self._term_ids.get(term)
+            if term_id is None:
+                missing += math.log(1 + (count + 0.5) / 0.5)
+            else:
+                term_ids.append(term_id)
+                weights.append(self._idf[term_id])
+        total = sum(weights) + missing
+        if not term_ids:
+            return []
+
+        # Candidate generation over the highest-impact postings of each term
+        scores: Dict[int, float] = {}
+        get = scores.get
+        limit = self.max_postings
+        for term_id in term_ids:
+            for doc, impact in zip(self._posting_docs[term_id][:limit], self._posting_impacts[term_id][:limit]):
+                scores[doc] = get(doc, 0.0) + impact
+
+        excluded = [
+            tuple(self._term_ids.get(term, -1) for term in phrase) for phrase in query.exclude
+        ]
+        # Rank a pool of the best candidates, widening it while the filters reject too many
+        pool = max(8 * k, 64)
+        while True:
+            candidates = heapq.nlargest(pool, scores.items(), key=itemgetter(1))
+            hits = self._rank(candidates, query, excluded, term_ids, weights, total, k)
+            if len(hits) >= k or pool >= len(scores):
+                return hits
+            pool *= 8
+
+    def _rank(self, candidates, query, excluded, term_ids, weights, total, k) -> List[SearchHit]:
+        """Filter `candidates`, rescore them exactly and return the best `k`."""
+        hits = []
+        for doc, _ in candidates:
+            if not self._allowed(doc, query, excluded):
+                continue
+            score, coverage, matched = self._rescore(doc, term_ids, weights, total)
+            document = self.documents[doc]
+            hits.append(SearchHit(doc, document.recipe_id, document.title, score, coverage, matched))
+        hits.sort(key=lambda hit: hit.score, reverse=True)
+        return hits[:k]
+
+    def text(self, hit: SearchHit) -> str:
+        """Read the recipe text of `hit` from the corpus."""
+        with open(self.path, "rb") as corpus:
+            corpus.seek(self.documents[hit.doc].offset)
+            return json.loads(corpus.readline())["text"]
+
+
+_default_index: Optional[RecipeIndex] = None
+_default_index_loaded = False
+_default_index_lock = threading.Lock()
+
+
+def default_recipe_index() -> Optional[RecipeIndex]:
+    """Return the index over RECIPE_CORPUS, building it on first use (None if it cannot be read)."""
+    global _default_index, _default_index_loaded
+    with _default_index_lock:
+        if not _default_index_loaded:
+            _default_index_loaded = True
+            try:
+                _default_index = RecipeIndex.build(RECIPE_CORPUS)
+            except (OSError, ValueError) as err:
+                logger.warning("Recipe corpus unavailable, generating every recipe",
+                               extra={"corpus": RECIPE_CORPUS, "error": str(err)})
+        return _default_index
+
+
+def retrieve_recipe(recipe_creator: RecipeCreatorAgent, state: WorkflowState) -> Optional[str]:
+    """
+    Answer a first attempt from the recipe corpus instead of generating a recipe.
+
+    A good match is adapted to the request, goal and conversation context
+    with a patch from `recipe_creator`. Requests matching fewer than
+    RETRIEVAL_MIN_TERMS terms are generated.
+
+    Args:
+        recipe_creator: Agent that proposes adaptation patches
+        state: Workflow state with the user's request, goal and conversation context
+
+    Returns:
+        The corpus recipe (possibly adapted), or None when the caller should generate one
+    """
+    if not RECIPE_RETRIEVAL or state.get("goal_compliance") == "NO":
+        return None
+    index = default_recipe_index()
+    if index is None:
+        return None
+
+    query = parse_query(state["user_input"])
+    hits = index.search(query, k=1)
+    # Diet filters the recipe satisfies make a request as specific as a matched term
+    specific = bool(hits) and hits[0].matched + len(query.diets) >= RETRIEVAL_MIN_TERMS
+    if not specific or hits[0].coverage < RETRIEVAL_ADAPT_COVERAGE:
+        RECIPE_RETRIEVALS.labels(outcome="miss").inc()
+        return None
+    hit = hits[0]
+    recipe = index.text(hit)
+    context = state.get("conversation_context", "")
+    goal = state.get("goal")
+    if goal:
+        # Corpus recipes are not written for a goal: let the patch fit the recipe to it
+        context = f"{context}\nDietary goal: {goal}".strip()
+    try:
+        patch = recipe_creator.adapt_recipe(recipe, state["user_input"], context)
+    except ValueError as err:
+        RECIPE_RETRIEVALS.labels(outcome="failed").inc()
+        logger.warning("Recipe adaptation could not be parsed", extra={"error": str(err)})
+        return None
+    if not patch.edits:
+        RECIPE_RETRIEVALS.labels(outcome="unchanged").inc()
+        logger.info("Recipe served from the corpus", extra={"recipe_id": hit.recipe_id, "score": round(hit.score, 2)})
+        return recipe
+    adapted = apply_patch(recipe, patch, label="Adapted to your request")
+    RECIPE_RETRIEVALS.labels(outcome="adapted" if adapted is not None else "unapplied").inc()
+    if adapted is not None:
+        logger.info("Corpus recipe adapted", extra={"recipe_id": hit.recipe_id, "edits": len(patch.edits)})
+    return adapted
@@ -0,0 +1,206 @@
+"""
+Patch-Based Recipe Revision
+
+When a recipe misses the user's goal, regenerating it from scratch costs
+hundreds of output tokens although usually only a few ingredient amounts need
+to change. In revision mode the RecipeCreatorAgent returns a compact
+structured patch instead (`RecipePatch`: quantity changes, substitutions,
+additions, removals), which is applied to the previous recipe text here.
+
+Downstream stages then only redo the changed parts: the nutrition cache (see
+`nutrition_cache`) already holds every untouched ingredient, so only the
+edited ones are analysed again.
+
+A patch that cannot be applied (an edit names an ingredient that is not in
+the recipe, or the recipe has no ingredients section) falls back to full
+regeneration. RECIPE_REVISION=full disables patching.
+"""
+
+import logging
+import os
+import re
+from typing import List, Optional, Tuple
+
+from .agent_definitions import IngredientEdit, RecipeCreatorAgent, RecipePatch
+from .ingredient_catalog import match_ingredient, normalize_name
+from .ingredient_parser import ParsedIngredient, ingredient_section_bounds, parse_ingredient_line
+from .metrics import RECIPE_REVISIONS
+from .workflow_state import WorkflowState
+
+logger = logging.getLogger(__name__)
+
+RECIPE_REVISION = os.getenv("RECIPE_REVISION", "patch")
+
+_BULLET_RE = re.compile(r"^\s*(?:[-*•]\s*|\d+[.)]\s*)?")
+# Preparation note after an ingredient and its amount (", chopped", " (skinless)")
+_NOTE_RE = re.compile(r"\s*[,(].*$")
+
+
+def should_revise(state: WorkflowState) -> bool:
+    """True when the previous recipe missed the goal and can be patched instead of regenerated."""
+    return RECIPE_REVISION != "full" and state.get("goal_compliance") == "NO" and bool(state.get("recipe"))
+
+
+def _find(lines: List[Tuple[int, ParsedIngredient]], name: str) -> Optional[int]:
+    """Return the position in `lines` of the ingredient called `name`, by name or canonical id."""
+    wanted = normalize_name(name)
+    for position, (_, parsed) in enumerate(lines):
+        if normalize_name(parsed.name) == wanted:
+            return position
+    canonical_id = match_ingredient(name)
+    if canonical_id is None:
+        return None
+    for position, (_, parsed) in enumerate(lines):
+        if parsed.canonical_id == canonical_id:
+            return position
+    return None
+
+
+def _amount(parsed: ParsedIngredient) -> str:
+    """Return the amount of a parsed ingredient as text ("" when it has none)."""
+    if parsed.quantity is None:
+        return ""
+    return f"{parsed.quantity:g} {parsed.unit}" if parsed.unit != "piece" else f"{parsed.quantity:g}"
+
+
+def _line_note(line: str, parsed: ParsedIngredient) -> str:
+    """Return the preparation note of an ingredient line (", chopped"), or "" when it has none."""
+    body = line[_BULLET_RE.match(line).end():].strip()
+    if body.startswith("("):
+        # "(garlic, 3 cloves, minced)": everything after the amount
+        return "".join(f",{part}" for part in body.strip("()").split(",")[2:])
+    found = body.lower().find(parsed.name.lower())
+    note = _NOTE_RE.search(body[found + len(parsed.name):]) if found >= 0 else None
+    return note.group(0) if note else ""
+
+
+def _ingredient_line(template: str, quantity: Optional[str], name: str, note: str = "") -> str:
+    """Format an edited ingredient line in the style of the `template` line it replaces or follows."""
+    prefix = _BULLET_RE.match(template).group(0) or "- "
+    if template[len(prefix):].startswith("("):
+        return f"{prefix}({name}, {quantity}{note})" if quantity else f"{prefix}({name}{note})"
+    return f"{prefix}{quantity} {name}{note}" if quantity else f"{prefix}{name}{note}"
+
+
+def _rename(text: str, renames: List[Tuple[str, str]]) -> str:
+    """Rename substituted ingredients in `text`, whole words only and all in one pass."""
+    if not renames:
+        return text
+    names = {old.lower(): new for old, new in renames}
+    pattern = re.compile(
+        r"\b(?:" + "|".join(re.escape(old) for old in sorted(names, key=len, reverse=True)) + r")\b",
+        re.IGNORECASE,
+    )
+    # A function replacement, so the LLM's text is never read as a template
+    return pattern.sub(lambda match: names[match.group(0).lower()], text)
+
+
+def apply_patch(recipe: str, patch: RecipePatch, label: str = "Goal adjustments") -> Optional[str]:
+    """
+    Apply `patch` to the ingredients section of `recipe`.
+
+    Substituted ingredients are also renamed in the rest of the recipe, and
+    the patch note is appended under `label` so the user sees what was adjusted.
+
+    Args:
+        recipe: Previous recipe text
+        patch: Edits returned by RecipeCreatorAgent.revise_recipe or adapt_recipe
+        label: Heading of the appended note
+
+    Returns:
+        The revised recipe, or None if the patch is empty or an edit does not apply
+    """
+    bounds = ingredient_section_bounds(recipe)
+    if bounds is None or not patch.edits:
+        return None
+    start, end = bounds
+    end = len(recipe) if end is None else end
+    section = recipe[start:end].splitlines()
+
+    # (index in section, parsed ingredient) for every ingredient line
+    lines = [(index, parse_ingredient_line(line)) for index, line in enumerate(section) if line.strip()]
+    lines = [(index, parsed) for index, parsed in lines if parsed is not None]
+    if not lines:
+        return None
+    last_line = section[lines[-1][0]]
+
+    renames: List[Tuple[str, str]] = []
+    removed = set()
+    added: List[str] = []
+    for edit in patch.edits:
+        if edit.action == "add":
+            added.append(_ingredient_line(last_line, edit.quantity, edit.ingredient))
+            continue
+
+        position = _find(lines, edit.ingredient)
+        if position is None or not _apply_edit(section, lines, position, edit, renames, removed):
+            logger.info("Recipe patch does not apply", extra={"action": edit.action, "ingredient": edit.ingredient})
+            return None
+
+    last = lines[-1][0]
+    section[last + 1:last + 1] = added
+    section = [line for index, line in enumerate(section) if index not in removed]
+
+    rest = _rename(recipe[end:], renames)
+    revised = recipe[:start] + "\n".join(section) + ("\n" if recipe[start:end].endswith("\n") else "") + rest
+    if patch.note:
+        # One note per recipe, however many retries it went through
+        note = re.compile(rf"\s*{re.escape(label)}: [^\n]*$")
+        revised = note.sub("", revised.rstrip()) + f"\n\n{label}: {patch.note.strip()}"
+    return revised
+
+
+def _apply_edit(
+    section: List[str],
+    lines: List[Tuple[int, ParsedIngredient]],
+    position: int,
+    edit: IngredientEdit,
+    renames: List[Tuple[str, str]],
+    removed: set,
+) -> bool:
+    """Apply one change/replace/remove edit to `section` in place; False if it is incomplete."""
+    index, parsed = lines[position]
+    if edit.action == "remove":
+        removed.add(index)
+    elif edit.action == "change":
+        if not edit.quantity:
+            return False
+        section[index] = _ingredient_line(section[index], edit.quantity, parsed.name, _line_note(section[index], parsed))
+    elif edit.action == "replace":
+        if not edit.new_ingredient:
+            return False
+        section[index] = _ingredient_line(section[index], edit.quantity or _amount(parsed), edit.new_ingredient)
+        renames.append((parsed.name, edit.new_ingredient))
+    return True
+
+
+def revise_recipe(recipe_creator: RecipeCreatorAgent, state: WorkflowState) -> Optional[str]:
+    """
+    Ask for a patch against the previous recipe and apply it.
+
+    Args:
+        recipe_creator: Agent that proposes the patch
+        state: Workflow state with the previous recipe, its nutrient profile and the goal
+
+    Returns:
+        The revised recipe, or None when the caller should regenerate it instead
+    """
+    try:
+        patch = recipe_creator.revise_recipe(
+            state["recipe"], state["goal"], state["weight"], state.get("nutrient_profile", "")
+        )
+    except ValueError as err:
+        # Malformed structured output; a full regeneration still works
+        RECIPE_REVISIONS.labels(outcome="failed").inc()
+        logger.warning("Recipe patch could not be parsed", extra={"error": str(err)})
+        return None
+
+    try:
+        revised = apply_patch(state["recipe"], patch)
+    except (re.error, ValueError) as err:
+        logger.warning("Recipe patch could not be applied", extra={"error": str(err)})
+        revised = None
+    RECIPE_REVISIONS.labels(outcome="patched" if revised is not None else "unapplied").inc()
+    if revised is not None:
+        logger.info("Recipe revised with a patch", extra={"edits": len(patch.edits)})
+    return revised
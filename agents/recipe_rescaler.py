@@ -0,0 +1,426 @@
+"""
+Local Serving-Size Rescaling
+
+Follow-ups such as "make that for 8 people", "halve it" or "double the
+recipe" only change amounts, so they are answered from the previous turn's
+recipe instead of another workflow run: every ingredient amount is scaled in
+place (with unit promotion such as 1200 g -> 1.2 kg and kitchen-friendly
+rounding), the serving size is updated, the nutrient profile (which describes
+the whole recipe) is scaled by the same factor, and the response is
+re-rendered with `format_final_output_node`. No LLM call is made.
+
+Only messages that ask for nothing but a new size are handled here; anything
+else ("for 8 people, but vegan") goes through the workflow. Set
+RECIPE_RESCALE=0 to always run the workflow.
+"""
+
+import json
+import logging
+import os
+import re
+from fractions import Fraction
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from .format_output_node import format_final_output_node
+from .ingredient_parser import (
+    UNIT_ALIASES, _LIST_NUMBER_RE, _to_number, ingredient_section_bounds, parse_ingredient_line,
+)
+from .metrics import RECIPE_RESCALES
+
+logger = logging.getLogger(__name__)
+
+RECIPE_RESCALE = os.getenv("RECIPE_RESCALE", "1") != "0"
+
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7, "eight": 8,
+    "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "a dozen": 12, "dozen": 12, "fifteen": 15, "twenty": 20,
+}
+_COUNT = r"(\d+(?:\.\d+)?|" + "|".join(sorted(_NUMBER_WORDS, key=len, reverse=True)) + ")"
+_SERVINGS_REQUEST_RE = re.compile(
+    rf"\b(?:for|feeds?|serves?|serving|to serve|make it)\s+(?:about\s+)?{_COUNT}"
+    r"(?:\s+(?:people|persons|servings|portions|guests|adults|of us|instead))?\b"
+    rf"|\b{_COUNT}\s+(?:servings|portions|people)\b"
+)
+_FACTOR_REQUEST_RES: Tuple[Tuple[re.Pattern, Optional[float]], ...] = (
+    (re.compile(r"\b(?:halve|half|halved)\b"), 0.5),
+    (re.compile(r"\b(?:double|doubled|twice)\b"), 2.0),
+    (re.compile(r"\b(?:triple|tripled|thrice)\b"), 3.0),
+    (re.compile(r"\b(?:quadruple|quadrupled)\b"), 4.0),
+    (re.compile(r"\b(?:a\s+)?(?:quarter)\b"), 0.25),
+    (re.compile(r"(?:\bx\s*(\d+(?:\.\d+)?)\b|\b(\d+(?:\.\d+)?)\s*x\b)"), None),
+    (re.compile(r"\b(?:scale|multiply)\s+(?:it|that|this|the recipe|everything)?\s*(?:up|down)?\s*by\s+(\d+(?:\.\d+)?)"), None),
+    (re.compile(r"\b(\d+(?:\.\d+)?)\s+times\b"), None),
+)
+# Words a pure rescaling request may contain besides the size itself
+_FILLER = frozenset("""
+    make made that it this the recipe recipes please can could would you now instead same but for
+    people persons servings serving portions portion guests adults of us one do let lets let's scale
+    rescale adjust change i we need want to a an batch amount amounts quantities quantity ingredients
+    size just how about what if ok okay thanks thank actually up down by as much is are there will be
+    and me my our too so times bigger smaller larger more less feed feeds serve serves dinner party
+    whole everything size sized again x
+""".split())
+_WORD_RE = re.compile(r"[a-z']+")
+
+_SERVING_SIZE_RE = re.compile(
+    r"(?P<label>(?:serving size|servings|serves|yield|makes)[*:\s]*(?:\n\s*[-*•]\s*)?(?:about\s+)?)"
+    r"(?P<count>\d+(?:\.\d+)?)(?:\s*(?:-|–|to)\s*(?P<count2>\d+))?(?P<unit>\s+(?:servings?|people|portions?)\b)?",
+    re.IGNORECASE,
+)
+_NUMBER = r"\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?(?:\s*[½¼¾⅓⅔⅛])?|[½¼¾⅓⅔⅛]"
+# An amount with its unit; "a"/"an" count as one ("an onion", "a pinch of salt")
+_AMOUNT_RE = re.compile(
+    rf"(?P<amount>(?P<qty>{_NUMBER}|(?<![\w'])[Aa]n?(?=\s))(?:\s*(?:-|–|to)\s*(?P<qty2>{_NUMBER}))?)"
+    r"(?:\s*(?P<unit>[A-Za-z]+)\b\.?)?"
+)
+_PLURAL_NAME_RE = re.compile(r"(?<=\s)[A-Za-z]+\b(?!\s*\()")
+_NOTE_RE = re.compile(r"\s*Scaled: [^\n]*$")
+_PROFILE_LINE_RE = re.compile(r"^(?P<head>.*?)(?P<json>\{.*\})\s*$")
+# A leading "Label: <n> <unit>" amount (list marker and bold optional); the
+# label has no digits of its own except in names such as "Vitamin B12"
+_PROFILE_AMOUNT_RE = re.compile(
+    r"^(?P<head>\s*(?:[-*•]\s*|\d+[.)]\s+)?(?:\*\*)?(?P<label>(?:[A-Za-z]\d+|[^\d:\n])*?)(?:\*\*)?\s*[:–-]?\s*(?:\*\*)?)"
+    r"(?P<value>\d+(?:\.\d+)?)(?=\s*(?:kcal|calories|cal|kj|mg|mcg|µg|μg|g|grams|milligrams|micrograms)\b)",
+    re.IGNORECASE,
+)
+# Labels of reference values (daily values, targets, per-meal ranges), which do not scale with the recipe
+_PROFILE_REFERENCE_RE = re.compile(
+    r"\b(?:recommend\w*|daily|target|goal|reference|per meal|range|intake|limit|rda|dv)\b", re.IGNORECASE
+)
+# JSON keys holding shares rather than amounts
+_PROFILE_SHARE_KEY_RE = re.compile(r"pct|percent|share|ratio|dv", re.IGNORECASE)
+
+# Unit promotion: unit -> (threshold, larger unit, factor) and the way back down
+_PROMOTE = {"g": (1000, "kg", 1000), "mg": (1000, "g", 1000), "ml": (1000, "l", 1000),
+            "tsp": (3, "tbsp", 3), "tbsp": (16, "cup", 16), "oz": (16, "lb", 16)}
+_DEMOTE = {"kg": (1, "g", 1000), "l": (1, "ml", 1000), "cup": (0.25, "tbsp", 16),
+           "tbsp": (1, "tsp", 3), "lb": (1, "oz", 16)}
+# Rounding step per unit (a callable of the value for metric units)
+_STEPS = {
+    "tsp": 0.25, "tbsp": 0.5, "cup": 0.25, "oz": 0.5, "lb": 0.25, "kg": 0.05, "l": 0.05,
+    "piece": 0.5, "can": 0.5, "bunch": 0.5, "handful": 0.5,
+    "clove": 1, "slice": 1, "stalk": 1, "sprig": 1, "pinch": 1, "dash": 1,
+}
+_FRACTION_UNITS = frozenset(("tsp", "tbsp", "cup", "piece", "can", "bunch", "handful", "lb"))
+# Unit words whose written form depends on the amount
+_PLURALS = {
+    "clove": "cloves", "can": "cans", "slice": "slices", "stalk": "stalks", "cup": "cups",
+    "pinch": "pinches", "dash": "dashes", "handful": "handfuls", "bunch": "bunches", "sprig": "sprigs",
+    "piece": "pieces", "tablespoon": "tablespoons", "teaspoon": "teaspoons", "gram": "grams",
+    "kilogram": "kilograms", "ounce": "ounces", "pound": "pounds", "liter": "liters", "litre": "litres",
+    "milliliter": "milliliters", "millilitre": "millilitres", "pint": "pints",
+    "serving": "servings", "portion": "portions",
+}
+_SINGULARS = {plural: singular for singular, plural in _PLURALS.items()}
+
+
+class RescaleRequest(NamedTuple):
+    """
+    A follow-up that only asks for a different amount.
+
+    Attributes:
+        factor: Multiplier for every amount, when given directly ("double it")
+        servings: Target number of servings, when given instead ("for 8 people")
+    """
+    factor: Optional[float]
+    servings: Optional[float]
+
+
+def _count(text: str) -> float:
+    """Parse "8" or "eight" into a number."""
+    return float(_NUMBER_WORDS.get(text, text))
+
+
+def parse_rescale_request(message: str) -> Optional[RescaleRequest]:
+    """
+    Recognise a follow-up that asks for nothing but a new size.
+
+    Args:
+        message: User message
+
+    Returns:
+        The requested factor or serving count, or None when the message asks for
+        anything else (or for no size change at all)
+    """
+    text = message.lower()
+    request = None
+    servings = _SERVINGS_REQUEST_RE.search(text)
+    if servings:
+        request = RescaleRequest(None, _count(servings.group(1) or servings.group(2)))
+        text = text[:servings.start()] + " " + text[servings.end():]
+    else:
+        for pattern, factor in _FACTOR_REQUEST_RES:
+            match = pattern.search(text)
+            if match:
+                value = factor if factor is not None else float(next(group for group in match.groups() if group))
+                request = RescaleRequest(value, None)
+                text = text[:match.start()] + " " + text[match.end():]
+                break
+    if request is None or (request.factor or request.servings or 0) <= 0:
+        return None
+    if any(word not in _FILLER for word in _WORD_RE.findall(text)):
+        return None
+    return request
+
+
+def recipe_servings(recipe: str) -> Optional[float]:
+    """Return the serving count stated in `recipe` (the midpoint of a range), or None."""
+    match = _SERVING_SIZE_RE.search(recipe)
+    if not match:
+        return None
+    count = float(match.group("count"))
+    if match.group("count2"):
+        count = (count + float(match.group("count2"))) / 2
+    return count or None
+
+
+def _round_to(value: float, step: float) -> float:
+    """Round `value` to a multiple of `step`, never down to zero."""
+    return max(round(value / step) * step, step)
+
+
+def scale_amount(quantity: float, unit: str, factor: float) -> Tuple[float, str]:
+    """
+    Scale an amount, moving to a larger or smaller unit where it reads better.
+
+    Args:
+        quantity: Original amount
+        unit: Canonical unit (see `ingredient_parser.UNIT_ALIASES`)
+        factor: Multiplier
+
+    Returns:
+        (rounded amount, unit)
+    """
+    value = quantity * factor
+    if unit in _PROMOTE and value >= _PROMOTE[unit][0]:
+        _, unit, size = _PROMOTE[unit]
+        value /= size
+    elif unit in _DEMOTE and value < _DEMOTE[unit][0]:
+        _, unit, size = _DEMOTE[unit]
+        value *= size
+
+    if unit in _STEPS:
+        return _round_to(value, _STEPS[unit]), unit
+    if unit in ("g", "ml", "mg"):
+        step = 1 if value < 10 else 5 if value < 100 else 10
+        return _round_to(value, step), unit
+    return round(value, 2), unit
+
+
+def format_quantity(value: float, unit: str) -> str:
+    """Write an amount as cooks do: "1 1/2" for spoons, cups and pieces, decimals otherwise."""
+    if unit not in _FRACTION_UNITS or value == int(value):
+        return f"{value:g}"
+    whole, part = divmod(Fraction(value).limit_denominator(8), 1)
+    return f"{whole} {part}" if whole else f"{part}"
+
+
+def _unit_word(written: Optional[str], unit: str, value: float) -> str:
+    """Write `unit` for `value`, keeping the recipe's own spelling (with its number fixed) if given."""
+    if written is None:
+        return "cups" if unit == "cup" and value > 1 else unit
+    lower = written.lower()
+    singular = _SINGULARS.get(lower, lower)
+    if singular not in _PLURALS:
+        return written
+    word = _PLURALS[singular] if value > 1 else singular
+    return word.capitalize() if written[0].isupper() else word
+
+
+def _match_quantity(match: re.Match) -> float:
+    """Return the amount of an `_AMOUNT_RE` match (the midpoint of a range)."""
+    quantity = 1.0 if match.group("qty")[0] in "aA" else _to_number(match.group("qty"))
+    if match.group("qty2"):
+        quantity = (quantity + _to_number(match.group("qty2"))) / 2
+    return quantity
+
+
+def _pluralize(match: re.Match) -> str:
+    """Plural of the first word of an ingredient name ("an onion" -> "2 onions")."""
+    word = match.group(0)
+    if word.endswith(("s", "x", "ch", "sh", "o")):
+        return word + "es"
+    if word.endswith("y") and word[-2:-1] not in "aeiou":
+        return word[:-1] + "ies"
+    return word + "s"
+
+
+def _singularize(match: re.Match) -> str:
+    """Singular of the first word of an ingredient name ("2 eggs" -> "1 egg")."""
+    word = match.group(0)
+    lower = word.lower()
+    if lower.endswith("ies"):
+        return word[:-3] + "y"
+    if lower.endswith(("oes", "ches", "shes", "xes", "sses")):
+        return word[:-2]
+    if lower.endswith("s") and not lower.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def _servings_word(written: Optional[str], servings: float) -> str:
+    """The word after the serving count ("4 servings" -> " 1 serving"), with its spacing."""
+    if not written:
+        return ""
+    word = written.lstrip()
+    return written[:len(written) - len(word)] + _unit_word(word, "", servings)
+
+
+def _scale_line(line: str, factor: float) -> Optional[str]:
+    """Scale the amount of one ingredient line in place; None if it cannot be located."""
+    parsed = parse_ingredient_line(line)
+    if parsed is None or parsed.quantity is None:
+        return line
+    leading = None
+    numbered = _LIST_NUMBER_RE.match(line)
+    for match in _AMOUNT_RE.finditer(line, numbered.end() if numbered else 0):
+        word = match.group("unit")
+        unit = UNIT_ALIASES.get(word.lower(), "") if word else ""
+        quantity = _match_quantity(match)
+        if unit != parsed.unit and not (parsed.unit == "piece" and not unit):
+            leading = leading or (match if not unit else None)
+            continue
+        if abs(quantity - parsed.quantity) > 1e-6:
+            if leading is not None and abs(_match_quantity(leading) * quantity - parsed.quantity) < 1e-6:
+                # Package sizes ("2 (6 oz) salmon fillets"): scale the number of packages
+                amount = format_quantity(_round_to(_match_quantity(leading) * factor, 0.5), "piece")
+                return line[:leading.start("qty")] + amount + line[leading.end("amount"):]
+            # A number inside the name
+            return None
+        value, new_unit = scale_amount(parsed.quantity, parsed.unit, factor)
+        amount = format_quantity(value, new_unit)
+        if parsed.unit == "piece":
+            # "2 eggs", "3 large carrots": only the number changes, and the name's number across 1
+            rest = line[match.end("amount"):]
+            if value > 1 >= parsed.quantity:
+                rest = _PLURAL_NAME_RE.sub(_pluralize, rest, count=1)
+            elif value <= 1 < parsed.quantity:
+                rest = _PLURAL_NAME_RE.sub(_singularize, rest, count=1)
+            return line[:match.start("qty")] + amount + rest
+        written = word if new_unit == parsed.unit else None
+        space = match.group(0)[match.end("amount") - match.start():match.start("unit") - match.start()]
+        replacement = f"{amount}{space if new_unit == parsed.unit else ' '}{_unit_word(written, new_unit, value)}"
+        return line[:match.start("qty")] + replacement + line[match.end("unit"):]
+    return None
+
+
+def scale_recipe(recipe: str, factor: float, servings: Optional[float] = None) -> Optional[str]:
+    """
+    Scale every ingredient amount of `recipe` by `factor`.
+
+    Args:
+        recipe: Recipe text in the RecipeCreatorAgent format
+        factor: Multiplier for every amount
+        servings: New serving count written into the recipe, if known
+
+    Returns:
+        The scaled recipe, or None if it has no ingredients section or an
+        amount could not be rewritten
+    """
+    bounds = ingredient_section_bounds(recipe)
+    if bounds is None:
+        return None
+    start, end = bounds
+    end = len(recipe) if end is None else end
+
+    lines = []
+    for line in recipe[start:end].split("\n"):
+        scaled = _scale_line(line, factor) if line.strip() else line
+        if scaled is None:
+            logger.info("Ingredient amount not rescalable", extra={"line": line.strip()})
+            return None
+        lines.append(scaled)
+    scaled_recipe = recipe[:start] + "\n".join(lines) + recipe[end:]
+
+    if servings is not None:
+        scaled_recipe = _SERVING_SIZE_RE.sub(
+            lambda match: f"{match.group('label')}{servings:g}{_servings_word(match.group('unit'), servings)}",
+            scaled_recipe, count=1
+        )
+    note = f"amounts ×{factor:.3g} of the previous version" + (
+        f", {servings:g} {'serving' if servings == 1 else 'servings'}" if servings else "")
+    return _NOTE_RE.sub("", scaled_recipe.rstrip()) + f"\n\nScaled: {note}."
+
+
+def scale_nutrient_profile(profile: str, factor: float) -> str:
+    """
+    Scale a whole-recipe nutrient profile by `factor`.
+
+    Lines carrying a JSON object (the nutrition cache's format) are scaled
+    exactly, except for shares such as "protein_pct". In free text only the
+    leading "Label: <n> g" or "<n> kcal" amount of a line is scaled;
+    percentages, reference diets ("of a 2000 kcal diet"), meal ranges and
+    lines labelled as daily values or targets are left alone.
+    """
+    lines = []
+    for line in profile.splitlines():
+        match = _PROFILE_LINE_RE.match(line)
+        if match:
+            try:
+                facts = json.loads(match.group("json"))
+            except ValueError:
+                facts = None
+            if isinstance(facts, dict):
+                scaled = {key: round(value * factor, 1)
+                          if isinstance(value, (int, float)) and not _PROFILE_SHARE_KEY_RE.search(key) else value
+                          for key, value in facts.items()}
+                lines.append(_scale_amount(match.group("head"), factor) + json.dumps(scaled))
+                continue
+        lines.append(_scale_amount(line, factor))
+    return "\n".join(lines)
+
+
+def _scale_amount(text: str, factor: float) -> str:
+    """Multiply the leading amount of a line of free text, unless it is a reference value."""
+    match = _PROFILE_AMOUNT_RE.match(text)
+    if match is None or _PROFILE_REFERENCE_RE.search(match.group("label")):
+        return text
+    value = float(match.group("value")) * factor
+    number = f"{value:.1f}".rstrip("0").rstrip(".") if value != int(value) else f"{int(value)}"
+    return match.group("head") + number + text[match.end():]
+
+
+def rescale_previous(previous: Optional[Dict[str, Any]], message: str) -> Optional[Dict[str, Any]]:
+    """
+    Answer a sizing follow-up from the previous turn's final workflow state.
+
+    Args:
+        previous: Final state of the session's previous workflow run
+        message: The follow-up message
+
+    Returns:
+        The new final state (recipe, nutrient profile and final_output rescaled),
+        or None when the message needs a workflow run
+    """
+    if not RECIPE_RESCALE or not previous or not previous.get("recipe"):
+        return None
+    request = parse_rescale_request(message)
+    if request is None:
+        return None
+
+    recipe = previous["recipe"]
+    current = recipe_servings(recipe)
+    if request.servings is not None:
+        if current is None:
+            RECIPE_RESCALES.labels(outcome="unknown_servings").inc()
+            return None
+        factor, servings = request.servings / current, request.servings
+    else:
+        factor, servings = request.factor, current * request.factor if current else None
+
+    scaled = scale_recipe(recipe, factor, servings)
+    if scaled is None:
+        RECIPE_RESCALES.labels(outcome="unparsed").inc()
+        return None
+
+    state = {
+        **previous,
+        "user_input": message,
+        "recipe": scaled,
+        "nutrient_profile": scale_nutrient_profile(previous.get("nutrient_profile") or "", factor),
+        "omitted_sections": [],
+    }
+    state.update(format_final_output_node(state))
+    RECIPE_RESCALES.labels(outcome="rescaled").inc()
+    logger.info("Recipe rescaled locally", extra={"factor": round(factor, 3), "servings": servings})
+    return state
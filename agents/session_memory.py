@@ -0,0 +1,264 @@
+"""
+Bounded Conversation Memory for the Chat Frontend
+
+This module keeps per-session state (goal, weight, prior recipes and dialogue)
+in a server-side LRU/TTL cache, and builds the conversation context injected
+into RecipeCreatorAgent prompts. Older dialogue is folded into a rolling,
+locally compacted summary so the injected context never exceeds a fixed token
+budget, however long the conversation runs.
+"""
+
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .metrics import CACHE_EVENTS
+
+DEFAULT_GOAL = "weight loss"
+DEFAULT_WEIGHT = 200
+
+_GOAL_PATTERNS: List[Tuple[re.Pattern, str]] = [
+    (re.compile(r"\b(?:lose|losing|shed|drop)\s+(?:some\s+)?(?:weight|fat|pounds|lbs|kg)\b|\bweight[- ]loss\b", re.I), "weight loss"),
+    (re.compile(r"\b(?:build|gain|gaining|put on)\s+(?:some\s+)?(?:muscle|mass)\b|\bmuscle[- ]gain\b|\bbulk(?:ing)?\b", re.I), "muscle gain"),
+    (re.compile(r"\bmaintain(?:ing)?\s+(?:my\s+)?weight\b|\bmaintenance\b", re.I), "maintenance"),
+]
+# "I weigh 180", "my weight is 82 kg", "weight: 180", or "weight 82 kg" and
+# "I'm 180 lbs" (a unit is required there, so "weight 500 calories" is not one)
+_WEIGHT_RE = re.compile(
+    r"\b(?:i\s+weigh|(?:my\s+)?weight\s*(?:is|of|:))\s*(?:about\s+|around\s+)?"
+    r"(?P<value>\d{2,3}(?:\.\d+)?)\s*(?P<unit>lbs?|pounds|kg|kilos?)?\b"
+    r"|\b(?:(?:my\s+)?weight|i\s*(?:'m|am))\s*(?:about\s+|around\s+)?"
+    r"(?P<value2>\d{2,3}(?:\.\d+)?)\s*(?P<unit2>lbs?|pounds|kg|kilos?)\b",
+    re.I,
+)
+_TITLE_RE = re.compile(r"recipe name[*:\s]*([^\n*]+)", re.I)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)."""
+    return (len(text) + 3) // 4
+
+
+def _clip_to_tokens(text: str, tokens: int) -> str:
+    """Truncate `text` on a word boundary so it fits in `tokens`."""
+    limit = tokens * 4
+    if len(text) <= limit:
+        return text
+    clipped = text[:limit].rsplit(" ", 1)[0]
+    return clipped + "…"
+
+
+def recipe_title(recipe: str) -> str:
+    """Return the recipe name line of a RecipeCreatorAgent recipe."""
+    match = _TITLE_RE.search(recipe)
+    if match:
+        return match.group(1).strip()[:60]
+    first_line = recipe.strip().splitlines()[0] if recipe.strip() else ""
+    return first_line.strip("#*: ")[:60]
+
+
+def extract_profile_updates(message: str) -> Dict[str, object]:
+    """
+    Pick up goal and body-weight statements from a user message.
+
+    Examples: "I'm trying to build muscle", "I weigh 82 kg".
+
+    Returns:
+        Dict with "goal" and/or "weight" (pounds) for the statements found
+    """
+    updates: Dict[str, object] = {}
+    for pattern, goal in _GOAL_PATTERNS:
+        if pattern.search(message):
+            updates["goal"] = goal
+            break
+
+    weight = _WEIGHT_RE.search(message)
+    if weight:
+        value = float(weight.group("value") or weight.group("value2"))
+        unit = (weight.group("unit") or weight.group("unit2") or "").lower()
+        if unit.startswith("k"):
+            value *= 2.20462
+        if 60 <= value <= 700:
+            updates["weight"] = int(round(value))
+    return updates
+
+
+class ConversationSession:
+    """
+    Server-side state for one chat session.
+
+    Attributes:
+        session_id: Opaque id handed to the client
+        goal: Current dietary goal
+        weight: Body weight in pounds
+        recipes: Titles of the most recent recipes, oldest first
+        turns: Recent dialogue kept verbatim as (role, text), oldest first
+        summary: Rolling summary of dialogue that fell out of `turns`
+        last_result: Final workflow state of the previous turn, if any
+    """
+
+    __slots__ = (
+        "session_id", "goal", "weight", "recipes", "turns", "summary",
+        "last_result", "last_access", "lock",
+    )
+
+    def __init__(self, session_id: str, max_recipes: int = 5, max_turns: int = 6):
+        self.session_id = session_id
+        self.goal = DEFAULT_GOAL
+        self.weight = DEFAULT_WEIGHT
+        self.recipes: Deque[str] = deque(maxlen=max_recipes)
+        self.turns: Deque[Tuple[str, str]] = deque()
+        self.summary = ""
+        self.last_result: Optional[Dict[str, object]] = None
+        self.last_access = time.monotonic()
+        # Serialises turns of the same session (double-submits, multiple tabs)
+        self.lock = threading.Lock()
+
+
+class RollingSummarizer:
+    """
+    Build a fixed-budget conversation context for the recipe prompt.
+
+    The context is assembled from, in order of priority: the user profile
+    (goal/weight), recent recipe titles, the rolling summary and as many of the
+    most recent turns as fit. Turns beyond `max_turns` are folded into the
+    summary, which is itself compacted to `summary_tokens` by dropping its
+    oldest clauses. Every step is bounded, so both the cost of building the
+    context and its size are constant per turn.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = 300,
+        summary_tokens: int = 80,
+        turn_tokens: int = 60,
+        max_turns: int = 6,
+    ):
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.turn_tokens = turn_tokens
+        self.max_turns = max_turns
+
+    def record_turn(self, session: ConversationSession, role: str, text: str) -> None:
+        """Append a turn, folding the oldest verbatim turns into the summary."""
+        session.turns.append((role, _clip_to_tokens(" ".join(text.split()), self.turn_tokens)))
+        while len(session.turns) > self.max_turns:
+            old_role, old_text = session.turns.popleft()
+            self._fold(session, old_role, old_text)
+
+    def _fold(self, session: ConversationSession, role: str, text: str) -> None:
+        """Fold one turn into the rolling summary and re-compact it."""
+        # User turns carry the preferences; assistant turns only name the recipe
+        clause = _clip_to_tokens(text, 16) if role == "user" else ""
+        if not clause:
+            return
+        clauses = [c for c in session.summary.split(" | ") if c] + [clause]
+        while clauses and estimate_tokens(" | ".join(clauses)) > self.summary_tokens:
+            clauses.pop(0)
+        session.summary = " | ".join(clauses)
+
+    def build_context(self, session: ConversationSession) -> str:
+        """Return the context block to inject into the recipe prompt."""
+        parts = [f"User goal: {session.goal}; weight: {session.weight} lbs."]
+        if session.recipes:
+            parts.append("Recipes already suggested: " + "; ".join(session.recipes) + ".")
+        if session.summary:
+            parts.append("Earlier in the conversation: " + session.summary)
+
+        used = estimate_tokens("\n".join(parts))
+        recent: List[str] = []
+        for role, text in reversed(session.turns):
+            line = f"{role}: {text}"
+            cost = estimate_tokens(line) + 1
+            if used + cost > self.token_budget:
+                break
+            recent.append(line)
+            used += cost
+        if recent:
+            parts.append("Recent messages:\n" + "\n".join(reversed(recent)))
+
+        return _clip_to_tokens("\n".join(parts), self.token_budget)
+
+
+class SessionStore:
+    """
+    Thread-safe LRU cache of ConversationSession objects with idle expiry.
+
+    Sessions are evicted when the store exceeds `max_sessions` (least recently
+    used first) or when they have been idle for longer than `ttl_seconds`.
+    """
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 3600.0):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, ConversationSession]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_create(self, session_id: Optional[str] = None) -> ConversationSession:
+        """Return the session for `session_id`, creating a new one if unknown or expired."""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id) if session_id else None
+            if session is not None:
+                self.hits += 1
+                CACHE_EVENTS.labels(cache="session", result="hit").inc()
+                self._sessions.move_to_end(session_id)
+            else:
+                self.misses += 1
+                CACHE_EVENTS.labels(cache="session", result="miss").inc()
+                session = ConversationSession(session_id or uuid.uuid4().hex)
+                self._sessions[session.session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+                    self.evictions += 1
+            session.last_access = now
+            return session
+
+    def _expire(self, now: float) -> None:
+        """Drop sessions idle for longer than the TTL (oldest are at the front)."""
+        while self._sessions:
+            oldest = next(iter(self._sessions.values()))
+            if now - oldest.last_access <= self.ttl_seconds:
+                break
+            self._sessions.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+def update_session(
+    session: ConversationSession,
+    summarizer: RollingSummarizer,
+    user_input: str,
+    result: Dict[str, object],
+) -> None:
+    """Record a completed workflow turn; turns without a new recipe keep the previous one."""
+    recipe = str(result.get("recipe") or "")
+    summarizer.record_turn(session, "user", user_input)
+    if recipe:
+        title = recipe_title(recipe)
+        session.recipes.append(title)
+        summarizer.record_turn(session, "assistant", f"suggested {title}")
+        session.last_result = result
+
+
+def build_session_store() -> SessionStore:
+    """Create a SessionStore sized from SESSION_MAX / SESSION_TTL_SECONDS."""
+    return SessionStore(
+        max_sessions=int(os.getenv("SESSION_MAX", "1000")),
+        ttl_seconds=float(os.getenv("SESSION_TTL_SECONDS", "3600")),
+    )
+
+
+def build_summarizer() -> RollingSummarizer:
+    """Create a RollingSummarizer with the CONTEXT_TOKEN_BUDGET budget."""
+    return RollingSummarizer(token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", "300")))
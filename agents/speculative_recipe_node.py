@@ -0,0 +1,178 @@
+"""
+Speculative Recipe Creation Node for LangGraph Workflow
+
+This module contains an opt-in replacement for the create_recipe ->
+analyse_nutrition -> evaluate_goal retry loop. Several candidate recipes are
+generated concurrently, each goes through nutrition analysis and goal
+evaluation on its own, and the first candidate that meets the goal wins; the
+others are cancelled. A goal that needs a few attempts then costs about one
+pass of latency instead of one pass per attempt.
+
+Enabled when SPECULATIVE_CANDIDATES is greater than 1. SPECULATIVE_MAX_CANDIDATES
+caps the number of candidates (and so LLM calls) spent on one request.
+"""
+
+import asyncio
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Set, Tuple
+
+from langchain_openai import ChatOpenAI
+from .agent_definitions import (
+    EvaluateNutritionalContent,
+    NutritionalAnalysisAgent,
+    NutritionGoalAgent,
+    RecipeCreatorAgent,
+)
+from .concurrency import run_coroutine_sync
+from .metrics import SPECULATIVE_CANDIDATES
+from .nutrition_cache import IncrementalNutritionAnalyzer
+from .recipe_creator_node import build_recipe_prompt
+from .recipe_index import retrieve_recipe
+from .verbosity import mode_for
+from .workflow_state import WorkflowState
+
+logger = logging.getLogger(__name__)
+
+Candidate = Dict[str, str]
+
+
+def speculative_settings() -> Tuple[int, int]:
+    """Return (candidates in flight, max candidates per request) from the environment."""
+    width = max(1, int(os.getenv("SPECULATIVE_CANDIDATES", "1")))
+    budget = max(width, int(os.getenv("SPECULATIVE_MAX_CANDIDATES", str(2 * width))))
+    return width, budget
+
+
+async def race_candidates(
+    make_candidate: Callable[[int], Awaitable[Candidate]],
+    width: int,
+    budget: int,
+) -> Candidate:
+    """
+    Run candidates `width` at a time until one meets the goal.
+
+    Whenever a candidate finishes without meeting the goal, another one is
+    started, until `budget` candidates have been launched. The first candidate
+    with goal_compliance "YES" is returned and every other one is cancelled.
+
+    Args:
+        make_candidate: Coroutine factory taking the candidate index
+        width: Number of candidates kept in flight
+        budget: Maximum number of candidates launched in total
+
+    Returns:
+        The winning candidate, or the first finished one if none met the goal
+
+    Raises:
+        Exception: The last candidate error, if every candidate failed
+    """
+    pending: Set[asyncio.Future] = set()
+    launched = 0
+    fallback = None
+    error = None
+
+    def launch() -> None:
+        nonlocal launched
+        pending.add(asyncio.ensure_future(make_candidate(launched)))
+        launched += 1
+
+    for _ in range(min(width, budget)):
+        launch()
+
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is not None:
+                    SPECULATIVE_CANDIDATES.labels(outcome="failed").inc()
+                    error = task.exception()
+                elif task.result()["goal_compliance"] == "YES":
+                    SPECULATIVE_CANDIDATES.labels(outcome="accepted").inc()
+                    return task.result()
+                else:
+                    SPECULATIVE_CANDIDATES.labels(outcome="rejected").inc()
+                    fallback = fallback or task.result()
+                if launched < budget:
+                    launch()
+    finally:
+        # Losing candidates are cancelled, which aborts their in-flight requests
+        for task in pending:
+            task.cancel()
+            SPECULATIVE_CANDIDATES.labels(outcome="cancelled").inc()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    if fallback is None:
+        raise error
+    return fallback
+
+
+def create_recipe_speculative_node(state: WorkflowState, fused: bool = False) -> Dict[str, Any]:
+    """
+    Node function for speculative recipe creation.
+
+    Generates up to SPECULATIVE_MAX_CANDIDATES recipes, SPECULATIVE_CANDIDATES
+    at a time, each analysed and checked against the user's goal, and keeps
+    the first one that meets it. If the budget runs out first, the first
+    finished candidate is used as is, so the workflow never loops back. A
+    good match from the recipe corpus (see `recipe_index`) is the first
+    candidate instead of a generated one.
+
+    Args:
+        state: Current workflow state containing user input and goal
+        fused: Get each candidate's nutrient profile and verdict from one
+            structured call (the "nutrition_verdict" fusion)
+
+    Returns:
+        State update with the recipe, nutrient profile and goal compliance
+    """
+    width, budget = speculative_settings()
+    logger.info("Drafting candidate recipes in parallel", extra={"candidates": width, "budget": budget})
+
+    # Initialize LLMs and agents, shared by every candidate
+    recipe_creator = RecipeCreatorAgent(ChatOpenAI(
+        model="gpt-3.5-turbo",
+        temperature=0.7,
+        openai_api_key=os.getenv("OPENAI_API_KEY")
+    ), mode_for(state, "recipe"))
+    nutrition_analyzer = IncrementalNutritionAnalyzer(NutritionalAnalysisAgent(ChatOpenAI(
+        model="gpt-3.5-turbo",
+        temperature=0.01,
+        openai_api_key=os.getenv("OPENAI_API_KEY")
+    )))
+    goal_evaluator = EvaluateNutritionalContent(ChatOpenAI(
+        model="gpt-3.5-turbo",
+        temperature=0.7,
+        openai_api_key=os.getenv("OPENAI_API_KEY")
+    ))
+    nutrition_goal_agent = NutritionGoalAgent(ChatOpenAI(
+        model="gpt-3.5-turbo",
+        temperature=0.01,
+        openai_api_key=os.getenv("OPENAI_API_KEY")
+    ))
+    prompt = build_recipe_prompt(state)
+    context = state.get("conversation_context", "")
+    # A corpus match, if any, is the first candidate; the others are generated
+    retrieved = retrieve_recipe(recipe_creator, state)
+
+    async def candidate(index: int) -> Candidate:
+        if index == 0 and retrieved is not None:
+            recipe = retrieved
+        else:
+            recipe = await recipe_creator.acreate_recipe(prompt, context)
+        if fused:
+            nutrient_profile, verdict = await nutrition_goal_agent.aanalyse_and_evaluate(
+                recipe, state["goal"], state["weight"]
+            )
+        else:
+            nutrient_profile = await nutrition_analyzer.aanalyse(recipe)
+            verdict = await goal_evaluator.aevaluate(state["goal"], nutrient_profile, state["weight"])
+        return {"recipe": recipe, "nutrient_profile": nutrient_profile, "goal_compliance": verdict}
+
+    winner = run_coroutine_sync(race_candidates(candidate, width, budget))
+    logger.info("Goal verdict", extra={"verdict": winner["goal_compliance"], "goal": state["goal"]})
+
+    return {
+        **winner,
+        "step": "goal_evaluated",
+    }
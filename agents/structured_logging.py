@@ -0,0 +1,179 @@
+"""
+Non-Blocking Structured Logging for the Recipe Workflow
+
+This module configures the standard `logging` package so that records never
+block the request that emits them:
+
+- Records go through a bounded queue (QueueHandler) to a background listener
+  thread that formats and writes them; when the queue is full the record is
+  dropped and counted instead of waiting.
+- Every record carries the request id (bound by the frontend) and the trace /
+  span ids of the current workflow run.
+- Per-level sampling (LOG_SAMPLE_DEBUG, LOG_SAMPLE_INFO) thins out chatty
+  levels; warnings and errors are always kept.
+- Output is one JSON object per line (LOG_FORMAT=json, the default) or plain
+  text (LOG_FORMAT=text) for local development.
+
+Modules log through `logging.getLogger(__name__)` as usual, passing
+structured fields with `extra={...}`.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, Optional
+
+from prometheus_client import Counter
+
+from .metrics import REGISTRY
+from .tracing import current_span
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_listener: Optional[logging.handlers.QueueListener] = None
+
+LOG_RECORDS_DROPPED = Counter(
+    "recipe_log_records_dropped", "Log records dropped because the log queue was full.",
+    ["level"], registry=REGISTRY)
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_STANDARD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+_CONTEXT_ATTRS = ("request_id", "trace_id", "span_id")
+
+
+@contextmanager
+def bind_request(request_id: str) -> Iterator[None]:
+    """Attach `request_id` to every record logged inside the block (and its threads)."""
+    token = _request_id.set(request_id)
+    try:
+        yield
+    finally:
+        _request_id.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Stamp records with the request id and the current trace/span ids."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        active = current_span()
+        record.request_id = _request_id.get()
+        record.trace_id = active.trace_id if active else None
+        record.span_id = active.span_id if active else None
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of the records of each level; WARNING and above are always kept."""
+
+    def __init__(self, rates: Dict[int, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.levelno, 1.0)
+        return record.levelno >= logging.WARNING or rate >= 1.0 or random.random() < rate
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for name in _CONTEXT_ATTRS:
+            value = getattr(record, name, None)
+            if value is not None:
+                payload[name] = value
+        for name, value in vars(record).items():
+            if name not in _STANDARD_ATTRS and name not in _CONTEXT_ATTRS:
+                payload[name] = value
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc_info"] = record.exc_text
+        return json.dumps(payload, default=str, ensure_ascii=False)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records instead of blocking on a full queue."""
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.labels(level=record.levelname).inc()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting happens on the listener thread; only make a copy safe to
+        # hand over (render the message and the traceback text now).
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(force: bool = False) -> None:
+    """
+    Install the queue handler on the root logger and start the listener thread.
+
+    Safe to call more than once; later calls are no-ops unless `force` is set.
+    Configured through LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE, LOG_SAMPLE_DEBUG
+    and LOG_SAMPLE_INFO.
+    """
+    global _listener
+    if _listener is not None and not force:
+        return
+    if _listener is not None:
+        _listener.stop()
+
+    if os.getenv("LOG_FORMAT", "json") == "text":
+        formatter: logging.Formatter = logging.Formatter(
+            "%(asctime)s %(levelname)s %(name)s [%(trace_id)s] %(message)s"
+        )
+    else:
+        formatter = JsonFormatter()
+    formatter.converter = time.gmtime
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(formatter)
+
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000"))))
+    handler.addFilter(SamplingFilter({
+        logging.DEBUG: float(os.getenv("LOG_SAMPLE_DEBUG", "1")),
+        logging.INFO: float(os.getenv("LOG_SAMPLE_INFO", "1")),
+    }))
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for existing in [h for h in root.handlers if isinstance(h, NonBlockingQueueHandler)]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=False)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,259 @@
+"""
+Trace Spans and Node Instrumentation for the Recipe Workflow
+
+This module records a trace span for every workflow run, node and upstream
+call (OpenAI, Google Places), and updates the metrics in `agents.metrics`
+alongside. Spans nest through a context variable, so a node's upstream calls
+become its children even when LangGraph runs branches in worker threads.
+
+Finished spans are kept in a bounded in-memory buffer and, when the
+TRACE_FILE environment variable is set, appended to that file as JSON lines
+(one span per line, with OpenTelemetry-style trace/span/parent ids). As with
+log records (see `structured_logging`), the file is written by a background
+thread fed through a bounded queue (TRACE_QUEUE_SIZE), so ending a span never
+waits on the disk; spans that find the queue full are dropped and counted.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+from prometheus_client import Counter
+
+from .metrics import IN_FLIGHT, NODE_ERRORS, NODE_LATENCY, REGISTRY, UPSTREAM_ERRORS, UPSTREAM_LATENCY
+
+logger = logging.getLogger(__name__)
+
+TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "10000"))
+
+TRACE_SPANS_DROPPED = Counter(
+    "recipe_trace_spans_dropped", "Spans not written to TRACE_FILE because the span queue was full.",
+    registry=REGISTRY)
+
+
+class Span:
+    """
+    One timed operation within a trace.
+
+    Attributes:
+        name: Operation name, e.g. "node.create_recipe" or "openai.create_recipe"
+        trace_id: Id shared by every span of one workflow run
+        span_id: Id of this span
+        parent_id: Id of the enclosing span (None for the root)
+        start: Wall-clock start time (seconds since the epoch)
+        duration: Duration in seconds, set when the span ends
+        attributes: Extra key/value data (node, upstream, error, ...)
+        status: "ok" or "error"
+    """
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "duration",
+                 "attributes", "status", "_t0")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.time()
+        self.duration = 0.0
+        self.attributes = attributes
+        self.status = "ok"
+        self._t0 = time.perf_counter()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the span as a JSON-serialisable dict."""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "end": self.start + self.duration,
+            "duration_ms": round(self.duration * 1000, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class SpanSink:
+    """
+    Keeps the most recent finished spans and optionally appends them to a JSON-lines file.
+
+    The file is written by a background thread that drains a bounded queue in
+    batches; `export` only enqueues, and drops (and counts) the span when the
+    queue is full.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_spans: int = 2000, queue_size: Optional[int] = None):
+        self.path = path
+        self.spans: Deque[Span] = deque(maxlen=max_spans)
+        self._lock = threading.Lock()
+        self._queue: Optional[queue.Queue] = None
+        if path:
+            self._queue = queue.Queue(maxsize=queue_size or TRACE_QUEUE_SIZE)
+            threading.Thread(target=self._write, name="span-writer", daemon=True).start()
+
+    def export(self, span: Span) -> None:
+        """Record a finished span."""
+        with self._lock:
+            self.spans.append(span)
+        if self._queue is not None:
+            try:
+                self._queue.put_nowait(span)
+            except queue.Full:
+                TRACE_SPANS_DROPPED.inc()
+
+    def flush(self) -> None:
+        """Wait until every queued span has been written."""
+        if self._queue is not None:
+            self._queue.join()
+
+    def _write(self) -> None:
+        """Writer thread: append queued spans to the file, one batch per write."""
+        f = None
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                # Spans keep being drained (and lost) while the file cannot be written
+                f = f or open(self.path, "a", encoding="utf-8")
+                f.write("".join(json.dumps(span.to_dict(), default=str) + "\n" for span in batch))
+                f.flush()
+            except (OSError, ValueError) as err:
+                logger.warning("Could not write spans", extra={"path": self.path, "error": str(err)})
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def trace(self, trace_id: str) -> List[Span]:
+        """Return the buffered spans of one trace, in completion order."""
+        with self._lock:
+            return [span for span in self.spans if span.trace_id == trace_id]
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+# Thread ident -> trace id of the span that thread is running (read by the profiler)
+_thread_traces: Dict[int, str] = {}
+# Trace id -> callback run when a thread starts working on that trace; it
+# returns the callback to run when the thread is done (see `watch_trace_threads`)
+_thread_watchers: Dict[str, Callable[[], Callable[[], None]]] = {}
+sink = SpanSink(os.getenv("TRACE_FILE") or None)
+atexit.register(sink.flush)
+
+
+def current_span() -> Optional[Span]:
+    """Return the innermost active span, if any."""
+    return _current_span.get()
+
+
+def thread_trace_ids() -> Dict[int, str]:
+    """Return a snapshot of which trace each thread is currently working on."""
+    return dict(_thread_traces)
+
+
+@contextmanager
+def watch_trace_threads(trace_id: str, on_enter: Callable[[], Callable[[], None]]) -> Iterator[None]:
+    """
+    Call `on_enter` in every other thread that starts working on `trace_id`.
+
+    `on_enter` runs in the thread when its first span of the trace starts and
+    returns a callback that runs in the thread when that span ends. The
+    profiler uses this to follow a run into LangGraph's worker threads.
+    """
+    _thread_watchers[trace_id] = on_enter
+    try:
+        yield
+    finally:
+        _thread_watchers.pop(trace_id, None)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Span]:
+    """
+    Time the enclosed block as a span.
+
+    The span joins the current trace (or starts a new one), is marked as an
+    error if the block raises, and is exported to the sink when it ends.
+    """
+    parent = _current_span.get()
+    trace_id = parent.trace_id if parent else uuid.uuid4().hex
+    current = Span(name, trace_id, parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+    thread = threading.get_ident()
+    previous_trace = _thread_traces.get(thread)
+    _thread_traces[thread] = trace_id
+    watcher = _thread_watchers.get(trace_id) if previous_trace != trace_id else None
+    leave = watcher() if watcher else None
+    try:
+        yield current
+    except BaseException as err:
+        current.status = "error"
+        current.attributes["error"] = type(err).__name__
+        raise
+    finally:
+        current.duration = time.perf_counter() - current._t0
+        if leave:
+            leave()
+        _current_span.reset(token)
+        if previous_trace is None:
+            _thread_traces.pop(thread, None)
+        else:
+            _thread_traces[thread] = previous_trace
+        sink.export(current)
+
+
+def instrument_node(name: str) -> Callable[[Callable], Callable]:
+    """
+    Decorator for workflow node functions.
+
+    Each call runs inside a "node.<name>" span and updates the node latency
+    histogram, the in-flight gauge and the node error counter.
+
+    Args:
+        name: Node name as registered in the graph
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(state):
+            with span(f"node.{name}", node=name), \
+                    IN_FLIGHT.labels(kind="node").track_inprogress(), \
+                    NODE_LATENCY.labels(node=name).time():
+                try:
+                    return func(state)
+                except Exception as err:
+                    NODE_ERRORS.labels(node=name, error=type(err).__name__).inc()
+                    raise
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def upstream_call(upstream: str, operation: str) -> Iterator[Span]:
+    """
+    Time one call to an upstream service.
+
+    Args:
+        upstream: Service name, e.g. "openai" or "google_places"
+        operation: What the call does, e.g. "create_recipe"
+    """
+    with span(f"{upstream}.{operation}", upstream=upstream, operation=operation) as current, \
+            UPSTREAM_LATENCY.labels(upstream=upstream, operation=operation).time():
+        try:
+            yield current
+        except Exception as err:
+            UPSTREAM_ERRORS.labels(upstream=upstream, operation=operation, error=type(err).__name__).inc()
+            raise
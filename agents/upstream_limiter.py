@@ -0,0 +1,335 @@
+"""
+Adaptive Concurrency Limits for LLM Calls
+
+Every node sends its LLM calls as soon as a request reaches it, so a burst of
+requests turns into a burst of upstream calls, the upstream answers with 429s,
+and the retries slow everyone down. Every call made by the agents in
+`agent_definitions` takes a slot from a process-wide limiter for its model
+first, and the number of slots adapts to what the upstream can take:
+
+- each successful call sent while the limit was full (it took the last
+  slot, or waited for one) adds 1/limit, so the limit grows by about one per round of calls, but only
+  while latency stays flat: once calls of an operation get more than
+  LLM_LATENCY_GROWTH times slower than the fastest recent one (the upstream
+  is queueing), growth stops;
+- a call LLM_LATENCY_TOLERANCE times slower than that takes 10% off;
+- a 429 (rate limited) takes 25% off and sets a ceiling one below the
+  concurrency the call was sent at. The limit stays under the ceiling, which
+  is raised by one every LLM_CEILING_PROBE_S without a 429, so the limiter
+  settles just under the upstream's capacity and only probes above it
+  slowly instead of oscillating around it.
+
+Decreases happen at most once per LLM_LIMIT_COOLDOWN_S, so one burst of
+failures counts once.
+
+Waiting calls are kept in two queues. The user-facing recipe generation
+(INTERACTIVE) is served first; nutrition analysis, verdicts and reviews
+(BACKGROUND) are served when no recipe waits, or as soon as the oldest has
+waited LLM_BACKGROUND_MAX_WAIT_S, so runs already in progress are delayed,
+never starved. Limits start at LLM_CONCURRENCY_INITIAL and stay between
+LLM_CONCURRENCY_MIN and a per-model maximum (LLM_CONCURRENCY, e.g.
+"gpt-3.5-turbo=64,gpt-4o=16", else LLM_CONCURRENCY_MAX). LLM_LIMITER=0 turns
+the limiter off.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from typing import Any, AsyncIterator, Deque, Dict, Iterator, Optional, Tuple
+
+from openai import RateLimitError
+
+from .metrics import UPSTREAM_CONCURRENCY_LIMIT, UPSTREAM_LIMIT_DECREASES, UPSTREAM_QUEUE_SECONDS
+from .tracing import Span, upstream_call
+
+logger = logging.getLogger(__name__)
+
+LLM_LIMITER = os.getenv("LLM_LIMITER", "1") != "0"
+LLM_CONCURRENCY_INITIAL = int(os.getenv("LLM_CONCURRENCY_INITIAL", "8"))
+LLM_CONCURRENCY_MIN = int(os.getenv("LLM_CONCURRENCY_MIN", "1"))
+LLM_CONCURRENCY_MAX = int(os.getenv("LLM_CONCURRENCY_MAX", "64"))
+LLM_CONCURRENCY = os.getenv("LLM_CONCURRENCY", "")
+LLM_LATENCY_GROWTH = float(os.getenv("LLM_LATENCY_GROWTH", "1.3"))
+LLM_LATENCY_TOLERANCE = float(os.getenv("LLM_LATENCY_TOLERANCE", "3.0"))
+LLM_LIMIT_COOLDOWN_S = float(os.getenv("LLM_LIMIT_COOLDOWN_S", "1.0"))
+LLM_CEILING_PROBE_S = float(os.getenv("LLM_CEILING_PROBE_S", "10.0"))
+LLM_BACKGROUND_MAX_WAIT_S = float(os.getenv("LLM_BACKGROUND_MAX_WAIT_S", "2.0"))
+
+INTERACTIVE, BACKGROUND = 0, 1
+_PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+
+class _Waiter:
+    """A call waiting for a slot; `wake` is called (under the limiter lock) when it gets one."""
+
+    def __init__(self):
+        self.queued_at = time.monotonic()
+        self.granted = False
+        self.cancelled = False
+        self.started = 0
+        self.event = threading.Event()
+
+    def wake(self) -> None:
+        self.event.set()
+
+
+class _AsyncWaiter(_Waiter):
+    """A waiter on an event loop; `aacquire` hands the slot back if the waiting task was cancelled."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        super().__init__()
+        self.loop = loop
+        self.future: asyncio.Future = loop.create_future()
+
+    def wake(self) -> None:
+        self.loop.call_soon_threadsafe(self._deliver)
+
+    def _deliver(self) -> None:
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class AdaptiveLimiter:
+    """
+    Adaptive concurrency limit with interactive and background wait queues, for one model.
+
+    Args:
+        name: Model name, the `model` label of the limiter metrics
+        initial: Starting limit
+        min_limit: The limit never drops below this
+        max_limit: The limit never grows above this
+    """
+
+    def __init__(self, name: str, initial: int, min_limit: int, max_limit: int):
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self.ceiling: Optional[float] = None
+        self.in_flight = 0
+        self._queues: Dict[int, Deque[_Waiter]] = {INTERACTIVE: deque(), BACKGROUND: deque()}
+        self._baselines: Dict[str, float] = {}
+        self._last_decrease = 0.0
+        self._last_probe = 0.0
+        self._lock = threading.Lock()
+        UPSTREAM_CONCURRENCY_LIMIT.labels(model=name).set(int(self.limit))
+
+    def _try_acquire(self, priority: int, waiter: _Waiter) -> bool:
+        """Take a free slot, or queue `waiter` (call with the lock held); True if a slot was taken."""
+        if self.in_flight < int(self.limit) and not any(self._queues.values()):
+            self.in_flight += 1
+            waiter.started = self.in_flight
+            return True
+        self._queues[priority].append(waiter)
+        return False
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        """Pop the next waiter to serve: an aged background call, else interactive first (lock held)."""
+        interactive, background = self._queues[INTERACTIVE], self._queues[BACKGROUND]
+        for queue in (interactive, background):
+            while queue and queue[0].cancelled:
+                queue.popleft()
+        if background and (not interactive
+                           or time.monotonic() - background[0].queued_at >= LLM_BACKGROUND_MAX_WAIT_S):
+            return background.popleft()
+        return interactive.popleft() if interactive else None
+
+    def _grant(self) -> None:
+        """Hand free slots to the next waiters (call with the lock held)."""
+        while self.in_flight < int(self.limit):
+            waiter = self._next_waiter()
+            if waiter is None:
+                return
+            waiter.granted = True
+            self.in_flight += 1
+            waiter.started = self.in_flight
+            waiter.wake()
+
+    def acquire(self, priority: int = BACKGROUND) -> Tuple[float, int]:
+        """Block until a slot is free; return (seconds spent waiting, calls in flight including this one)."""
+        start = time.perf_counter()
+        waiter = _Waiter()
+        with self._lock:
+            if self._try_acquire(priority, waiter):
+                return 0.0, waiter.started
+        waiter.event.wait()
+        return time.perf_counter() - start, waiter.started
+
+    async def aacquire(self, priority: int = BACKGROUND) -> Tuple[float, int]:
+        """Async version of `acquire`: waits without blocking the event loop."""
+        start = time.perf_counter()
+        waiter = _AsyncWaiter(asyncio.get_running_loop())
+        with self._lock:
+            if self._try_acquire(priority, waiter):
+                return 0.0, waiter.started
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                # Not granted yet: drop out of the queue
+                granted = waiter.granted
+                waiter.cancelled = not granted
+            if granted:
+                # Granted before or after the cancel landed: the slot is ours to give back
+                self.release()
+            raise
+        return time.perf_counter() - start, waiter.started
+
+    def release(self) -> None:
+        """Give a slot back."""
+        with self._lock:
+            self.in_flight -= 1
+            self._grant()
+
+    def record(self, operation: str, latency_s: float, rate_limited: bool, started: int) -> None:
+        """
+        Adapt the limit to the outcome of one call.
+
+        Args:
+            operation: What the call did; latencies are compared per operation
+            latency_s: Duration of the call
+            rate_limited: The upstream answered 429
+            started: Calls in flight when this one was sent, itself included
+        """
+        with self._lock:
+            now = time.monotonic()
+            reason, factor, growing = None, 1.0, False
+            if rate_limited:
+                reason, factor = "rate_limited", 0.75
+            else:
+                baseline = self._baselines.get(operation, latency_s)
+                # The fastest recent latency; it drifts up slowly so old minima expire
+                self._baselines[operation] = min(latency_s, baseline + (latency_s - baseline) * 0.01)
+                if LLM_LATENCY_TOLERANCE and latency_s > LLM_LATENCY_TOLERANCE * baseline:
+                    reason, factor = "latency", 0.9
+                else:
+                    growing = latency_s <= LLM_LATENCY_GROWTH * baseline
+
+            if reason is not None:
+                if now - self._last_decrease < LLM_LIMIT_COOLDOWN_S:
+                    return
+                self._last_decrease = self._last_probe = now
+                if rate_limited:
+                    # The upstream refused `started` concurrent calls: stay below that
+                    self.ceiling = float(max(self.min_limit, started - 1))
+                self.limit = max(float(self.min_limit), min(self.limit, float(started)) * factor)
+                UPSTREAM_LIMIT_DECREASES.labels(model=self.name, reason=reason).inc()
+                logger.info("Upstream concurrency limit lowered", extra={
+                    "model": self.name, "reason": reason, "limit": int(self.limit),
+                    "ceiling": int(self.ceiling) if self.ceiling is not None else None,
+                })
+            else:
+                if self.ceiling is not None and now - self._last_probe >= LLM_CEILING_PROBE_S:
+                    # No 429 for a while: let the limit probe one slot higher
+                    self._last_probe = now
+                    self.ceiling = min(float(self.max_limit), self.ceiling + 1)
+                if growing and started >= int(self.limit):
+                    top = self.ceiling if self.ceiling is not None else float(self.max_limit)
+                    self.limit = max(self.limit, min(top, self.limit + 1 / self.limit))
+                    self._grant()
+            UPSTREAM_CONCURRENCY_LIMIT.labels(model=self.name).set(int(self.limit))
+
+
+def _model_limits() -> Dict[str, int]:
+    """Parse LLM_CONCURRENCY ("model=max,model=max") into per-model maxima."""
+    limits = {}
+    for pair in LLM_CONCURRENCY.split(","):
+        if "=" in pair:
+            model, value = pair.split("=", 1)
+            limits[model.strip()] = int(value)
+    return limits
+
+
+_MODEL_LIMITS = _model_limits()
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def model_name(llm: Any) -> str:
+    """Return the model name behind `llm`, also through `.bind()` and structured-output wrappers."""
+    runnable = llm
+    for _ in range(5):
+        name = getattr(runnable, "model_name", None)
+        if isinstance(name, str):
+            return name
+        runnable = getattr(runnable, "bound", None) or getattr(runnable, "first", None)
+        if runnable is None:
+            break
+    return "default"
+
+
+def limiter_for(model: str) -> AdaptiveLimiter:
+    """Return the process-wide limiter of `model`, created on first use."""
+    with _limiters_lock:
+        limiter = _limiters.get(model)
+        if limiter is None:
+            maximum = _MODEL_LIMITS.get(model, LLM_CONCURRENCY_MAX)
+            limiter = _limiters[model] = AdaptiveLimiter(
+                model, min(LLM_CONCURRENCY_INITIAL, maximum), LLM_CONCURRENCY_MIN, maximum
+            )
+        return limiter
+
+
+@contextmanager
+def llm_slot(llm: Any, operation: str, priority: int = BACKGROUND) -> Iterator[None]:
+    """
+    Hold a slot of the limiter of `llm`'s model for the duration of the block.
+
+    The block's duration and a 429 raised in it adapt the limit.
+    """
+    if not LLM_LIMITER:
+        yield
+        return
+    limiter = limiter_for(model_name(llm))
+    waited, started = limiter.acquire(priority)
+    UPSTREAM_QUEUE_SECONDS.labels(model=limiter.name, priority=_PRIORITY_NAMES[priority]).observe(waited)
+    start = time.perf_counter()
+    rate_limited = False
+    try:
+        yield
+    except RateLimitError:
+        rate_limited = True
+        raise
+    finally:
+        limiter.release()
+        limiter.record(operation, time.perf_counter() - start, rate_limited, started)
+
+
+@asynccontextmanager
+async def allm_slot(llm: Any, operation: str, priority: int = BACKGROUND) -> AsyncIterator[None]:
+    """Async version of `llm_slot`."""
+    if not LLM_LIMITER:
+        yield
+        return
+    limiter = limiter_for(model_name(llm))
+    waited, started = await limiter.aacquire(priority)
+    UPSTREAM_QUEUE_SECONDS.labels(model=limiter.name, priority=_PRIORITY_NAMES[priority]).observe(waited)
+    start = time.perf_counter()
+    rate_limited = False
+    try:
+        yield
+    except RateLimitError:
+        rate_limited = True
+        raise
+    finally:
+        limiter.release()
+        limiter.record(operation, time.perf_counter() - start, rate_limited, started)
+
+
+@contextmanager
+def llm_call(llm: Any, operation: str, priority: int = BACKGROUND) -> Iterator[Span]:
+    """Take a limiter slot for `llm`, then time the call as an OpenAI upstream call (see `upstream_call`)."""
+    with llm_slot(llm, operation, priority), upstream_call("openai", operation) as current:
+        yield current
+
+
+@asynccontextmanager
+async def allm_call(llm: Any, operation: str, priority: int = BACKGROUND) -> AsyncIterator[Span]:
+    """Async version of `llm_call`."""
+    async with allm_slot(llm, operation, priority):
+        with upstream_call("openai", operation) as current:
+            yield current
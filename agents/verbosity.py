@@ -0,0 +1,130 @@
+"""
+Output-Length Controls
+
+Latency is dominated by output tokens, and the full prompts of the Recipe
+Creator and Recipe Evaluator ask for long six-section answers every time.
+Each request can pick a verbosity mode per part of the answer:
+
+- "full": the original prompts, no caps
+- "standard": no tips or variations, a shorter review
+- "concise": for mobile clients; the essentials of the recipe and a
+  one-line verdict with at most three fixes
+
+The parts are "recipe" (Recipe Creator), "evaluation" (Recipe Evaluator) and
+"output" (how `format_final_output_node` lays the answer out). Each mode of an
+agent has its own prompt variant (in `agent_definitions`) and the output
+limits below: a `max_tokens` cap and stop sequences that end the answer at
+sections the mode leaves out. A request names one mode for every part
+("concise") or a mode per part ("recipe=standard,evaluation=concise"); the
+rest use VERBOSITY, the server default.
+"""
+
+import logging
+import os
+from typing import Any, Dict, Mapping, NamedTuple, Optional, Tuple, Union
+
+from .metrics import TRUNCATED_OUTPUTS
+from .workflow_state import WorkflowState
+
+logger = logging.getLogger(__name__)
+
+FULL, STANDARD, CONCISE = "full", "standard", "concise"
+MODES = (FULL, STANDARD, CONCISE)
+PARTS = ("recipe", "evaluation", "output")
+
+VERBOSITY = os.getenv("VERBOSITY", FULL)
+
+# Headings of the recipe's optional sixth section, as the full prompt asks for it
+_TIPS_STOPS = ("\n6. Tips", "\n6. Optional", "Tips or Variations:", "\n**Tips")
+
+
+class OutputLimits(NamedTuple):
+    """
+    Output limits of one agent in one mode.
+
+    Attributes:
+        max_tokens: Cap on generated tokens, None for the model's default
+        stop: Stop sequences (at most 4, the OpenAI limit)
+    """
+    max_tokens: Optional[int]
+    stop: Tuple[str, ...]
+
+
+OUTPUT_LIMITS: Dict[str, Dict[str, OutputLimits]] = {
+    "recipe": {
+        FULL: OutputLimits(None, ()),
+        STANDARD: OutputLimits(int(os.getenv("RECIPE_MAX_TOKENS_STANDARD", "650")), _TIPS_STOPS),
+        CONCISE: OutputLimits(int(os.getenv("RECIPE_MAX_TOKENS_CONCISE", "400")), _TIPS_STOPS),
+    },
+    "evaluation": {
+        FULL: OutputLimits(None, ()),
+        STANDARD: OutputLimits(int(os.getenv("EVALUATION_MAX_TOKENS_STANDARD", "300")), ("\n5.",)),
+        CONCISE: OutputLimits(int(os.getenv("EVALUATION_MAX_TOKENS_CONCISE", "110")), ()),
+    },
+}
+
+
+def parse_verbosity(value: Union[str, Mapping[str, str], None]) -> Dict[str, str]:
+    """
+    Resolve a requested verbosity into a mode for every part.
+
+    Args:
+        value: A mode for every part ("concise"), modes per part as a mapping
+            or as "part=mode" pairs separated by commas, or None for VERBOSITY
+
+    Returns:
+        Mode of each of PARTS
+
+    Raises:
+        ValueError: If a part or mode is unknown
+    """
+    modes = dict.fromkeys(PARTS, VERBOSITY)
+    if not value:
+        return modes
+    if isinstance(value, str):
+        value = value.strip().lower()
+        if "=" not in value:
+            value = dict.fromkeys(PARTS, value)
+        else:
+            pairs = (pair.split("=", 1) for pair in value.split(",") if pair.strip())
+            value = {part.strip(): mode.strip() for part, mode in pairs}
+    for part, mode in value.items():
+        if part not in PARTS:
+            raise ValueError(f"Unknown verbosity part {part!r}; expected one of {', '.join(PARTS)}")
+        if mode not in MODES:
+            raise ValueError(f"Unknown verbosity mode {mode!r}; expected one of {', '.join(MODES)}")
+        modes[part] = mode
+    return modes
+
+
+def mode_for(state: WorkflowState, part: str) -> str:
+    """Return the run's verbosity mode for `part` (VERBOSITY when the state has none)."""
+    return (state.get("verbosity") or {}).get(part, VERBOSITY)
+
+
+def limit_output(llm: Any, agent: str, mode: str) -> Any:
+    """Bind the `max_tokens` cap and stop sequences of `agent` in `mode` to `llm` (unchanged in full mode)."""
+    limits = OUTPUT_LIMITS[agent][mode]
+    kwargs: Dict[str, Any] = {}
+    if limits.max_tokens:
+        kwargs["max_tokens"] = limits.max_tokens
+    if limits.stop:
+        kwargs["stop"] = list(limits.stop)
+    return llm.bind(**kwargs) if kwargs else llm
+
+
+def complete_text(response: Any, agent: str) -> str:
+    """
+    Return the text of a chat model response, without a line cut off by the token cap.
+
+    A response that ran into `max_tokens` ends mid-sentence; its last partial
+    line is dropped so the answer ends on a complete one.
+    """
+    text = response.content
+    metadata = getattr(response, "response_metadata", None) or {}
+    if metadata.get("finish_reason") != "length":
+        return text
+    TRUNCATED_OUTPUTS.labels(agent=agent).inc()
+    logger.warning("Output hit its token cap", extra={"agent": agent})
+    head, newline, _ = text.rpartition("\n")
+    return head.rstrip() if newline else text
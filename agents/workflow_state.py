@@ -2,9 +2,19 @@
 Shared State Definition for LangGraph Workflow
 
 This module contains the WorkflowState TypedDict that is used across all nodes.
+
+Nodes return only the keys they change and LangGraph merges them into the
+state, so no node copies the whole state. Keys written by nodes that run in
+the same step (parallel branches) declare a reducer with `Annotated`.
 """
 
-from typing import TypedDict
+import operator
+from typing import Annotated, Any, Dict, List, TypedDict
+
+
+def latest_step(current: str, update: str) -> str:
+    """Reducer for `step`: keep the most recent progress marker."""
+    return update
 
 
 class WorkflowState(TypedDict):
@@ -16,18 +26,113 @@ class WorkflowState(TypedDict):
 
     Attributes:
         user_input: Original user request for a recipe
+        conversation_context: Bounded summary of the chat session so far
         recipe: Generated recipe from the Recipe Creator agent
+        nutrient_profile: Nutritional breakdown from the Nutrient Analysis agent
+        goal_compliance: "YES"/"NO" verdict of the Goal Evaluator agent
+        goal: User's dietary goal (e.g. "weight loss")
+        weight: User's body weight in pounds
         evaluation: Evaluation feedback from the Recipe Evaluator agent
+        restaurant_suggestions: Nearby restaurants serving similar food
         final_output: Final formatted response to return to user
-        step: Current step in the workflow (for tracking progress)
+        deadline: Absolute time (epoch seconds) the answer is due by, 0 for none
+        omitted_sections: Optional sections skipped to meet the deadline;
+            appended to by parallel branches, so merged with `operator.add`
+        intent: Sub-graph chosen by the intent router ("generate", "nutrition", ...)
+        last_recipe: The session's previous recipe, for follow-up questions
+        last_nutrient_profile: Nutrient profile of `last_recipe`
+        verbosity: Verbosity mode of each part of the answer ("recipe",
+            "evaluation", "output"), see `verbosity`
+        step: Current step in the workflow (for tracking progress); written by
+            parallel branches, so it is merged with `latest_step`
     """
     user_input: str
+    conversation_context: str
     recipe: str
-    nutrition_profile: str
     nutrient_profile: str
     goal_compliance: str
     goal: str
     weight: int
     evaluation: str
+    restaurant_suggestions: List[Dict[str, Any]]
+    final_output: str
+    deadline: float
+    omitted_sections: Annotated[List[str], operator.add]
+    intent: str
+    last_recipe: str
+    last_nutrient_profile: str
+    verbosity: Dict[str, str]
+    step: Annotated[str, latest_step]
+
+
+def merge_meals(current: List[Dict[str, Any]], update: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Reducer for `meals`: a regenerated meal replaces the one in the same day and slot."""
+    merged = {(meal["day"], meal["meal"]): meal for meal in current}
+    merged.update({(meal["day"], meal["meal"]): meal for meal in update})
+    return [merged[key] for key in sorted(merged, key=lambda key: key[0])]
+
+
+class MealSlot(TypedDict):
+    """
+    Input of one meal's task in the meal-plan graph, sent by `dispatch_meals`.
+
+    Attributes:
+        day: Day of the plan, from 1
+        meal: Meal of the day ("breakfast", "dinner", ...)
+        days: Number of days in the plan
+        user_input: The user's meal-plan request
+        conversation_context: Bounded summary of the chat session so far
+        goal: User's dietary goal
+        weight: User's body weight in pounds
+        verbosity: Verbosity mode of each part of the answer
+        feedback: Why the previous version of this day missed the goal, "" on
+            the first attempt
+    """
+    day: int
+    meal: str
+    days: int
+    user_input: str
+    conversation_context: str
+    goal: str
+    weight: int
+    verbosity: Dict[str, str]
+    feedback: str
+
+
+class MealPlanState(TypedDict):
+    """
+    State of the meal-plan graph (see `meal_plan_nodes`).
+
+    Attributes:
+        user_input: The user's meal-plan request
+        conversation_context: Bounded summary of the chat session so far
+        goal: User's dietary goal
+        weight: User's body weight in pounds
+        days: Number of days in the plan
+        meal_names: Meals of each day, in order ("breakfast", "lunch", "dinner")
+        meals: One entry per day and meal with its recipe, nutrient profile
+            and per-serving totals ("missing" when it could not be
+            generated); written by concurrent meal tasks, so merged with
+            `merge_meals`
+        day_verdicts: "YES"/"NO" goal verdict of each day, "MISSING" for a
+            day with a meal that could not be generated
+        pending_days: Days to generate (again) in the next round
+        rounds: Regeneration rounds run so far
+        verbosity: Verbosity mode of each part of the answer
+        final_output: Final formatted plan to return to the user
+        step: Current step in the workflow; written by concurrent meal tasks,
+            so merged with `latest_step`
+    """
+    user_input: str
+    conversation_context: str
+    goal: str
+    weight: int
+    days: int
+    meal_names: List[str]
+    meals: Annotated[List[Dict[str, Any]], merge_meals]
+    day_verdicts: Dict[int, str]
+    pending_days: List[int]
+    rounds: int
+    verbosity: Dict[str, str]
     final_output: str
-    step: str
+    step: Annotated[str, latest_step]
@@ -0,0 +1,66 @@
+"""
+Benchmark for the local cuisine keyword extractor
+
+Runs `extract_cuisine_keywords` over the bundled recipe corpus, reports the
+per-recipe latency and checks the top keyword against the labels in the corpus.
+
+Usage:
+    python benchmarks/bench_cuisine_keywords.py [--repeat N]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from agents.cuisine_keywords import extract_cuisine_keywords  # noqa: E402
+
+CORPUS = ROOT / "data" / "recipes.jsonl"
+
+
+def load_corpus(path: Path = CORPUS):
+    """Load the recipe corpus as a list of dicts."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    """Run the benchmark and print a short report."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=2000,
+                        help="passes over the corpus")
+    args = parser.parse_args()
+
+    recipes = load_corpus()
+    texts = [recipe["text"] for recipe in recipes]
+
+    # Accuracy: top keyword must equal the labelled primary keyword
+    correct = 0
+    for recipe in recipes:
+        keywords = extract_cuisine_keywords(recipe["text"])
+        if keywords[:1] == recipe["keywords"][:1]:
+            correct += 1
+        else:
+            print(f"❌ {recipe['id']}: expected {recipe['keywords']}, got {keywords}")
+
+    # Latency
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for text in texts:
+            extract_cuisine_keywords(text)
+    elapsed = time.perf_counter() - start
+    calls = args.repeat * len(texts)
+
+    avg_chars = sum(len(text) for text in texts) / len(texts)
+    print(f"📚 Corpus: {len(recipes)} recipes, {avg_chars:.0f} chars on average")
+    print(f"🎯 Top-1 accuracy: {correct}/{len(recipes)}")
+    print(f"⚡ {elapsed / calls * 1e6:.1f} µs per recipe "
+          f"({calls / elapsed:,.0f} recipes/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark for request deadlines
+
+Runs a request whose first recipe misses the goal under a range of latency
+budgets and reports the wall-clock time and which optional sections were
+dropped to meet each budget. The agents are fakes that sleep for a fixed
+upstream latency, so the numbers show the degradation policy, not model
+quality.
+
+Usage:
+    python benchmarks/bench_deadlines.py [--budgets 0,10,6,3] [--recipe-s S] [--review-s S]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# The nodes construct ChatOpenAI / googlemaps clients; no request is ever sent
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("GOOGLE_MAPS_API_KEY", "AIza-benchmark")
+# Keep node logs (and the refused recipe patches) out of the report
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+# Every request generates its recipe; see bench_recipe_index.py for corpus retrieval
+os.environ["RECIPE_RETRIEVAL"] = "0"
+
+import workflow  # noqa: E402
+from agents import agent_definitions  # noqa: E402
+from agents.agent_definitions import IngredientNutrients  # noqa: E402
+from agents.deadlines import deadline_after  # noqa: E402
+from agents.nutrition_cache import default_nutrition_cache  # noqa: E402
+
+RECIPE = "**Recipe Name:** Lemon Chicken\n\nIngredients:\n- 200 g chicken breast\n\nInstructions:\n1. Grill."
+FACTS = {"calories": 120.0, "protein_g": 10.0, "carbs_g": 8.0, "fat_g": 4.0, "sugar_g": 1.0, "fiber_g": 1.0}
+
+
+def ingredient_facts(ingredients):
+    """Answer a cache-miss analysis with the same FACTS for every ingredient line."""
+    return {index: IngredientNutrients(index=index, **FACTS) for index in range(len(ingredients))}
+
+
+def install_fake_agents(recipe_s: float, analysis_s: float, review_s: float, places_s: float):
+    """Replace upstream calls with sleeps; the goal is missed once per run, then met."""
+    verdicts = []
+
+    def timed(seconds, result):
+        def call(self, *args, **kwargs):
+            time.sleep(seconds)
+            return result
+        return call
+
+    def stream_recipe(self, *args, **kwargs):
+        time.sleep(recipe_s)
+        yield RECIPE
+
+    def evaluate(self, *args, **kwargs):
+        verdicts.append("YES" if verdicts else "NO")
+        return verdicts[-1]
+
+    def revise_recipe(self, *args, **kwargs):
+        raise ValueError("regenerate")  # full retries, the slow case
+
+    def analyse_ingredients(self, ingredients):
+        time.sleep(analysis_s)
+        return ingredient_facts(ingredients)
+
+    agent_definitions.RecipeCreatorAgent.stream_recipe = stream_recipe
+    agent_definitions.RecipeCreatorAgent.revise_recipe = revise_recipe
+    agent_definitions.NutritionalAnalysisAgent.analyse_nutrients = timed(analysis_s, "{'protein': 30}")
+    agent_definitions.NutritionalAnalysisAgent.analyse_ingredients = analyse_ingredients
+    agent_definitions.EvaluateNutritionalContent.evaluate = evaluate
+    agent_definitions.RecipeEvaluatorAgent.evaluate_recipe = timed(review_s, "Looks good.")
+    agent_definitions.NearbyRestaurantsAgent.recommend_restaurants = timed(places_s, [])
+    return verdicts
+
+
+def main():
+    """Run the benchmark and print a short report."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--budgets", default="0,10,6,3",
+                        help="comma-separated budgets in seconds (0 = no deadline)")
+    parser.add_argument("--recipe-s", type=float, default=2.0, help="simulated recipe generation latency (s)")
+    parser.add_argument("--analysis-s", type=float, default=0.5, help="simulated nutrition analysis latency (s)")
+    parser.add_argument("--review-s", type=float, default=3.0, help="simulated recipe evaluation latency (s)")
+    parser.add_argument("--places-s", type=float, default=0.8, help="simulated restaurant lookup latency (s)")
+    args = parser.parse_args()
+
+    verdicts = install_fake_agents(args.recipe_s, args.analysis_s, args.review_s, args.places_s)
+    graph = workflow.build_workflow(pipelined=True, speculative=False, fusions=[])
+
+    for budget in (float(value) for value in args.budgets.split(",")):
+        verdicts.clear()
+        default_nutrition_cache().clear()  # every budget analyses its recipe
+        state = {
+            "user_input": "High-protein dinner", "conversation_context": "", "recipe": "",
+            "nutrient_profile": "", "goal_compliance": "", "goal": "muscle gain", "weight": 180,
+            "evaluation": "", "restaurant_suggestions": [], "final_output": "",
+            "deadline": deadline_after(budget), "omitted_sections": [], "step": "starting",
+        }
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = graph.invoke(state)
+        elapsed = time.perf_counter() - start
+
+        omitted = result["omitted_sections"]
+        label = f"{budget:g} s budget" if budget else "no deadline"
+        print(f"{'⏱️ ' if budget else '🐢'} {label:>14}: {elapsed:5.2f} s, "
+              f"omitted: {', '.join(omitted) or 'nothing'}")
+
+
+if __name__ == "__main__":
+    main()
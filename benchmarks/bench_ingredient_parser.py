@@ -0,0 +1,102 @@
+"""
+Benchmark for the ingredient parser and canonical ingredient matcher
+
+Checks `parse_ingredient_line` against the labelled lines in
+data/ingredient_labels.jsonl, then measures single-threaded throughput of
+`parse_recipe_ingredients` over the recipe corpus, with the name-matching cache
+both warm and cold.
+
+Usage:
+    python benchmarks/bench_ingredient_parser.py [--repeat N]
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from agents.ingredient_catalog import default_matcher  # noqa: E402
+from agents.ingredient_parser import parse_ingredient_line, parse_recipe_ingredients  # noqa: E402
+
+CORPUS = ROOT / "data" / "recipes.jsonl"
+LABELS = ROOT / "data" / "ingredient_labels.jsonl"
+
+
+def load_jsonl(path: Path):
+    """Load a JSONL file as a list of dicts."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def check_labels(labels) -> int:
+    """Print mismatches against the labelled corpus and return the number correct."""
+    correct = 0
+    for label in labels:
+        parsed = parse_ingredient_line(label["line"])
+        problems = []
+        if parsed is None:
+            problems.append("not parsed")
+        else:
+            if label["quantity"] is None:
+                if parsed.quantity is not None:
+                    problems.append(f"quantity {parsed.quantity}")
+            elif parsed.quantity is None or abs(parsed.quantity - label["quantity"]) > 1e-6:
+                problems.append(f"quantity {parsed.quantity}")
+            if parsed.unit != label["unit"]:
+                problems.append(f"unit {parsed.unit!r}")
+            if parsed.name.lower() != label["name"]:
+                problems.append(f"name {parsed.name!r}")
+            if parsed.canonical_id != label["canonical_id"]:
+                problems.append(f"canonical_id {parsed.canonical_id}")
+            if label["grams"] is not None and abs((parsed.grams or 0) - label["grams"]) > 1e-3:
+                problems.append(f"grams {parsed.grams}")
+        if problems:
+            print(f"❌ {label['line']!r}: {', '.join(problems)}")
+        else:
+            correct += 1
+    return correct
+
+
+def throughput(texts, repeat: int, rounds: int = 5) -> float:
+    """Return recipes parsed per second, best of `rounds` runs of `repeat` passes."""
+    best = float("inf")
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for text in texts:
+                parse_recipe_ingredients(text)
+        best = min(best, time.perf_counter() - start)
+    return repeat * len(texts) / best
+
+
+def main():
+    """Run the benchmark and print a short report."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=200,
+                        help="passes over the corpus")
+    args = parser.parse_args()
+
+    labels = load_jsonl(LABELS)
+    texts = [recipe["text"] for recipe in load_jsonl(CORPUS)]
+    lines = sum(len(parse_recipe_ingredients(text)) for text in texts)
+
+    correct = check_labels(labels)
+    print(f"🎯 Labelled lines: {correct}/{len(labels)} fully correct")
+
+    matcher = default_matcher()
+    matcher.match.cache_clear()
+    cold = throughput(texts, 1, rounds=1)
+    warm = throughput(texts, args.repeat)
+
+    print(f"📚 Corpus: {len(texts)} recipes, {lines} ingredient lines")
+    print(f"🧊 Cold name cache: {cold:,.0f} recipes/s")
+    print(f"⚡ Warm name cache: {warm:,.0f} recipes/s "
+          f"({warm * lines / len(texts):,.0f} lines/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+Benchmark for the local intent router
+
+Three measurements:
+- routing accuracy, by 5-fold cross-validation over the labelled examples in
+  data/intents.jsonl, including how often a recipe request is wrongly kept
+  out of generation, and on recipe requests that mention a restaurant or a
+  nutrient (which the keyword rules must not route away);
+- classification latency;
+- a chat session of one recipe request followed by typical follow-ups
+  (nutrition questions, small talk, restaurant lookups), run with and
+  without the router.
+
+The agents are fakes with fixed latencies that count upstream calls, so the
+session numbers show what routing saves, not model quality.
+
+Usage:
+    python benchmarks/bench_intent_router.py [--call-ms MS] [--folds N]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# The nodes construct ChatOpenAI clients; no request is ever sent
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+# Every request generates its recipe; see bench_recipe_index.py for corpus retrieval
+os.environ["RECIPE_RETRIEVAL"] = "0"
+os.environ["REQUEST_DEADLINE_S"] = "0"
+
+import workflow  # noqa: E402
+from agents import agent_definitions  # noqa: E402
+from agents.agent_definitions import IngredientNutrients  # noqa: E402
+from agents.intent_router import GENERATE, IntentModel, classify_intent, load_examples  # noqa: E402
+from agents.nutrition_cache import default_nutrition_cache  # noqa: E402
+from agents.session_memory import ConversationSession  # noqa: E402
+
+RECIPE = (ROOT / "data" / "recipes.jsonl").read_text(encoding="utf-8").splitlines()[0]
+PROFILE = "\n".join([
+    '- chicken breast (450 g): {"calories": 742.5, "protein_g": 139.5, "carbs_g": 0.0, "fat_g": 16.2}',
+    'Total: {"calories": 1786.5, "protein_g": 179.7, "carbs_g": 213.0, "fat_g": 23.7, "sugar_g": 9.1}',
+])
+CONVERSATION = [
+    "Make me a healthy chicken pasta",
+    "how much protein is in that?",
+    "thanks!",
+    "Which ingredient has the most fat?",
+    "any Italian restaurants near me?",
+    "what are the macros?",
+    "Make it vegetarian instead",
+    "great, thank you",
+    "calories per serving?",
+]
+# Recipe requests that look like restaurant lookups or nutrition questions
+RECIPE_REQUESTS = [
+    "make me a pad thai like the one from my favourite restaurant",
+    "give me a takeout-style orange chicken recipe",
+    "Can you make a copycat delivery pizza at home",
+    "how much protein is in a recipe for lentil soup",
+]
+CALLS = Counter()
+FACTS = {"calories": 120.0, "protein_g": 10.0, "carbs_g": 8.0, "fat_g": 4.0, "sugar_g": 1.0, "fiber_g": 1.0}
+
+
+def ingredient_facts(ingredients):
+    """Answer a cache-miss analysis with the same FACTS for every ingredient line."""
+    return {index: IngredientNutrients(index=index, **FACTS) for index in range(len(ingredients))}
+
+
+def install_fake_agents(call_s: float):
+    """Replace upstream calls with sleeps that count themselves."""
+    recipe = json.loads(RECIPE)["text"]
+
+    def fake(name, result):
+        def call(self, *args, **kwargs):
+            CALLS[name] += 1
+            time.sleep(call_s)
+            return result
+        return call
+
+    def stream_recipe(self, *args, **kwargs):
+        CALLS["create_recipe"] += 1
+        time.sleep(call_s)
+        yield recipe
+
+    def analyse_ingredients(self, ingredients):
+        CALLS["analyse_ingredients"] += 1
+        time.sleep(call_s)
+        return ingredient_facts(ingredients)
+
+    agent_definitions.RecipeCreatorAgent.create_recipe = fake("create_recipe", recipe)
+    agent_definitions.RecipeCreatorAgent.stream_recipe = stream_recipe
+    agent_definitions.NutritionalAnalysisAgent.analyse_nutrients = fake("analyse_nutrients", PROFILE)
+    agent_definitions.NutritionalAnalysisAgent.analyse_ingredients = analyse_ingredients
+    agent_definitions.NutritionalAnalysisAgent.answer_question = fake("answer_question", "The chicken.")
+    agent_definitions.EvaluateNutritionalContent.evaluate = fake("evaluate", "YES")
+    agent_definitions.RecipeEvaluatorAgent.evaluate_recipe = fake("evaluate_recipe", "Looks good.")
+    agent_definitions.NearbyRestaurantsAgent.recommend_restaurants = fake("places", [])
+
+
+def cross_validate(folds: int):
+    """Return (accuracy, generation requests routed elsewhere, examples) over `folds` folds."""
+    examples = load_examples()
+    random.Random(3).shuffle(examples)
+    correct = lost = 0
+    for fold in range(folds):
+        train = [example for index, example in enumerate(examples) if index % folds != fold]
+        model = IntentModel().train(train)
+        for text, intent in examples[fold::folds]:
+            routed = classify_intent(text, True, model).intent
+            correct += routed == intent
+            lost += intent == GENERATE and routed != GENERATE
+    return correct / len(examples), lost, examples
+
+
+def session(routed: bool):
+    """Run CONVERSATION in one session; return (seconds, upstream calls)."""
+    workflow.INTENT_ROUTER = routed
+    workflow.compiled_workflow.cache_clear()
+    CALLS.clear()
+    default_nutrition_cache().clear()  # both modes start from a cold cache
+    chat = ConversationSession(f"bench-{routed}")
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for message in CONVERSATION:
+            workflow.run_workflow(message, chat)
+    return time.perf_counter() - start, sum(CALLS.values())
+
+
+def main():
+    """Run the benchmark and print a short report."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--call-ms", type=float, default=300.0, help="simulated latency per upstream call (ms)")
+    parser.add_argument("--folds", type=int, default=5, help="cross-validation folds")
+    args = parser.parse_args()
+
+    accuracy, lost, examples = cross_validate(args.folds)
+    generation = sum(intent == GENERATE for _, intent in examples)
+    print(f"🎯 Routing accuracy ({args.folds}-fold, {len(examples)} examples): {accuracy:.1%}; "
+          f"{lost}/{generation} recipe requests kept out of generation")
+    misrouted = [text for text in RECIPE_REQUESTS if classify_intent(text, True).intent != GENERATE]
+    print(f"🍜 Recipe requests naming a restaurant or nutrient: {len(RECIPE_REQUESTS) - len(misrouted)}/"
+          f"{len(RECIPE_REQUESTS)} sent to generation" + (f" (missed: {'; '.join(misrouted)})" if misrouted else ""))
+
+    texts = [text for text, _ in examples]
+    classify_intent(texts[0], True)  # trains the default model
+    times = []
+    for text in texts:
+        start = time.perf_counter()
+        classify_intent(text, True)
+        times.append((time.perf_counter() - start) * 1e6)
+    print(f"⚡ Classification: median {statistics.median(times):.0f} µs, max {max(times):.0f} µs")
+
+    install_fake_agents(args.call_ms / 1000)
+    for routed, icon, label in ((False, "🐢", "Without router"), (True, "⚡", "With router")):
+        seconds, calls = session(routed)
+        print(f"{icon} {label + ':':16} {len(CONVERSATION)} messages in {seconds:5.1f} s, {calls} upstream calls")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark for hot-path logging
+
+Compares the time a node thread spends emitting one status line with `print`
+(synchronous write to a slow stream) and with the queue-based structured
+logger from `agents.structured_logging`, with many threads logging at once.
+The sink sleeps per write to stand in for a slow terminal, pipe or log
+collector.
+
+Usage:
+    python benchmarks/bench_logging.py [--threads N] [--records R] [--write-us US]
+"""
+
+import argparse
+import io
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from agents.metrics import REGISTRY  # noqa: E402
+from agents.structured_logging import configure_logging, shutdown_logging  # noqa: E402
+
+
+class SlowStream(io.StringIO):
+    """In-memory stream whose writes take `write_s` seconds."""
+
+    def __init__(self, write_s: float):
+        super().__init__()
+        self.write_s = write_s
+
+    def write(self, text: str) -> int:
+        time.sleep(self.write_s)
+        return super().write(text)
+
+
+def run_threads(emit, threads: int, records: int) -> float:
+    """Return the mean caller-side microseconds per record over all threads."""
+    totals = []
+
+    def worker(index: int) -> None:
+        start = time.perf_counter()
+        for i in range(records):
+            emit(index, i)
+        totals.append(time.perf_counter() - start)
+
+    pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return sum(totals) / (threads * records) * 1e6
+
+
+def main():
+    """Run the benchmark and print a short report."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, default=16, help="concurrent logging threads")
+    parser.add_argument("--records", type=int, default=200, help="records per thread")
+    parser.add_argument("--write-us", type=float, default=50, help="simulated sink latency per write (us)")
+    args = parser.parse_args()
+
+    write_s = args.write_us / 1e6
+    stream = SlowStream(write_s)
+    lock = threading.Lock()
+
+    def emit_print(index, i):
+        # print holds the stream for the whole write, as a real stdout does
+        with lock:
+            print(f"verdict----> YES (thread {index}, record {i})", file=stream)
+
+    print(f"🧵 {args.threads} threads x {args.records} records, sink {args.write_us:.0f} us/write")
+    print_us = run_threads(emit_print, args.threads, args.records)
+    print(f"🐢 print:              {print_us:8.1f} us/record in the caller")
+
+    real_stdout, sys.stdout = sys.stdout, SlowStream(write_s)
+    try:
+        configure_logging(force=True)
+        logger = logging.getLogger("bench")
+
+        def emit_log(index, i):
+            logger.info("Goal verdict", extra={"verdict": "YES", "worker": index, "record": i})
+
+        log_us = run_threads(emit_log, args.threads, args.records)
+        shutdown_logging()
+    finally:
+        sys.stdout = real_stdout
+
+    dropped = REGISTRY.get_sample_value("recipe_log_records_dropped_total", {"level": "INFO"}) or 0.0
+    print(f"⚡ structured logging: {log_us:8.1f} us/record in the caller ({dropped:.0f} dropped)")
+
+
+if __name__ == "__main__":
+    main()
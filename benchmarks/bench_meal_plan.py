@@ -0,0 +1,162 @@
+"""
+Benchmark for the parallel meal-plan graph
+
+Compares a week of meals asked for the way users do today, one chat request
+per day through the recipe workflow, with one run of the meal-plan graph at a
+few concurrency bounds. The agents are replaced by fakes that sleep for a
+fixed upstream latency; each day meets the goal with probability `--p-meet`,
+so the numbers show latency and LLM calls spent, not model quality.
+
+Usage:
+    python benchmarks/bench_meal_plan.py [--days N] [--meals M,M] [--p-meet P] [--concurrency C,C]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# The nodes construct ChatOpenAI / googlemaps clients; no request is ever sent
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+# Keep node logs (and the missing Places key of the chat runs) out of the report
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+# Every request generates its recipe; see bench_recipe_index.py for corpus retrieval
+os.environ["RECIPE_RETRIEVAL"] = "0"
+# Goal retries regenerate the recipe, as the meal plan does
+os.environ["RECIPE_REVISION"] = "full"
+os.environ["PIPELINE_NUTRITION"] = "0"
+
+import workflow  # noqa: E402
+from agents import agent_definitions, meal_plan_nodes  # noqa: E402
+from agents.agent_definitions import IngredientNutrients  # noqa: E402
+from agents.nutrition_cache import default_nutrition_cache  # noqa: E402
+
+RECIPE = ("1. Recipe Name: Lemon Chicken\n\n2. Ingredients:\n- (chicken breast, 400 grams)\n\n"
+          "3. Instructions:\n1. Grill.\n\n4. Serving Size: 2 servings")
+PROFILE = ('- chicken breast (400 g): {"calories": 660.0, "protein_g": 124.0, "carbs_g": 0.0, "fat_g": 14.4}\n'
+           'Total: {"calories": 660.0, "protein_g": 124.0, "carbs_g": 0.0, "fat_g": 14.4, "sugar_g": 0.0, '
+           '"fiber_g": 0.0}')
+CALLS = {"count": 0}
+FACTS = {"calories": 120.0, "protein_g": 10.0, "carbs_g": 8.0, "fat_g": 4.0, "sugar_g": 1.0, "fiber_g": 1.0}
+
+
+def ingredient_facts(ingredients):
+    """Answer a cache-miss analysis with the same FACTS for every ingredient line."""
+    return {index: IngredientNutrients(index=index, **FACTS) for index in range(len(ingredients))}
+
+
+def install_fake_agents(p_meet: float, create_s: float, analysis_s: float, goal_s: float, rng: random.Random):
+    """Replace upstream calls with sleeps; a verdict is YES with probability `p_meet`."""
+    def sync_call(seconds, result):
+        def call(self, *args, **kwargs):
+            CALLS["count"] += 1
+            time.sleep(seconds)
+            return result() if callable(result) else result
+        return call
+
+    def async_call(seconds, result):
+        async def call(self, *args, **kwargs):
+            CALLS["count"] += 1
+            await asyncio.sleep(seconds)
+            return result() if callable(result) else result
+        return call
+
+    def analyse_ingredients(self, ingredients):
+        CALLS["count"] += 1
+        time.sleep(analysis_s)
+        return ingredient_facts(ingredients)
+
+    async def aanalyse_ingredients(self, ingredients):
+        CALLS["count"] += 1
+        await asyncio.sleep(analysis_s)
+        return ingredient_facts(ingredients)
+
+    def verdict():
+        return "YES" if rng.random() < p_meet else "NO"
+
+    agent_definitions.RecipeCreatorAgent.create_recipe = sync_call(create_s, RECIPE)
+    agent_definitions.NutritionalAnalysisAgent.analyse_nutrients = sync_call(analysis_s, PROFILE)
+    agent_definitions.NutritionalAnalysisAgent.analyse_ingredients = analyse_ingredients
+    agent_definitions.NutritionalAnalysisAgent.aanalyse_ingredients = aanalyse_ingredients
+    agent_definitions.EvaluateNutritionalContent.evaluate = sync_call(goal_s, verdict)
+    agent_definitions.EvaluateNutritionalContent.aevaluate = async_call(goal_s, verdict)
+    agent_definitions.RecipeEvaluatorAgent.evaluate_recipe = sync_call(0.0, "Looks good.")
+
+
+def measure_chat(days: int, runs: int):
+    """Return (mean seconds, mean LLM calls) of `days` chat requests in a row, one per day."""
+    graph = workflow.build_workflow(pipelined=False, speculative=False, routed=False)
+    total_s = 0.0
+    CALLS["count"] = 0
+    for _ in range(runs):
+        default_nutrition_cache().clear()  # every run analyses its recipes
+        start = time.perf_counter()
+        for day in range(1, days + 1):
+            state = {
+                "user_input": f"High-protein dinner for day {day}", "conversation_context": "", "recipe": "",
+                "nutrient_profile": "", "goal_compliance": "", "goal": "muscle gain", "weight": 180,
+                "evaluation": "", "restaurant_suggestions": [], "final_output": "", "deadline": 0.0,
+                "omitted_sections": [], "last_recipe": "", "last_nutrient_profile": "", "verbosity": {},
+                "step": "starting",
+            }
+            with contextlib.redirect_stdout(io.StringIO()):
+                graph.invoke(state, {"recursion_limit": 200})
+        total_s += time.perf_counter() - start
+    return total_s / runs, CALLS["count"] / runs
+
+
+def measure_plan(days: int, meals, concurrency: int, runs: int):
+    """Return (mean seconds, mean LLM calls, mean regenerated days) of one meal-plan run."""
+    total_s = 0.0
+    regenerated = 0
+    CALLS["count"] = 0
+    for _ in range(runs):
+        default_nutrition_cache().clear()  # every run analyses its recipes
+        start = time.perf_counter()
+        output = workflow.run_meal_plan("High-protein dinners", days, meals, concurrency=concurrency)
+        total_s += time.perf_counter() - start
+        regenerated += output.count("⚠️")
+    return total_s / runs, CALLS["count"] / runs, regenerated / runs
+
+
+def main():
+    """Run the benchmark and print a short report."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, default=7, help="days in the plan")
+    parser.add_argument("--meals", default="dinner", help="comma-separated meals of each day")
+    parser.add_argument("--p-meet", type=float, default=0.7, help="probability that a day meets the goal")
+    parser.add_argument("--concurrency", default="7,3", help="comma-separated meal-plan concurrency bounds")
+    parser.add_argument("--create-s", type=float, default=0.3, help="simulated recipe latency (s)")
+    parser.add_argument("--analysis-s", type=float, default=0.1, help="simulated analysis latency (s)")
+    parser.add_argument("--goal-s", type=float, default=0.03, help="simulated goal check latency (s)")
+    parser.add_argument("--runs", type=int, default=5, help="runs per mode")
+    args = parser.parse_args()
+    meals = args.meals.split(",")
+
+    pass_s = args.create_s + args.analysis_s + args.goal_s
+    print(f"🗓️ {args.days} days x {len(meals)} meal(s), a day meets the goal with p={args.p_meet:.2f}; "
+          f"one recipe ≈ {pass_s:.2f} s")
+
+    install_fake_agents(args.p_meet, args.create_s, args.analysis_s, args.goal_s, random.Random(7))
+    if meals == ["dinner"]:
+        mean_s, calls = measure_chat(args.days, args.runs)
+        print(f"🐢 {args.days} chat requests: {mean_s:5.2f} s ({mean_s / pass_s:4.1f} recipes), "
+              f"{calls:5.1f} LLM calls")
+    for concurrency in (int(value) for value in args.concurrency.split(",")):
+        install_fake_agents(args.p_meet, args.create_s, args.analysis_s, args.goal_s, random.Random(7))
+        mean_s, calls, missed = measure_plan(args.days, meals, concurrency, args.runs)
+        print(f"⚡ Meal plan, {concurrency:2} at once: {mean_s:5.2f} s ({mean_s / pass_s:4.1f} recipes), "
+              f"{calls:5.1f} LLM calls, {missed:.1f} days still off goal "
+              f"(max rounds {meal_plan_nodes.MEAL_PLAN_MAX_ROUNDS})")
+
+
+if __name__ == "__main__":
+    main()
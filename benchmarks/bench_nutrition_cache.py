@@ -0,0 +1,118 @@
+"""
+Benchmark for the ingredient-level nutrition cache
+
+Replays the labelled recipe corpus as a stream of requests, each followed by a
+goal retry that rescales one or two ingredients and swaps one for an
+ingredient from another recipe, and compares whole-recipe analysis with
+`IncrementalNutritionAnalyzer`. The agent is a fake whose latency grows with
+the number of ingredients it is asked about, so the numbers show how much
+analysis work the cache saves, not model quality.
+
+Usage:
+    python benchmarks/bench_nutrition_cache.py [--rounds N] [--call-ms MS] [--ingredient-ms MS]
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from agents.agent_definitions import IngredientNutrients  # noqa: E402
+from agents.metrics import REGISTRY  # noqa: E402
+from agents.nutrition_cache import IncrementalNutritionAnalyzer, NutritionCache  # noqa: E402
+
+CORPUS = ROOT / "data" / "recipes.jsonl"
+
+
+class FakeNutritionAgent:
+    """Stands in for NutritionalAnalysisAgent; sleeps per call and per ingredient."""
+
+    def __init__(self, call_s: float, ingredient_s: float):
+        self.call_s = call_s
+        self.ingredient_s = ingredient_s
+        self.ingredients_analysed = 0
+        self.calls = 0
+
+    def _work(self, count: int) -> None:
+        self.calls += 1
+        self.ingredients_analysed += count
+        time.sleep(self.call_s + self.ingredient_s * count)
+
+    def analyse_nutrients(self, recipe: str) -> str:
+        self._work(recipe.count("\n- "))
+        return "{}"
+
+    def analyse_ingredients(self, ingredients):
+        self._work(len(ingredients))
+        return {
+            index: IngredientNutrients(index=index, calories=100, protein_g=5, carbs_g=10,
+                                       fat_g=3, sugar_g=1, fiber_g=1)
+            for index in range(len(ingredients))
+        }
+
+
+def recipe_text(ingredients) -> str:
+    """Render an ingredient list the way the RecipeCreatorAgent does."""
+    lines = [f"- ({item['name']}, {item['quantity']:g} {item['unit']})" for item in ingredients]
+    return "Ingredients:\n" + "\n".join(lines) + "\n\nInstructions:\n1. Cook everything."
+
+
+def requests(recipes, rounds: int, rng: random.Random):
+    """Yield recipe texts: each corpus recipe, then its goal retry, `rounds` times over."""
+    pool = [item for recipe in recipes for item in recipe["ingredients"]]
+    for _ in range(rounds):
+        for recipe in rng.sample(recipes, len(recipes)):
+            ingredients = [dict(item) for item in recipe["ingredients"]]
+            yield recipe_text(ingredients)
+            for item in rng.sample(ingredients, min(2, len(ingredients))):
+                item["quantity"] *= rng.choice((0.5, 1.5, 2.0))
+            ingredients[rng.randrange(len(ingredients))] = dict(rng.choice(pool))
+            yield recipe_text(ingredients)
+
+
+def main():
+    """Run the benchmark and print a short report."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=3, help="passes over the corpus")
+    parser.add_argument("--call-ms", type=float, default=2.0, help="simulated fixed latency per call (ms)")
+    parser.add_argument("--ingredient-ms", type=float, default=1.0,
+                        help="simulated latency per analysed ingredient (ms)")
+    args = parser.parse_args()
+
+    with open(CORPUS, "r", encoding="utf-8") as f:
+        recipes = [json.loads(line) for line in f if line.strip()]
+    texts = list(requests(recipes, args.rounds, random.Random(7)))
+
+    whole = FakeNutritionAgent(args.call_ms / 1000, args.ingredient_ms / 1000)
+    start = time.perf_counter()
+    for text in texts:
+        whole.analyse_nutrients(text)
+    whole_s = time.perf_counter() - start
+
+    agent = FakeNutritionAgent(args.call_ms / 1000, args.ingredient_ms / 1000)
+    analyzer = IncrementalNutritionAnalyzer(agent, NutritionCache())
+    start = time.perf_counter()
+    for text in texts:
+        analyzer.analyse(text)
+    cached_s = time.perf_counter() - start
+
+    print(f"🧾 {len(texts)} analyses over {len(recipes)} recipes (each followed by a goal retry)")
+    print(f"🐢 Whole recipe: {whole.ingredients_analysed} ingredients analysed, "
+          f"{whole_s * 1000 / len(texts):.1f} ms/analysis")
+    print(f"⚡ Ingredient cache: {agent.ingredients_analysed} ingredients analysed "
+          f"({agent.ingredients_analysed / whole.ingredients_analysed:.0%}), {agent.calls} agent calls, "
+          f"{cached_s * 1000 / len(texts):.1f} ms/analysis")
+    outcomes = {name: REGISTRY.get_sample_value("recipe_nutrition_analyses_total", {"outcome": name}) or 0.0
+                for name in ("full_hit", "partial", "miss")}
+    print(f"📊 Outcomes: {outcomes['full_hit']:.0f} full hits, {outcomes['partial']:.0f} partial, "
+          f"{outcomes['miss']:.0f} misses; ingredient hit rate "
+          f"{analyzer.cache.hits / (analyzer.cache.hits + analyzer.cache.misses):.0%}")
+
+
+if __name__ == "__main__":
+    main()
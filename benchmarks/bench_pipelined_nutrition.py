@@ -0,0 +1,128 @@
+"""
+Benchmark for pipelined nutrition analysis
+
+Runs the workflow end to end in sequential and pipelined mode with the agents
+replaced by fakes that sleep for a configurable upstream latency: the recipe
+is streamed token by token, and nutrition analysis, goal evaluation and
+recipe evaluation each take a fixed time. Reports the wall-clock time of
+each mode and how much of it the pipeline hides.
+
+Usage:
+    python benchmarks/bench_pipelined_nutrition.py [--token-ms MS] [--analysis-s S] [--runs N]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# The nodes construct ChatOpenAI clients; no request is ever sent
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+# Keep per-node INFO logs out of the report
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# Every request generates its recipe; see bench_recipe_index.py for corpus retrieval
+os.environ["RECIPE_RETRIEVAL"] = "0"
+
+import workflow  # noqa: E402
+from agents import agent_definitions  # noqa: E402
+from agents.agent_definitions import IngredientNutrients  # noqa: E402
+from agents.ingredient_parser import ingredient_section_bounds  # noqa: E402
+from agents.nutrition_cache import default_nutrition_cache  # noqa: E402
+
+CORPUS = ROOT / "data" / "recipes.jsonl"
+FACTS = {"calories": 120.0, "protein_g": 10.0, "carbs_g": 8.0, "fat_g": 4.0, "sugar_g": 1.0, "fiber_g": 1.0}
+
+
+def ingredient_facts(ingredients):
+    """Answer a cache-miss analysis with the same FACTS for every ingredient line."""
+    return {index: IngredientNutrients(index=index, **FACTS) for index in range(len(ingredients))}
+
+
+def install_fake_agents(recipe: str, token_ms: float, analysis_s: float, goal_s: float, review_s: float):
+    """Replace the agents' upstream calls with sleeps of the given length."""
+    tokens = [recipe[i:i + 4] for i in range(0, len(recipe), 4)]
+
+    def create_recipe(self, *args, **kwargs):
+        time.sleep(len(tokens) * token_ms / 1000)
+        return recipe
+
+    def stream_recipe(self, *args, **kwargs):
+        for token in tokens:
+            time.sleep(token_ms / 1000)
+            yield token
+
+    def timed(seconds, result):
+        def call(self, *args, **kwargs):
+            time.sleep(seconds)
+            return result
+        return call
+
+    def analyse_ingredients(self, ingredients):
+        time.sleep(analysis_s)
+        return ingredient_facts(ingredients)
+
+    agent_definitions.RecipeCreatorAgent.create_recipe = create_recipe
+    agent_definitions.RecipeCreatorAgent.stream_recipe = stream_recipe
+    agent_definitions.NutritionalAnalysisAgent.analyse_nutrients = timed(analysis_s, "{'protein': 30}")
+    agent_definitions.NutritionalAnalysisAgent.analyse_ingredients = analyse_ingredients
+    agent_definitions.EvaluateNutritionalContent.evaluate = timed(goal_s, "YES")
+    agent_definitions.RecipeEvaluatorAgent.evaluate_recipe = timed(review_s, "Looks good.")
+    return len(tokens)
+
+
+def run(graph) -> float:
+    """Run `graph` once from a fresh state and return the wall-clock seconds."""
+    state = {
+        "user_input": "Make me a healthy dinner", "conversation_context": "", "recipe": "",
+        "nutrient_profile": "", "goal_compliance": "", "goal": "weight loss", "weight": 200,
+        "evaluation": "", "restaurant_suggestions": [], "final_output": "", "step": "starting",
+    }
+    default_nutrition_cache().clear()  # a new recipe, so every run analyses it
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        graph.invoke(state)
+    return time.perf_counter() - start
+
+
+def main():
+    """Run the benchmark and print a short report."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--token-ms", type=float, default=4.0,
+                        help="simulated time per streamed 4-character token (ms)")
+    parser.add_argument("--analysis-s", type=float, default=1.0,
+                        help="simulated nutrition analysis latency (s)")
+    parser.add_argument("--goal-s", type=float, default=0.3,
+                        help="simulated goal evaluation latency (s)")
+    parser.add_argument("--review-s", type=float, default=0.8,
+                        help="simulated recipe evaluation latency (s)")
+    parser.add_argument("--runs", type=int, default=3, help="runs per mode (best is reported)")
+    args = parser.parse_args()
+
+    with open(CORPUS, "r", encoding="utf-8") as f:
+        recipe = json.loads(f.readline())["text"]
+    start, end = ingredient_section_bounds(recipe)
+    tokens = install_fake_agents(recipe, args.token_ms, args.analysis_s, args.goal_s, args.review_s)
+
+    sequential = workflow.build_workflow(pipelined=False)
+    pipelined = workflow.build_workflow(pipelined=True)
+    best_sequential = min(run(sequential) for _ in range(args.runs))
+    best_pipelined = min(run(pipelined) for _ in range(args.runs))
+
+    stream_s = tokens * args.token_ms / 1000
+    print(f"📜 Recipe: {tokens} tokens ({stream_s:.2f} s streamed), "
+          f"ingredients close at {end / len(recipe):.0%} of the text")
+    print(f"🐢 Sequential: {best_sequential:.2f} s")
+    print(f"⚡ Pipelined:  {best_pipelined:.2f} s "
+          f"({best_sequential - best_pipelined:.2f} s saved, "
+          f"{1 - best_pipelined / best_sequential:.0%})")
+
+
+if __name__ == "__main__":
+    main()
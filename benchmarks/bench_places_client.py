@@ -0,0 +1,146 @@
+"""
+Benchmark for the async Places client
+
+Starts a local stub of the Places Text Search endpoint that answers after a
+fixed delay, then compares restaurant lookups through the synchronous
+`googlemaps` client with the pooled `AsyncPlacesClient`: one lookup with a
+query per cuisine keyword, and a burst of lookups made from request handlers
+on one event loop (where the synchronous client blocks the loop). The numbers
+show request scheduling, not Google's latency.
+
+Usage:
+    python benchmarks/bench_places_client.py [--delay-ms MS] [--burst N]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from agents.agent_definitions import NearbyRestaurantsAgent  # noqa: E402
+from agents.concurrency import run_coroutine_sync  # noqa: E402
+from agents.places_client import AsyncPlacesClient, keyword_queries  # noqa: E402
+
+API_KEY = "AIza-benchmark"
+RECIPE = "Italian risotto with pesto, served like a Neapolitan pasta dish"
+
+
+def stub_server(delay_s: float) -> ThreadingHTTPServer:
+    """Start a Places Text Search stub; each query returns 5 places, 2 shared by every query."""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real endpoint
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path != "/maps/api/place/textsearch/json":
+                self.send_error(404)
+                return
+            query = parse_qs(url.query).get("query", [""])[0]
+            time.sleep(delay_s)
+            own = [f"{query}-{rank}" for rank in range(3)]
+            results = [
+                {"place_id": place_id, "name": place_id.title(), "formatted_address": "Toronto",
+                 "rating": 4.5, "price_level": 2, "user_ratings_total": 100}
+                for place_id in own[:2] + ["popular-1", "popular-2"] + own[2:]
+            ]
+            body = json.dumps({"status": "OK", "results": results}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    class Server(ThreadingHTTPServer):
+        daemon_threads = True
+        request_queue_size = 64  # accept a burst of new connections
+
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def timed(call) -> tuple:
+    """Return (seconds, result) of `call()`."""
+    start = time.perf_counter()
+    result = call()
+    return time.perf_counter() - start, result
+
+
+async def burst(handler, count: int) -> None:
+    """Serve `count` lookups "concurrently" from coroutines on one event loop."""
+    await asyncio.gather(*(handler() for _ in range(count)))
+
+
+def main():
+    """Run the benchmark and print a short report."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--delay-ms", type=float, default=150.0, help="stub latency per query (ms)")
+    parser.add_argument("--burst", type=int, default=8, help="concurrent lookups in the burst test")
+    parser.add_argument("--concurrency", type=int, default=8, help="PLACES_MAX_CONCURRENCY for the async client")
+    args = parser.parse_args()
+
+    server = stub_server(args.delay_ms / 1000)
+    host = f"http://127.0.0.1:{server.server_port}"
+
+    sync_agent = NearbyRestaurantsAgent(None, API_KEY, backend="sync")
+    sync_agent.gmaps.base_url = host
+    client = AsyncPlacesClient(API_KEY, base_url=f"{host}/maps/api/place",
+                               max_concurrency=args.concurrency, max_connections=args.concurrency)
+    async_agent = NearbyRestaurantsAgent(None, API_KEY, backend="async", places_client=client)
+    queries = keyword_queries(sync_agent.extract_keywords(RECIPE))
+
+    def sync_per_keyword():
+        places = {}
+        for query in queries:
+            for result in sync_agent.gmaps.places(query=query, location="Toronto", radius=5000,
+                                                  type="restaurant")["results"]:
+                places.setdefault(result["place_id"], result)
+        return list(places.values())[:5]
+
+    # Warm both connection paths so the numbers exclude connection setup
+    sync_agent.recommend_restaurants(RECIPE, "Toronto")
+    async_agent.recommend_restaurants(RECIPE, "Toronto")
+
+    print(f"🔎 Keywords: {sync_agent.extract_keywords(RECIPE)} ({len(queries)} queries)")
+    seconds, single = timed(lambda: sync_agent.recommend_restaurants(RECIPE, "Toronto"))
+    print(f"🐢 Sync, one combined query:    {seconds * 1000:6.0f} ms, {len(single)} places")
+    seconds, merged = timed(sync_per_keyword)
+    print(f"🐢 Sync, a query per keyword:   {seconds * 1000:6.0f} ms, {len(merged)} places")
+    seconds, merged = timed(lambda: async_agent.recommend_restaurants(RECIPE, "Toronto"))
+    print(f"⚡ Async, a query per keyword:  {seconds * 1000:6.0f} ms, {len(merged)} places "
+          f"(deduplicated by place id)")
+
+    async def blocking_handler():
+        return sync_agent.recommend_restaurants(RECIPE, "Toronto")
+
+    async def async_handler():
+        return await async_agent.arecommend_restaurants(RECIPE, "Toronto")
+
+    sync_s, _ = timed(lambda: asyncio.run(burst(blocking_handler, args.burst)))
+    async_s, _ = timed(lambda: run_coroutine_sync(burst(async_handler, args.burst)))
+    print(f"🐢 Burst of {args.burst} on one event loop, sync client:  {sync_s:5.2f} s "
+          f"({args.burst} queries, one at a time)")
+    print(f"⚡ Burst of {args.burst} on one event loop, async client: {async_s:5.2f} s "
+          f"({args.burst * len(queries)} queries, {args.concurrency} in flight)")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
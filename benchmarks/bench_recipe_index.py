@@ -0,0 +1,140 @@
+"""
+Benchmark for the local recipe index
+
+Writes a synthetic corpus of recipes (titles, cuisines, dishes, diets and
+ingredient lists recombined from the bundled recipes and ingredient labels),
+indexes it with `RecipeIndex` and replays a set of recipe requests against it.
+Reports the build time, the query latency percentiles with the default
+per-term postings cap and for an exhaustive scan, and how often the capped
+search returns the same best recipe as the exhaustive one (or one scoring
+within 5% of it).
+
+Usage:
+    python benchmarks/bench_recipe_index.py [--recipes N] [--queries N]
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from agents.cuisine_keywords import CUISINES, DISHES  # noqa: E402
+from agents.recipe_index import RecipeIndex, parse_query  # noqa: E402
+
+CORPUS = ROOT / "data" / "recipes.jsonl"
+LABELS = ROOT / "data" / "ingredient_labels.jsonl"
+DIETS = ["vegan", "vegetarian", "gluten-free", "dairy-free", "keto", "nut-free"]
+ADJECTIVES = ["spicy", "creamy", "smoky", "crispy", "zesty", "herbed", "roasted", "grilled",
+              "garlic", "honey", "lemon", "coconut", "sesame", "ginger", "chipotle", "miso"]
+
+
+def synthetic_corpus(path: str, count: int, rng: random.Random):
+    """Write `count` synthetic recipes to `path`; return the ingredient, cuisine and dish vocabularies."""
+    with open(CORPUS, "r", encoding="utf-8") as f:
+        bases = [json.loads(line) for line in f if line.strip()]
+    with open(LABELS, "r", encoding="utf-8") as f:
+        names = sorted({json.loads(line)["name"] for line in f if line.strip()})
+    cuisines, dishes = list(CUISINES), list(DISHES)
+
+    with open(path, "w", encoding="utf-8") as out:
+        for number in range(count):
+            base = rng.choice(bases)
+            ingredients = rng.sample(names, rng.randint(5, 12))
+            cuisine = rng.choice(cuisines) if rng.random() < 0.7 else base["cuisine"]
+            dish = rng.choice(dishes)
+            title = f"{rng.choice(ADJECTIVES).title()} {ingredients[0].title()} {dish.title()}"
+            lines = [f"- ({name}, {rng.randint(1, 40) * 10} grams)" for name in ingredients]
+            text = (f"1. Recipe Name: {title}\n\n2. Ingredients:\n" + "\n".join(lines)
+                    + "\n\n3. Instructions:\n1. Prepare the ingredients.\n2. Cook and serve.")
+            out.write(json.dumps({
+                "id": f"synthetic-{number}", "title": title, "cuisine": cuisine, "dish": dish,
+                "diets": rng.sample(DIETS, rng.randint(0, 2)), "keywords": [f"{cuisine} {dish}"],
+                "ingredients": [{"name": name} for name in ingredients], "text": text,
+            }) + "\n")
+    return names, cuisines, dishes
+
+
+def requests(count: int, names, cuisines, dishes, rng: random.Random):
+    """Return `count` free-text recipe requests in a few typical shapes."""
+    shapes = [
+        lambda: f"Make me a {rng.choice(cuisines)} {rng.choice(dishes)} with {rng.choice(names)}",
+        lambda: f"{rng.choice(DIETS)} {rng.choice(dishes)} please",
+        lambda: f"{rng.choice(ADJECTIVES)} {rng.choice(names)} {rng.choice(dishes)} without {rng.choice(names)}",
+        lambda: f"I want something with {rng.choice(names)}, {rng.choice(names)} and {rng.choice(names)}",
+        lambda: f"{rng.choice(cuisines)} {rng.choice(dishes)}",
+    ]
+    return [rng.choice(shapes)() for _ in range(count)]
+
+
+def latencies(index: RecipeIndex, queries):
+    """Return (per-query milliseconds, best hit per query)."""
+    times, best = [], []
+    for query in queries:
+        start = time.perf_counter()
+        hits = index.search(query, k=5)
+        times.append((time.perf_counter() - start) * 1000)
+        best.append(hits[0] if hits else None)
+    return times, best
+
+
+def percentile(values, fraction: float) -> float:
+    """Return the `fraction` percentile of `values`."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    """Run the benchmark and print a short report."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=100_000, help="synthetic corpus size")
+    parser.add_argument("--queries", type=int, default=500, help="requests replayed against the index")
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "recipes.jsonl")
+        names, cuisines, dishes = synthetic_corpus(path, args.recipes, rng)
+        size_mb = os.path.getsize(path) / 1e6
+
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.perf_counter()
+        index = RecipeIndex.build(path)
+        build_s = time.perf_counter() - start
+        rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(f"📚 Indexed {len(index):,} recipes ({size_mb:.0f} MB of JSONL) in {build_s:.1f} s, "
+              f"~{(rss_after - rss_before) / 1024:.0f} MB resident")
+
+        queries = [parse_query(text) for text in requests(args.queries, names, cuisines, dishes, rng)]
+        latencies(index, queries[:20])  # warm up
+
+        capped, capped_best = latencies(index, queries)
+        cap = index.max_postings
+        index.max_postings = len(index)
+        exhaustive, exhaustive_best = latencies(index, queries)
+        index.max_postings = cap
+
+        for label, icon, times in ((f"capped at {cap} postings/term", "⚡", capped),
+                                   ("exhaustive", "🐢", exhaustive)):
+            print(f"{icon} Query, {label}: p50 {statistics.median(times):.2f} ms, "
+                  f"p95 {percentile(times, 0.95):.2f} ms, max {max(times):.2f} ms")
+        pairs = list(zip(capped_best, exhaustive_best))
+        same = sum((a and a.recipe_id) == (b and b.recipe_id) for a, b in pairs) / len(pairs)
+        close = sum(a is None and b is None or bool(a and b and a.score >= 0.95 * b.score)
+                    for a, b in pairs) / len(pairs)
+        print(f"🎯 Same best recipe as the exhaustive scan for {same:.1%} of {len(queries)} requests, "
+              f"within 5% of its score for {close:.1%}")
+
+
+if __name__ == "__main__":
+    main()
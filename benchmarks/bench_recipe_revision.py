@@ -0,0 +1,156 @@
+"""
+Benchmark for patch-based recipe revision
+
+Runs a request whose first recipe misses the goal, so the workflow retries
+once, with the retry either regenerating the whole recipe (RECIPE_REVISION=full)
+or patching it. The agents are fakes whose generation latency is a first-token
+delay plus a per-token cost, so the numbers show what output tokens cost on
+the retry, not model quality.
+
+Usage:
+    python benchmarks/bench_recipe_revision.py [--token-ms MS] [--first-token-ms MS] [--runs N]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# The nodes construct ChatOpenAI clients; no request is ever sent
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+# Keep node logs (and the Places lookup failing without a key) out of the report
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+# Every request generates its recipe; see bench_recipe_index.py for corpus retrieval
+os.environ["RECIPE_RETRIEVAL"] = "0"
+
+import workflow  # noqa: E402
+from agents import agent_definitions, recipe_patch  # noqa: E402
+from agents.agent_definitions import IngredientNutrients, RecipePatch  # noqa: E402
+from agents.nutrition_cache import default_nutrition_cache  # noqa: E402
+from agents.session_memory import estimate_tokens  # noqa: E402
+
+CORPUS = ROOT / "data" / "recipes.jsonl"
+PATCH = RecipePatch(
+    edits=[
+        {"action": "change", "ingredient": "chicken breast", "quantity": "600 g"},
+        {"action": "replace", "ingredient": "whole wheat penne pasta",
+         "new_ingredient": "zucchini noodles", "quantity": "300 g"},
+    ],
+    note="More lean protein and fewer starchy carbs per serving.",
+)
+GENERATED = {"tokens": 0}
+FACTS = {"calories": 120.0, "protein_g": 10.0, "carbs_g": 8.0, "fat_g": 4.0, "sugar_g": 1.0, "fiber_g": 1.0}
+
+
+def ingredient_facts(ingredients):
+    """Answer a cache-miss analysis with the same FACTS for every ingredient line."""
+    return {index: IngredientNutrients(index=index, **FACTS) for index in range(len(ingredients))}
+
+
+def install_fake_agents(recipe: str, first_token_s: float, token_s: float, call_s: float):
+    """Replace upstream calls with sleeps; the goal is missed once per run, then met."""
+    recipe_tokens = [recipe[i:i + 4] for i in range(0, len(recipe), 4)]
+    patch_tokens = estimate_tokens(PATCH.model_dump_json())
+    verdicts = []
+
+    def create_recipe(self, *args, **kwargs):
+        GENERATED["tokens"] += len(recipe_tokens)
+        time.sleep(first_token_s + len(recipe_tokens) * token_s)
+        return recipe
+
+    def stream_recipe(self, *args, **kwargs):
+        time.sleep(first_token_s)
+        for token in recipe_tokens:
+            GENERATED["tokens"] += 1
+            time.sleep(token_s)
+            yield token
+
+    def revise_recipe(self, *args, **kwargs):
+        GENERATED["tokens"] += patch_tokens
+        time.sleep(first_token_s + patch_tokens * token_s)
+        return PATCH
+
+    def evaluate(self, *args, **kwargs):
+        time.sleep(call_s)
+        verdicts.append("YES" if verdicts else "NO")
+        return verdicts[-1]
+
+    def timed(result):
+        def call(self, *args, **kwargs):
+            time.sleep(call_s)
+            return result
+        return call
+
+    def analyse_ingredients(self, ingredients):
+        time.sleep(call_s)
+        return ingredient_facts(ingredients)
+
+    agent_definitions.RecipeCreatorAgent.create_recipe = create_recipe
+    agent_definitions.RecipeCreatorAgent.stream_recipe = stream_recipe
+    agent_definitions.RecipeCreatorAgent.revise_recipe = revise_recipe
+    agent_definitions.NutritionalAnalysisAgent.analyse_nutrients = timed("{'protein': 30}")
+    agent_definitions.NutritionalAnalysisAgent.analyse_ingredients = analyse_ingredients
+    agent_definitions.EvaluateNutritionalContent.evaluate = evaluate
+    agent_definitions.RecipeEvaluatorAgent.evaluate_recipe = timed("Looks good.")
+    return verdicts, len(recipe_tokens), patch_tokens
+
+
+def run(graph, verdicts) -> float:
+    """Run `graph` once from a fresh state and return the wall-clock seconds."""
+    verdicts.clear()
+    GENERATED["tokens"] = 0
+    default_nutrition_cache().clear()  # every run analyses its first recipe
+    state = {
+        "user_input": "Make me a healthy chicken pasta", "conversation_context": "", "recipe": "",
+        "nutrient_profile": "", "goal_compliance": "", "goal": "muscle gain", "weight": 180,
+        "evaluation": "", "restaurant_suggestions": [], "final_output": "", "step": "starting",
+    }
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        graph.invoke(state)
+    return time.perf_counter() - start
+
+
+def main():
+    """Run the benchmark and print a short report."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--token-ms", type=float, default=15.0, help="simulated time per output token (ms)")
+    parser.add_argument("--first-token-ms", type=float, default=300.0,
+                        help="simulated time to first token per generation (ms)")
+    parser.add_argument("--call-ms", type=float, default=300.0,
+                        help="simulated latency of the analysis and evaluation calls (ms)")
+    parser.add_argument("--runs", type=int, default=3, help="runs per mode (best is reported)")
+    args = parser.parse_args()
+
+    with open(CORPUS, "r", encoding="utf-8") as f:
+        recipe = json.loads(f.readline())["text"]
+    verdicts, recipe_tokens, patch_tokens = install_fake_agents(
+        recipe, args.first_token_ms / 1000, args.token_ms / 1000, args.call_ms / 1000
+    )
+
+    print(f"📜 Recipe: {recipe_tokens} tokens; patch: {patch_tokens} tokens")
+    results = {}
+    for mode in ("full", "patch"):
+        recipe_patch.RECIPE_REVISION = mode
+        for pipelined in (False, True):
+            graph = workflow.build_workflow(pipelined=pipelined, speculative=False, fusions=[])
+            best = min(run(graph, verdicts) for _ in range(args.runs))
+            results[mode, pipelined] = best
+            label = "Pipelined " if pipelined else "Sequential"
+            icon = "🐢" if mode == "full" else "⚡"
+            print(f"{icon} {label} with {mode} retry: {best:.2f} s, {GENERATED['tokens']} tokens generated")
+
+    for pipelined in (False, True):
+        saved = results["full", pipelined] - results["patch", pipelined]
+        print(f"✂️  {'Pipelined' if pipelined else 'Sequential'}: retry {saved:.2f} s faster with a patch")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark for local serving-size rescaling
+
+Runs a first recipe request in a chat session, then a series of sizing
+follow-ups ("make that for 8 people", "halve it", ...) through `run_workflow`,
+once with the follow-ups rescaled locally and once with RECIPE_RESCALE=0, where
+each one runs the whole workflow again. The agents are fakes whose generation
+latency is a first-token delay plus a per-token cost, so the numbers show
+what the LLM round-trips cost, not model quality. The local rescaler is also
+timed on every recipe of the bundled corpus.
+
+Usage:
+    python benchmarks/bench_rescaler.py [--token-ms MS] [--first-token-ms MS] [--call-ms MS]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# The nodes construct ChatOpenAI clients; no request is ever sent
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+# Keep node logs (and the Places lookup failing without a key) out of the report
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+# Every request generates its recipe; see bench_recipe_index.py for corpus retrieval
+os.environ["RECIPE_RETRIEVAL"] = "0"
+# No deadline, so the full workflow always runs every section
+os.environ["REQUEST_DEADLINE_S"] = "0"
+
+import workflow  # noqa: E402
+from agents import agent_definitions, recipe_rescaler  # noqa: E402
+from agents.agent_definitions import IngredientNutrients  # noqa: E402
+from agents.nutrition_cache import default_nutrition_cache  # noqa: E402
+from agents.recipe_rescaler import recipe_servings, scale_nutrient_profile, scale_recipe  # noqa: E402
+from agents.session_memory import ConversationSession  # noqa: E402
+
+CORPUS = ROOT / "data" / "recipes.jsonl"
+FOLLOW_UPS = ["make that for 8 people", "halve it", "double the recipe please", "can you make it for six?",
+              "scale it by 1.5"]
+PROFILE = "\n".join([
+    '- chicken breast (450 g): {"calories": 742.5, "protein_g": 139.5, "carbs_g": 0.0, "fat_g": 16.2}',
+    '- whole wheat penne pasta (300 g): {"calories": 1044.0, "protein_g": 40.2, "carbs_g": 213.0, "fat_g": 7.5}',
+    'Total: {"calories": 1786.5, "protein_g": 179.7, "carbs_g": 213.0, "fat_g": 23.7}',
+])
+GENERATED = {"tokens": 0}
+FACTS = {"calories": 120.0, "protein_g": 10.0, "carbs_g": 8.0, "fat_g": 4.0, "sugar_g": 1.0, "fiber_g": 1.0}
+
+
+def ingredient_facts(ingredients):
+    """Answer a cache-miss analysis with the same FACTS for every ingredient line."""
+    return {index: IngredientNutrients(index=index, **FACTS) for index in range(len(ingredients))}
+
+
+def install_fake_agents(recipe: str, first_token_s: float, token_s: float, call_s: float):
+    """Replace upstream calls with sleeps; the generated recipe is always `recipe`."""
+    recipe_tokens = [recipe[i:i + 4] for i in range(0, len(recipe), 4)]
+
+    def create_recipe(self, *args, **kwargs):
+        GENERATED["tokens"] += len(recipe_tokens)
+        time.sleep(first_token_s + len(recipe_tokens) * token_s)
+        return recipe
+
+    def stream_recipe(self, *args, **kwargs):
+        time.sleep(first_token_s)
+        for token in recipe_tokens:
+            GENERATED["tokens"] += 1
+            time.sleep(token_s)
+            yield token
+
+    def timed(result):
+        def call(self, *args, **kwargs):
+            time.sleep(call_s)
+            return result
+        return call
+
+    def analyse_ingredients(self, ingredients):
+        time.sleep(call_s)
+        return ingredient_facts(ingredients)
+
+    agent_definitions.RecipeCreatorAgent.create_recipe = create_recipe
+    agent_definitions.RecipeCreatorAgent.stream_recipe = stream_recipe
+    agent_definitions.NutritionalAnalysisAgent.analyse_nutrients = timed(PROFILE)
+    agent_definitions.NutritionalAnalysisAgent.analyse_ingredients = analyse_ingredients
+    agent_definitions.EvaluateNutritionalContent.evaluate = timed("YES")
+    agent_definitions.RecipeEvaluatorAgent.evaluate_recipe = timed("Looks good.")
+    return len(recipe_tokens)
+
+
+def follow_ups(enabled: bool):
+    """Run a first request and the follow-ups in one session; return per-follow-up (seconds, tokens)."""
+    recipe_rescaler.RECIPE_RESCALE = enabled
+    session = ConversationSession(f"bench-{enabled}")
+    default_nutrition_cache().clear()  # both modes start from a cold cache
+    with contextlib.redirect_stdout(io.StringIO()):
+        workflow.run_workflow("Make me a healthy chicken pasta", session)
+        results = []
+        for message in FOLLOW_UPS:
+            GENERATED["tokens"] = 0
+            start = time.perf_counter()
+            workflow.run_workflow(message, session)
+            results.append((time.perf_counter() - start, GENERATED["tokens"]))
+    return results
+
+
+def main():
+    """Run the benchmark and print a short report."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--token-ms", type=float, default=15.0, help="simulated time per output token (ms)")
+    parser.add_argument("--first-token-ms", type=float, default=300.0,
+                        help="simulated time to first token per generation (ms)")
+    parser.add_argument("--call-ms", type=float, default=300.0,
+                        help="simulated latency of the analysis and evaluation calls (ms)")
+    args = parser.parse_args()
+
+    with open(CORPUS, "r", encoding="utf-8") as f:
+        recipes = [json.loads(line)["text"] for line in f if line.strip()]
+    recipe_tokens = install_fake_agents(
+        recipes[0], args.first_token_ms / 1000, args.token_ms / 1000, args.call_ms / 1000
+    )
+    print(f"📜 Recipe: {recipe_tokens} tokens; {len(FOLLOW_UPS)} sizing follow-ups per session")
+
+    for enabled, icon, label in ((False, "🐢", "Full workflow"), (True, "⚡", "Local rescale")):
+        results = follow_ups(enabled)
+        seconds = [elapsed for elapsed, _ in results]
+        print(f"{icon} {label + ':':15} median {statistics.median(seconds) * 1000:8.1f} ms per follow-up, "
+              f"max {max(seconds) * 1000:8.1f} ms, {sum(tokens for _, tokens in results)} tokens generated")
+
+    times, rescaled = [], 0
+    for recipe in recipes:
+        servings = recipe_servings(recipe)
+        start = time.perf_counter()
+        scaled = scale_recipe(recipe, 2, servings and servings * 2)
+        scale_nutrient_profile(PROFILE, 2)
+        times.append((time.perf_counter() - start) * 1000)
+        rescaled += scaled is not None
+    print(f"🧮 Corpus: {rescaled}/{len(recipes)} recipes rescaled locally, "
+          f"median {statistics.median(times):.2f} ms, max {max(times):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
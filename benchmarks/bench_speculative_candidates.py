@@ -0,0 +1,138 @@
+"""
+Benchmark for speculative recipe candidates
+
+Compares the serial retry loop with speculative candidates on a goal that
+each recipe only meets with probability `--p-meet`. The agents are replaced by
+fakes that sleep for a fixed upstream latency (sync and async variants), so
+the numbers show latency and LLM calls spent, not model quality.
+
+Usage:
+    python benchmarks/bench_speculative_candidates.py [--p-meet P] [--candidates N] [--runs R]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# The nodes construct ChatOpenAI clients; no request is ever sent
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+# Keep per-node INFO logs out of the report
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# Every request generates its recipe; see bench_recipe_index.py for corpus retrieval
+os.environ["RECIPE_RETRIEVAL"] = "0"
+# Serial retries regenerate the recipe, as the candidates do
+os.environ["RECIPE_REVISION"] = "full"
+os.environ["PIPELINE_NUTRITION"] = "0"
+
+import workflow  # noqa: E402
+from agents import agent_definitions  # noqa: E402
+from agents.agent_definitions import IngredientNutrients  # noqa: E402
+from agents.nutrition_cache import default_nutrition_cache  # noqa: E402
+
+RECIPE = "**Recipe Name:** Lemon Chicken\n\nIngredients:\n- 200 g chicken breast\n\nInstructions:\n1. Grill."
+CALLS = {"count": 0}
+FACTS = {"calories": 120.0, "protein_g": 10.0, "carbs_g": 8.0, "fat_g": 4.0, "sugar_g": 1.0, "fiber_g": 1.0}
+
+
+def ingredient_facts(ingredients):
+    """Answer a cache-miss analysis with the same FACTS for every ingredient line."""
+    return {index: IngredientNutrients(index=index, **FACTS) for index in range(len(ingredients))}
+
+
+def install_fake_agents(p_meet: float, create_s: float, analysis_s: float, goal_s: float, rng: random.Random):
+    """Replace upstream calls with sleeps; the goal is met with probability `p_meet`."""
+    def sync_call(seconds, result):
+        def call(self, *args, **kwargs):
+            CALLS["count"] += 1
+            time.sleep(seconds)
+            return result() if callable(result) else result
+        return call
+
+    def async_call(seconds, result):
+        async def call(self, *args, **kwargs):
+            CALLS["count"] += 1
+            await asyncio.sleep(seconds)
+            return result() if callable(result) else result
+        return call
+
+    def analyse_ingredients(self, ingredients):
+        CALLS["count"] += 1
+        time.sleep(analysis_s)
+        return ingredient_facts(ingredients)
+
+    async def aanalyse_ingredients(self, ingredients):
+        CALLS["count"] += 1
+        await asyncio.sleep(analysis_s)
+        return ingredient_facts(ingredients)
+
+    def verdict():
+        return "YES" if rng.random() < p_meet else "NO"
+
+    agent_definitions.RecipeCreatorAgent.create_recipe = sync_call(create_s, RECIPE)
+    agent_definitions.RecipeCreatorAgent.acreate_recipe = async_call(create_s, RECIPE)
+    agent_definitions.NutritionalAnalysisAgent.analyse_nutrients = sync_call(analysis_s, "{}")
+    agent_definitions.NutritionalAnalysisAgent.aanalyse_nutrients = async_call(analysis_s, "{}")
+    agent_definitions.NutritionalAnalysisAgent.analyse_ingredients = analyse_ingredients
+    agent_definitions.NutritionalAnalysisAgent.aanalyse_ingredients = aanalyse_ingredients
+    agent_definitions.EvaluateNutritionalContent.evaluate = sync_call(goal_s, verdict)
+    agent_definitions.EvaluateNutritionalContent.aevaluate = async_call(goal_s, verdict)
+    agent_definitions.RecipeEvaluatorAgent.evaluate_recipe = sync_call(0.0, "Looks good.")
+
+
+def measure(graph, runs: int):
+    """Return (mean seconds, mean upstream calls) over `runs` runs of `graph`."""
+    total_s = 0.0
+    CALLS["count"] = 0
+    for _ in range(runs):
+        default_nutrition_cache().clear()  # every run analyses its recipes
+        state = {
+            "user_input": "High-protein dinner", "conversation_context": "", "recipe": "",
+            "nutrient_profile": "", "goal_compliance": "", "goal": "muscle gain", "weight": 180,
+            "evaluation": "", "restaurant_suggestions": [], "final_output": "", "step": "starting",
+        }
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            graph.invoke(state, {"recursion_limit": 200})
+        total_s += time.perf_counter() - start
+    return total_s / runs, CALLS["count"] / runs
+
+
+def main():
+    """Run the benchmark and print a short report."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--p-meet", type=float, default=0.4,
+                        help="probability that one recipe meets the goal")
+    parser.add_argument("--candidates", type=int, default=3, help="candidates in flight")
+    parser.add_argument("--max-candidates", type=int, default=6, help="candidate budget per request")
+    parser.add_argument("--create-s", type=float, default=0.15, help="simulated recipe latency (s)")
+    parser.add_argument("--analysis-s", type=float, default=0.1, help="simulated analysis latency (s)")
+    parser.add_argument("--goal-s", type=float, default=0.03, help="simulated goal check latency (s)")
+    parser.add_argument("--runs", type=int, default=20, help="runs per mode")
+    args = parser.parse_args()
+
+    os.environ["SPECULATIVE_CANDIDATES"] = str(args.candidates)
+    os.environ["SPECULATIVE_MAX_CANDIDATES"] = str(args.max_candidates)
+
+    pass_s = args.create_s + args.analysis_s + args.goal_s
+    print(f"🎯 Goal met with p={args.p_meet:.2f}; one pass ≈ {pass_s:.2f} s")
+    for name, graph in (
+        ("Serial retries", workflow.build_workflow(speculative=False)),
+        (f"Speculative x{args.candidates}", workflow.build_workflow(speculative=True)),
+    ):
+        install_fake_agents(args.p_meet, args.create_s, args.analysis_s, args.goal_s, random.Random(7))
+        mean_s, calls = measure(graph, args.runs)
+        print(f"{'🐢' if name.startswith('Serial') else '⚡'} {name}: {mean_s:.2f} s/request "
+              f"({mean_s / pass_s:.1f} passes), {calls:.1f} LLM calls started")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Benchmark for the adaptive upstream concurrency limiter
+
+A burst of requests, each making the calls of one workflow run (recipe
+generation, then nutrition analysis, the goal verdict and the review), hits a
+fake upstream that serves at most --capacity calls at once. Calls beyond
+that are answered 429 and retried with backoff, as the OpenAI client does
+(two retries, then RateLimitError). Each burst runs once with LLM_LIMITER=0
+and once with the limiter; the report shows how many requests failed, their
+latency, the time to the recipe (the user-facing, INTERACTIVE call), how
+many 429s the upstream sent and the limit the limiter ended at.
+
+At the default rates, 7/s stays under the upstream's capacity and 40/s
+offers about four times what it can serve: no limiter can then keep latency
+low, and the limiter trades failed requests for queueing. Latencies only
+count requests that completed.
+
+Usage:
+    python benchmarks/bench_upstream_limiter.py [--requests N] [--rates R,R] [--capacity C]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+# One verdict call per request; see bench_verdict_batching.py for batching
+os.environ["VERDICT_BATCHING"] = "0"
+
+import httpx  # noqa: E402
+from langchain_core.language_models.chat_models import BaseChatModel  # noqa: E402
+from langchain_core.messages import AIMessage, BaseMessage  # noqa: E402
+from langchain_core.outputs import ChatGeneration, ChatResult  # noqa: E402
+from openai import RateLimitError  # noqa: E402
+
+from agents import upstream_limiter  # noqa: E402
+from agents.agent_definitions import (  # noqa: E402
+    EvaluateNutritionalContent,
+    NutritionalAnalysisAgent,
+    RecipeCreatorAgent,
+    RecipeEvaluatorAgent,
+)
+from agents.structured_logging import configure_logging  # noqa: E402
+
+_RESPONSE_429 = httpx.Response(429, request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"))
+
+
+class FakeUpstream:
+    """Serves at most `capacity` calls at once; the others get a 429 and retry with backoff."""
+
+    def __init__(self, capacity: int, retries: int = 2, backoff_s: float = 0.5):
+        self.capacity = capacity
+        self.retries = retries
+        self.backoff_s = backoff_s
+        self.in_flight = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def call(self, seconds: float) -> None:
+        for attempt in range(self.retries + 1):
+            with self._lock:
+                accepted = self.in_flight < self.capacity
+                if accepted:
+                    self.in_flight += 1
+                else:
+                    self.rejected += 1
+            if accepted:
+                try:
+                    time.sleep(seconds)
+                finally:
+                    with self._lock:
+                        self.in_flight -= 1
+                return
+            if attempt < self.retries:
+                time.sleep(self.backoff_s * 2 ** attempt)
+        raise RateLimitError("Rate limit reached", response=_RESPONSE_429, body=None)
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model whose calls take `seconds` on a shared FakeUpstream."""
+
+    model_name: str = "gpt-3.5-turbo"
+    seconds: float
+    upstream: Any
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-upstream"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self.upstream.call(self.seconds)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="YES"))])
+
+
+def run_burst(args, rate: float, limited: bool):
+    """Run the burst; return (request latencies, recipe latencies, failed requests, 429s, final limit, seconds)."""
+    upstream_limiter.LLM_LIMITER = limited
+    upstream_limiter._limiters.clear()
+    upstream = FakeUpstream(args.capacity)
+    recipe_llm = FakeChatModel(seconds=args.recipe_ms / 1000, upstream=upstream)
+    call_llm = FakeChatModel(seconds=args.call_ms / 1000, upstream=upstream)
+    latencies: List[float] = []
+    recipe_latencies: List[float] = []
+    failed = []
+
+    def request() -> None:
+        start = time.perf_counter()
+        try:
+            recipe = RecipeCreatorAgent(recipe_llm).create_recipe("A healthy dinner")
+            recipe_latencies.append(time.perf_counter() - start)
+            profile = NutritionalAnalysisAgent(call_llm).analyse_nutrients(recipe)
+            EvaluateNutritionalContent(call_llm).evaluate("weight loss", profile, "180")
+            RecipeEvaluatorAgent(call_llm).evaluate_recipe(recipe, profile, "weight loss")
+        except RateLimitError:
+            failed.append(1)
+            return
+        latencies.append(time.perf_counter() - start)
+
+    rng = random.Random(5)
+    threads = []
+    began = time.perf_counter()
+    for _ in range(args.requests):
+        thread = threading.Thread(target=request)
+        thread.start()
+        threads.append(thread)
+        time.sleep(rng.expovariate(rate))
+    for thread in threads:
+        thread.join()
+    limit = upstream_limiter.limiter_for("gpt-3.5-turbo").limit if limited else None
+    return latencies, recipe_latencies, len(failed), upstream.rejected, limit, time.perf_counter() - began
+
+
+def report(args, rate: float, limited: bool, icon: str, label: str) -> None:
+    """Run one burst and print its line of the report."""
+    latencies, recipe_latencies, failed, rejected, limit, seconds = run_burst(args, rate, limited)
+    p95 = sorted(latencies)[int(0.95 * (len(latencies) - 1))] if latencies else float("nan")
+    limit_note = f", final limit {limit:.1f}" if limit is not None else ""
+    print(f"{icon} {label + ':':18} {failed:3} failed, {rejected:4} 429s, all done in {seconds:5.2f} s, request median "
+          f"{statistics.median(latencies) if latencies else float('nan'):5.2f} s / p95 {p95:5.2f} s, "
+          f"recipe median {statistics.median(recipe_latencies):5.2f} s{limit_note}")
+
+
+def main():
+    """Run the benchmark and print a short report."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=80, help="requests in the burst")
+    parser.add_argument("--rates", default="7,40", help="comma-separated arrivals per second")
+    parser.add_argument("--capacity", type=int, default=16, help="concurrent calls the upstream serves")
+    parser.add_argument("--recipe-ms", type=float, default=1000.0, help="simulated recipe generation time (ms)")
+    parser.add_argument("--call-ms", type=float, default=250.0, help="simulated time of the other calls (ms)")
+    args = parser.parse_args()
+    configure_logging()
+
+    for rate in (float(value) for value in args.rates.split(",")):
+        print(f"🌊 {args.requests} requests at {rate:g}/s, 4 LLM calls each, upstream capacity {args.capacity}")
+        for limited, icon, label in ((False, "🐢", "No limiter"), (True, "⚡", "Adaptive limiter")):
+            report(args, rate, limited, icon, label)
+
+
+if __name__ == "__main__":
+    main()
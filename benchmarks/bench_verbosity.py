@@ -0,0 +1,164 @@
+"""
+Benchmark for verbosity modes
+
+Runs the Recipe Creator and Recipe Evaluator agents in each verbosity mode
+(full, standard, concise) over every recipe of the bundled corpus, and lays
+the answer out with `format_final_output_node` in the same mode. The chat
+model is a fake that counts the tokens it generates; generation time is
+simulated as a first-token delay plus a per-token cost per call. It honours
+the `max_tokens` cap and stop sequences bound by the mode, and writes one of
+two kinds of answers:
+
+- compliant: what the mode's prompt asks for (the corpus recipe, without
+  its tips in the shorter modes, and a review of the requested length);
+- verbose: the long full-mode answer whatever the prompt says, so only the
+  caps and stop sequences bound it.
+
+The numbers show what output length costs, not model quality.
+
+Usage:
+    python benchmarks/bench_verbosity.py [--token-ms MS] [--first-token-ms MS]
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+from pathlib import Path
+from typing import Any, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+from langchain_core.language_models.chat_models import BaseChatModel  # noqa: E402
+from langchain_core.messages import AIMessage, BaseMessage  # noqa: E402
+from langchain_core.outputs import ChatGeneration, ChatResult  # noqa: E402
+
+from agents.agent_definitions import RecipeCreatorAgent, RecipeEvaluatorAgent  # noqa: E402
+from agents.format_output_node import format_final_output_node  # noqa: E402
+from agents.structured_logging import configure_logging  # noqa: E402
+from agents.verbosity import CONCISE, FULL, MODES, STANDARD  # noqa: E402
+
+CORPUS = ROOT / "data" / "recipes.jsonl"
+PROFILE = "\n".join([
+    '- chicken breast (450 g): {"calories": 742.5, "protein_g": 139.5, "carbs_g": 0.0, "fat_g": 16.2}',
+    'Total: {"calories": 1786.5, "protein_g": 179.7, "carbs_g": 213.0, "fat_g": 23.7, "sugar_g": 9.1}',
+])
+_TIPS_RE = re.compile(r"\n+6\. Tips or Variations:.*\Z", re.DOTALL)
+
+EVALUATIONS = {
+    FULL: """1. Overall Assessment: Good. The recipe supports the weight loss goal with lean protein, plenty of
+vegetables and a moderate amount of whole grains, and the method is sound.
+
+2. Strengths of the recipe:
+- High protein from the chicken breast keeps the dish filling for its calories.
+- Whole wheat pasta adds fiber, which helps with satiety.
+- Simple techniques and a short ingredient list make it easy to cook on a weeknight.
+
+3. Areas for improvement:
+- The parmesan and olive oil add a fair share of the fat; measure them rather than pouring freely.
+- The portion of pasta per serving is generous for a calorie deficit.
+- Cooking times for the chicken depend on thickness and are not checked with a thermometer.
+
+4. Safety considerations:
+- Cook the chicken to an internal temperature of 74 °C (165 °F) and rest it before slicing.
+- Keep raw chicken away from the vegetables and use a separate board.
+
+5. Suggested modifications:
+- Reduce the pasta to 240 g and add 150 g of zucchini or broccoli.
+- Replace half of the parmesan with lemon zest for flavour with fewer calories.
+- Use a spray of oil instead of 2 tablespoons.
+
+6. Final recommendation: A well balanced dish for weight loss; with a smaller pasta portion and a
+measured amount of cheese it fits a calorie deficit comfortably.""",
+    STANDARD: """1. Overall Assessment: Good; it supports the weight loss goal with lean protein and vegetables.
+2. Strengths: high protein, fiber from whole wheat pasta, simple method.
+3. Suggested modifications: use 240 g pasta with extra zucchini; halve the parmesan.
+4. Safety considerations: cook the chicken to 74 °C (165 °F).""",
+    CONCISE: """Verdict: Good - lean protein and vegetables suit weight loss.
+- Cook the chicken to 74 °C (165 °F).
+- Use 240 g pasta and add zucchini.
+- Halve the parmesan.""",
+}
+TOKENS: List[int] = []
+
+
+def tokens(text: str) -> List[str]:
+    """Split text into pseudo-tokens of 4 characters (about the OpenAI average)."""
+    return [text[i:i + 4] for i in range(0, len(text), 4)]
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model that writes a fixed answer, honouring caps and stop sequences, and counts its tokens."""
+
+    answer: str
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-verbosity"
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        text, finish_reason = self.answer, "stop"
+        for sequence in stop or ():
+            text = text.split(sequence, 1)[0]
+        pieces = tokens(text)
+        cap = kwargs.get("max_tokens")
+        if cap and len(pieces) > cap:
+            pieces, finish_reason = pieces[:cap], "length"
+        TOKENS.append(len(pieces))
+        message = AIMessage(content="".join(pieces), response_metadata={"finish_reason": finish_reason})
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def run_mode(recipes: List[str], mode: str, compliant: bool, first_token_s: float, token_s: float):
+    """Return (mean simulated seconds, mean generated tokens, mean answer characters) per request in `mode`."""
+    seconds, generated, characters = [], [], []
+    for recipe in recipes:
+        recipe_answer = _TIPS_RE.sub("", recipe) if compliant and mode != FULL else recipe
+        evaluation_answer = EVALUATIONS[mode if compliant else FULL]
+        TOKENS.clear()
+        created = RecipeCreatorAgent(FakeChatModel(answer=recipe_answer), mode).create_recipe("A healthy dinner")
+        evaluator = RecipeEvaluatorAgent(FakeChatModel(answer=evaluation_answer), mode)
+        evaluation = evaluator.evaluate_recipe(created, PROFILE, "weight loss")
+        output = format_final_output_node({
+            "recipe": created, "evaluation": evaluation, "nutrient_profile": PROFILE,
+            "restaurant_suggestions": [], "omitted_sections": [], "goal_compliance": "YES",
+            "verbosity": {"recipe": mode, "evaluation": mode, "output": mode},
+        })["final_output"]
+        seconds.append(len(TOKENS) * first_token_s + sum(TOKENS) * token_s)
+        generated.append(sum(TOKENS))
+        characters.append(len(output))
+    return statistics.mean(seconds), statistics.mean(generated), statistics.mean(characters)
+
+
+def main():
+    """Run the benchmark and print a short report."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--token-ms", type=float, default=15.0, help="simulated latency per output token (ms)")
+    parser.add_argument("--first-token-ms", type=float, default=300.0, help="simulated time to first token (ms)")
+    args = parser.parse_args()
+    configure_logging()
+
+    with open(CORPUS, "r", encoding="utf-8") as f:
+        recipes = [json.loads(line)["text"] for line in f if line.strip()]
+
+    for compliant, label in ((True, "compliant model"), (False, "verbose model, bound by caps and stops")):
+        print(f"📝 {label} ({len(recipes)} recipes, recipe + evaluation per request):")
+        baseline = None
+        for mode in MODES:
+            seconds, generated, characters = run_mode(
+                recipes, mode, compliant, args.first_token_ms / 1000, args.token_ms / 1000
+            )
+            baseline = baseline or seconds
+            icon = "🐢" if mode == FULL else "⚡"
+            print(f"   {icon} {mode:9} {seconds:5.2f} s per request ({baseline / seconds:4.2f}x), "
+                  f"{generated:5.0f} output tokens, {characters:5.0f} characters shown")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Benchmark for micro-batched goal verdicts
+
+Goal verdict requests arrive at a steady random rate (as they would from many
+concurrent workflow runs) and each one calls
+`EvaluateNutritionalContent.evaluate`, once with VERDICT_BATCHING off and once
+with it on. The chat model is a fake: every request takes a fixed round-trip
+time plus a small cost per item in it, and batched requests answer every item.
+The report shows upstream requests per second (what rate limits count) and
+the latency each caller sees, including the batching wait.
+
+Usage:
+    python benchmarks/bench_verdict_batching.py [--call-ms MS] [--item-ms MS] [--seconds S]
+        [--rates R,R,...] [--max-wait-ms MS] [--max-size N]
+"""
+
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+os.environ.setdefault("LOG_LEVEL", "ERROR")
+
+from langchain_core.language_models.chat_models import BaseChatModel  # noqa: E402
+from langchain_core.messages import AIMessage, BaseMessage  # noqa: E402
+from langchain_core.outputs import ChatGeneration, ChatResult  # noqa: E402
+from langchain_core.runnables import RunnableLambda  # noqa: E402
+
+from agents import agent_definitions  # noqa: E402
+from agents.agent_definitions import EvaluateNutritionalContent, GoalVerdict, GoalVerdicts  # noqa: E402
+from agents.micro_batcher import VERDICT_BATCH_MAX_SIZE, VERDICT_BATCH_MAX_WAIT_MS, MicroBatcher  # noqa: E402
+from agents.structured_logging import configure_logging  # noqa: E402
+
+PROFILE = 'Total: {"calories": 1786.5, "protein_g": 179.7, "carbs_g": 213.0, "fat_g": 23.7}'
+_ITEM_RE = re.compile(r"\bItem (\d+):")
+REQUESTS: List[int] = []
+_requests_lock = threading.Lock()
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model with a fixed round-trip time that answers single and batched verdicts."""
+
+    call_s: float
+    item_s: float
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-verdict"
+
+    def _record(self, items: int) -> None:
+        with _requests_lock:
+            REQUESTS.append(items)
+        time.sleep(self.call_s + items * self.item_s)
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self._record(1)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="YES"))])
+
+    def with_structured_output(self, schema: Any, **kwargs: Any) -> RunnableLambda:
+        def answer(prompt: Any) -> GoalVerdicts:
+            items = [int(number) for number in _ITEM_RE.findall(prompt.to_string())]
+            self._record(len(items))
+            return GoalVerdicts(verdicts=[GoalVerdict(item=item, meets_goal=True) for item in items])
+        return RunnableLambda(answer)
+
+
+def run_load(rate: float, seconds: float, batching: bool, llm: FakeChatModel):
+    """Fire verdicts at `rate` per second for `seconds`; return (latencies in s, upstream requests)."""
+    agent_definitions.VERDICT_BATCHING = batching
+    REQUESTS.clear()
+    latencies: List[float] = []
+    rng = random.Random(11)
+
+    def call() -> None:
+        start = time.perf_counter()
+        EvaluateNutritionalContent(llm).evaluate("weight loss", PROFILE, "180")
+        latencies.append(time.perf_counter() - start)
+
+    threads = []
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        thread = threading.Thread(target=call)
+        thread.start()
+        threads.append(thread)
+        time.sleep(rng.expovariate(rate))
+    for thread in threads:
+        thread.join()
+    return latencies, len(REQUESTS)
+
+
+def main():
+    """Run the benchmark and print a short report."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--call-ms", type=float, default=400.0, help="simulated round-trip per upstream request (ms)")
+    parser.add_argument("--item-ms", type=float, default=5.0, help="simulated extra time per verdict in a request (ms)")
+    parser.add_argument("--seconds", type=float, default=3.0, help="length of each load run")
+    parser.add_argument("--rates", default="5,50,200", help="comma-separated verdicts per second")
+    parser.add_argument("--max-wait-ms", type=float, default=VERDICT_BATCH_MAX_WAIT_MS, help="batching window (ms)")
+    parser.add_argument("--max-size", type=int, default=VERDICT_BATCH_MAX_SIZE, help="verdicts per batch")
+    args = parser.parse_args()
+    configure_logging()
+
+    agent_definitions.VERDICT_BATCHER = MicroBatcher("goal_verdict", args.max_size, args.max_wait_ms / 1000)
+    llm = FakeChatModel(call_s=args.call_ms / 1000, item_s=args.item_ms / 1000)
+    print(f"📦 Batches of up to {args.max_size} verdicts, waiting up to {args.max_wait_ms:g} ms")
+    for rate in (float(value) for value in args.rates.split(",")):
+        for batching, icon, label in ((False, "🐢", "one per verdict"), (True, "⚡", "micro-batched")):
+            latencies, requests = run_load(rate, args.seconds, batching, llm)
+            latencies.sort()
+            p95 = latencies[int(0.95 * (len(latencies) - 1))]
+            print(f"{icon} {rate:4.0f}/s {label:16} {len(latencies):4} verdicts in {requests:4} upstream requests "
+                  f"({requests / args.seconds:5.1f} req/s), latency median {statistics.median(latencies) * 1000:4.0f} ms, "
+                  f"p95 {p95 * 1000:4.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Memory benchmark for one run of the LangGraph workflow
+
+Runs the full graph with the agents' LLM calls replaced by canned responses of
+realistic size, and uses tracemalloc to report the peak traced memory and the
+memory still held after the runs. `--copy-state` wraps the nodes so they return
+`{**state, **update}` (the old behaviour) for a before/after comparison.
+
+Usage:
+    python benchmarks/bench_workflow_memory.py [--runs N] [--copy-state]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+# The nodes construct ChatOpenAI / googlemaps clients; no request is ever sent
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+# Keep per-node INFO logs out of the report
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# Every request generates its recipe; see bench_recipe_index.py for corpus retrieval
+os.environ["RECIPE_RETRIEVAL"] = "0"
+# The canned agents and NODES below describe the sequential graph
+os.environ["PIPELINE_NUTRITION"] = "0"
+os.environ.setdefault("GOOGLE_MAPS_API_KEY", "AIza-benchmark")
+
+import workflow  # noqa: E402
+from agents import agent_definitions  # noqa: E402
+from agents.agent_definitions import IngredientNutrients  # noqa: E402
+
+CORPUS = ROOT / "data" / "recipes.jsonl"
+NODES = [
+    "create_recipe_node",
+    "analyse_nutrition_node",
+    "evaluate_goal_node",
+    "format_final_output_node",
+]
+# evaluate_recipe_node and nearby_restaurants_node run in parallel, and
+# LangGraph rejects two full-state copies in the same step, so --copy-state
+# leaves them alone (slightly understating the old cost)
+
+
+def install_canned_agents() -> None:
+    """Replace every LLM / Places call with a canned response."""
+    with open(CORPUS, "r", encoding="utf-8") as f:
+        recipe = json.loads(f.readline())["text"]
+    nutrients = "\n".join(
+        f'"ingredient {i}": {{"protein": 4.2, "fat": 1.3, "carbs": 17.0, "sugar": 0.4}}'
+        for i in range(40)
+    )
+    evaluation = "The method is sound and the seasoning is balanced. " * 40
+    restaurants = [
+        {"name": f"Restaurant {i}", "address": f"{i} King St W, Toronto",
+         "rating": 4.5, "price_level": 2, "user_ratings_total": 120}
+        for i in range(5)
+    ]
+
+    agent_definitions.RecipeCreatorAgent.create_recipe = lambda self, *a, **k: recipe
+    agent_definitions.NutritionalAnalysisAgent.analyse_nutrients = lambda self, *a: nutrients
+    agent_definitions.NutritionalAnalysisAgent.analyse_ingredients = lambda self, ingredients: {
+        index: IngredientNutrients(index=index, calories=120.0, protein_g=10.0, carbs_g=8.0,
+                                   fat_g=4.0, sugar_g=1.0, fiber_g=1.0)
+        for index in range(len(ingredients))
+    }
+    agent_definitions.EvaluateNutritionalContent.evaluate = lambda self, *a: "YES"
+    agent_definitions.RecipeEvaluatorAgent.evaluate_recipe = lambda self, *a: evaluation
+    agent_definitions.NearbyRestaurantsAgent.recommend_restaurants = (
+        lambda self, *a, **k: list(restaurants)
+    )
+
+
+def copy_state(node):
+    """Wrap `node` so it returns a full copy of the state, as nodes used to."""
+    def wrapper(state):
+        return {**state, **node(state)}
+    return wrapper
+
+
+def run_once() -> None:
+    """Run the workflow once with its progress prints silenced."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        workflow.run_workflow("Make me a healthy Italian pasta dinner")
+
+
+def main():
+    """Run the benchmark and print a short report."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=50,
+                        help="measured workflow runs")
+    parser.add_argument("--copy-state", action="store_true",
+                        help="make every node copy the full state (old behaviour)")
+    args = parser.parse_args()
+
+    install_canned_agents()
+    if args.copy_state:
+        for name in NODES:
+            setattr(workflow, name, copy_state(getattr(workflow, name)))
+        workflow.compiled_workflow.cache_clear()
+
+    # Warm up: compile the graph and fill import-time / lazy caches
+    for _ in range(3):
+        run_once()
+
+    tracemalloc.start()
+    peaks = []
+    start_current, _ = tracemalloc.get_traced_memory()
+    elapsed = 0.0
+    for _ in range(args.runs):
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        start = time.perf_counter()
+        run_once()
+        elapsed += time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+    end_current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    peaks.sort()
+    mode = "copy-state" if args.copy_state else "delta updates"
+    print(f"🧪 Mode: {mode}, {args.runs} runs")
+    print(f"📈 Peak traced memory per run: median {peaks[len(peaks) // 2] / 1024:,.1f} KiB, "
+          f"max {peaks[-1] / 1024:,.1f} KiB")
+    print(f"📦 Retained after all runs: {(end_current - start_current) / 1024:,.1f} KiB")
+    print(f"⏱️  {elapsed / args.runs * 1e3:.2f} ms per run (under tracemalloc)")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,17 +5,33 @@ This module provides a web-based chat interface to interact with the
 Recipe Creation and Evaluation workflow.
 """
 
-from workflow import run_workflow
-from fastapi import FastAPI, Request
+from workflow import run_meal_plan, run_workflow
+from agents.session_memory import build_session_store
+from agents.deadlines import check_request_timeout
+from agents.metrics import IN_FLIGHT, METRICS_CONTENT_TYPE, render_metrics
+from agents.profiling import list_profiles, profile_path, token_allows
+from agents.intent_router import default_intent_model
+from agents.meal_plan_nodes import parse_plan_request
+from agents.recipe_index import default_recipe_index
+from agents.structured_logging import bind_request
+from agents.verbosity import parse_verbosity
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, JSONResponse
-from pydantic import BaseModel
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, PlainTextResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional
+import logging
+import threading
+import uuid
 import uvicorn
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI(title="Recipe Creation Chatbot",
               description="A simple chatbot for creating and evaluating recipes")
 
@@ -27,14 +43,46 @@ templates = Jinja2Templates(directory=os.path.join(
 try:
     workflow_ready = True
 except Exception as e:
-    print(f"Warning: Could not initialize workflow: {e}")
-    print("Make sure you have set up your .env file with OPENAI_API_KEY")
+    logger.warning("Could not initialize workflow; make sure .env sets OPENAI_API_KEY",
+                   extra={"error": str(e)})
     workflow_ready = False
 
+# Per-session goal, weight and conversation memory (bounded LRU with idle expiry)
+sessions = build_session_store()
+
+# Index the recipe corpus off the request path; early requests wait for it
+threading.Thread(target=default_recipe_index, name="recipe-index", daemon=True).start()
+# Likewise for the intent router's model (trained in well under a second)
+threading.Thread(target=default_intent_model, name="intent-model", daemon=True).start()
+
 
 class ChatMessage(BaseModel):
     """Request model for chat messages."""
     message: str
+    session_id: Optional[str] = None
+    goal: Optional[str] = Field(None, min_length=1, max_length=100)
+    weight: Optional[int] = Field(None, gt=0, lt=1000)
+
+
+class MealPlanRequest(BaseModel):
+    """Request model for multi-day meal plans."""
+    message: str
+    days: Optional[int] = None
+    meals: Optional[List[str]] = None
+    session_id: Optional[str] = None
+    goal: Optional[str] = Field(None, min_length=1, max_length=100)
+    weight: Optional[int] = Field(None, gt=0, lt=1000)
+
+
+def _set_profile(session, goal: Optional[str], weight: Optional[int]) -> None:
+    """Store the goal and weight sent with a request, under the session lock (a run may hold it)."""
+    if not goal and not weight:
+        return
+    with session.lock:
+        if goal:
+            session.goal = goal
+        if weight:
+            session.weight = weight
 
 
 @app.get("/", response_class=HTMLResponse)
@@ -44,15 +92,28 @@ async def home(request: Request):
 
 
 @app.post("/chat")
-async def chat(chat_message: ChatMessage):
+async def chat(
+    chat_message: ChatMessage,
+    x_profile_token: Optional[str] = Header(None),
+    x_request_timeout: Optional[float] = Header(None),
+    x_verbosity: Optional[str] = Header(None),
+):
     """
     Process a chat message and return the recipe workflow response.
 
     Args:
-        chat_message: User's message
+        chat_message: User's message, with the session id from a previous reply
+        x_profile_token: PROFILE_TOKEN to capture a profile of this request
+        x_request_timeout: Latency budget in seconds, positive and finite
+            (400 otherwise); optional sections are dropped to meet it
+            (REQUEST_DEADLINE_S when absent)
+        x_verbosity: Answer length, "full", "standard" or "concise" (for
+            mobile clients), or per part as "recipe=standard,evaluation=concise"
+            (VERBOSITY when absent)
 
     Returns:
-        JSON response with the workflow result
+        JSON response with the workflow result, the session id and the
+        request id (which every log record of this request carries)
     """
     if not workflow_ready:
         return JSONResponse({
@@ -61,21 +122,123 @@ async def chat(chat_message: ChatMessage):
         })
     else:
         try:
-            # Run the workflow with the user's message
-            result = run_workflow(chat_message.message)
+            verbosity = parse_verbosity(x_verbosity)
+            timeout = check_request_timeout(x_request_timeout)
+        except ValueError as err:
+            raise HTTPException(status_code=400, detail=str(err))
+
+        session = sessions.get_or_create(chat_message.session_id)
+        await run_in_threadpool(_set_profile, session, chat_message.goal, chat_message.weight)
+
+        request_id = uuid.uuid4().hex
+        # The request id follows the workflow into the threadpool through the context
+        with bind_request(request_id):
+            try:
+                # Run the blocking workflow off the event loop so other chats keep flowing
+                with IN_FLIGHT.labels(kind="chat_request").track_inprogress():
+                    result = await run_in_threadpool(
+                        run_workflow, chat_message.message, session,
+                        token_allows(x_profile_token), timeout, verbosity,
+                    )
+
+                return JSONResponse({
+                    "response": result,
+                    "session_id": session.session_id,
+                    "request_id": request_id,
+                    "error": False
+                })
+
+            except Exception as e:
+                logger.exception("Chat request failed", extra={"session_id": session.session_id})
+                return JSONResponse({
+                    "response": f"Sorry, I encountered an error: {str(e)}",
+                    "session_id": session.session_id,
+                    "request_id": request_id,
+                    "error": True
+                })
+
+
+@app.post("/meal-plan")
+async def meal_plan(plan_request: MealPlanRequest, x_verbosity: Optional[str] = Header(None)):
+    """
+    Plan several days of meals in one request, generated concurrently.
+
+    Args:
+        plan_request: What to plan ("high-protein, no pork"), for how many
+            days (7) and which meals of each day (dinner); the session's
+            goal and weight apply unless given here
+        x_verbosity: Answer length, as for /chat; "concise" lists each meal
+            by name and nutrition instead of its full recipe
+
+    Returns:
+        JSON response with the formatted plan, the session id and the request id
+    """
+    if not workflow_ready:
+        return JSONResponse({
+            "response": "Sorry, the recipe system is not properly configured. Please check your environment variables.",
+            "error": True
+        })
+    try:
+        days, meals = parse_plan_request(plan_request.days, plan_request.meals)
+        verbosity = parse_verbosity(x_verbosity)
+    except ValueError as err:
+        raise HTTPException(status_code=400, detail=str(err))
 
+    session = sessions.get_or_create(plan_request.session_id)
+    await run_in_threadpool(_set_profile, session, plan_request.goal, plan_request.weight)
+
+    request_id = uuid.uuid4().hex
+    with bind_request(request_id):
+        try:
+            with IN_FLIGHT.labels(kind="meal_plan_request").track_inprogress():
+                result = await run_in_threadpool(
+                    run_meal_plan, plan_request.message, days, meals, session, verbosity,
+                )
             return JSONResponse({
                 "response": result,
+                "session_id": session.session_id,
+                "request_id": request_id,
                 "error": False
             })
-
         except Exception as e:
+            logger.exception("Meal plan request failed", extra={"session_id": session.session_id})
             return JSONResponse({
                 "response": f"Sorry, I encountered an error: {str(e)}",
+                "session_id": session.session_id,
+                "request_id": request_id,
                 "error": True
             })
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint: node/upstream latencies, in-flight gauges, cache and error counters."""
+    return PlainTextResponse(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+def _require_profile_access(token: Optional[str]) -> None:
+    """Reject profile access without the PROFILE_TOKEN (always rejected when no token is configured)."""
+    if not token_allows(token):
+        raise HTTPException(status_code=403, detail="Profiling access denied")
+
+
+@app.get("/debug/profiles")
+async def debug_profiles(x_profile_token: Optional[str] = Header(None)):
+    """List recent per-request profile captures, newest first."""
+    _require_profile_access(x_profile_token)
+    return {"profiles": list_profiles()}
+
+
+@app.get("/debug/profiles/{file_name}")
+async def debug_profile_file(file_name: str, x_profile_token: Optional[str] = Header(None)):
+    """Download one capture file (.folded, .prof or .json)."""
+    _require_profile_access(x_profile_token)
+    path = profile_path(file_name)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path)
+
+
 @app.get("/health")
 async def health():
     """Health check endpoint."""
@@ -5,8 +5,10 @@ This module implements the LangGraph workflow that coordinates between
 the Recipe Creator and Recipe Evaluator agents using modular node functions.
 """
 
+import logging
 import os
-from typing import Dict, Any
+from functools import lru_cache, partial
+from typing import Dict, Any, List, Mapping, Optional, Sequence, Union
 from langgraph.graph import StateGraph, END
 from dotenv import load_dotenv
 
@@ -17,85 +19,376 @@ from agents import (
     format_final_output_node,
     evaluate_goal_node,
     analyse_nutrition_node,
-    nearby_restaurants_node
+    nearby_restaurants_node,
+    create_recipe_pipelined_node,
+    create_recipe_speculative_node
 
 )
+from agents.session_memory import (
+    DEFAULT_GOAL,
+    DEFAULT_WEIGHT,
+    ConversationSession,
+    build_summarizer,
+    extract_profile_updates,
+    update_session,
+)
+from agents.deadlines import deadline_after, record_goal_cutoff, retry_goal
+from agents.meal_plan_nodes import (
+    MEAL_PLAN_CONCURRENCY,
+    check_plan_node,
+    dispatch_meals,
+    format_meal_plan_node,
+    parse_plan_request,
+    plan_meal_node,
+)
+from agents.intent_reply_nodes import answer_nutrition_node, canned_reply_node, restaurant_reply_node
+from agents.intent_router import GENERATE, INTENT_ROUTER, NUTRITION, RESTAURANTS, SMALLTALK, route_intent_node
+from agents.metrics import IN_FLIGHT
+from agents.node_fusion import enabled_fusions, fuse_chain
+from agents.recipe_rescaler import rescale_previous
+from agents.speculative_recipe_node import speculative_settings
+from agents.tracing import instrument_node, span
+from agents.verbosity import parse_verbosity
+from agents.workflow_state import MealPlanState
+from agents.profiling import profile_run, should_profile
+from agents.structured_logging import configure_logging
 
 # Load environment variables
 load_dotenv()
+configure_logging()
+
+logger = logging.getLogger(__name__)
 
+# Keeps the conversation context injected into prompts under a fixed token budget
+summarizer = build_summarizer()
+
+
+def build_workflow(
+    pipelined: Optional[bool] = None,
+    speculative: Optional[bool] = None,
+    fusions: Optional[Sequence[str]] = None,
+    routed: Optional[bool] = None,
+) -> StateGraph:  # type: ignore[valid-type]
+    """
+    Compile the LangGraph recipe workflow graph.
 
-def build_workflow() -> StateGraph:  # type: ignore[valid-type]
-    """Compile the LangGraph recipe workflow graph."""
+    Args:
+        pipelined: Stream the recipe and overlap nutrition analysis and goal
+            evaluation with it (one node instead of three). Defaults to the
+            PIPELINE_NUTRITION environment variable, which is off unless "1".
+        speculative: Race several recipe candidates instead of retrying
+            serially when the goal is missed; takes precedence over
+            `pipelined`. Defaults to SPECULATIVE_CANDIDATES being above 1.
+        fusions: Names from `agents.node_fusion.FUSIONS` to apply, e.g.
+            ["nutrition_verdict"]. Defaults to the FUSED_NODES variable.
+        routed: Start with the local intent router, which sends small talk,
+            nutrition questions and restaurant lookups to short sub-graphs
+            instead of generation. Defaults to INTENT_ROUTER (on unless "0").
+    """
+    if pipelined is None:
+        pipelined = os.getenv("PIPELINE_NUTRITION", "0") == "1"
+    if speculative is None:
+        speculative = speculative_settings()[0] > 1
+    if routed is None:
+        routed = INTENT_ROUTER
+    fusions = enabled_fusions(fusions)
+    # The single-node modes run analysis and goal check internally
+    fuse_verdict = "nutrition_verdict" in fusions
 
     graph = StateGraph(WorkflowState)
 
-    # Add each node
-    graph.add_node("create_recipe", create_recipe_node)
-    graph.add_node("analyse_nutrition", analyse_nutrition_node)
-    graph.add_node("evaluate_goal", evaluate_goal_node)
-    graph.add_node("evaluate_recipe", evaluate_recipe_node)
-    graph.add_node("nearby_restaurants", nearby_restaurants_node)
-    graph.add_node("format_final_output", format_final_output_node)
+    # Add each node, instrumented with a trace span and latency/error metrics
+    if speculative:
+        graph.add_node("create_recipe_speculative",
+                       instrument_node("create_recipe_speculative")(
+                           partial(create_recipe_speculative_node, fused=fuse_verdict)))
+        first, goal_checked = "create_recipe_speculative", None
+    elif pipelined:
+        graph.add_node("create_recipe_pipelined",
+                       instrument_node("create_recipe_pipelined")(
+                           record_goal_cutoff(partial(create_recipe_pipelined_node, fused=fuse_verdict))))
+        first, goal_checked = "create_recipe_pipelined", "create_recipe_pipelined"
+    else:
+        # Linear chain, with adjacent LLM nodes fused where configured
+        chain, fused_nodes = fuse_chain(
+            ["create_recipe", "analyse_nutrition", "evaluate_goal"], fusions
+        )
+        nodes = {
+            "create_recipe": create_recipe_node,
+            "analyse_nutrition": analyse_nutrition_node,
+            "evaluate_goal": evaluate_goal_node,
+            **fused_nodes,
+        }
+        # The last node gives the verdict, and records a retry cut for time
+        nodes[chain[-1]] = record_goal_cutoff(nodes[chain[-1]])
+        for name in chain:
+            graph.add_node(name, instrument_node(name)(nodes[name]))
+        for source, target in zip(chain, chain[1:]):
+            graph.add_edge(source, target)
+        first, goal_checked = chain[0], chain[-1]
+    graph.add_node("evaluate_recipe", instrument_node("evaluate_recipe")(evaluate_recipe_node))
+    graph.add_node("nearby_restaurants", instrument_node("nearby_restaurants")(nearby_restaurants_node))
+    graph.add_node("format_final_output", instrument_node("format_final_output")(format_final_output_node))
 
 
     # Wire edges
-    graph.set_entry_point("create_recipe")
-    graph.add_edge("create_recipe", "analyse_nutrition")
-    graph.add_edge("analyse_nutrition", "evaluate_goal")
- 
-    graph.add_conditional_edges(
-    "evaluate_goal",                     # source node
-    lambda s:                            
-        "create_recipe" if s["goal_compliance"] == "NO" else "evaluate_recipe",
-    [
-        "create_recipe",                 # allowed branch if goal not met
-        "evaluate_recipe",               # normal forward branch
-    ],
-)
+    if routed:
+        # Messages that need no new recipe go to a single reply node
+        replies = {
+            NUTRITION: ("answer_nutrition", answer_nutrition_node),
+            RESTAURANTS: ("restaurant_reply", restaurant_reply_node),
+            SMALLTALK: ("canned_reply", canned_reply_node),
+        }
+        graph.add_node("route_intent", instrument_node("route_intent")(route_intent_node))
+        for name, node in replies.values():
+            graph.add_node(name, instrument_node(name)(node))
+            graph.add_edge(name, END)
+        graph.set_entry_point("route_intent")
+        graph.add_conditional_edges(
+            "route_intent",
+            lambda s: replies[s["intent"]][0] if s["intent"] in replies else first,
+            [first, *(name for name, _ in replies.values())],
+        )
+    else:
+        graph.set_entry_point(first)
 
+    if goal_checked is None:
+        # Speculative candidates already handled the goal: never loop back
+        graph.add_edge(first, "evaluate_recipe")
+        graph.add_edge(first, "nearby_restaurants")
+    else:
+        graph.add_conditional_edges(
+        goal_checked,                    # source node
+        lambda s:
+            first if retry_goal(s) else ["evaluate_recipe", "nearby_restaurants"],
+        [
+            first,                       # allowed branch if goal not met
+            "evaluate_recipe",           # normal forward branch
+            "nearby_restaurants",        # runs in parallel with evaluate_recipe
+        ],
+    )
+
+    # Both branches finish in the same step, so the output is formatted once
     graph.add_edge("evaluate_recipe", "format_final_output")
+    graph.add_edge("nearby_restaurants", "format_final_output")
     graph.add_edge("format_final_output", END)
 
     return graph.compile()
 
 
-def run_workflow(user_input: str) -> str:
+@lru_cache(maxsize=1)
+def compiled_workflow():
+    """Return the compiled workflow graph, built once and shared by all runs."""
+    return build_workflow()
+
+
+def run_workflow(
+    user_input: str,
+    session: Optional[ConversationSession] = None,
+    profile: bool = False,
+    deadline_s: Optional[float] = None,
+    verbosity: Union[str, Mapping[str, str], None] = None,
+) -> str:
     """
     Run the complete workflow for a user request.
 
     This function initializes the workflow state and executes the entire
-    recipe creation and evaluation process.
+    recipe creation and evaluation process. When a chat session is given, its
+    goal, weight and bounded conversation context personalise the run, and the
+    session is updated with the result afterwards.
 
     Args:
         user_input: User's recipe request
+        session: Server-side chat session, if the request belongs to one
+        profile: Profile this run (runs may also be sampled, see agents.profiling)
+        deadline_s: Latency budget in seconds; optional sections are dropped to
+            meet it (defaults to REQUEST_DEADLINE_S, see agents.deadlines)
+        verbosity: Verbosity mode for every part of the answer ("concise") or
+            per part (see agents.verbosity); VERBOSITY by default
 
     Returns:
         str: Final formatted response with recipe and evaluation
     """
-    print("🚀 Starting Recipe Creation & Evaluation Workflow")
-    print(f"User Request: {user_input}\n")
+    logger.info("Starting workflow", extra={
+        "user_input": user_input,
+        "session_id": session.session_id if session else None,
+    })
+
+    # The budget starts now, before waiting for the session lock
+    deadline = deadline_after(deadline_s)
+    modes = parse_verbosity(verbosity)
+
+    if session is None:
+        return _invoke_workflow(
+            user_input, DEFAULT_GOAL, DEFAULT_WEIGHT, "", deadline, modes, profile
+        )["final_output"]
+
+    with session.lock:
+        # Sizing follow-ups ("make that for 8 people") rescale the previous recipe locally,
+        # laid out in this request's verbosity
+        previous = session.last_result and {**session.last_result, "verbosity": modes}
+        with span("workflow.rescale"):
+            rescaled = rescale_previous(previous, user_input)
+        if rescaled is not None:
+            update_session(session, summarizer, user_input, rescaled)
+            return rescaled["final_output"]
+
+        for key, value in extract_profile_updates(user_input).items():
+            setattr(session, key, value)
+
+        result = _invoke_workflow(
+            user_input, session.goal, session.weight, summarizer.build_context(session), deadline, modes,
+            profile, previous=session.last_result,
+        )
+        update_session(session, summarizer, user_input, result)
 
-    # Build the workflow
-    workflow = build_workflow()
+    return result["final_output"]
+
+
+def _invoke_workflow(
+    user_input: str, goal: str, weight: int, context: str, deadline: float, verbosity: Dict[str, str],
+    profile: bool = False, previous: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Run the shared graph from a fresh state (with the previous turn's recipe) and return the final state."""
+    previous = previous or {}
+    # The compiled graph holds no per-run data, so it is reused across runs
+    workflow = compiled_workflow()
 
     # Initialize state
     initial_state = WorkflowState(
         user_input=user_input,
+        conversation_context=context,
         recipe="",
-        nutrition_profile= "",
-        goal_compliance= "",
-        goal ="weight loss",
-        weight= 200,
-        evaluation = "",
-        final_output= "",
+        nutrient_profile="",
+        goal_compliance="",
+        goal=goal,
+        weight=weight,
+        evaluation="",
+        restaurant_suggestions=[],
+        final_output="",
+        deadline=deadline,
+        omitted_sections=[],
+        intent=GENERATE,
+        last_recipe=str(previous.get("recipe") or ""),
+        last_nutrient_profile=str(previous.get("nutrient_profile") or ""),
+        verbosity=verbosity,
+        step="starting"
+    )
+
+    # Run the workflow as one trace; node and upstream spans nest under it
+    with span("workflow.run") as root, IN_FLIGHT.labels(kind="workflow").track_inprogress():
+        if should_profile(profile):
+            with profile_run(root.trace_id, "requested" if profile else "sampled"):
+                result = workflow.invoke(initial_state)
+        else:
+            result = workflow.invoke(initial_state)
+
+    logger.info("Workflow completed", extra={
+        "duration_ms": round(root.duration * 1000, 1),
+        "intent": result["intent"],
+        "goal_compliance": result["goal_compliance"],
+        "omitted_sections": result["omitted_sections"],
+    })
+    return result
+
+
+def build_meal_plan_workflow() -> StateGraph:  # type: ignore[valid-type]
+    """
+    Compile the meal-plan graph.
+
+    The entry routes every slot of the plan (day x meal) to its own
+    `plan_meal` task with `Send`; the tasks run concurrently, then
+    `check_plan` judges each day against the goal and routes the days that
+    missed it back to `plan_meal`, or the finished plan to formatting.
+    """
+    graph = StateGraph(MealPlanState)
+    graph.add_node("plan_meal", instrument_node("plan_meal")(plan_meal_node))
+    graph.add_node("check_plan", instrument_node("check_plan")(check_plan_node))
+    graph.add_node("format_meal_plan", instrument_node("format_meal_plan")(format_meal_plan_node))
+
+    graph.set_conditional_entry_point(dispatch_meals, ["plan_meal", "format_meal_plan"])
+    # Runs once all meals sent in a step are done
+    graph.add_edge("plan_meal", "check_plan")
+    graph.add_conditional_edges("check_plan", dispatch_meals, ["plan_meal", "format_meal_plan"])
+    graph.add_edge("format_meal_plan", END)
+
+    return graph.compile()
+
+
+@lru_cache(maxsize=1)
+def compiled_meal_plan_workflow():
+    """Return the compiled meal-plan graph, built once and shared by all runs."""
+    return build_meal_plan_workflow()
+
+
+def run_meal_plan(
+    user_input: str,
+    days: Optional[int] = None,
+    meals: Optional[List[str]] = None,
+    session: Optional[ConversationSession] = None,
+    verbosity: Union[str, Mapping[str, str], None] = None,
+    concurrency: Optional[int] = None,
+) -> str:
+    """
+    Plan several days of meals in one run.
+
+    Every meal is generated concurrently (at most `concurrency` at once),
+    then each day's nutrition is checked against the goal and only the days
+    that miss it are generated again.
+
+    Args:
+        user_input: User's meal-plan request ("high-protein dinners, no pork")
+        days: Number of days, 7 by default
+        meals: Meals of each day, e.g. ["breakfast", "lunch", "dinner"];
+            one dinner a day by default
+        session: Chat session whose goal, weight and context personalise the plan
+        verbosity: Verbosity mode, as for `run_workflow`
+        concurrency: Meals generated at once; MEAL_PLAN_CONCURRENCY by default
+
+    Returns:
+        str: Formatted plan with every day's meals and the plan's nutrition
+
+    Raises:
+        ValueError: Invalid plan size or verbosity
+    """
+    days, meal_names = parse_plan_request(days, meals)
+    modes = parse_verbosity(verbosity)
+    goal, weight, context = DEFAULT_GOAL, DEFAULT_WEIGHT, ""
+    if session is not None:
+        with session.lock:
+            for key, value in extract_profile_updates(user_input).items():
+                setattr(session, key, value)
+            goal, weight, context = session.goal, session.weight, summarizer.build_context(session)
+
+    logger.info("Starting meal plan", extra={
+        "days": days, "meals": meal_names, "session_id": session.session_id if session else None,
+    })
+    initial_state = MealPlanState(
+        user_input=user_input,
+        conversation_context=context,
+        goal=goal,
+        weight=weight,
+        days=days,
+        meal_names=meal_names,
+        meals=[],
+        day_verdicts={},
+        pending_days=list(range(1, days + 1)),
+        rounds=0,
+        verbosity=modes,
+        final_output="",
         step="starting"
     )
 
-    # Run the workflow
-    result = workflow.invoke(initial_state)
+    with span("meal_plan.run") as root, IN_FLIGHT.labels(kind="meal_plan").track_inprogress():
+        result = compiled_meal_plan_workflow().invoke(
+            initial_state, {"max_concurrency": max(1, concurrency or MEAL_PLAN_CONCURRENCY)}
+        )
 
-    print("✅ Workflow completed!\n")
+    logger.info("Meal plan completed", extra={
+        "duration_ms": round(root.duration * 1000, 1),
+        "rounds": result["rounds"],
+        "missed_days": [day for day, verdict in result["day_verdicts"].items() if verdict != "YES"],
+    })
     return result["final_output"]
 
 